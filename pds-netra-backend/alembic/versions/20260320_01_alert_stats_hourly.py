@@ -0,0 +1,66 @@
+"""add alert_stats_hourly rollup table
+
+Revision ID: 20260320_01
+Revises: 20260305_02
+Create Date: 2026-03-20
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260320_01"
+down_revision = "20260305_02"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if not _table_exists("alert_stats_hourly"):
+        op.create_table(
+            "alert_stats_hourly",
+            sa.Column("godown_id", sa.String(64), nullable=False),
+            sa.Column("alert_type", sa.String(64), nullable=False),
+            sa.Column("severity", sa.String(16), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("alerts_total", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("alerts_open", sa.Integer(), nullable=False, server_default="0"),
+            sa.PrimaryKeyConstraint("godown_id", "alert_type", "severity", "bucket_start"),
+        )
+        op.create_index(
+            op.f("ix_alert_stats_hourly_bucket_start"), "alert_stats_hourly", ["bucket_start"], unique=False
+        )
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # Backfill from existing alerts; the worker's reconciliation job keeps
+        # it in sync afterwards.
+        op.execute("DELETE FROM alert_stats_hourly")
+        op.execute(
+            """
+            INSERT INTO alert_stats_hourly
+                (godown_id, alert_type, severity, bucket_start, alerts_total, alerts_open)
+            SELECT
+                godown_id,
+                alert_type,
+                COALESCE(severity_final, ''),
+                date_trunc('hour', start_time AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                COUNT(*),
+                SUM(CASE WHEN status = 'OPEN' THEN 1 ELSE 0 END)
+            FROM alerts
+            WHERE godown_id IS NOT NULL AND alert_type IS NOT NULL AND start_time IS NOT NULL
+            GROUP BY 1, 2, 3, 4
+            """
+        )
+
+
+def downgrade() -> None:
+    if _table_exists("alert_stats_hourly"):
+        op.drop_index(op.f("ix_alert_stats_hourly_bucket_start"), table_name="alert_stats_hourly")
+        op.drop_table("alert_stats_hourly")
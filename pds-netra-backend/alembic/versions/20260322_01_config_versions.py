@@ -0,0 +1,39 @@
+"""add config_versions table
+
+Revision ID: 20260322_01
+Revises: 20260320_01
+Create Date: 2026-03-22
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260322_01"
+down_revision = "20260320_01"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if not _table_exists("config_versions"):
+        op.create_table(
+            "config_versions",
+            sa.Column("godown_id", sa.String(64), nullable=False),
+            sa.Column("kind", sa.String(32), nullable=False),
+            sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+            sa.PrimaryKeyConstraint("godown_id", "kind"),
+        )
+
+
+def downgrade() -> None:
+    if _table_exists("config_versions"):
+        op.drop_table("config_versions")
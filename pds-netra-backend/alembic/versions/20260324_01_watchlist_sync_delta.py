@@ -0,0 +1,59 @@
+"""add watchlist sync_version and tombstones for delta sync
+
+Revision ID: 20260324_01
+Revises: 20260322_01
+Create Date: 2026-03-24
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260324_01"
+down_revision = "20260322_01"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return column_name in {col["name"] for col in inspector.get_columns(table_name)}
+
+
+def upgrade() -> None:
+    if not _column_exists("watchlist_persons", "sync_version"):
+        op.add_column(
+            "watchlist_persons",
+            sa.Column("sync_version", sa.BigInteger(), nullable=False, server_default="0"),
+        )
+        op.create_index(
+            op.f("ix_watchlist_persons_sync_version"), "watchlist_persons", ["sync_version"], unique=False
+        )
+    if not _table_exists("watchlist_tombstones"):
+        op.create_table(
+            "watchlist_tombstones",
+            sa.Column("person_id", sa.String(36), nullable=False),
+            sa.Column("sync_version", sa.BigInteger(), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("person_id"),
+        )
+        op.create_index(
+            op.f("ix_watchlist_tombstones_sync_version"), "watchlist_tombstones", ["sync_version"], unique=False
+        )
+
+
+def downgrade() -> None:
+    if _table_exists("watchlist_tombstones"):
+        op.drop_index(op.f("ix_watchlist_tombstones_sync_version"), table_name="watchlist_tombstones")
+        op.drop_table("watchlist_tombstones")
+    if _column_exists("watchlist_persons", "sync_version"):
+        op.drop_index(op.f("ix_watchlist_persons_sync_version"), table_name="watchlist_persons")
+        op.drop_column("watchlist_persons", "sync_version")
@@ -0,0 +1,100 @@
+"""store face embeddings as packed binary
+
+Revision ID: 20260326_01
+Revises: 20260324_01
+Create Date: 2026-03-26
+"""
+
+from __future__ import annotations
+
+import struct
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260326_01"
+down_revision = "20260324_01"
+branch_labels = None
+depends_on = None
+
+# (table, primary key column, embedding required)
+_TABLES = (
+    ("watchlist_person_embeddings", "id", True),
+    ("authorized_users", "person_id", False),
+)
+_BATCH = 500
+
+# Frozen copy of the format-1 blob layout from app.models.types:
+# b"PE" | version | dtype code (b"f" float32, b"e" float16) | dim (uint32 LE) | little-endian values
+_HEADER = struct.Struct("<2sBcI")
+
+
+def _pack_float32(values: list[float]) -> bytes:
+    return _HEADER.pack(b"PE", 1, b"f", len(values)) + struct.pack(f"<{len(values)}f", *values)
+
+
+def _unpack(blob: bytes) -> list[float]:
+    magic, version, code, dim = _HEADER.unpack_from(blob)
+    if magic != b"PE" or version != 1 or code not in (b"f", b"e"):
+        raise ValueError("Unsupported packed embedding header")
+    return list(struct.unpack_from(f"<{dim}{code.decode()}", blob, _HEADER.size))
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return column_name in {col["name"] for col in inspector.get_columns(table_name)}
+
+
+def _copy(table_name: str, key: str, source: str, source_type, target: str, target_type, convert) -> None:
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column(key, sa.String), sa.column(source, source_type), sa.column(target, target_type))
+    last = None
+    while True:
+        query = sa.select(table.c[key], table.c[source]).where(table.c[source].isnot(None))
+        if last is not None:
+            query = query.where(table.c[key] > last)
+        rows = bind.execute(query.order_by(table.c[key]).limit(_BATCH)).all()
+        if not rows:
+            break
+        for row_key, value in rows:
+            bind.execute(table.update().where(table.c[key] == row_key).values({target: convert(value)}))
+        last = rows[-1][0]
+
+
+def upgrade() -> None:
+    for table_name, key, required in _TABLES:
+        if not _column_exists(table_name, "embedding_packed"):
+            op.add_column(table_name, sa.Column("embedding_packed", sa.LargeBinary(), nullable=True))
+        if _column_exists(table_name, "embedding"):
+            _copy(
+                table_name,
+                key,
+                "embedding",
+                sa.JSON,
+                "embedding_packed",
+                sa.LargeBinary,
+                lambda value: _pack_float32([float(v) for v in value]),
+            )
+            op.drop_column(table_name, "embedding")
+        if required:
+            # Added nullable so existing rows could be copied; the JSON column it
+            # replaces was NOT NULL.
+            op.alter_column(table_name, "embedding_packed", existing_type=sa.LargeBinary(), nullable=False)
+
+
+def downgrade() -> None:
+    for table_name, key, _ in _TABLES:
+        if not _column_exists(table_name, "embedding"):
+            op.add_column(table_name, sa.Column("embedding", sa.JSON(), nullable=True))
+        if _column_exists(table_name, "embedding_packed"):
+            _copy(
+                table_name,
+                key,
+                "embedding_packed",
+                sa.LargeBinary,
+                "embedding",
+                sa.JSON,
+                lambda value: _unpack(bytes(value)),
+            )
+            op.drop_column(table_name, "embedding_packed")
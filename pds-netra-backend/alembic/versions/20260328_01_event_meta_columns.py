@@ -0,0 +1,176 @@
+"""promote hot event meta keys to indexed columns
+
+Revision ID: 20260328_01
+Revises: 20260326_01
+Create Date: 2026-03-28
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260328_01"
+down_revision = "20260326_01"
+branch_labels = None
+depends_on = None
+
+_EVENT_COLUMNS = ("zone_id", "plate_norm", "person_id", "movement_type", "run_id")
+_BATCH = 5000
+
+# Frozen copy of the extraction rules in app.models.event as of this revision.
+PROMOTED_META_LENGTH = 64
+
+
+def _meta_str(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    text = str(value).strip()
+    return text[:PROMOTED_META_LENGTH] or None
+
+
+def _normalize_plate(text: Any) -> Optional[str]:
+    if not text:
+        return None
+    out = "".join(ch for ch in str(text).upper() if ch.isalnum())
+    return out[:PROMOTED_META_LENGTH] or None
+
+
+def promoted_event_columns(meta: Optional[dict]) -> dict[str, Optional[str]]:
+    meta = meta if isinstance(meta, dict) else {}
+    extra = meta.get("extra") if isinstance(meta.get("extra"), dict) else {}
+    return {
+        "zone_id": _meta_str(meta.get("zone_id")),
+        "plate_norm": _normalize_plate(meta.get("plate_norm") or meta.get("plate_text")),
+        "person_id": _meta_str(meta.get("person_id") or extra.get("person_id")),
+        "movement_type": _meta_str(meta.get("movement_type")),
+        "run_id": _meta_str(extra.get("run_id") or meta.get("run_id")),
+    }
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return column_name in {col["name"] for col in inspector.get_columns(table_name)}
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+
+def _id_batches(bind, table_name: str):
+    lo, hi = bind.execute(sa.text(f"SELECT MIN(id), MAX(id) FROM {table_name}")).one()
+    if lo is None:
+        return
+    start = lo
+    while start <= hi:
+        yield start, start + _BATCH
+        start += _BATCH
+
+
+def _backfill_events_postgres(bind) -> None:
+    n = PROMOTED_META_LENGTH
+    stmt = sa.text(
+        f"""
+        UPDATE events SET
+            zone_id = left(NULLIF(btrim(meta->>'zone_id'), ''), {n}),
+            plate_norm = left(NULLIF(upper(regexp_replace(
+                COALESCE(NULLIF(meta->>'plate_norm', ''), meta->>'plate_text'), '[^[:alnum:]]', '', 'g')), ''), {n}),
+            person_id = left(NULLIF(btrim(COALESCE(
+                NULLIF(meta->>'person_id', ''), meta->'extra'->>'person_id')), ''), {n}),
+            movement_type = left(NULLIF(btrim(meta->>'movement_type'), ''), {n}),
+            run_id = left(NULLIF(btrim(COALESCE(
+                NULLIF(meta->'extra'->>'run_id', ''), meta->>'run_id')), ''), {n})
+        WHERE id >= :lo AND id < :hi
+        """
+    )
+    for lo, hi in _id_batches(bind, "events"):
+        bind.execute(stmt, {"lo": lo, "hi": hi})
+    bind.execute(
+        sa.text(
+            f"UPDATE alerts SET person_id = left(NULLIF(btrim(extra->>'person_id'), ''), {n}) "
+            "WHERE extra IS NOT NULL AND extra->>'person_id' IS NOT NULL"
+        )
+    )
+
+
+def _backfill_python(bind) -> None:
+    events = sa.table(
+        "events",
+        sa.column("id", sa.Integer),
+        sa.column("meta", sa.JSON),
+        *(sa.column(column, sa.String) for column in _EVENT_COLUMNS),
+    )
+    for lo, hi in _id_batches(bind, "events"):
+        rows = bind.execute(sa.select(events.c.id, events.c.meta).where(events.c.id >= lo, events.c.id < hi)).all()
+        for event_id, meta in rows:
+            values = promoted_event_columns(meta)
+            if any(values.values()):
+                bind.execute(events.update().where(events.c.id == event_id).values(values))
+    alerts = sa.table(
+        "alerts",
+        sa.column("id", sa.Integer),
+        sa.column("extra", sa.JSON),
+        sa.column("person_id", sa.String),
+    )
+    for lo, hi in _id_batches(bind, "alerts"):
+        rows = bind.execute(
+            sa.select(alerts.c.id, alerts.c.extra).where(alerts.c.id >= lo, alerts.c.id < hi, alerts.c.extra.isnot(None))
+        ).all()
+        for alert_id, extra in rows:
+            person_id = extra.get("person_id") if isinstance(extra, dict) else None
+            if person_id:
+                bind.execute(
+                    alerts.update().where(alerts.c.id == alert_id).values(person_id=str(person_id)[:PROMOTED_META_LENGTH])
+                )
+
+
+def upgrade() -> None:
+    added = False
+    for column in _EVENT_COLUMNS:
+        if not _column_exists("events", column):
+            op.add_column("events", sa.Column(column, sa.String(64), nullable=True))
+            added = True
+    if not _column_exists("alerts", "person_id"):
+        op.add_column("alerts", sa.Column("person_id", sa.String(64), nullable=True))
+        added = True
+
+    if added:
+        bind = op.get_bind()
+        if bind.dialect.name == "postgresql":
+            _backfill_events_postgres(bind)
+        else:
+            _backfill_python(bind)
+
+    for column in _EVENT_COLUMNS:
+        name = op.f(f"ix_events_{column}")
+        if not _index_exists("events", name):
+            op.create_index(name, "events", [column], unique=False)
+    if not _index_exists("events", "ix_events_godown_type_zone_ts"):
+        op.create_index(
+            "ix_events_godown_type_zone_ts",
+            "events",
+            ["godown_id", "event_type", "zone_id", "timestamp_utc"],
+            unique=False,
+        )
+    if not _index_exists("alerts", op.f("ix_alerts_person_id")):
+        op.create_index(op.f("ix_alerts_person_id"), "alerts", ["person_id"], unique=False)
+
+
+def downgrade() -> None:
+    if _index_exists("alerts", op.f("ix_alerts_person_id")):
+        op.drop_index(op.f("ix_alerts_person_id"), table_name="alerts")
+    if _column_exists("alerts", "person_id"):
+        op.drop_column("alerts", "person_id")
+    if _index_exists("events", "ix_events_godown_type_zone_ts"):
+        op.drop_index("ix_events_godown_type_zone_ts", table_name="events")
+    for column in _EVENT_COLUMNS:
+        name = op.f(f"ix_events_{column}")
+        if _index_exists("events", name):
+            op.drop_index(name, table_name="events")
+        if _column_exists("events", column):
+            op.drop_column("events", column)
@@ -0,0 +1,71 @@
+"""composite and partial indexes for alert hot paths
+
+Revision ID: 20260330_01
+Revises: 20260328_01
+Create Date: 2026-03-30
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260330_01"
+down_revision = "20260328_01"
+branch_labels = None
+depends_on = None
+
+_ACTIVE = "status IN ('OPEN', 'ACK')"
+
+# (name, columns, partial predicate)
+_INDEXES = (
+    ("ix_alerts_godown_type_status_start", ["godown_id", "alert_type", "status", "start_time"], None),
+    ("ix_alerts_godown_camera_type_start", ["godown_id", "camera_id", "alert_type", "start_time"], None),
+    ("ix_alerts_active_type_last_detection", ["alert_type", "last_detection_at", "start_time"], _ACTIVE),
+)
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+
+def _pg_index_valid(index_name: str) -> bool | None:
+    """``pg_index.indisvalid`` for the index, or None if it does not exist."""
+    row = op.get_bind().execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": index_name},
+    ).first()
+    return None if row is None else bool(row[0])
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for name, columns, where in _INDEXES:
+        if postgres:
+            valid = _pg_index_valid(name)
+            if valid:
+                continue
+            if valid is False:
+                # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index
+                # behind; drop it and build it again.
+                with op.get_context().autocommit_block():
+                    op.drop_index(name, table_name="alerts", postgresql_concurrently=True)
+        elif _index_exists("alerts", name):
+            continue
+        kwargs = {}
+        if where:
+            kwargs = {"postgresql_where": sa.text(where), "sqlite_where": sa.text(where)}
+        if postgres:
+            # Build without blocking ingest writes on large alert tables.
+            with op.get_context().autocommit_block():
+                op.create_index(name, "alerts", columns, unique=False, postgresql_concurrently=True, **kwargs)
+        else:
+            op.create_index(name, "alerts", columns, unique=False, **kwargs)
+
+
+def downgrade() -> None:
+    for name, _, _ in reversed(_INDEXES):
+        if _index_exists("alerts", name):
+            op.drop_index(name, table_name="alerts")
@@ -0,0 +1,178 @@
+"""partition events by month on timestamp_utc
+
+Revision ID: 20260401_01
+Revises: 20260330_01
+Create Date: 2026-04-01
+
+PostgreSQL only; other dialects keep plain tables. Existing rows are copied
+into the new partitioned table inside the migration transaction, so expect
+it to take a while on large installations.
+
+anpr_events stays a plain table: a unique key on a partitioned table has to
+include the partition key, which would let the same ANPR event_id in again
+under a different timestamp.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+from typing import Optional
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260401_01"
+down_revision = "20260330_01"
+branch_labels = None
+depends_on = None
+
+_TABLE = "events"
+_KEY = "timestamp_utc"
+
+# A unique key on a partitioned table must include the partition key, so
+# events.id can no longer be the target of a foreign key.
+_LINK_FK = "alert_event_links_event_id_fkey"
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _foreign_keys_to(table_name: str) -> list[tuple[str, str]]:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    found = []
+    for source in inspector.get_table_names():
+        for fk in inspector.get_foreign_keys(source):
+            if fk.get("referred_table") == table_name and fk.get("name"):
+                found.append((source, fk["name"]))
+    return found
+
+
+def _quote(conn, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def _month_floor(value: datetime.datetime) -> datetime.datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    value = value.astimezone(datetime.timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(month: datetime.datetime, count: int) -> datetime.datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _months_ahead() -> int:
+    try:
+        return max(0, int(os.getenv("EVENT_PARTITION_MONTHS_AHEAD", "3")))
+    except Exception:
+        return 3
+
+
+def _is_partitioned(conn, table: str) -> bool:
+    row = conn.execute(
+        sa.text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": table},
+    ).first()
+    return row is not None
+
+
+def _create_month_partition(conn, table: str, month: datetime.datetime) -> None:
+    name = f"{table}_p{month:%Y%m}"
+    lower = month.isoformat()
+    upper = _add_months(month, 1).isoformat()
+    conn.execute(
+        sa.text(
+            f"CREATE TABLE IF NOT EXISTS {_quote(conn, name)} PARTITION OF {_quote(conn, table)} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+    )
+
+
+def _index_sql(conn, table: str, index: dict, *, key: Optional[str]) -> str:
+    columns = [c for c in index["column_names"] if c]
+    if index.get("unique") and key and key not in columns:
+        columns.append(key)
+    unique = "UNIQUE " if index.get("unique") else ""
+    cols = ", ".join(_quote(conn, c) for c in columns)
+    sql = f"CREATE {unique}INDEX {_quote(conn, index['name'])} ON {_quote(conn, table)} ({cols})"
+    where = (index.get("dialect_options") or {}).get("postgresql_where")
+    if where is not None:
+        sql += f" WHERE {where}"
+    return sql
+
+
+def _rebuild_table(conn, table: str, *, partitioned: bool, now: Optional[datetime.datetime] = None) -> None:
+    inspector = sa.inspect(conn)
+    pk_columns = list(inspector.get_pk_constraint(table)["constrained_columns"])
+    indexes = [ix for ix in inspector.get_indexes(table) if not ix.get("duplicates_constraint")]
+    uniques = inspector.get_unique_constraints(table)
+    sequence = conn.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}).scalar()
+
+    legacy = f"{table}_rebuild"
+    q_table, q_legacy = _quote(conn, table), _quote(conn, legacy)
+    conn.execute(sa.text(f"ALTER TABLE {q_table} RENAME TO {q_legacy}"))
+    if sequence:
+        conn.execute(sa.text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+    suffix = f" PARTITION BY RANGE ({_quote(conn, _KEY)})" if partitioned else ""
+    conn.execute(sa.text(f"CREATE TABLE {q_table} (LIKE {q_legacy} INCLUDING DEFAULTS){suffix}"))
+
+    if partitioned:
+        lo, hi = conn.execute(
+            sa.text(f"SELECT MIN({_quote(conn, _KEY)}), MAX({_quote(conn, _KEY)}) FROM {q_legacy}")
+        ).one()
+        current = _month_floor(now or datetime.datetime.now(datetime.timezone.utc))
+        month = _month_floor(lo) if lo is not None else current
+        last = _add_months(max(_month_floor(hi), current) if hi is not None else current, _months_ahead())
+        while month <= last:
+            _create_month_partition(conn, table, month)
+            month = _add_months(month, 1)
+        conn.execute(
+            sa.text(f"CREATE TABLE IF NOT EXISTS {_quote(conn, table + '_default')} PARTITION OF {q_table} DEFAULT")
+        )
+        key = _KEY
+        pk_columns = pk_columns + [key] if key not in pk_columns else pk_columns
+    else:
+        key = None
+        pk_columns = [c for c in pk_columns if c != _KEY]
+
+    conn.execute(sa.text(f"INSERT INTO {q_table} SELECT * FROM {q_legacy}"))
+    conn.execute(sa.text(f"DROP TABLE {q_legacy} CASCADE"))
+    conn.execute(sa.text(f"ALTER TABLE {q_table} ADD PRIMARY KEY ({', '.join(_quote(conn, c) for c in pk_columns)})"))
+    for uq in uniques:
+        columns = [c for c in uq["column_names"] if c != _KEY]
+        conn.execute(sa.text(_index_sql(conn, table, {"name": uq["name"], "column_names": columns, "unique": True}, key=key)))
+    for index in indexes:
+        if not partitioned and index.get("unique"):
+            index = {**index, "column_names": [c for c in index["column_names"] if c != _KEY]}
+        conn.execute(sa.text(_index_sql(conn, table, index, key=key)))
+    if sequence:
+        conn.execute(sa.text(f"ALTER SEQUENCE {sequence} OWNED BY {q_table}.id"))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not _table_exists(_TABLE):
+        return
+    if _is_partitioned(bind, _TABLE):
+        return
+    for source, name in _foreign_keys_to(_TABLE):
+        op.drop_constraint(name, source, type_="foreignkey")
+    _rebuild_table(bind, _TABLE, partitioned=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not _table_exists(_TABLE):
+        return
+    if _is_partitioned(bind, _TABLE):
+        _rebuild_table(bind, _TABLE, partitioned=False)
+    if _table_exists("alert_event_links"):
+        op.execute("DELETE FROM alert_event_links WHERE event_id NOT IN (SELECT id FROM events)")
+        op.create_foreign_key(_LINK_FK, "alert_event_links", "events", ["event_id"], ["id"], ondelete="CASCADE")
@@ -0,0 +1,35 @@
+"""claim leases on notification_outbox
+
+Revision ID: 20260402_01
+Revises: 20260401_01
+Create Date: 2026-04-02
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260402_01"
+down_revision = "20260401_01"
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return column_name in {col["name"] for col in inspector.get_columns(table_name)}
+
+
+def upgrade() -> None:
+    if not _column_exists("notification_outbox", "claimed_by"):
+        op.add_column("notification_outbox", sa.Column("claimed_by", sa.String(length=128), nullable=True))
+    if not _column_exists("notification_outbox", "lease_expires_at"):
+        op.add_column("notification_outbox", sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    for column in ("lease_expires_at", "claimed_by"):
+        if _column_exists("notification_outbox", column):
+            op.drop_column("notification_outbox", column)
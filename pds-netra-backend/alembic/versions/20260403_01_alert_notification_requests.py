@@ -0,0 +1,54 @@
+"""alert notification requests (fan-out queue for the outbox)
+
+Revision ID: 20260403_01
+Revises: 20260402_01
+Create Date: 2026-04-03
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260403_01"
+down_revision = "20260402_01"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("alert_notification_requests"):
+        return
+    op.create_table(
+        "alert_notification_requests",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "alert_id",
+            sa.String(length=36),
+            sa.ForeignKey("alerts.public_id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("event_id", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="PENDING"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_alert_notification_requests_alert_id", "alert_notification_requests", ["alert_id"])
+    op.create_index(
+        "ix_alert_notification_requests_status_created",
+        "alert_notification_requests",
+        ["status", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    if _table_exists("alert_notification_requests"):
+        op.drop_table("alert_notification_requests")
@@ -0,0 +1,63 @@
+"""events (godown_id, timestamp_utc) index for latest-event lookups
+
+Revision ID: 20260404_01
+Revises: 20260403_01
+Create Date: 2026-04-04
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260404_01"
+down_revision = "20260403_01"
+branch_labels = None
+depends_on = None
+
+_INDEX = "ix_events_godown_ts"
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+
+def _is_partitioned(conn, table: str) -> bool:
+    row = conn.execute(
+        sa.text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": table},
+    ).first()
+    return row is not None
+
+
+def _pg_index_valid(index_name: str) -> bool | None:
+    """``pg_index.indisvalid`` for the index, or None if it does not exist."""
+    row = op.get_bind().execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": index_name},
+    ).first()
+    return None if row is None else bool(row[0])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # CONCURRENTLY is not available on a partitioned parent; there the index
+    # is created on every partition in one statement.
+    if bind.dialect.name == "postgresql" and not _is_partitioned(bind, "events"):
+        valid = _pg_index_valid(_INDEX)
+        if valid:
+            return
+        with op.get_context().autocommit_block():
+            if valid is False:
+                # Left INVALID by a failed concurrent build.
+                op.drop_index(_INDEX, table_name="events", postgresql_concurrently=True)
+            op.create_index(_INDEX, "events", ["godown_id", "timestamp_utc"], unique=False, postgresql_concurrently=True)
+    elif not _index_exists("events", _INDEX):
+        op.create_index(_INDEX, "events", ["godown_id", "timestamp_utc"], unique=False)
+
+
+def downgrade() -> None:
+    if _index_exists("events", _INDEX):
+        op.drop_index(_INDEX, table_name="events")
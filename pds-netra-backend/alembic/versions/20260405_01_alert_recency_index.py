@@ -0,0 +1,53 @@
+"""expression index for the alert listing keyset order
+
+Revision ID: 20260405_01
+Revises: 20260404_01
+Create Date: 2026-04-05
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20260405_01"
+down_revision = "20260404_01"
+branch_labels = None
+depends_on = None
+
+_INDEX = "ix_alerts_recency_id"
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+
+def _pg_index_valid(index_name: str) -> bool | None:
+    """``pg_index.indisvalid`` for the index, or None if it does not exist."""
+    row = op.get_bind().execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": index_name},
+    ).first()
+    return None if row is None else bool(row[0])
+
+
+def upgrade() -> None:
+    columns = [sa.text("coalesce(end_time, start_time)"), "id"]
+    if op.get_bind().dialect.name == "postgresql":
+        valid = _pg_index_valid(_INDEX)
+        if valid:
+            return
+        with op.get_context().autocommit_block():
+            if valid is False:
+                # Left INVALID by a failed concurrent build.
+                op.drop_index(_INDEX, table_name="alerts", postgresql_concurrently=True)
+            op.create_index(_INDEX, "alerts", columns, unique=False, postgresql_concurrently=True)
+    elif not _index_exists("alerts", _INDEX):
+        op.create_index(_INDEX, "alerts", columns, unique=False)
+
+
+def downgrade() -> None:
+    if _index_exists("alerts", _INDEX):
+        op.drop_index(_INDEX, table_name="alerts")
@@ -19,6 +19,7 @@ from .v1.dispatch_issues import router as dispatch_issues_router
 from .v1.rules import router as rules_router
 from .v1.zones import router as zones_router
 from .v1.watchlist import router as watchlist_router
+from .v1.face_index import router as face_index_router
 from .v1.edge_events import router as edge_events_router
 from .v1.after_hours import router as after_hours_router
 from .v1.vehicle_gate_sessions import router as vehicle_gate_sessions_router
@@ -52,6 +53,7 @@ api_router.include_router(dispatch_issues_router, dependencies=protected)
 api_router.include_router(rules_router, dependencies=protected)
 api_router.include_router(zones_router, dependencies=protected)
 api_router.include_router(watchlist_router, dependencies=protected)
+api_router.include_router(face_index_router, dependencies=protected)
 api_router.include_router(edge_events_router, dependencies=protected)
 api_router.include_router(after_hours_router, dependencies=protected)
 api_router.include_router(vehicle_gate_sessions_router, dependencies=protected)
@@ -17,7 +17,7 @@ from sqlalchemy import and_, desc
 from ...core.db import get_db
 from ...models.anpr_event import AnprEvent
 from ...models.anpr_vehicle import AnprVehicle
-from ...core.pagination import clamp_limit
+from ...core.pagination import clamp_limit, keyset_page
 
 try:
     from zoneinfo import ZoneInfo
@@ -73,8 +73,15 @@ def get_anpr_events(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     limit: int = Query(200, ge=1),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
 ):
+    """
+    Recent ANPR events, newest first.
+
+    Passing ``cursor`` (empty for the first page) pages by keyset on
+    (timestamp_utc, id) and adds ``next_cursor`` to the response.
+    """
     limit = clamp_limit(limit)
     start_utc, end_utc = _local_range_to_utc(timezone_name, date_from, date_to)
 
@@ -100,13 +107,23 @@ def get_anpr_events(
     if match_status:
         filters2.append(AnprEvent.match_status == match_status.strip().upper())
 
-    rows = (
-        db.query(AnprEvent)
-        .filter(and_(*filters2))
-        .order_by(desc(AnprEvent.timestamp_utc))
-        .limit(limit)
-        .all()
-    )
+    next_cursor = None
+    if cursor is not None:
+        rows, next_cursor = keyset_page(
+            db.query(AnprEvent).filter(and_(*filters2)),
+            (AnprEvent.timestamp_utc, AnprEvent.id),
+            cursor,
+            limit,
+            lambda ev: (ev.timestamp_utc, ev.id),
+        )
+    else:
+        rows = (
+            db.query(AnprEvent)
+            .filter(and_(*filters2))
+            .order_by(desc(AnprEvent.timestamp_utc))
+            .limit(limit)
+            .all()
+        )
 
     plate_norms = {ev.plate_norm for ev in rows if ev.plate_norm}
     registry: dict[str, str] = {}
@@ -149,8 +166,11 @@ def get_anpr_events(
         if (ev.plate_raw or ev.plate_norm)
     ]
 
-    return {
+    result = {
         "source": {"db": True, "table": "anpr_events"},
         "count": len(out),
         "events": out,
     }
+    if cursor is not None:
+        result["next_cursor"] = next_cursor
+    return result
@@ -9,13 +9,12 @@ from __future__ import annotations
 
 import csv
 import datetime
-import io
 from collections import defaultdict
-from typing import Optional
+from typing import Iterator, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
-from sqlalchemy import and_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, selectinload
 
 from ...core.auth import get_optional_user
 from ...core.db import get_db
@@ -24,7 +23,7 @@ from ...models.anpr_event import AnprEvent
 from ...models.anpr_daily_plan import AnprDailyPlan
 from ...models.anpr_daily_plan_item import AnprDailyPlanItem
 from ...core.pagination import clamp_page_size
-from ...core.request_limits import enforce_upload_limit, read_upload_bytes_sync
+from ...core.request_limits import enforce_upload_limit, open_upload_text
 from ...schemas.anpr_management import (
     AnprVehicleCreate,
     AnprVehicleOut,
@@ -39,6 +38,7 @@ from ...schemas.anpr_management import (
     CsvImportSummary,
     CsvImportRowResult,
 )
+from ...services.anpr_import import DailyPlanItemImport, VehicleImport
 
 try:
     from zoneinfo import ZoneInfo
@@ -57,6 +57,8 @@ ANPR_EVENT_TYPES = (
     "ANPR_PLATE_DETECTED",
     "ANPR_TIME_VIOLATION",
 )
+# Above this many planned plates the report scans all events instead of an IN list.
+REPORT_PLATE_FILTER_MAX = 1000
 
 
 def _normalize_plate(text: str) -> str:
@@ -110,20 +112,21 @@ def _parse_time(value: Optional[str]) -> Optional[datetime.time]:
         raise HTTPException(status_code=400, detail=f"Invalid time: {value}")
 
 
-def _read_csv_rows(upload: UploadFile) -> list[dict[str, str]]:
-    raw = read_upload_bytes_sync(upload)
-    if not raw:
-        return []
-    text = raw.decode("utf-8-sig")
-    reader = csv.DictReader(io.StringIO(text))
+def _iter_csv_rows(upload: UploadFile) -> Iterator[tuple[int, dict[str, str]]]:
+    """Yield ``(row_number, row)`` with lower-cased, stripped keys and values."""
+    reader = csv.DictReader(open_upload_text(upload))
     if not reader.fieldnames:
-        return []
-    rows: list[dict[str, str]] = []
+        return
+    row_number = 1
     for row in reader:
         if not row:
             continue
-        rows.append({(k or "").strip(): (v or "").strip() for k, v in row.items()})
-    return rows
+        row_number += 1
+        yield row_number, {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+
+
+def _csv_plate(lower: dict[str, str]) -> str:
+    return lower.get("plate_text") or lower.get("plate") or lower.get("plate_no") or lower.get("plate_number") or ""
 
 
 def _local_day_range_to_utc(tz_name: str, d: datetime.date) -> tuple[datetime.datetime, datetime.datetime]:
@@ -133,29 +136,42 @@ def _local_day_range_to_utc(tz_name: str, d: datetime.date) -> tuple[datetime.da
     return start_local.astimezone(datetime.timezone.utc), end_local.astimezone(datetime.timezone.utc)
 
 
-def _verified_arrivals_for_range(
+def _as_utc(ts: datetime.datetime) -> datetime.datetime:
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=datetime.timezone.utc)
+    return ts.astimezone(datetime.timezone.utc)
+
+
+def _verified_sightings(
     db: Session,
     *,
     godown_id: str,
     start_utc: datetime.datetime,
     end_utc: datetime.datetime,
-) -> tuple[dict[str, datetime.datetime], set[str]]:
-    rows = (
-        db.query(
-            AnprEvent.plate_norm,
-            AnprEvent.plate_raw,
-            AnprEvent.match_status,
-            AnprEvent.timestamp_utc,
-        )
-        .filter(
-            AnprEvent.godown_id == godown_id,
-            AnprEvent.timestamp_utc >= start_utc,
-            AnprEvent.timestamp_utc < end_utc,
-            AnprEvent.event_type.in_(ANPR_EVENT_TYPES),
-        )
-        .all()
+    plates: Optional[set[str]] = None,
+) -> list[tuple[str, datetime.datetime]]:
+    """
+    Return ``(plate_norm, timestamp_utc)`` for verified sightings in one scan.
+
+    Events without a registry verdict fall back to the active registry entry
+    for the plate, which is loaded once for the whole range. ``plates``
+    narrows the scan to the plates a caller actually needs.
+    """
+    query = db.query(
+        AnprEvent.plate_norm,
+        AnprEvent.plate_raw,
+        AnprEvent.match_status,
+        AnprEvent.timestamp_utc,
+    ).filter(
+        AnprEvent.godown_id == godown_id,
+        AnprEvent.timestamp_utc >= start_utc,
+        AnprEvent.timestamp_utc < end_utc,
+        AnprEvent.event_type.in_(ANPR_EVENT_TYPES),
     )
-    plate_norms = {pn for (pn, _, _, _) in rows if pn}
+    if plates is not None:
+        query = query.filter(or_(AnprEvent.plate_norm.in_(plates), AnprEvent.plate_norm.is_(None)))
+    rows = query.all()
+    plate_norms = {pn for (pn, _, status, _) in rows if pn and (status or "").upper() not in {"VERIFIED", "BLACKLIST"}}
     registry: dict[str, str] = {}
     if plate_norms:
         regs = (
@@ -169,7 +185,7 @@ def _verified_arrivals_for_range(
         )
         registry = {pn: (lt or "WHITELIST").upper() for pn, lt in regs}
 
-    arrived_at: dict[str, datetime.datetime] = {}
+    sightings: list[tuple[str, datetime.datetime]] = []
     for pn, raw, status, ts in rows:
         plate = pn or _normalize_plate(raw or "")
         if not plate:
@@ -179,6 +195,19 @@ def _verified_arrivals_for_range(
             s = "BLACKLIST" if registry[plate] == "BLACKLIST" else "VERIFIED"
         if s not in {"VERIFIED", "BLACKLIST"}:
             continue
+        sightings.append((plate, ts))
+    return sightings
+
+
+def _verified_arrivals_for_range(
+    db: Session,
+    *,
+    godown_id: str,
+    start_utc: datetime.datetime,
+    end_utc: datetime.datetime,
+) -> tuple[dict[str, datetime.datetime], set[str]]:
+    arrived_at: dict[str, datetime.datetime] = {}
+    for plate, ts in _verified_sightings(db, godown_id=godown_id, start_utc=start_utc, end_utc=end_utc):
         prev = arrived_at.get(plate)
         if prev is None or ts < prev:
             arrived_at[plate] = ts
@@ -346,21 +375,20 @@ def import_anpr_vehicles_csv(
     request=Depends(enforce_upload_limit),
 ) -> CsvImportSummary:
     godown_id = _enforce_godown_scope(user, godown_id)
-    rows = _read_csv_rows(file)
-    summary = CsvImportSummary(total=len(rows))
-    if not rows:
-        return summary
-
-    for row_number, row in enumerate(rows, start=2):
-        lower = {k.strip().lower(): (v or "").strip() for k, v in row.items()}
-        plate_text = lower.get("plate_text") or lower.get("plate") or lower.get("plate_no") or lower.get("plate_number")
-        if not plate_text:
+    summary = CsvImportSummary()
+    importer: Optional[VehicleImport] = None
+
+    for row_number, lower in _iter_csv_rows(file):
+        summary.total += 1
+        if importer is None:
+            importer = VehicleImport(db, godown_id, columns=set(lower))
+        plate_raw = _csv_plate(lower)
+        if not plate_raw:
             summary.failed += 1
             summary.rows.append(
                 CsvImportRowResult(row_number=row_number, plate_text="", status="failed", message="plate_text is required")
             )
             continue
-        plate_raw = plate_text.strip()
         plate_norm = _normalize_plate(plate_raw)
         if not plate_norm:
             summary.failed += 1
@@ -370,57 +398,14 @@ def import_anpr_vehicles_csv(
             continue
 
         try:
-            existing = (
-                db.query(AnprVehicle)
-                .filter(AnprVehicle.godown_id == godown_id, AnprVehicle.plate_norm == plate_norm)
-                .first()
+            status, entity_id = importer.stage(
+                plate_raw=plate_raw,
+                plate_norm=plate_norm,
+                list_type=_coerce_list_type(lower.get("list_type")),
+                transporter=lower.get("transporter"),
+                notes=lower.get("notes"),
+                is_active=_coerce_bool(lower.get("is_active")),
             )
-
-            list_type = lower.get("list_type")
-            transporter = lower.get("transporter")
-            notes = lower.get("notes")
-            is_active = lower.get("is_active")
-
-            if existing:
-                if plate_raw:
-                    existing.plate_raw = plate_raw
-                if "list_type" in lower and list_type:
-                    existing.list_type = _coerce_list_type(list_type) or existing.list_type
-                if "transporter" in lower:
-                    existing.transporter = transporter or None
-                if "notes" in lower:
-                    existing.notes = notes or None
-                if "is_active" in lower:
-                    val = _coerce_bool(is_active)
-                    if val is not None:
-                        existing.is_active = bool(val)
-                db.add(existing)
-                summary.updated += 1
-                summary.rows.append(
-                    CsvImportRowResult(
-                        row_number=row_number,
-                        plate_text=plate_raw,
-                        status="updated",
-                        entity_id=existing.id,
-                    )
-                )
-            else:
-                list_type_value = _coerce_list_type(list_type) if list_type else "WHITELIST"
-                active_val = _coerce_bool(is_active)
-                v = AnprVehicle(
-                    godown_id=godown_id,
-                    plate_raw=plate_raw,
-                    plate_norm=plate_norm,
-                    list_type=list_type_value or "WHITELIST",
-                    transporter=transporter or None,
-                    notes=notes or None,
-                    is_active=bool(active_val) if active_val is not None else True,
-                )
-                db.add(v)
-                summary.created += 1
-                summary.rows.append(
-                    CsvImportRowResult(row_number=row_number, plate_text=plate_raw, status="created")
-                )
         except HTTPException as exc:
             summary.failed += 1
             summary.rows.append(
@@ -431,8 +416,18 @@ def import_anpr_vehicles_csv(
                     message=str(exc.detail),
                 )
             )
+            continue
+        if status == "created":
+            summary.created += 1
+        else:
+            summary.updated += 1
+        summary.rows.append(
+            CsvImportRowResult(row_number=row_number, plate_text=plate_raw, status=status, entity_id=entity_id)
+        )
 
-    db.commit()
+    if importer is not None:
+        importer.flush()
+        db.commit()
     return summary
 
 
@@ -629,21 +624,20 @@ def import_daily_plan_items_csv(
         db.commit()
         db.refresh(plan)
 
-    rows = _read_csv_rows(file)
-    summary = CsvImportSummary(total=len(rows))
-    if not rows:
-        return summary
+    summary = CsvImportSummary()
+    importer: Optional[DailyPlanItemImport] = None
 
-    for row_number, row in enumerate(rows, start=2):
-        lower = {k.strip().lower(): (v or "").strip() for k, v in row.items()}
-        plate_text = lower.get("plate_text") or lower.get("plate") or lower.get("plate_no") or lower.get("plate_number")
-        if not plate_text:
+    for row_number, lower in _iter_csv_rows(file):
+        summary.total += 1
+        if importer is None:
+            importer = DailyPlanItemImport(db, plan.id, godown_id, columns=set(lower))
+        plate_raw = _csv_plate(lower)
+        if not plate_raw:
             summary.failed += 1
             summary.rows.append(
                 CsvImportRowResult(row_number=row_number, plate_text="", status="failed", message="plate_text is required")
             )
             continue
-        plate_raw = plate_text.strip()
         plate_norm = _normalize_plate(plate_raw)
         if not plate_norm:
             summary.failed += 1
@@ -653,57 +647,13 @@ def import_daily_plan_items_csv(
             continue
 
         try:
-            expected_by = _parse_time(lower.get("expected_by_local") or lower.get("expected_by"))
-            status_value = lower.get("status")
-            notes = lower.get("notes")
-
-            existing = (
-                db.query(AnprDailyPlanItem)
-                .filter(AnprDailyPlanItem.plan_id == plan.id, AnprDailyPlanItem.plate_norm == plate_norm)
-                .first()
+            status, entity_id = importer.stage(
+                plate_raw=plate_raw,
+                plate_norm=plate_norm,
+                expected_by_local=_parse_time(lower.get("expected_by_local") or lower.get("expected_by")),
+                status=_coerce_status(lower.get("status")),
+                notes=lower.get("notes"),
             )
-
-            vehicle = (
-                db.query(AnprVehicle)
-                .filter(AnprVehicle.godown_id == godown_id, AnprVehicle.plate_norm == plate_norm)
-                .first()
-            )
-
-            if existing:
-                if "expected_by_local" in lower or "expected_by" in lower:
-                    existing.expected_by_local = expected_by
-                if "status" in lower and status_value:
-                    existing.status = _coerce_status(status_value)
-                if "notes" in lower:
-                    existing.notes = notes or None
-                if vehicle and existing.vehicle_id != vehicle.id:
-                    existing.vehicle_id = vehicle.id
-                    existing.plate_raw = vehicle.plate_raw
-                db.add(existing)
-                summary.updated += 1
-                summary.rows.append(
-                    CsvImportRowResult(
-                        row_number=row_number,
-                        plate_text=plate_raw,
-                        status="updated",
-                        entity_id=existing.id,
-                    )
-                )
-            else:
-                it = AnprDailyPlanItem(
-                    plan_id=plan.id,
-                    vehicle_id=vehicle.id if vehicle else None,
-                    plate_raw=vehicle.plate_raw if vehicle else plate_raw,
-                    plate_norm=plate_norm,
-                    expected_by_local=expected_by,
-                    status=_coerce_status(status_value) if status_value else None,
-                    notes=notes or None,
-                )
-                db.add(it)
-                summary.created += 1
-                summary.rows.append(
-                    CsvImportRowResult(row_number=row_number, plate_text=plate_raw, status="created")
-                )
         except HTTPException as exc:
             summary.failed += 1
             summary.rows.append(
@@ -714,8 +664,18 @@ def import_daily_plan_items_csv(
                     message=str(exc.detail),
                 )
             )
+            continue
+        if status == "created":
+            summary.created += 1
+        else:
+            summary.updated += 1
+        summary.rows.append(
+            CsvImportRowResult(row_number=row_number, plate_text=plate_raw, status=status, entity_id=entity_id)
+        )
 
-    db.commit()
+    if importer is not None:
+        importer.flush()
+        db.commit()
     return summary
 
 
@@ -787,6 +747,7 @@ def anpr_daily_report(
 
     plans = (
         db.query(AnprDailyPlan)
+        .options(selectinload(AnprDailyPlan.items))
         .filter(
             AnprDailyPlan.godown_id == godown_id,
             AnprDailyPlan.plan_date >= date_from,
@@ -800,27 +761,36 @@ def anpr_daily_report(
     now_local = datetime.datetime.now(datetime.timezone.utc).astimezone(tz)
     today_local = now_local.date()
 
+    # One ranged scan covering every plan day, bucketed by each plan's local day.
+    arrived_by_day: dict[tuple[str, datetime.date], set[str]] = defaultdict(set)
+    plates = {it.plate_norm for p in plans for it in p.items or []}
+    if plates:
+        day_ranges = [_local_day_range_to_utc(p.timezone_name or timezone_name, p.plan_date) for p in plans]
+        tz_names = {p.timezone_name or timezone_name for p in plans}
+        zones = {name: ZoneInfo(name) if ZoneInfo else datetime.timezone.utc for name in tz_names}
+        sightings = _verified_sightings(
+            db,
+            godown_id=godown_id,
+            start_utc=min(start for start, _ in day_ranges),
+            end_utc=max(end for _, end in day_ranges),
+            plates=plates if len(plates) <= REPORT_PLATE_FILTER_MAX else None,
+        )
+        for plate, ts in sightings:
+            ts = _as_utc(ts)
+            for name, zone in zones.items():
+                arrived_by_day[(name, ts.astimezone(zone).date())].add(plate)
+
     rows: list[DailyReportRow] = []
     d = date_from
     while d <= date_to:
         plan = plan_by_date.get(d)
         if plan is None:
-            plan = AnprDailyPlan(godown_id=godown_id, plan_date=d, timezone_name=timezone_name)
-            items: list[AnprDailyPlanItem] = []
-            expected_count = None
-            cutoff = datetime.time(18, 0)
-        else:
-            items = list(plan.items or [])
-            expected_count = plan.expected_count
-            cutoff = plan.cutoff_time_local or datetime.time(18, 0)
-
-        start_utc, end_utc = _local_day_range_to_utc(plan.timezone_name or timezone_name, d)
-        _, arrived_set = _verified_arrivals_for_range(
-            db,
-            godown_id=godown_id,
-            start_utc=start_utc,
-            end_utc=end_utc,
-        )
+            rows.append(DailyReportRow(date_local=d))
+            d = d + datetime.timedelta(days=1)
+            continue
+        items = list(plan.items or [])
+        cutoff = plan.cutoff_time_local or datetime.time(18, 0)
+        arrived_set = arrived_by_day.get((plan.timezone_name or timezone_name, d), set())
 
         counts = defaultdict(int)
         for it in items:
@@ -848,7 +818,7 @@ def anpr_daily_report(
         rows.append(
             DailyReportRow(
                 date_local=d,
-                expected_count=expected_count,
+                expected_count=plan.expected_count,
                 planned_items=len(items),
                 arrived=int(counts["arrived"]),
                 delayed=int(counts["delayed"]),
@@ -17,7 +17,7 @@ from typing import List
 from fastapi import APIRouter, Depends, Query, HTTPException, UploadFile, File, Form, Response
 import requests
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import LargeBinary, func, type_coerce
 
 from ...core.db import get_db
 from ...core.errors import log_exception
@@ -37,6 +37,7 @@ from ...schemas.authorized_user import (
     AuthorizedUserResponse,
     AuthorizedUserFaceIndexItem,
 )
+from ...services.face_index_export import FACE_INDEX_MEDIA_TYPE, encode_face_index
 from ...services.watchlist import _compute_embedding_from_image, _hash_embedding_vector
 
 
@@ -98,14 +99,17 @@ def list_authorized_users(
 @router.get("/face-index", response_model=List[AuthorizedUserFaceIndexItem])
 def get_authorized_user_face_index(
     godown_id: str = Query(..., description="Godown ID for edge face index sync"),
+    export_format: str = Query("json", alias="format", pattern="^(json|binary)$"),
+    dtype: str = Query("float32", pattern="^(float32|float16)$"),
     db: Session = Depends(get_db),
     user: UserContext = Depends(get_current_user_or_authorized_users_service),
-) -> List[AuthorizedUser]:
+):
     """
     Return active authorized users with embeddings for edge face recognition.
 
     This endpoint is DB-driven and intended for edge sync. It only returns users
-    that have embeddings and are active.
+    that have embeddings and are active. ``format=binary`` returns the packed
+    face-index export (see ``services.face_index_export``) instead of JSON.
     """
     query = _authorized_user_query_for_user(db, user).filter(
         AuthorizedUser.is_active.is_(True),
@@ -115,8 +119,38 @@ def get_authorized_user_face_index(
         (AuthorizedUser.godown_id == godown_id) | (AuthorizedUser.godown_id.is_(None))
     )
     if user.principal_type == "edge_service":
-        logger.info("face-index requested by edge service godown_id=%s", godown_id)
-    return query.order_by(AuthorizedUser.person_id.asc()).all()
+        logger.info("face-index requested by edge service godown_id=%s format=%s", godown_id, export_format)
+    query = query.order_by(AuthorizedUser.person_id.asc())
+    if export_format != "binary":
+        return query.all()
+    rows = query.with_entities(
+        AuthorizedUser.person_id,
+        AuthorizedUser.name,
+        AuthorizedUser.role,
+        AuthorizedUser.godown_id,
+        AuthorizedUser.embedding_version,
+        AuthorizedUser.embedding_hash,
+        type_coerce(AuthorizedUser.embedding, LargeBinary()),
+    ).all()
+    body = encode_face_index(
+        (
+            (
+                {
+                    "person_id": person_id,
+                    "name": name,
+                    "role": role,
+                    "godown_id": row_godown_id,
+                    "embedding_version": embedding_version,
+                    "embedding_hash": embedding_hash,
+                },
+                blob,
+            )
+            for person_id, name, role, row_godown_id, embedding_version, embedding_hash, blob in rows
+        ),
+        dtype=dtype,
+        extra={"kind": "authorized_users", "godown_id": godown_id},
+    )
+    return Response(content=body, media_type=FACE_INDEX_MEDIA_TYPE)
 
 
 @router.get("/{person_id}", response_model=AuthorizedUserResponse)
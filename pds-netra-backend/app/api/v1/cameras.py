@@ -19,6 +19,7 @@ from ...models.godown import Camera, Godown
 from ...core.auth import UserContext, get_current_user
 from ...services.rule_seed import seed_rules_for_camera, ensure_phone_usage_rules_for_camera
 from ...services.live_frames import remove_live_frame_artifacts
+from ...services.zone_geometry import invalidate_camera_geometry
 from ...services.mqtt_publisher import (
     publish_camera_config_changed,
     publish_rules_config_changed,
@@ -244,6 +245,7 @@ def update_camera_zones(
     db.add(camera)
     db.commit()
     db.refresh(camera)
+    invalidate_camera_geometry(camera.godown_id, camera.id)
     publish_zones_config_changed(camera.godown_id, camera.id)
     publish_camera_config_changed(camera.godown_id, camera.id, "updated")
     return {
@@ -331,6 +333,7 @@ def create_camera(
     db.add(camera)
     db.commit()
     db.refresh(camera)
+    invalidate_camera_geometry(camera.godown_id, camera.id)
     publish_camera_config_changed(camera.godown_id, camera.id, "created")
     if os.getenv("AUTO_SEED_RULES", "true").lower() in {"1", "true", "yes"}:
         seed_rules_for_camera(db, camera)
@@ -384,6 +387,7 @@ def update_camera(
     db.add(camera)
     db.commit()
     db.refresh(camera)
+    invalidate_camera_geometry(camera.godown_id, camera.id)
     publish_camera_config_changed(camera.godown_id, camera.id, "updated")
     if payload.modules is not None:
         new_modules = _parse_modules(camera.modules_json) or {}
@@ -409,6 +413,7 @@ def delete_camera(
     godown_key = camera.godown_id
     db.delete(camera)
     db.commit()
+    invalidate_camera_geometry(godown_key, camera_key)
     publish_camera_config_changed(godown_key, camera_key, "deleted")
     _remove_live_latest_frame(godown_key, camera_key)
     return {"status": "deleted", "camera_id": camera_id}
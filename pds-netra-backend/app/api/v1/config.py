@@ -4,35 +4,68 @@ Configuration version endpoint for detecting config changes.
 
 from __future__ import annotations
 
-from fastapi import APIRouter
+from datetime import datetime, timezone
 
-from ...services.mqtt_publisher import get_last_config_change
+from fastapi import APIRouter, Depends, Header, Query, Response
+from sqlalchemy.orm import Session
+
+from ...core.db import get_db
+from ...services.config_version import config_etag, etag_matches, get_config_versions
 
 
 router = APIRouter(prefix="/api/v1/config", tags=["config"])
 
+# Reported while no config write has been recorded yet, so edges never see 0.
+_STARTED_AT = datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
 
 @router.get("/version", response_model=dict)
-def get_config_version() -> dict:
+def get_config_version(
+    response: Response,
+    godown_id: str | None = Query(None),
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
     """
-    Get the current configuration version.
+    Get the current configuration version vector.
 
     This lightweight endpoint allows edge nodes to detect config changes without MQTT.
-    The version is updated whenever cameras, rules, or zones are created/updated/deleted.
+    Counters are persisted per godown and resource kind and bumped in the same
+    transaction as camera, rule, zone, watchlist and authorized-user writes.
+    ``version`` and ``epoch_ms`` keep their original meaning (time of the last
+    change); ``etag`` is the opaque hash of the vector. Send the returned
+    ``ETag`` back as ``If-None-Match`` to get an empty 304 while nothing has
+    changed.
 
     Example response:
     {
+        "godown_id": "GDN_001",
         "version": "2026-03-03T10:45:23.123456Z",
+        "etag": "3f2a9c0d1b7e4a55",
+        "versions": {"cameras": 4, "rules": 12, "zones": 3, "watchlist": 7, "authorized_users": 1},
+        "updated_at": "2026-03-03T10:45:23.123456Z",
         "epoch_ms": 1740000000000
     }
     """
-    last_change = get_last_config_change()
-    # Format ISO string - isoformat() may already have Z or +00:00, so handle both
-    iso_str = last_change.isoformat()
-    if not iso_str.endswith('Z') and '+' not in iso_str:
-        iso_str += "Z"
-    epoch_ms = int(last_change.timestamp() * 1000)
+    versions, last_updated = get_config_versions(db, godown_id)
+    etag = config_etag(versions, godown_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    updated_at = _as_utc(last_updated) if last_updated is not None else _STARTED_AT
+    iso_str = updated_at.isoformat().replace("+00:00", "Z")
     return {
+        "godown_id": godown_id,
         "version": iso_str,
-        "epoch_ms": epoch_ms,
+        "etag": etag.strip('"'),
+        "versions": versions,
+        "updated_at": iso_str,
+        "epoch_ms": int(updated_at.timestamp() * 1000),
     }
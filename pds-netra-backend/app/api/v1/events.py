@@ -13,7 +13,6 @@ import os
 from typing import List, Optional
 from datetime import datetime, timezone
 from pathlib import Path
-import json
 from urllib.parse import urlsplit
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
@@ -23,14 +22,16 @@ from sqlalchemy.orm import Session
 
 from ...core.db import get_db
 from ...core.auth import get_optional_user
-from ...models.event import Event, Alert, AlertEventLink
-from ...models.godown import Godown, Camera
+from ...models.event import Event, Alert, AlertEventLink, normalize_plate
+from ...models.godown import Godown
 from ...models.alert_action import AlertAction
 from ...models.notification_outbox import NotificationOutbox
 from ...schemas.alert_action import AlertActionCreate, AlertActionOut
 from ...schemas.notifications import NotificationDeliveryOut
 from ...services.ack_tokens import verify_raw_token
-from ...core.pagination import clamp_page_size, set_pagination_headers
+from ...services.snapshot_index import snapshot_exists
+from ...services.zone_geometry import infer_event_zones, parse_bbox
+from ...core.pagination import clamp_page_size, paginate_query, set_pagination_headers
 
 
 router = APIRouter(prefix="/api/v1", tags=["events", "alerts"])
@@ -61,86 +62,6 @@ def _enforce_alert_scope(alert: Alert, user, db: Session) -> None:
         raise HTTPException(status_code=403, detail="Forbidden")
 
 
-def _parse_bbox(bbox_raw: str | None) -> Optional[list[int]]:
-    if not bbox_raw:
-        return None
-    try:
-        # Stored as string representation of list
-        if bbox_raw.startswith("[") and bbox_raw.endswith("]"):
-            parts = bbox_raw.strip("[]").split(",")
-            return [int(float(p.strip())) for p in parts if p.strip()]
-    except Exception:
-        return None
-    return None
-
-
-def _point_in_polygon(x: float, y: float, polygon: list[tuple[float, float]]) -> bool:
-    num = len(polygon)
-    j = num - 1
-    inside = False
-    for i in range(num):
-        xi, yi = polygon[i]
-        xj, yj = polygon[j]
-        intersects = ((yi > y) != (yj > y)) and (x < (xj - xi) * (y - yi) / (yj - yi + 1e-9) + xi)
-        if intersects:
-            inside = not inside
-        j = i
-    return inside
-
-
-def _bbox_in_zone(bbox: list[int], polygon: list[tuple[float, float]]) -> bool:
-    if len(bbox) != 4:
-        return False
-    x1, y1, x2, y2 = bbox
-    cx = (x1 + x2) / 2.0
-    cy = (y1 + y2) / 2.0
-    if _point_in_polygon(cx, cy, polygon):
-        return True
-    corners = [(x1, y1), (x1, y2), (x2, y1), (x2, y2)]
-    if any(_point_in_polygon(x, y, polygon) for x, y in corners):
-        return True
-    xs = [pt[0] for pt in polygon]
-    ys = [pt[1] for pt in polygon]
-    if not xs or not ys:
-        return False
-    min_x, max_x = min(xs), max(xs)
-    min_y, max_y = min(ys), max(ys)
-    return not (x2 < min_x or x1 > max_x or y2 < min_y or y1 > max_y)
-
-
-def _infer_zone_id(db: Session, event: Event) -> Optional[str]:
-    bbox = _parse_bbox(event.bbox)
-    if not bbox:
-        return None
-    camera = (
-        db.query(Camera)
-        .filter(Camera.id == event.camera_id, Camera.godown_id == event.godown_id)
-        .first()
-    )
-    if not camera or not camera.zones_json:
-        return None
-    try:
-        zones = json.loads(camera.zones_json)
-    except Exception:
-        return None
-    if not isinstance(zones, list):
-        return None
-    for zone in zones:
-        zone_id = zone.get("id") if isinstance(zone, dict) else None
-        polygon = zone.get("polygon") if isinstance(zone, dict) else None
-        if not zone_id or not isinstance(polygon, list):
-            continue
-        try:
-            poly_pts = [tuple(map(float, pt)) for pt in polygon if isinstance(pt, list) and len(pt) == 2]
-        except Exception:
-            continue
-        if not poly_pts:
-            continue
-        if _bbox_in_zone(bbox, poly_pts):
-            return zone_id
-    return None
-
-
 def _event_to_item(event: Event) -> dict:
     snapshots_root = Path(os.getenv("PDS_DATA_DIR", "/opt/app/data")) / "snapshots"
 
@@ -194,7 +115,7 @@ def _event_to_item(event: Event) -> dict:
         rel = _to_snapshot_relpath(candidate)
         if rel:
             file_path = snapshots_root / rel
-            if file_path.exists():
+            if snapshot_exists(file_path):
                 image_url = f"/media/snapshots/{rel}"
                 break
             # Snapshot path is known but file is missing on backend storage.
@@ -209,7 +130,7 @@ def _event_to_item(event: Event) -> dict:
             f"{event.godown_id}/{event.camera_id}/"
             f"{event.timestamp_utc.date().isoformat()}/{event.event_id_edge}.jpg"
         )
-        if (snapshots_root / inferred_rel).exists():
+        if snapshot_exists(snapshots_root / inferred_rel):
             image_url = f"/media/snapshots/{inferred_rel}"
 
     return {
@@ -220,7 +141,7 @@ def _event_to_item(event: Event) -> dict:
         "event_type": event.event_type,
         "severity": event.severity_raw,
         "timestamp_utc": event.timestamp_utc,
-        "bbox": _parse_bbox(event.bbox),
+        "bbox": parse_bbox(event.bbox),
         "track_id": event.track_id,
         "image_url": image_url,
         "clip_url": event.clip_url,
@@ -242,9 +163,17 @@ def list_events(
     page_size: int = Query(50, ge=1),
     start_time: Optional[datetime] = Query(None),
     end_time: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None),
+    count_mode: Optional[str] = Query(None, pattern="^(exact|estimated|none)$"),
     db: Session = Depends(get_db),
 ) -> dict:
-    """List raw events with optional filters."""
+    """
+    List raw events with optional filters.
+
+    Passing ``cursor`` (empty for the first page) switches to keyset
+    pagination on (timestamp_utc, id); the response then carries
+    ``next_cursor`` and ``total`` defaults to ``count_mode=none``.
+    """
     page_size = clamp_page_size(page_size)
     query = db.query(Event)
     if godown_id:
@@ -261,34 +190,57 @@ def list_events(
     if date_to or end_time:
         query = query.filter(Event.timestamp_utc <= (date_to or end_time))
     if plate_text:
-        query = query.filter(Event.meta["plate_text"].astext == plate_text)
+        query = query.filter(Event.plate_norm == normalize_plate(plate_text))
     if person_id:
-        query = query.filter(Event.meta["person_id"].astext == person_id)
-    total = query.count()
-    events = (
-        query.order_by(Event.timestamp_utc.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+        query = query.filter(Event.person_id == person_id)
+    events, total, next_cursor = paginate_query(
+        db,
+        query,
+        keys=(Event.timestamp_utc, Event.id),
+        key_of=lambda e: (e.timestamp_utc, e.id),
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        count_mode=count_mode,
     )
-    updated = False
+    inferred_zones = infer_event_zones(db, events)
     for event in events:
-        meta = event.meta or {}
-        if not meta.get("zone_id") and event.bbox:
-            inferred_zone = _infer_zone_id(db, event)
-            if inferred_zone:
-                meta = dict(meta)
-                meta["zone_id"] = inferred_zone
-                event.meta = meta
-                updated = True
-    if updated:
+        inferred_zone = inferred_zones.get(event.id)
+        if inferred_zone:
+            meta = dict(event.meta or {})
+            meta["zone_id"] = inferred_zone
+            event.meta = meta
+    if inferred_zones:
         db.commit()
-    return {
+    result = {
         "items": [_event_to_item(e) for e in events],
         "total": total,
         "page": page,
         "page_size": page_size,
     }
+    if cursor is not None:
+        result["next_cursor"] = next_cursor
+    return result
+
+
+def _alert_link_stats(db: Session, alert_ids: List[int]) -> dict[int, tuple[int, int]]:
+    """Map alert id -> (linked event count, first linked event id) in one grouped query."""
+    if not alert_ids:
+        return {}
+    rows = (
+        db.query(AlertEventLink.alert_id, func.count(AlertEventLink.event_id), func.min(AlertEventLink.event_id))
+        .filter(AlertEventLink.alert_id.in_(alert_ids))
+        .group_by(AlertEventLink.alert_id)
+        .all()
+    )
+    return {alert_id: (int(count), first_id) for alert_id, count, first_id in rows}
+
+
+def _load_first_events(db: Session, link_stats: dict[int, tuple[int, int]]) -> dict[int, Event]:
+    event_ids = {first_id for _, first_id in link_stats.values() if first_id is not None}
+    if not event_ids:
+        return {}
+    return {event.id: event for event in db.query(Event).filter(Event.id.in_(event_ids)).all()}
 
 
 @router.get("/alerts")
@@ -302,10 +254,20 @@ def list_alerts(
     date_to: Optional[datetime] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1),
+    cursor: Optional[str] = Query(None),
+    count_mode: Optional[str] = Query(None, pattern="^(exact|estimated|none)$"),
     db: Session = Depends(get_db),
     user=Depends(get_optional_user),
 ) -> dict:
-    """List alerts with optional filters."""
+    """
+    List alerts with optional filters.
+
+    Linked-event counts and first-event metadata for the page are fetched with
+    two batched queries instead of lazy loads per row. ``count_mode`` can be
+    ``estimated`` (planner estimate) or ``none`` to avoid an exact count on
+    deep pages. Passing ``cursor`` (empty for the first page) switches to
+    keyset pagination on (coalesce(end_time, start_time), id).
+    """
     page_size = clamp_page_size(page_size)
     query = db.query(Alert, Godown.district, Godown.name).join(
         Godown, Godown.id == Alert.godown_id, isouter=True
@@ -325,21 +287,26 @@ def list_alerts(
         query = query.filter(Alert.start_time >= date_from)
     if date_to:
         query = query.filter(Alert.start_time <= date_to)
-    total = query.count()
-    sort_time = func.coalesce(Alert.end_time, Alert.start_time)
-    rows = (
-        query.order_by(sort_time.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    rows, total, next_cursor = paginate_query(
+        db,
+        query,
+        keys=(func.coalesce(Alert.end_time, Alert.start_time), Alert.id),
+        key_of=lambda row: (row[0].end_time or row[0].start_time, row[0].id),
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        count_mode=count_mode,
     )
+    link_stats = _alert_link_stats(db, [alert.id for alert, _, _ in rows])
+    first_events = _load_first_events(db, link_stats)
     items: List[dict] = []
     for alert, godown_district, godown_name in rows:
-        linked_ids = [link.event_id for link in alert.events]
+        count_events, first_event_id = link_stats.get(alert.id, (0, None))
+        first_event = first_events.get(first_event_id) if first_event_id is not None else None
         key_meta = {}
-        if alert.events:
+        if first_event is not None:
             try:
-                meta = alert.events[0].event.meta or {}
+                meta = first_event.meta or {}
                 extra = meta.get("extra") or {}
                 if not isinstance(extra, dict):
                     extra = {}
@@ -349,7 +316,7 @@ def list_alerts(
                     "movement_type": meta.get("movement_type"),
                     "reason": meta.get("reason"),
                     "run_id": extra.get("run_id"),
-                    "snapshot_url": alert.events[0].event.image_url if alert.events else None,
+                    "snapshot_url": first_event.image_url,
                 }
             except Exception:
                 key_meta = {}
@@ -416,9 +383,9 @@ def list_alerts(
             )
         if alert.alert_type == "WORKPLACE_WORKSTATION_ABSENCE":
             extra = alert.extra or {}
-            if (not extra) and alert.events:
+            if (not extra) and first_event is not None:
                 try:
-                    first_meta = (alert.events[0].event.meta or {})
+                    first_meta = (first_event.meta or {})
                     meta_extra = first_meta.get("extra") if isinstance(first_meta, dict) else None
                     if isinstance(meta_extra, dict):
                         extra = meta_extra
@@ -451,11 +418,14 @@ def list_alerts(
                 "end_time": alert.end_time,
                 "status": alert.status,
                 "summary": alert.summary,
-                "count_events": len(linked_ids),
+                "count_events": count_events,
                 "key_meta": key_meta or None,
             }
         )
-    return {"items": items, "total": total, "page": page, "page_size": page_size}
+    result = {"items": items, "total": total, "page": page, "page_size": page_size}
+    if cursor is not None:
+        result["next_cursor"] = next_cursor
+    return result
 
 
 @router.get("/alerts/{alert_id}")
@@ -591,6 +561,8 @@ def get_alert_deliveries(
     response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1),
+    cursor: Optional[str] = Query(None),
+    count_mode: Optional[str] = Query(None, pattern="^(exact|estimated|none)$"),
     db: Session = Depends(get_db),
     user=Depends(get_optional_user),
 ):
@@ -603,14 +575,17 @@ def get_alert_deliveries(
         db.query(NotificationOutbox)
         .filter(NotificationOutbox.alert_id == alert.public_id)
     )
-    total = base_query.count()
-    deliveries = (
-        base_query.order_by(NotificationOutbox.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    deliveries, total, next_cursor = paginate_query(
+        db,
+        base_query,
+        keys=(NotificationOutbox.created_at, NotificationOutbox.id),
+        key_of=lambda row: (row.created_at, row.id),
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        count_mode=count_mode,
     )
-    set_pagination_headers(response, total=total, page=page, page_size=page_size)
+    set_pagination_headers(response, total=total, page=page, page_size=page_size, next_cursor=next_cursor)
     return deliveries
 
 
@@ -0,0 +1,70 @@
+"""
+Server-side face search over watchlist and authorized-user embeddings.
+"""
+
+from __future__ import annotations
+
+import time
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from ...core.auth import UserContext, require_roles
+from ...core.db import get_db
+from ...models.godown import Godown
+from ...schemas.watchlist import FaceSearchRequest
+from ...services.face_index import AUTHORIZED_USERS, WATCHLIST, get_face_index
+
+
+router = APIRouter(prefix="/api/v1/face-index", tags=["face-index"])
+
+_KINDS = {WATCHLIST, AUTHORIZED_USERS}
+ADMIN_ROLES = {"STATE_ADMIN", "HQ_ADMIN"}
+
+
+def _is_admin(user: UserContext) -> bool:
+    return (user.role or "").upper() in ADMIN_ROLES
+
+
+def _owned_godown_ids(db: Session, user: UserContext) -> set[str]:
+    if not user.user_id:
+        return set()
+    return {row[0] for row in db.query(Godown.id).filter(Godown.created_by_user_id == user.user_id)}
+
+
+@router.post("/search")
+def search_face_index(
+    req: FaceSearchRequest,
+    db: Session = Depends(get_db),
+    user: UserContext = Depends(require_roles("STATE_ADMIN", "HQ_ADMIN", "USER")),
+) -> dict:
+    """
+    Top-k cosine matches for an embedding across all godowns.
+
+    ``godown_id`` restricts results to that godown plus global entries
+    (the watchlist); ``kinds`` selects ``watchlist`` and/or ``authorized_users``.
+    Non-admin users only see authorized users of godowns they created.
+    """
+    if req.kinds and not set(req.kinds) <= _KINDS:
+        raise HTTPException(status_code=400, detail=f"kinds must be a subset of {sorted(_KINDS)}")
+    authorized_godowns = None
+    if not _is_admin(user):
+        authorized_godowns = _owned_godown_ids(db, user)
+        if req.godown_id and req.godown_id not in authorized_godowns:
+            raise HTTPException(status_code=403, detail="Forbidden")
+    index = get_face_index()
+    index.refresh(db)
+    started = time.perf_counter()
+    matches = index.search(
+        req.embedding,
+        top_k=req.top_k,
+        kinds=req.kinds,
+        godown_id=req.godown_id,
+        authorized_godowns=authorized_godowns,
+        min_score=req.min_score,
+    )
+    return {
+        "matches": matches,
+        "took_ms": round((time.perf_counter() - started) * 1000.0, 3),
+        "index_entries": index.stats()["entries"],
+    }
@@ -14,13 +14,16 @@ import json
 from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from ...core.auth import UserContext, get_current_user
 from ...core.db import get_db
 from ...models.godown import Godown, Camera
 from ...models.event import Alert, Event
 from ...core.pagination import clamp_page_size, set_pagination_headers
+from ...services.alert_stats import clear_godown_alert_stats
+from ...services.snapshot_index import invalidate_snapshots
+from ...services.zone_geometry import invalidate_camera_geometry
 
 
 router = APIRouter(prefix="/api/v1/godowns", tags=["godowns"])
@@ -320,7 +323,7 @@ def delete_godown(
     - All test runs with this godown_id
     - All media directories (live, annotated, snapshots, uploads)
     """
-    from ...models.event import Event, Alert
+    from ...models.event import Event, Alert, AlertEventLink
     from ...models.rule import Rule
     from ...services.test_runs import delete_test_run, list_test_runs
     import shutil
@@ -346,11 +349,14 @@ def delete_godown(
             except Exception:
                 pass  # Continue even if individual test run deletion fails
 
-    # Delete all events
+    # Delete all events; their alert links have no FK cascade (partitioned events).
+    godown_event_ids = select(Event.id).where(Event.godown_id == godown_id)
+    db.query(AlertEventLink).filter(AlertEventLink.event_id.in_(godown_event_ids)).delete(synchronize_session=False)
     db.query(Event).filter(Event.godown_id == godown_id).delete(synchronize_session=False)
     
     # Delete all alerts
     db.query(Alert).filter(Alert.godown_id == godown_id).delete(synchronize_session=False)
+    clear_godown_alert_stats(db, godown_id)
     
     # Delete all rules
     from ...models.rule import Rule
@@ -359,6 +365,8 @@ def delete_godown(
     # Delete the godown (cameras will be cascade deleted)
     db.delete(godown)
     db.commit()
+    invalidate_camera_geometry(godown_id)
+    invalidate_snapshots(godown_id)
 
     # Delete media directories
     data_root = Path(__file__).resolve().parents[3] / "data"
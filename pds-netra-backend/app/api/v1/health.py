@@ -6,6 +6,7 @@ Provides summary and per-godown camera health.
 
 from __future__ import annotations
 
+import os
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List
 
@@ -18,11 +19,18 @@ from ...core.config import settings
 from ...models.godown import Godown, Camera
 from ...models.event import Event
 from ...core.auth import UserContext, get_optional_user
+from ...services.face_index import face_index_stats
+from ...services.mqtt_publisher import publisher_stats
+from ...services.notification_outbox import notification_target_cache_stats
+from ...services.snapshot_index import snapshot_index_stats
+from ...services.watchlist import sync_cache_stats
+from ...services.zone_geometry import zone_geometry_cache_stats
 
 
 router = APIRouter(prefix="/api/v1/health", tags=["health"])
 
 HEALTH_EVENT_TYPES = {"CAMERA_OFFLINE", "CAMERA_TAMPERED", "LOW_LIGHT"}
+HEALTH_STATUS_LOOKBACK_DAYS = int(os.getenv("HEALTH_STATUS_LOOKBACK_DAYS", "30"))
 
 ADMIN_ROLES = {"STATE_ADMIN", "HQ_ADMIN"}
 
@@ -125,9 +133,11 @@ def health_summary(
     # Recent camera status list
     recent_status: List[dict] = []
     # Latest health event per camera (best-effort)
+    # Bounded so partitioned event tables only read the recent months.
+    status_since = datetime.utcnow() - timedelta(days=HEALTH_STATUS_LOOKBACK_DAYS)
     q_latest_base = (
         db.query(Event)
-        .filter(Event.event_type.in_(HEALTH_EVENT_TYPES))
+        .filter(Event.event_type.in_(HEALTH_EVENT_TYPES), Event.timestamp_utc >= status_since)
         .order_by(Event.timestamp_utc.desc())
     )
     q_latest = _filter_by_godown(q_latest_base).limit(50)
@@ -169,12 +179,32 @@ def health_summary(
 def mqtt_health(request: Request) -> dict:
     consumer = getattr(request.app.state, "mqtt_consumer", None)
     if consumer is None:
-        return {"enabled": False, "connected": False, "host": settings.mqtt_broker_host, "port": settings.mqtt_broker_port}
+        return {
+            "enabled": False,
+            "connected": False,
+            "host": settings.mqtt_broker_host,
+            "port": settings.mqtt_broker_port,
+            "publisher": publisher_stats(),
+        }
     return {
         "enabled": True,
         "connected": consumer.is_connected(),
         "host": settings.mqtt_broker_host,
         "port": settings.mqtt_broker_port,
+        "ingest": consumer.ingest_stats(),
+        "publisher": publisher_stats(),
+    }
+
+
+@router.get("/caches")
+def cache_health() -> dict:
+    """Hit/miss counters for the per-process lookup caches."""
+    return {
+        "snapshot_index": snapshot_index_stats(),
+        "zone_geometry": zone_geometry_cache_stats(),
+        "watchlist_sync": sync_cache_stats(),
+        "face_index": face_index_stats(),
+        "notification_targets": notification_target_cache_stats(),
     }
 
 
@@ -18,6 +18,7 @@ from ...schemas.notifications import (
     NotificationEndpointUpdate,
 )
 from ...core.pagination import clamp_page_size, set_pagination_headers
+from ...services.notification_outbox import bump_notification_targets
 
 
 router = APIRouter(prefix="/api/v1/notification", tags=["notification"])
@@ -148,6 +149,7 @@ def create_endpoint(
         is_enabled=payload.is_enabled,
     )
     db.add(endpoint)
+    bump_notification_targets(db)
     db.commit()
     db.refresh(endpoint)
     return endpoint
@@ -208,6 +210,7 @@ def update_endpoint(
     if payload.is_enabled is not None:
         endpoint.is_enabled = payload.is_enabled
     db.add(endpoint)
+    bump_notification_targets(db)
     db.commit()
     db.refresh(endpoint)
     return endpoint
@@ -227,5 +230,6 @@ def delete_endpoint(
         if endpoint.scope != "GODOWN_MANAGER" or endpoint.godown_id not in owned:
             raise HTTPException(status_code=403, detail="Forbidden")
     db.delete(endpoint)
+    bump_notification_targets(db)
     db.commit()
     return {"status": "deleted", "id": endpoint_id}
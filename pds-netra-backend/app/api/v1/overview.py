@@ -11,19 +11,29 @@ from typing import Dict, List
 
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
 
 from ...core.db import get_db
 from ...core.auth import UserContext, get_current_user
 from ...models.godown import Godown, Camera
-from ...models.event import Alert, Event
+from ...models.alert_stats import AlertStatsHourly
+from ...models.event import Event
 from ...models.vehicle_gate_session import VehicleGateSession
 from ...core.pagination import clamp_page_size
+from ...services.alert_stats import hour_bucket
 
 
 router = APIRouter(prefix="/api/v1", tags=["overview"])
 ADMIN_ROLES = {"STATE_ADMIN", "HQ_ADMIN"}
 
+# Stat prefix -> alert type for the 24h/7d counters.
+_WINDOW_COUNTERS = {
+    "after_hours_person": "AFTER_HOURS_PERSON_PRESENCE",
+    "after_hours_vehicle": "AFTER_HOURS_VEHICLE_PRESENCE",
+    "animal_intrusions": "ANIMAL_INTRUSION",
+    "fire_alerts": "FIRE_DETECTED",
+}
+
 
 def _is_admin(user: UserContext) -> bool:
     return (user.role or "").upper() in ADMIN_ROLES
@@ -56,18 +66,6 @@ def overview(
 
     # Core counts
     godowns_monitored = db.query(func.count(Godown.id)).filter(Godown.id.in_(allowed_ids_select)).scalar() or 0
-    open_alerts_critical = (
-        db.query(func.count(Alert.id))
-        .filter(Alert.status == "OPEN", Alert.severity_final == "critical", Alert.godown_id.in_(allowed_ids_select))
-        .scalar()
-        or 0
-    )
-    open_alerts_warning = (
-        db.query(func.count(Alert.id))
-        .filter(Alert.status == "OPEN", Alert.severity_final == "warning", Alert.godown_id.in_(allowed_ids_select))
-        .scalar()
-        or 0
-    )
     open_gate_sessions = (
         db.query(func.count(VehicleGateSession.id))
         .filter(VehicleGateSession.status == "OPEN", VehicleGateSession.godown_id.in_(allowed_ids_select))
@@ -75,115 +73,59 @@ def overview(
         or 0
     )
 
-    # Alerts by type (open alerts)
+    # Alert counters are read from the hourly rollup (alert_stats_hourly), so
+    # the cost scales with godowns x hour buckets rather than with alerts.
     alerts_by_type: Dict[str, int] = {}
+    open_alerts_critical = 0
+    open_alerts_warning = 0
     rows = (
-        db.query(Alert.alert_type, func.count(Alert.id))
-        .filter(Alert.status == "OPEN", Alert.godown_id.in_(allowed_ids_select))
-        .group_by(Alert.alert_type)
+        db.query(AlertStatsHourly.alert_type, AlertStatsHourly.severity, func.sum(AlertStatsHourly.alerts_open))
+        .filter(AlertStatsHourly.alerts_open > 0, AlertStatsHourly.godown_id.in_(allowed_ids_select))
+        .group_by(AlertStatsHourly.alert_type, AlertStatsHourly.severity)
         .all()
     )
-    for alert_type, count in rows:
-        alerts_by_type[alert_type] = int(count)
-
-    # Alerts over time (last 7 days)
-    since = datetime.utcnow() - timedelta(days=7)
-    alerts = (
-        db.query(Alert.start_time)
-        .filter(Alert.start_time >= since, Alert.godown_id.in_(allowed_ids_select))
+    for alert_type, severity, count in rows:
+        count = int(count or 0)
+        if count <= 0:
+            continue
+        alerts_by_type[alert_type] = alerts_by_type.get(alert_type, 0) + count
+        if severity == "critical":
+            open_alerts_critical += count
+        elif severity == "warning":
+            open_alerts_warning += count
+
+    # Alerts over time (last 7 days) and the 24h/7d type counters. Windows are
+    # aligned to the rollup's hour buckets.
+    now = datetime.utcnow()
+    since = hour_bucket(now - timedelta(days=7))
+    since_24h = hour_bucket(now - timedelta(hours=24))
+    rows = (
+        db.query(AlertStatsHourly.bucket_start, AlertStatsHourly.alert_type, func.sum(AlertStatsHourly.alerts_total))
+        .filter(AlertStatsHourly.bucket_start >= since, AlertStatsHourly.godown_id.in_(allowed_ids_select))
+        .group_by(AlertStatsHourly.bucket_start, AlertStatsHourly.alert_type)
         .all()
     )
     counts: Dict[str, int] = {}
-    for (ts,) in alerts:
-        key = ts.strftime("%b %d")
-        counts[key] = counts.get(key, 0) + 1
+    window_stats: Dict[str, int] = {}
+    for name in _WINDOW_COUNTERS:
+        window_stats[f"{name}_7d"] = 0
+        window_stats[f"{name}_24h"] = 0
+    window_names = {alert_type: name for name, alert_type in _WINDOW_COUNTERS.items()}
+    for bucket, alert_type, total in rows:
+        total = int(total or 0)
+        bucket = hour_bucket(bucket)
+        key = bucket.strftime("%b %d")
+        counts[key] = counts.get(key, 0) + total
+        name = window_names.get(alert_type)
+        if name:
+            window_stats[f"{name}_7d"] += total
+            if bucket >= since_24h:
+                window_stats[f"{name}_24h"] += total
+    counts = {k: v for k, v in counts.items() if v}
     alerts_over_time = [{"t": k, "count": v} for k, v in sorted(counts.items())]
 
-    now = datetime.utcnow()
-    since_24h = now - timedelta(hours=24)
-    after_hours_person_24h = (
-        db.query(func.count(Alert.id))
-        .filter(
-            Alert.alert_type == "AFTER_HOURS_PERSON_PRESENCE",
-            Alert.start_time >= since_24h,
-            Alert.godown_id.in_(allowed_ids_select),
-        )
-        .scalar()
-        or 0
-    )
-    after_hours_vehicle_24h = (
-        db.query(func.count(Alert.id))
-        .filter(
-            Alert.alert_type == "AFTER_HOURS_VEHICLE_PRESENCE",
-            Alert.start_time >= since_24h,
-            Alert.godown_id.in_(allowed_ids_select),
-        )
-        .scalar()
-        or 0
-    )
-    after_hours_person_7d = (
-        db.query(func.count(Alert.id))
-        .filter(
-            Alert.alert_type == "AFTER_HOURS_PERSON_PRESENCE",
-            Alert.start_time >= since,
-            Alert.godown_id.in_(allowed_ids_select),
-        )
-        .scalar()
-        or 0
-    )
-    after_hours_vehicle_7d = (
-        db.query(func.count(Alert.id))
-        .filter(
-            Alert.alert_type == "AFTER_HOURS_VEHICLE_PRESENCE",
-            Alert.start_time >= since,
-            Alert.godown_id.in_(allowed_ids_select),
-        )
-        .scalar()
-        or 0
-    )
-
-    animal_intrusions_24h = (
-        db.query(func.count(Alert.id))
-        .filter(
-            Alert.alert_type == "ANIMAL_INTRUSION",
-            Alert.start_time >= since_24h,
-            Alert.godown_id.in_(allowed_ids_select),
-        )
-        .scalar()
-        or 0
-    )
-    animal_intrusions_7d = (
-        db.query(func.count(Alert.id))
-        .filter(
-            Alert.alert_type == "ANIMAL_INTRUSION",
-            Alert.start_time >= since,
-            Alert.godown_id.in_(allowed_ids_select),
-        )
-        .scalar()
-        or 0
-    )
-    fire_alerts_24h = (
-        db.query(func.count(Alert.id))
-        .filter(
-            Alert.alert_type == "FIRE_DETECTED",
-            Alert.start_time >= since_24h,
-            Alert.godown_id.in_(allowed_ids_select),
-        )
-        .scalar()
-        or 0
-    )
-    fire_alerts_7d = (
-        db.query(func.count(Alert.id))
-        .filter(
-            Alert.alert_type == "FIRE_DETECTED",
-            Alert.start_time >= since,
-            Alert.godown_id.in_(allowed_ids_select),
-        )
-        .scalar()
-        or 0
-    )
-
-    # Godown summary cards
+    # Godown summary cards: per-godown metrics come from grouped queries over
+    # the page's godown ids rather than a query set per godown.
     godown_rows = (
         db.query(Godown)
         .filter(Godown.id.in_(allowed_ids_select))
@@ -192,35 +134,48 @@ def overview(
         .limit(page_size)
         .all()
     )
-    godown_items: List[dict] = []
-    for g in godown_rows:
-        cameras_total = db.query(func.count(Camera.id)).filter(Camera.godown_id == g.id).scalar() or 0
-        open_critical = (
-            db.query(func.count(Alert.id))
-            .filter(
-                Alert.godown_id == g.id,
-                Alert.status == "OPEN",
-                Alert.severity_final == "critical",
-            )
-            .scalar()
-            or 0
+    page_ids = [g.id for g in godown_rows]
+    cameras_by_godown: Dict[str, int] = {}
+    open_by_godown: Dict[str, tuple[int, int]] = {}
+    last_event_by_godown: Dict[str, datetime] = {}
+    if page_ids:
+        cameras_by_godown = dict(
+            db.query(Camera.godown_id, func.count(Camera.id))
+            .filter(Camera.godown_id.in_(page_ids))
+            .group_by(Camera.godown_id)
+            .all()
         )
-        open_warning = (
-            db.query(func.count(Alert.id))
-            .filter(
-                Alert.godown_id == g.id,
-                Alert.status == "OPEN",
-                Alert.severity_final == "warning",
+        for godown_id, critical, warning in (
+            db.query(
+                AlertStatsHourly.godown_id,
+                func.sum(case((AlertStatsHourly.severity == "critical", AlertStatsHourly.alerts_open), else_=0)),
+                func.sum(case((AlertStatsHourly.severity == "warning", AlertStatsHourly.alerts_open), else_=0)),
             )
-            .scalar()
-            or 0
-        )
+            .filter(AlertStatsHourly.godown_id.in_(page_ids), AlertStatsHourly.alerts_open > 0)
+            .group_by(AlertStatsHourly.godown_id)
+            .all()
+        ):
+            open_by_godown[godown_id] = (int(critical or 0), int(warning or 0))
+        # Newest event per godown as a correlated ORDER BY ... LIMIT 1, so each
+        # godown is one backward scan of ix_events_godown_ts instead of an
+        # aggregate over every event of the page.
         last_event = (
             db.query(Event.timestamp_utc)
-            .filter(Event.godown_id == g.id)
+            .filter(Event.godown_id == Godown.id)
             .order_by(Event.timestamp_utc.desc())
-            .first()
+            .limit(1)
+            .correlate(Godown)
+            .scalar_subquery()
         )
+        last_event_by_godown = {
+            godown_id: last
+            for godown_id, last in db.query(Godown.id, last_event).filter(Godown.id.in_(page_ids)).all()
+            if last is not None
+        }
+
+    godown_items: List[dict] = []
+    for g in godown_rows:
+        open_critical, open_warning = open_by_godown.get(g.id, (0, 0))
         cameras_offline = 0
         godown_items.append(
             {
@@ -228,11 +183,11 @@ def overview(
                 "name": g.name,
                 "district": g.district,
                 "capacity": None,
-                "cameras_total": cameras_total,
+                "cameras_total": int(cameras_by_godown.get(g.id, 0)),
                 "cameras_offline": cameras_offline,
                 "open_alerts_warning": open_warning,
                 "open_alerts_critical": open_critical,
-                "last_event_time_utc": last_event[0] if last_event else None,
+                "last_event_time_utc": last_event_by_godown.get(g.id),
                 "status": _status_for(open_critical, open_warning, cameras_offline),
             }
         )
@@ -246,14 +201,14 @@ def overview(
             "cameras_with_issues": 0,
             "alerts_by_type": alerts_by_type,
             "alerts_over_time": alerts_over_time,
-            "after_hours_person_24h": after_hours_person_24h,
-            "after_hours_vehicle_24h": after_hours_vehicle_24h,
-            "after_hours_person_7d": after_hours_person_7d,
-            "after_hours_vehicle_7d": after_hours_vehicle_7d,
-            "animal_intrusions_24h": animal_intrusions_24h,
-            "animal_intrusions_7d": animal_intrusions_7d,
-            "fire_alerts_24h": fire_alerts_24h,
-            "fire_alerts_7d": fire_alerts_7d,
+            "after_hours_person_24h": window_stats["after_hours_person_24h"],
+            "after_hours_vehicle_24h": window_stats["after_hours_vehicle_24h"],
+            "after_hours_person_7d": window_stats["after_hours_person_7d"],
+            "after_hours_vehicle_7d": window_stats["after_hours_vehicle_7d"],
+            "animal_intrusions_24h": window_stats["animal_intrusions_24h"],
+            "animal_intrusions_7d": window_stats["animal_intrusions_7d"],
+            "fire_alerts_24h": window_stats["fire_alerts_24h"],
+            "fire_alerts_7d": window_stats["fire_alerts_7d"],
             "open_gate_sessions": open_gate_sessions,
         },
         "godowns": godown_items,
@@ -12,18 +12,20 @@ from typing import Dict, Optional, Tuple
 
 from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from ...core.db import get_db
 from ...core.auth import require_roles, UserContext
 from ...models.event import Alert, Event
+from ...models.alert_stats import AlertStatsHourly
 from ...models.dispatch_issue import DispatchIssue
 from ...models.alert_report import AlertReport
 from ...models.notification_outbox import NotificationOutbox
 from ...schemas.alert_report import AlertReportListItem, AlertReportOut
 from ...schemas.notifications import NotificationDeliveryOut
 from ...services.alert_reports import generate_hq_report
-from ...core.pagination import clamp_page_size, clamp_limit, set_pagination_headers
+from ...core.pagination import clamp_page_size, clamp_limit, paginate_query, set_pagination_headers
 
 
 router = APIRouter(prefix="/api/v1/reports", tags=["reports"])
@@ -35,13 +37,15 @@ def alert_summary(
     db: Session = Depends(get_db),
 ) -> Dict[str, int]:
     """Return a simple count of open alerts by alert_type."""
-    query = db.query(Alert)
+    query = db.query(AlertStatsHourly.alert_type, func.sum(AlertStatsHourly.alerts_open)).filter(
+        AlertStatsHourly.alerts_open > 0
+    )
     if godown_id:
-        query = query.filter(Alert.godown_id == godown_id)
-    query = query.filter(Alert.status == "OPEN")
+        query = query.filter(AlertStatsHourly.godown_id == godown_id)
     counts: Dict[str, int] = {}
-    for alert in query:
-        counts[alert.alert_type] = counts.get(alert.alert_type, 0) + 1
+    for alert_type, count in query.group_by(AlertStatsHourly.alert_type):
+        if count:
+            counts[alert_type] = int(count)
     return counts
 
 
@@ -76,9 +80,7 @@ def _movement_query(
     if date_to:
         query = query.filter(Event.timestamp_utc <= _ensure_utc(date_to))
     if zone_id:
-        # Fallback to python-level filter for JSON to avoid dialect issues
-        events = query.order_by(Event.timestamp_utc.asc()).all()
-        return [e for e in events if (e.meta or {}).get("zone_id") == zone_id]
+        query = query.filter(Event.zone_id == zone_id)
     return query.order_by(Event.timestamp_utc.asc()).all()
 
 
@@ -168,14 +170,9 @@ def _find_first_movement(db: Session, issue: DispatchIssue) -> Optional[Event]:
     )
     if issue.camera_id:
         query = query.filter(Event.camera_id == issue.camera_id)
-    query = query.order_by(Event.timestamp_utc.asc())
-    if not issue.zone_id:
-        return query.first()
-    for event in query.yield_per(200):
-        meta = event.meta or {}
-        if meta.get("zone_id") == issue.zone_id:
-            return event
-    return None
+    if issue.zone_id:
+        query = query.filter(Event.zone_id == issue.zone_id)
+    return query.order_by(Event.timestamp_utc.asc()).first()
 
 
 def _count_movement_24h(db: Session, issue: DispatchIssue) -> int:
@@ -189,14 +186,9 @@ def _count_movement_24h(db: Session, issue: DispatchIssue) -> int:
     )
     if issue.camera_id:
         query = query.filter(Event.camera_id == issue.camera_id)
-    if not issue.zone_id:
-        return query.count()
-    count = 0
-    for event in query.yield_per(200):
-        meta = event.meta or {}
-        if meta.get("zone_id") == issue.zone_id:
-            count += 1
-    return count
+    if issue.zone_id:
+        query = query.filter(Event.zone_id == issue.zone_id)
+    return query.count()
 
 
 @router.get("/dispatch-trace")
@@ -391,6 +383,8 @@ def get_hq_report_deliveries(
     response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1),
+    cursor: Optional[str] = Query(None),
+    count_mode: Optional[str] = Query(None, pattern="^(exact|estimated|none)$"),
     db: Session = Depends(get_db),
     user: UserContext = Depends(require_roles("STATE_ADMIN", "HQ_ADMIN", "GODOWN_MANAGER", "USER")),
 ):
@@ -408,14 +402,17 @@ def get_hq_report_deliveries(
         db.query(NotificationOutbox)
         .filter(NotificationOutbox.report_id == report.id)
     )
-    total = base_query.count()
-    rows = (
-        base_query.order_by(NotificationOutbox.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    rows, total, next_cursor = paginate_query(
+        db,
+        base_query,
+        keys=(NotificationOutbox.created_at, NotificationOutbox.id),
+        key_of=lambda row: (row.created_at, row.id),
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        count_mode=count_mode,
     )
-    set_pagination_headers(response, total=total, page=page, page_size=page_size)
+    set_pagination_headers(response, total=total, page=page, page_size=page_size, next_cursor=next_cursor)
     return rows
 
 
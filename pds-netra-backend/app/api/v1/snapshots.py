@@ -5,6 +5,7 @@ import logging
 from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from ...core.auth import get_current_user_or_authorized_users_service
+from ...services.snapshot_index import record_snapshot
 
 router = APIRouter(prefix="/api/v1/snapshots", tags=["snapshots"])
 logger = logging.getLogger("snapshots")
@@ -42,6 +43,7 @@ async def upload_snapshot(
         target_dir.mkdir(parents=True, exist_ok=True)
         content = await file.read()
         target_path.write_bytes(content)
+        record_snapshot(target_path)
         
         logger.info("Snapshot uploaded: %s/%s/%s/%s", godown_id, camera_id, date_str, filename)
         
@@ -26,6 +26,7 @@ from ...services.test_runs import (
 from ...core.db import SessionLocal
 from ...models.godown import Camera, Godown
 from ...models.event import Alert
+from ...services.incident_lifecycle import mark_alert_closed
 from ...core.pagination import clamp_page_size
 from ...core.request_limits import enforce_upload_limit, copy_upload_file
 
@@ -162,15 +163,17 @@ async def upload_test_run(
     _cleanup_media(godown_id, camera_id, keep_run_id=meta.get("run_id"))
     try:
         with SessionLocal() as db:
-            (
+            alerts = (
                 db.query(Alert)
                 .filter(
                     Alert.status == "OPEN",
                     Alert.godown_id == godown_id,
                     Alert.camera_id == camera_id,
                 )
-                .update({"status": "CLOSED"})
+                .all()
             )
+            for alert in alerts:
+                mark_alert_closed(alert)
             db.commit()
     except Exception:
         pass
@@ -283,7 +286,7 @@ def activate_run(run_id: str, user: UserContext = Depends(get_current_user)) ->
     )
     try:
         with SessionLocal() as db:
-            (
+            alerts = (
                 db.query(Alert)
                 .filter(
                     Alert.status == "OPEN",
@@ -291,8 +294,10 @@ def activate_run(run_id: str, user: UserContext = Depends(get_current_user)) ->
                     Alert.godown_id == run["godown_id"],
                     Alert.camera_id == run["camera_id"],
                 )
-                .update({"status": "CLOSED"})
+                .all()
             )
+            for alert in alerts:
+                mark_alert_closed(alert)
             db.commit()
     except Exception:
         pass
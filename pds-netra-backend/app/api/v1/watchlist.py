@@ -7,7 +7,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional, List, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Query, Response, UploadFile
 from sqlalchemy.orm import Session
 
 from ...core.db import get_db
@@ -19,6 +19,8 @@ from ...schemas.watchlist import (
     FaceMatchEventOut,
 )
 from ...services import watchlist as watchlist_service
+from ...services.config_version import etag_matches
+from ...services.face_index_export import FACE_INDEX_MEDIA_TYPE
 from ...core.pagination import clamp_page_size
 from ...core.request_limits import enforce_upload_limit, read_upload_bytes_sync
 
@@ -182,61 +184,93 @@ def list_matches(
         "page_size": page_size,
     }
 
+def _sync_response(
+    db: Session,
+    response: Response,
+    *,
+    page: int,
+    page_size: int,
+    since: Optional[int],
+    if_none_match: Optional[str],
+    cursor: Optional[str] = None,
+    export_format: str = "json",
+    dtype: str = "float32",
+) -> Union[dict, Response]:
+    payload = None
+    page_size = clamp_page_size(page_size)
+    if since is not None:
+        payload = watchlist_service.build_sync_delta(db, since=since, page_size=page_size, cursor=cursor)
+    if payload is None:
+        payload = watchlist_service.build_sync_payload(db, page=page, page_size=page_size)
+    binary = export_format == "binary"
+    etag = f'"{payload["checksum"]}-{dtype}"' if binary else f'"{payload["checksum"]}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    if binary:
+        body = watchlist_service.build_sync_export(db, payload, dtype=dtype)
+        return Response(content=body, media_type=FACE_INDEX_MEDIA_TYPE, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return payload
+
+
 @router.get("/active")
 def active_watchlist(
+    response: Response,
     godown_id: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1),
+    since: Optional[int] = Query(None, ge=0),
+    cursor: Optional[str] = Query(None),
+    export_format: str = Query("json", alias="format", pattern="^(json|binary)$"),
+    dtype: str = Query("float32", pattern="^(float32|float16)$"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-) -> dict:
+):
     """
     Edge expects: GET /api/v1/watchlist/active?godown_id=GDN_001
     For compatibility, serve the same payload as /sync.
     godown_id is currently ignored because watchlist is global in DB.
     """
-    page_size = clamp_page_size(page_size)
-
-    payload = watchlist_service.build_sync_payload(db)
-
-    # apply same paging logic as /sync (keeps response stable)
-    items = payload.get("items") if isinstance(payload, dict) else None
-    if isinstance(items, list):
-        total = len(items)
-        start = max((page - 1) * page_size, 0)
-        end = start + page_size
-        page_items = items[start:end]
-        payload["items"] = page_items
-        payload["total"] = total
-        payload["page"] = page
-        payload["page_size"] = page_size
-        try:
-            payload["checksum"] = watchlist_service._checksum_payload(page_items)  # type: ignore[attr-defined]
-        except Exception:
-            pass
-
-    return payload
+    return _sync_response(
+        db,
+        response,
+        page=page,
+        page_size=page_size,
+        since=since,
+        if_none_match=if_none_match,
+        cursor=cursor,
+        export_format=export_format,
+        dtype=dtype,
+    )
 
 
 @router.get("/sync")
 def sync_watchlist(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1),
+    since: Optional[int] = Query(None, ge=0),
+    cursor: Optional[str] = Query(None),
+    export_format: str = Query("json", alias="format", pattern="^(json|binary)$"),
+    dtype: str = Query("float32", pattern="^(float32|float16)$"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-) -> dict:
-    page_size = clamp_page_size(page_size)
-    payload = watchlist_service.build_sync_payload(db)
-    items = payload.get("items") if isinstance(payload, dict) else None
-    if isinstance(items, list):
-        total = len(items)
-        start = max((page - 1) * page_size, 0)
-        end = start + page_size
-        page_items = items[start:end]
-        payload["items"] = page_items
-        payload["total"] = total
-        payload["page"] = page
-        payload["page_size"] = page_size
-        try:
-            payload["checksum"] = watchlist_service._checksum_payload(page_items)  # type: ignore[attr-defined]
-        except Exception:
-            pass
-    return payload
+):
+    """
+    Paged full snapshot of ACTIVE persons, or with ``since=<version>`` only the
+    persons upserted/deleted after that version, ``page_size`` at a time
+    (follow ``next_cursor`` with ``cursor``). The response ``ETag`` is the
+    content checksum; repeat it in ``If-None-Match`` to get a 304. With
+    ``format=binary`` the embeddings are sent as a packed face-index export.
+    """
+    return _sync_response(
+        db,
+        response,
+        page=page,
+        page_size=page_size,
+        since=since,
+        if_none_match=if_none_match,
+        cursor=cursor,
+        export_format=export_format,
+        dtype=dtype,
+    )
@@ -15,6 +15,7 @@ from ...core.auth import UserContext, get_current_user
 from ...models.zone import Zone
 from ...models.godown import Godown
 from ...services.mqtt_publisher import publish_zones_config_changed
+from ...services.zone_geometry import invalidate_camera_geometry
 from ...schemas.zone import ZoneCreate, ZoneOut, ZoneUpdate
 from ...core.pagination import clamp_page_size
 
@@ -151,6 +152,7 @@ def create_zone(
     db.commit()
     db.refresh(zone)
 
+    invalidate_camera_geometry(zone.godown_id, zone.camera_id)
     publish_zones_config_changed(zone.godown_id, zone.camera_id)
 
     return ZoneOut.model_validate(zone)
@@ -180,6 +182,7 @@ def update_zone(
     db.commit()
     db.refresh(zone)
 
+    invalidate_camera_geometry(zone.godown_id, zone.camera_id)
     publish_zones_config_changed(zone.godown_id, zone.camera_id)
 
     return ZoneOut.model_validate(zone)
@@ -200,6 +203,7 @@ def delete_zone(
     db.delete(zone)
     db.commit()
 
+    invalidate_camera_geometry(godown_id, camera_id)
     publish_zones_config_changed(godown_id, camera_id)
 
     return {"status": "deleted", "id": zone_id}
@@ -9,8 +9,11 @@ context manager is provided to get a session in synchronous code.
 from __future__ import annotations
 
 import os
+from contextlib import contextmanager
+from typing import Iterator
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from .config import settings
 
@@ -56,3 +59,36 @@ class SessionContext:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.db.close()
+
+
+_UOW_DEPTH_KEY = "pds_uow_depth"
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """
+    Run a block as a single transaction that commits exactly once.
+
+    The outermost call commits on success (rolls back on error). Nested
+    calls run inside a SAVEPOINT so a failing inner block can be discarded
+    without aborting the outer transaction.
+    """
+    depth = db.info.get(_UOW_DEPTH_KEY, 0)
+    if depth > 0:
+        db.info[_UOW_DEPTH_KEY] = depth + 1
+        try:
+            with db.begin_nested():
+                yield db
+        finally:
+            db.info[_UOW_DEPTH_KEY] = depth
+        return
+
+    db.info[_UOW_DEPTH_KEY] = 1
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.info.pop(_UOW_DEPTH_KEY, None)
@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
+import base64
+import json
 import os
-from typing import Optional
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence
 
-from fastapi import Response
+from fastapi import HTTPException, Response
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query, Session
 
 
 DEFAULT_PAGE_SIZE = 50
@@ -43,6 +48,7 @@ def set_pagination_headers(
     total: Optional[int],
     page: int,
     page_size: int,
+    next_cursor: Optional[str] = None,
 ) -> None:
     if not response:
         return
@@ -50,3 +56,124 @@ def set_pagination_headers(
         response.headers["X-Total-Count"] = str(total)
     response.headers["X-Page"] = str(page)
     response.headers["X-Page-Size"] = str(page_size)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+
+def estimate_count(db: Session, query: Query) -> Optional[int]:
+    """
+    Planner row estimate for ``query`` (PostgreSQL only).
+
+    Returns None when no estimate is available so callers can fall back to
+    an exact count.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    compiled = query.order_by(None).statement.compile(dialect=bind.dialect)
+    try:
+        with db.begin_nested():
+            raw = db.connection().exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+            ).scalar()
+    except Exception:
+        return None
+    plan = json.loads(raw) if isinstance(raw, str) else raw
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def count_rows(db: Session, query: Query, mode: str = "exact") -> Optional[int]:
+    """
+    Total for a list endpoint: ``exact`` (COUNT), ``estimated`` or ``none``.
+
+    ``query`` should select a single narrow column (e.g. the primary key);
+    ordering is dropped before counting.
+    """
+    mode = (mode or "exact").lower()
+    if mode == "none":
+        return None
+    if mode == "estimated":
+        estimate = estimate_count(db, query)
+        if estimate is not None:
+            return estimate
+    subquery = query.order_by(None).subquery()
+    return db.query(func.count()).select_from(subquery).scalar() or 0
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque, URL-safe cursor for a keyset position."""
+    packed = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(packed, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        packed = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(packed, list) or len(packed) != size:
+            raise ValueError("cursor size")
+        return [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v for v in packed]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(
+    query: Query,
+    keys: Sequence[Any],
+    cursor: Optional[str],
+    limit: int,
+    key_of: Callable[[Any], Sequence[Any]],
+) -> tuple[list[Any], Optional[str]]:
+    """
+    Fetch one page ordered by ``keys`` descending, starting after ``cursor``.
+
+    ``keys`` must end with a unique column (normally the primary key) so the
+    order is total. An empty cursor starts from the newest row. Returns the
+    rows and the cursor for the next page (None on the last page). When an
+    index covers ``keys`` in order (e.g. ``ix_alerts_recency_id`` for the
+    alert listing), each page is an index range scan and cost does not grow
+    with depth; without one every page sorts the filtered rows.
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        query = query.filter(tuple_(*keys) < tuple_(*values))
+    rows = query.order_by(*(key.desc() for key in keys)).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key_of(rows[-1]))
+
+
+def paginate_query(
+    db: Session,
+    query: Query,
+    *,
+    keys: Sequence[Any],
+    key_of: Callable[[Any], Sequence[Any]],
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    count_mode: Optional[str] = None,
+) -> tuple[list[Any], Optional[int], Optional[str]]:
+    """
+    Page through ``query`` by offset or, when ``cursor`` is given, by keyset.
+
+    Offset pages default to an exact total; cursor pages default to no total
+    so infinite scroll stays constant cost. Returns (rows, total, next_cursor).
+    """
+    keyset = cursor is not None
+    total = count_rows(db, query.with_entities(keys[-1]), count_mode or ("none" if keyset else "exact"))
+    if keyset:
+        rows, next_cursor = keyset_page(query, keys, cursor, page_size, key_of)
+        return rows, total, next_cursor
+    rows = (
+        query.order_by(*(key.desc() for key in keys))
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+    return rows, total, None
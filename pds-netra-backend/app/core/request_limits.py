@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+import io
 import os
-from typing import Optional
+from typing import IO, Optional
 
 from fastapi import HTTPException, Request, UploadFile
 
@@ -81,3 +82,38 @@ def copy_upload_file(upload: UploadFile, dest, *, max_bytes: Optional[int] = Non
             raise HTTPException(status_code=413, detail="Upload too large")
         dest.write(chunk)
     return copied
+
+
+class _BoundedReader(io.RawIOBase):
+    """Binary reader that raises 413 once more than ``limit`` bytes are read."""
+
+    def __init__(self, raw: IO[bytes], limit: int) -> None:
+        self._raw = raw
+        self._limit = limit
+        self._read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        if not data:
+            return 0
+        size = len(data)
+        self._read += size
+        if self._read > self._limit:
+            raise HTTPException(status_code=413, detail="Upload too large")
+        buffer[:size] = data
+        return size
+
+
+def open_upload_text(
+    upload: UploadFile,
+    *,
+    max_bytes: Optional[int] = None,
+    encoding: str = "utf-8-sig",
+) -> io.TextIOWrapper:
+    """Stream an upload as text without buffering the whole body in memory."""
+    limit = max_bytes or _max_upload_bytes()
+    reader = io.BufferedReader(_BoundedReader(upload.file, limit))
+    return io.TextIOWrapper(reader, encoding=encoding, newline="")
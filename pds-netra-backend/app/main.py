@@ -27,8 +27,11 @@ from .services.rule_seed import seed_rules
 from .services.auth_seed import seed_admin_user
 from .services.live_frames import enforce_single_live_frame
 from .services.mqtt_consumer import MQTTConsumer
+from .services.mqtt_publisher import shutdown_publisher
 from .services.dispatch_watchdog import run_dispatch_watchdog
 from .services.dispatch_plan_sync import run_dispatch_plan_sync
+from .services.alert_stats import register_alert_stats_listener
+from .services.config_version import register_config_version_listener
 from .scripts.run_migrations import run_migrations_to_head
 
 from .api import api_router
@@ -38,6 +41,8 @@ from .core.errors import log_exception
 
 def create_app() -> FastAPI:
     app = FastAPI(title="PDS Netra Backend", version="0.1.0")
+    register_alert_stats_listener(SessionLocal)
+    register_config_version_listener(SessionLocal)
     # Include API routers
     app.include_router(api_router)
     default_data_root = Path("/opt/app/data")
@@ -204,6 +209,7 @@ def create_app() -> FastAPI:
         consumer = getattr(app.state, "mqtt_consumer", None)
         if consumer:
             consumer.stop()
+        shutdown_publisher()
         stop_event = getattr(app.state, "dispatch_watchdog_stop", None)
         if stop_event:
             stop_event.set()
@@ -31,17 +31,24 @@ from .rule import Rule  # noqa: E402,F401
 from .alert_action import AlertAction  # noqa: E402,F401
 from .after_hours_policy import AfterHoursPolicy  # noqa: E402,F401
 from .after_hours_policy_audit import AfterHoursPolicyAudit  # noqa: E402,F401
-from .watchlist import WatchlistPerson, WatchlistPersonImage, WatchlistPersonEmbedding  # noqa: E402,F401
+from .watchlist import (  # noqa: E402,F401
+    WatchlistPerson,
+    WatchlistPersonImage,
+    WatchlistPersonEmbedding,
+    WatchlistTombstone,
+)
 from .face_match_event import FaceMatchEvent  # noqa: E402,F401
 from .notification_recipient import NotificationRecipient  # noqa: E402,F401
 from .notification_endpoint import NotificationEndpoint  # noqa: E402,F401
-from .notification_outbox import NotificationOutbox  # noqa: E402,F401
+from .notification_outbox import AlertNotificationRequest, NotificationOutbox  # noqa: E402,F401
 from .alert_report import AlertReport  # noqa: E402,F401
 from .vehicle_gate_session import VehicleGateSession  # noqa: E402,F401
 from .app_user import AppUser  # noqa: E402,F401
 from .authorized_user import AuthorizedUser  # noqa: E402,F401
 from .godown import Godown, Camera  # noqa: E402,F401
 from .event import Event, Alert, AlertEventLink  # noqa: E402,F401
+from .alert_stats import AlertStatsHourly  # noqa: E402,F401
+from .config_version import ConfigVersion  # noqa: E402,F401
 from .dispatch_issue import DispatchIssue  # noqa: E402,F401
 from .anpr_event import AnprEvent
 from .anpr_vehicle import AnprVehicle  # noqa: E402,F401
@@ -62,6 +69,7 @@ __all__ = [
     "AlertEventLink",
     "AlertAction",
     "AlertReport",
+    "AlertStatsHourly",
     "AnprEvent",
     "AnprVehicle",
     "AnprDailyPlan",
@@ -71,16 +79,19 @@ __all__ = [
     "WatchlistPerson",
     "WatchlistPersonImage",
     "WatchlistPersonEmbedding",
+    "WatchlistTombstone",
     "FaceMatchEvent",
 
     # Notifications
     "NotificationRecipient",
     "NotificationEndpoint",
     "NotificationOutbox",
+    "AlertNotificationRequest",
 
     # Godown / Camera
     "Godown",
     "Camera",
+    "ConfigVersion",
 
     # Vehicle
     "VehicleGateSession",
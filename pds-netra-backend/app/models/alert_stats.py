@@ -0,0 +1,29 @@
+"""
+Hourly alert rollup used by dashboard counters.
+
+One row per (godown, alert type, severity, hour of ``Alert.start_time``).
+``alerts_total`` counts alerts that started in the hour and ``alerts_open``
+counts those still in OPEN status. Rows are maintained incrementally on
+flush (see ``services.alert_stats``) and rebuilt by the worker's
+reconciliation job.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class AlertStatsHourly(Base):
+    __tablename__ = "alert_stats_hourly"
+
+    godown_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    alert_type: Mapped[str] = mapped_column(String(64), primary_key=True)
+    severity: Mapped[str] = mapped_column(String(16), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, index=True)
+    alerts_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    alerts_open: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
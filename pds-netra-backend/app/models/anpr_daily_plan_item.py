@@ -7,7 +7,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, time
 
-from sqlalchemy import DateTime, ForeignKey, String, Time
+from sqlalchemy import DateTime, ForeignKey, Index, String, Time
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
@@ -15,6 +15,7 @@ from . import Base
 
 class AnprDailyPlanItem(Base):
     __tablename__ = "anpr_daily_plan_items"
+    __table_args__ = (Index("ix_anpr_daily_plan_items_plan_plate", "plan_id", "plate_norm", unique=True),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     plan_id: Mapped[str] = mapped_column(String(36), ForeignKey("anpr_daily_plans.id"), index=True)
@@ -10,7 +10,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, String
+from sqlalchemy import Boolean, DateTime, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from . import Base
@@ -18,6 +18,7 @@ from . import Base
 
 class AnprVehicle(Base):
     __tablename__ = "anpr_vehicles"
+    __table_args__ = (Index("ix_anpr_vehicles_godown_plate", "godown_id", "plate_norm", unique=True),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     godown_id: Mapped[str] = mapped_column(String(64), index=True)
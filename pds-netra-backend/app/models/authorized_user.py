@@ -9,10 +9,11 @@ the edge face recognition system.
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import Column, String, ForeignKey, Boolean, DateTime, JSON
+from sqlalchemy import Column, String, ForeignKey, Boolean, DateTime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
+from .types import PackedEmbedding
 
 
 class AuthorizedUser(Base):
@@ -25,7 +26,7 @@ class AuthorizedUser(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    embedding: Mapped[list[float] | None] = mapped_column(JSON, nullable=True)
+    embedding: Mapped[list[float] | None] = mapped_column("embedding_packed", PackedEmbedding(), nullable=True)
     embedding_version: Mapped[str | None] = mapped_column(String(64), nullable=True)
     embedding_hash: Mapped[str | None] = mapped_column(String(128), nullable=True)
     embedding_generated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
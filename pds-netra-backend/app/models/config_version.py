@@ -0,0 +1,27 @@
+"""
+Persisted edge configuration version counters.
+
+One row per (godown, resource kind). ``version`` only ever increases and is
+bumped in the same transaction as the config write (see
+``services.config_version``), so every backend process reports the same
+value and it survives restarts. Resources that are not scoped to a godown
+(the watchlist) use ``godown_id = ""``.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class ConfigVersion(Base):
+    __tablename__ = "config_versions"
+
+    godown_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
@@ -11,15 +11,53 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, JSON, Enum, Boolean
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from typing import Any, Optional
+
+from sqlalchemy import Column, DDL, String, Integer, ForeignKey, DateTime, JSON, Enum, Boolean, Index, event, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from sqlalchemy.dialects.postgresql import UUID
 
 from . import Base
 
 
+# Meta keys copied into indexed columns; values longer than the column are cut.
+PROMOTED_META_LENGTH = 64
+
+
+def _meta_str(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    text = str(value).strip()
+    return text[:PROMOTED_META_LENGTH] or None
+
+
+def normalize_plate(text: Any) -> Optional[str]:
+    if not text:
+        return None
+    out = "".join(ch for ch in str(text).upper() if ch.isalnum())
+    return out[:PROMOTED_META_LENGTH] or None
+
+
+def promoted_event_columns(meta: Optional[dict]) -> dict[str, Optional[str]]:
+    """Derive the indexed lookup columns of an event from its ``meta``."""
+    meta = meta if isinstance(meta, dict) else {}
+    extra = meta.get("extra") if isinstance(meta.get("extra"), dict) else {}
+    return {
+        "zone_id": _meta_str(meta.get("zone_id")),
+        "plate_norm": normalize_plate(meta.get("plate_norm") or meta.get("plate_text")),
+        "person_id": _meta_str(meta.get("person_id") or extra.get("person_id")),
+        "movement_type": _meta_str(meta.get("movement_type")),
+        "run_id": _meta_str(extra.get("run_id") or meta.get("run_id")),
+    }
+
+
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_godown_type_zone_ts", "godown_id", "event_type", "zone_id", "timestamp_utc"),
+        # Latest event per godown (overview cards).
+        Index("ix_events_godown_ts", "godown_id", "timestamp_utc"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     godown_id: Mapped[str] = mapped_column(String(64), index=True)
@@ -33,33 +71,85 @@ class Event(Base):
     image_url: Mapped[str | None] = mapped_column(String, nullable=True)
     clip_url: Mapped[str | None] = mapped_column(String, nullable=True)
     meta: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # Copies of hot meta keys, kept in sync by ``_sync_promoted_meta``.
+    zone_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    plate_norm: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    person_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    movement_type: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    run_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
 
     alert_events: Mapped[list[AlertEventLink]] = relationship(
-        "AlertEventLink", back_populates="event", cascade="all, delete-orphan"
+        "AlertEventLink",
+        primaryjoin="Event.id == foreign(AlertEventLink.event_id)",
+        back_populates="event",
+        cascade="all, delete-orphan",
     )
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
+    @validates("meta")
+    def _sync_promoted_meta(self, key: str, meta: dict) -> dict:
+        for column, value in promoted_event_columns(meta).items():
+            setattr(self, column, value)
+        return meta
+
+
+# PostgreSQL keys events on (id, timestamp_utc), the layout migration
+# 20260401_01 partitions by month; SQLite keeps the single-column key its
+# autoincrement needs. ``id`` stays unique (sequence) and is the ORM identity.
+event.listen(
+    Event.__table__,
+    "after_create",
+    DDL("ALTER TABLE events DROP CONSTRAINT events_pkey, ADD PRIMARY KEY (id, timestamp_utc)").execute_if(
+        dialect="postgresql"
+    ),
+)
+
+
+# Predicate of the partial indexes that only cover live (not yet closed) alerts.
+ACTIVE_ALERT_PREDICATE = "status IN ('OPEN', 'ACK')"
+
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Rule engine / watchlist / gate de-duplication: godown + type + status within a window.
+        Index("ix_alerts_godown_type_status_start", "godown_id", "alert_type", "status", "start_time"),
+        # Camera-scoped de-duplication (fire, animal, after-hours presence).
+        Index("ix_alerts_godown_camera_type_start", "godown_id", "camera_id", "alert_type", "start_time"),
+        # Auto-close sweep in the worker; only live alerts are indexed.
+        Index(
+            "ix_alerts_active_type_last_detection",
+            "alert_type",
+            "last_detection_at",
+            "start_time",
+            postgresql_where=text(ACTIVE_ALERT_PREDICATE),
+            sqlite_where=text(ACTIVE_ALERT_PREDICATE),
+        ),
+        # Keyset order of the alert listing: (coalesce(end_time, start_time), id).
+        Index("ix_alerts_recency_id", text("coalesce(end_time, start_time)"), "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     public_id: Mapped[str] = mapped_column(String(36), unique=True, index=True, default=lambda: str(uuid.uuid4()))
-    godown_id: Mapped[str] = mapped_column(String(64), index=True)
+    godown_id: Mapped[str] = mapped_column(String(64), index=True, active_history=True)
     camera_id: Mapped[str | None] = mapped_column(String(64), index=True, nullable=True)
-    alert_type: Mapped[str] = mapped_column(String(64), index=True)
-    severity_final: Mapped[str] = mapped_column(String(16))
-    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    alert_type: Mapped[str] = mapped_column(String(64), index=True, active_history=True)
+    severity_final: Mapped[str] = mapped_column(String(16), active_history=True)
+    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True, active_history=True)
     first_detected_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     last_detection_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     end_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     closed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
-    status: Mapped[str] = mapped_column(String(16), default="OPEN")  # OPEN, ACK, or CLOSED
+    # active_history keeps the pre-change values of rollup columns available
+    # to the alert_stats flush listener even when the row was expired.
+    status: Mapped[str] = mapped_column(String(16), default="OPEN", active_history=True)  # OPEN, ACK, or CLOSED
     title: Mapped[str | None] = mapped_column(String(256), nullable=True)
     summary: Mapped[str | None] = mapped_column(String, nullable=True)
     zone_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
     extra: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Copy of ``extra["person_id"]`` for blacklist alert de-duplication.
+    person_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     acknowledged_by: Mapped[str | None] = mapped_column(String(128), nullable=True)
     acknowledged_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     ack_token_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
@@ -76,11 +166,27 @@ class Alert(Base):
     last_call_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     last_email_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
+    @validates("extra")
+    def _sync_person_id(self, key: str, extra: dict | None) -> dict | None:
+        self.person_id = _meta_str(extra.get("person_id")) if isinstance(extra, dict) else None
+        return extra
+
 
 class AlertEventLink(Base):
+    """
+    Alert <-> event association.
+
+    ``event_id`` has no foreign key: on PostgreSQL ``events`` is partitioned
+    and its primary key is ``(id, timestamp_utc)``, so ``events.id`` cannot
+    be referenced. Anything that deletes events outside the ORM cascade
+    (bulk deletes, dropped partitions) must delete their link rows too.
+    """
+
     __tablename__ = "alert_event_links"
 
     alert_id: Mapped[int] = mapped_column(Integer, ForeignKey("alerts.id", ondelete="CASCADE"), primary_key=True)
-    event_id: Mapped[int] = mapped_column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
-    event: Mapped[Event] = relationship("Event", back_populates="alert_events")
+    event_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    event: Mapped[Event] = relationship(
+        "Event", primaryjoin="foreign(AlertEventLink.event_id) == Event.id", back_populates="alert_events"
+    )
     alert: Mapped[Alert] = relationship("Alert", back_populates="events")
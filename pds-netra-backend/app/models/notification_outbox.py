@@ -35,9 +35,37 @@ class NotificationOutbox(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Claim lease: the worker sending this row and when its claim lapses (reclaimable after that).
+    claimed_by: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     __table_args__ = (
         UniqueConstraint("alert_id", "channel", "target", name="uq_notification_outbox_alert_channel_target"),
         UniqueConstraint("report_id", "channel", "target", name="uq_notification_outbox_report_channel_target"),
         Index("ix_notification_outbox_status_next_retry", "status", "next_retry_at"),
     )
+
+
+class AlertNotificationRequest(Base):
+    """
+    "Alert created" marker written in the alert's own transaction.
+
+    The worker fans each request out into per-target ``NotificationOutbox``
+    rows, so ingest never renders content or resolves recipients.
+    """
+
+    __tablename__ = "alert_notification_requests"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    alert_id: Mapped[str] = mapped_column(String(36), ForeignKey("alerts.public_id", ondelete="CASCADE"), index=True)
+    # events.id of the triggering event (no FK: events is partitioned on Postgres)
+    event_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    status: Mapped[str] = mapped_column(String(16), default="PENDING")  # PENDING | DONE | FAILED
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_alert_notification_requests_status_created", "status", "created_at"),
+    )
@@ -0,0 +1,69 @@
+"""
+Custom column types shared by ORM models.
+
+``PackedEmbedding`` stores a face embedding as a small binary header followed
+by little-endian float32 (or float16) values instead of a JSON array of
+floats. Attributes still read and write ``list[float]``, so callers are
+unchanged; bulk exports can select the raw bytes and hand them to NumPy
+without any text parsing.
+
+Blob layout (8-byte header)::
+
+    b"PE" | format version (1 byte) | dtype code (b"f" float32, b"e" float16) | dim (uint32 LE) | data
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+
+EMBEDDING_MAGIC = b"PE"
+EMBEDDING_FORMAT_VERSION = 1
+EMBEDDING_HEADER = struct.Struct("<2sBcI")
+_DTYPES = {b"f": np.dtype("<f4"), b"e": np.dtype("<f2")}
+_CODES = {"float32": b"f", "float16": b"e"}
+
+
+def storage_dtype() -> str:
+    value = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32").strip().lower()
+    return value if value in _CODES else "float32"
+
+
+def pack_embedding(values: Iterable[float], dtype: Optional[str] = None) -> bytes:
+    code = _CODES[dtype or storage_dtype()]
+    array = np.asarray(list(values) if not isinstance(values, np.ndarray) else values, dtype=_DTYPES[code])
+    array = array.reshape(-1)
+    return EMBEDDING_HEADER.pack(EMBEDDING_MAGIC, EMBEDDING_FORMAT_VERSION, code, array.size) + array.tobytes()
+
+
+def unpack_embedding(blob: bytes) -> np.ndarray:
+    """Return a read-only view over the packed values (no copy)."""
+    magic, version, code, dim = EMBEDDING_HEADER.unpack_from(blob)
+    if magic != EMBEDDING_MAGIC or version != EMBEDDING_FORMAT_VERSION or code not in _DTYPES:
+        raise ValueError("Unsupported packed embedding header")
+    return np.frombuffer(blob, dtype=_DTYPES[code], count=dim, offset=EMBEDDING_HEADER.size)
+
+
+class PackedEmbedding(TypeDecorator):
+    """``list[float]`` on the Python side, packed binary in the database."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value)
+        return pack_embedding(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return unpack_embedding(bytes(value)).astype(float).tolist()
@@ -7,10 +7,11 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, DateTime, ForeignKey, JSON
+from sqlalchemy import BigInteger, String, DateTime, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
+from .types import PackedEmbedding
 
 
 class WatchlistPerson(Base):
@@ -24,6 +25,9 @@ class WatchlistPerson(Base):
     status: Mapped[str] = mapped_column(String(16), default="ACTIVE")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Watchlist config version at which this person (or its images/embeddings)
+    # last changed; drives ``/watchlist/sync?since=`` deltas.
+    sync_version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, index=True)
 
     images: Mapped[list[WatchlistPersonImage]] = relationship(
         "WatchlistPersonImage", back_populates="person", cascade="all, delete-orphan"
@@ -50,9 +54,19 @@ class WatchlistPersonEmbedding(Base):
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     person_id: Mapped[str] = mapped_column(String(36), ForeignKey("watchlist_persons.id", ondelete="CASCADE"))
-    embedding: Mapped[list[float]] = mapped_column(JSON)
+    embedding: Mapped[list[float]] = mapped_column("embedding_packed", PackedEmbedding())
     embedding_version: Mapped[str] = mapped_column(String(64), default="v1")
     embedding_hash: Mapped[str | None] = mapped_column(String(128), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
     person: Mapped[WatchlistPerson] = relationship("WatchlistPerson", back_populates="embeddings")
+
+
+class WatchlistTombstone(Base):
+    """Hard-deleted watchlist person, kept so delta syncs can report the removal."""
+
+    __tablename__ = "watchlist_tombstones"
+
+    person_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    sync_version: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
@@ -73,6 +73,8 @@ class FaceMatchCandidate(BaseModel):
     match_score: float
     is_blacklisted: bool
     blacklist_person_id: Optional[str] = None
+    # Optional probe vector so the backend can re-score the match.
+    embedding: Optional[List[float]] = None
 
 
 class FaceMatchEvidence(BaseModel):
@@ -87,6 +89,14 @@ class FaceMatchPayload(BaseModel):
     evidence: FaceMatchEvidence
 
 
+class FaceSearchRequest(BaseModel):
+    embedding: List[float]
+    top_k: int = Field(5, ge=1, le=100)
+    godown_id: Optional[str] = None
+    kinds: Optional[List[str]] = None
+    min_score: float = Field(0.0, ge=-1.0, le=1.0)
+
+
 class FaceMatchEventIn(BaseModel):
     schema_version: str = Field("1.0")
     event_id: str
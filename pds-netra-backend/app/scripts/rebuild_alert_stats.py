@@ -0,0 +1,23 @@
+"""Rebuild the whole alert_stats_hourly rollup from alerts (manual repair)."""
+
+from __future__ import annotations
+
+import logging
+
+from app.core.db import SessionLocal
+from app.services.alert_stats import rebuild_alert_stats
+
+
+logger = logging.getLogger("scripts.rebuild_alert_stats")
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        written = rebuild_alert_stats(db)
+    logger.info("Alert stats rollup rebuilt rows=%s", written)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
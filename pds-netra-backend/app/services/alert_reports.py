@@ -38,16 +38,17 @@ def _period_range(period: str, now_utc: Optional[datetime.datetime] = None) -> T
     return start_ist.astimezone(datetime.timezone.utc), end_ist.astimezone(datetime.timezone.utc)
 
 
-def _dispatch_delay_counts(alerts: list[Alert]) -> dict:
-    counts: dict[str, int] = {}
-    for alert in alerts:
-        extra = alert.extra if isinstance(alert.extra, dict) else {}
-        threshold = extra.get("threshold_hours")
-        if threshold is None:
-            continue
-        key = str(threshold)
-        counts[key] = counts.get(key, 0) + 1
-    return counts
+def _dispatch_delay_counts(db: Session, period_start, period_end, godown_id: Optional[str]) -> dict:
+    threshold = Alert.extra["threshold_hours"].as_string()
+    q = db.query(threshold, func.count(Alert.id)).filter(
+        Alert.alert_type == "DISPATCH_MOVEMENT_DELAY",
+        Alert.start_time >= period_start,
+        Alert.start_time < period_end,
+        threshold.isnot(None),
+    )
+    if godown_id:
+        q = q.filter(Alert.godown_id == godown_id)
+    return {str(value): int(count) for value, count in q.group_by(threshold).all()}
 
 
 def generate_hq_report(
@@ -74,21 +75,19 @@ def generate_hq_report(
     existing = existing_q.first()
     if existing and not force:
         return existing
-    alerts_q = db.query(Alert).filter(Alert.start_time >= period_start, Alert.start_time < period_end)
-    if godown_id:
-        alerts_q = alerts_q.filter(Alert.godown_id == godown_id)
-    alerts = alerts_q.all()
-
+    # Every figure below is a grouped/filtered aggregate computed in SQL, so
+    # memory stays constant regardless of period length or alert volume.
     alert_counts_q = db.query(Alert.alert_type, func.count(Alert.id)).filter(
         Alert.start_time >= period_start,
         Alert.start_time < period_end,
     )
     if godown_id:
         alert_counts_q = alert_counts_q.filter(Alert.godown_id == godown_id)
-    alert_counts = dict(alert_counts_q.group_by(Alert.alert_type).all())
+    alert_counts = {k: int(v) for k, v in alert_counts_q.group_by(Alert.alert_type).all()}
+    total_alerts = sum(alert_counts.values())
 
     if godown_id:
-        top_godowns = [{"godown_id": godown_id, "count": len(alerts)}]
+        top_godowns = [{"godown_id": godown_id, "count": total_alerts}]
     else:
         godown_counts = (
             db.query(Alert.godown_id, func.count(Alert.id))
@@ -108,19 +107,14 @@ def generate_hq_report(
     if godown_id:
         offline_q = offline_q.filter(Event.godown_id == godown_id)
     offline_count = offline_q.scalar() or 0
-    blackout_count = 0
-    blackout_q = db.query(Event).filter(
+    blackout_q = db.query(func.count(Event.id)).filter(
         Event.timestamp_utc >= period_start,
         Event.timestamp_utc < period_end,
+        func.upper(Event.meta["reason"].as_string()).in_(("SUDDEN_BLACKOUT", "BLACK_FRAME")),
     )
     if godown_id:
         blackout_q = blackout_q.filter(Event.godown_id == godown_id)
-    blackout_events = blackout_q.all()
-    for ev in blackout_events:
-        meta = ev.meta or {}
-        reason = (meta.get("reason") or "").upper() if isinstance(meta, dict) else ""
-        if reason in {"SUDDEN_BLACKOUT", "BLACK_FRAME"}:
-            blackout_count += 1
+    blackout_count = blackout_q.scalar() or 0
 
     open_critical_q = db.query(func.count(Alert.id)).filter(
         Alert.status == "OPEN",
@@ -130,15 +124,14 @@ def generate_hq_report(
         open_critical_q = open_critical_q.filter(Alert.godown_id == godown_id)
     open_critical = open_critical_q.scalar() or 0
 
-    dispatch_alerts = [a for a in alerts if a.alert_type == "DISPATCH_MOVEMENT_DELAY"]
-    dispatch_counts = _dispatch_delay_counts(dispatch_alerts)
+    dispatch_counts = _dispatch_delay_counts(db, period_start, period_end, godown_id)
 
     summary = {
         "period": period,
         "period_start": period_start.isoformat(),
         "period_end": period_end.isoformat(),
         "godown_id": godown_id,
-        "total_alerts": len(alerts),
+        "total_alerts": total_alerts,
         "alerts_by_type": alert_counts,
         "top_godowns": top_godowns,
         "camera_health": {
@@ -163,7 +156,7 @@ def generate_hq_report(
         lines.append(f"Godown: {godown_id}")
     lines.extend(
         [
-            f"Total alerts: {len(alerts)} | Critical open: {open_critical}",
+            f"Total alerts: {total_alerts} | Critical open: {open_critical}",
             f"Top godowns: {top_godown_text}",
             f"Health: offline {offline_count}, blackout {blackout_count}",
             f"Dispatch delays: {dispatch_text}",
@@ -184,7 +177,7 @@ def generate_hq_report(
         f"<h3>HQ {period_label} Alert Report</h3>"
         f"<p><strong>Period:</strong> {period_text}</p>"
         f"{godown_html}"
-        f"<p><strong>Total alerts:</strong> {len(alerts)}</p>"
+        f"<p><strong>Total alerts:</strong> {total_alerts}</p>"
         f"<p><strong>Critical open alerts:</strong> {open_critical}</p>"
         f"<p><strong>Top godowns:</strong> {top_godown_text}</p>"
         f"<p><strong>Camera health:</strong> offline {offline_count}, blackout {blackout_count}</p>"
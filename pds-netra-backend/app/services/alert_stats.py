@@ -0,0 +1,226 @@
+"""
+Incremental maintenance of the ``alert_stats_hourly`` rollup.
+
+Alerts are created and transitioned from many places (rule engine handlers,
+watchlist, dispatch watchdog, gate sessions, the ack/close APIs and the
+worker's auto-close). Rather than instrument each of them, a session
+``after_flush`` listener diffs every flushed ``Alert`` (insert, status or
+severity change, delete) and applies the resulting deltas to the rollup with
+an atomic UPSERT on the same connection, so the rollup commits or rolls back
+together with the alert rows. Bulk ``Query.update``/``delete`` bypasses the
+listener, so callers either go through the ORM or fix the rollup themselves
+(``clear_godown_alert_stats``). ``rebuild_alert_stats`` recomputes rollup
+rows from ``alerts``: the worker periodically reconciles only the recent
+buckets to repair drift, and a full rebuild
+(``python -m app.scripts.rebuild_alert_stats``) is a manual repair tool.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import and_, case, delete, event, func, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models.alert_stats import AlertStatsHourly
+from ..models.event import Alert
+
+
+logger = logging.getLogger("alert_stats")
+
+_KeyT = tuple[str, str, str, datetime.datetime]
+_STATS = AlertStatsHourly.__table__
+
+
+def hour_bucket(ts: datetime.datetime) -> datetime.datetime:
+    """Truncate a timestamp to the start of its UTC hour (naive values are UTC)."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=datetime.timezone.utc)
+    else:
+        ts = ts.astimezone(datetime.timezone.utc)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _contribution(godown_id, alert_type, severity, start_time, status) -> Optional[tuple[_KeyT, int]]:
+    if not godown_id or not alert_type or start_time is None:
+        return None
+    key = (str(godown_id), str(alert_type), str(severity or ""), hour_bucket(start_time))
+    return key, 1 if (status or "OPEN") == "OPEN" else 0
+
+
+_TRACKED = ("godown_id", "alert_type", "severity_final", "start_time", "status")
+
+
+def _previous_values(alert: Alert) -> Optional[tuple]:
+    """Values before this flush, or None when no tracked column changed."""
+    state = inspect(alert)
+    values = []
+    changed = False
+    for attr in _TRACKED:
+        history = state.attrs[attr].history
+        if history.deleted:
+            changed = True
+            values.append(history.deleted[0])
+        else:
+            values.append(getattr(alert, attr))
+    return tuple(values) if changed else None
+
+
+def _collect_deltas(session: Session) -> dict[_KeyT, list[int]]:
+    deltas: dict[_KeyT, list[int]] = defaultdict(lambda: [0, 0])
+
+    def _apply(values: tuple, sign: int) -> None:
+        contribution = _contribution(*values)
+        if contribution is None:
+            return
+        key, is_open = contribution
+        deltas[key][0] += sign
+        deltas[key][1] += sign * is_open
+
+    for obj in session.new:
+        if isinstance(obj, Alert):
+            _apply(tuple(getattr(obj, attr) for attr in _TRACKED), 1)
+    for obj in session.dirty:
+        if not isinstance(obj, Alert):
+            continue
+        previous = _previous_values(obj)
+        if previous is None:
+            continue
+        _apply(previous, -1)
+        _apply(tuple(getattr(obj, attr) for attr in _TRACKED), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Alert):
+            previous = _previous_values(obj) or tuple(getattr(obj, attr) for attr in _TRACKED)
+            _apply(previous, -1)
+    return {key: value for key, value in deltas.items() if value[0] or value[1]}
+
+
+def _insert_for(conn: Connection):
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def apply_alert_stats_deltas(conn: Connection, deltas: dict[_KeyT, list[int]]) -> None:
+    """Add ``[total, open]`` deltas to the rollup rows, creating them as needed."""
+    if not deltas:
+        return
+    rows = [
+        {
+            "godown_id": key[0],
+            "alert_type": key[1],
+            "severity": key[2],
+            "bucket_start": key[3],
+            "alerts_total": total,
+            "alerts_open": open_,
+        }
+        for key, (total, open_) in deltas.items()
+    ]
+    insert = _insert_for(conn)
+    if insert is None:
+        for row in rows:
+            key_filter = and_(
+                _STATS.c.godown_id == row["godown_id"],
+                _STATS.c.alert_type == row["alert_type"],
+                _STATS.c.severity == row["severity"],
+                _STATS.c.bucket_start == row["bucket_start"],
+            )
+            updated = conn.execute(
+                _STATS.update()
+                .where(key_filter)
+                .values(
+                    alerts_total=_STATS.c.alerts_total + row["alerts_total"],
+                    alerts_open=_STATS.c.alerts_open + row["alerts_open"],
+                )
+            )
+            if not updated.rowcount:
+                conn.execute(_STATS.insert().values(**row))
+        return
+    stmt = insert(_STATS).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[_STATS.c.godown_id, _STATS.c.alert_type, _STATS.c.severity, _STATS.c.bucket_start],
+        set_={
+            "alerts_total": _STATS.c.alerts_total + stmt.excluded.alerts_total,
+            "alerts_open": _STATS.c.alerts_open + stmt.excluded.alerts_open,
+        },
+    )
+    conn.execute(stmt)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_alert_stats_deltas(session.connection(), deltas)
+
+
+def register_alert_stats_listener(factory: sessionmaker) -> None:
+    """Keep the rollup current for every session created by ``factory``."""
+    if not event.contains(factory, "after_flush", _after_flush):
+        event.listen(factory, "after_flush", _after_flush)
+
+
+def _hour_expr(db: Session):
+    """``Alert.start_time`` truncated to the hour, in the rollup's ``bucket_start`` representation."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.timezone("UTC", func.date_trunc("hour", func.timezone("UTC", Alert.start_time)))
+    # SQLAlchemy stores SQLite datetimes as "YYYY-MM-DD HH:MM:SS.ffffff" text.
+    return func.strftime("%Y-%m-%d %H:00:00.000000", Alert.start_time)
+
+
+def clear_godown_alert_stats(db: Session, godown_id: str) -> None:
+    """Drop a godown's rollup rows in the caller's transaction (after bulk-deleting its alerts)."""
+    db.execute(delete(_STATS).where(_STATS.c.godown_id == godown_id))
+
+
+def rebuild_alert_stats(db: Session, *, since: Optional[datetime.datetime] = None) -> int:
+    """
+    Recompute the rollup from ``alerts`` with one ``INSERT ... SELECT``.
+
+    With ``since``, only buckets from that hour on are deleted and rebuilt,
+    so the scan and the lock stay proportional to recent traffic; without it
+    the whole table is rebuilt. On Postgres the rollup is locked against
+    writers first, so alerts committed while the rebuild runs wait and apply
+    their deltas on top of the rebuilt rows instead of being lost. Commits;
+    returns the number of rollup rows written.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE alert_stats_hourly IN EXCLUSIVE MODE"))
+    bucket = _hour_expr(db)
+    severity = func.coalesce(Alert.severity_final, "")
+    grouped = (
+        select(
+            Alert.godown_id,
+            Alert.alert_type,
+            severity,
+            bucket,
+            func.count(Alert.id),
+            func.sum(case((Alert.status == "OPEN", 1), else_=0)),
+        )
+        .where(Alert.godown_id.isnot(None), Alert.alert_type.isnot(None), Alert.start_time.isnot(None))
+        .group_by(Alert.godown_id, Alert.alert_type, severity, bucket)
+    )
+    stale = delete(_STATS)
+    if since is not None:
+        # Alerts are bucketed by start_time, so this window owns exactly these rows.
+        first_bucket = hour_bucket(since)
+        grouped = grouped.where(Alert.start_time >= first_bucket)
+        stale = stale.where(_STATS.c.bucket_start >= first_bucket)
+    db.execute(stale)
+    written = db.execute(
+        _STATS.insert().from_select(
+            ["godown_id", "alert_type", "severity", "bucket_start", "alerts_total", "alerts_open"],
+            grouped,
+        )
+    ).rowcount
+    db.commit()
+    logger.info("Alert stats rebuilt rows=%s since=%s", written, since.isoformat() if since else "all")
+    return written
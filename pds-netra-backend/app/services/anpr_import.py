@@ -0,0 +1,253 @@
+"""
+Set-based CSV import for the ANPR vehicle registry and daily plans.
+
+The importers load the existing rows for the godown (or plan) in one query,
+resolve every CSV row against that in-memory map, and write the merged rows
+back as batched ``INSERT ... ON CONFLICT DO UPDATE`` statements keyed on the
+unique ``(godown_id, plate_norm)`` / ``(plan_id, plate_norm)`` indexes.
+Plates repeated within a file fold into the same entity, so the last row
+wins instead of inserting duplicates.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import uuid
+from typing import Any, Optional
+
+from sqlalchemy import Table, and_
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..models.anpr_daily_plan_item import AnprDailyPlanItem
+from ..models.anpr_vehicle import AnprVehicle
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, str(default))))
+    except Exception:
+        return default
+
+
+def _insert_for(conn: Connection):
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+class _BulkUpsert:
+    """Buffer merged rows by plate and write them in UPSERT batches."""
+
+    table: Table
+    conflict_columns: tuple[str, ...]
+    update_columns: tuple[str, ...]
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.batch_size = _env_int("ANPR_IMPORT_BATCH_SIZE", 500)
+        self._known: dict[str, dict[str, Any]] = {}
+        self._pending: dict[str, dict[str, Any]] = {}
+        self.batches = 0
+
+    def _stage(self, plate_norm: str, values: dict[str, Any]) -> None:
+        self._known[plate_norm] = values
+        self._pending[plate_norm] = values
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        rows = [{**values, "created_at": now, "updated_at": now} for values in self._pending.values()]
+        self._pending = {}
+        conn = self.db.connection()
+        insert = _insert_for(conn)
+        if insert is None:
+            self._write_fallback(conn, rows)
+        else:
+            stmt = insert(self.table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(self.conflict_columns),
+                set_={col: stmt.excluded[col] for col in self.update_columns},
+            )
+            conn.execute(stmt, rows)
+        self.batches += 1
+
+    def _write_fallback(self, conn: Connection, rows: list[dict[str, Any]]) -> None:
+        cols = self.table.c
+        for row in rows:
+            key_filter = and_(*(cols[col] == row[col] for col in self.conflict_columns))
+            updated = conn.execute(
+                self.table.update()
+                .where(key_filter)
+                .values({col: row[col] for col in self.update_columns})
+            )
+            if not updated.rowcount:
+                conn.execute(self.table.insert().values(row))
+
+
+class VehicleImport(_BulkUpsert):
+    """Merge CSV rows into the vehicle registry of one godown."""
+
+    table = AnprVehicle.__table__
+    conflict_columns = ("godown_id", "plate_norm")
+    update_columns = ("plate_raw", "list_type", "transporter", "notes", "is_active", "updated_at")
+
+    def __init__(self, db: Session, godown_id: str, *, columns: set[str]) -> None:
+        super().__init__(db)
+        self.godown_id = godown_id
+        self.columns = columns
+        rows = (
+            db.query(
+                AnprVehicle.id,
+                AnprVehicle.plate_raw,
+                AnprVehicle.plate_norm,
+                AnprVehicle.list_type,
+                AnprVehicle.transporter,
+                AnprVehicle.notes,
+                AnprVehicle.is_active,
+            )
+            .filter(AnprVehicle.godown_id == godown_id)
+            .all()
+        )
+        for row in rows:
+            self._known[row.plate_norm] = {
+                "id": row.id,
+                "godown_id": godown_id,
+                "plate_raw": row.plate_raw,
+                "plate_norm": row.plate_norm,
+                "list_type": row.list_type,
+                "transporter": row.transporter,
+                "notes": row.notes,
+                "is_active": row.is_active,
+            }
+
+    def stage(
+        self,
+        *,
+        plate_raw: str,
+        plate_norm: str,
+        list_type: Optional[str],
+        transporter: Optional[str],
+        notes: Optional[str],
+        is_active: Optional[bool],
+    ) -> tuple[str, str]:
+        """Queue one row and return ``(status, vehicle_id)``."""
+        current = self._known.get(plate_norm)
+        if current is not None:
+            values = dict(current)
+            values["plate_raw"] = plate_raw
+            if list_type:
+                values["list_type"] = list_type
+            if "transporter" in self.columns:
+                values["transporter"] = transporter or None
+            if "notes" in self.columns:
+                values["notes"] = notes or None
+            if is_active is not None:
+                values["is_active"] = bool(is_active)
+            status = "updated"
+        else:
+            values = {
+                "id": str(uuid.uuid4()),
+                "godown_id": self.godown_id,
+                "plate_raw": plate_raw,
+                "plate_norm": plate_norm,
+                "list_type": list_type or "WHITELIST",
+                "transporter": transporter or None,
+                "notes": notes or None,
+                "is_active": bool(is_active) if is_active is not None else True,
+            }
+            status = "created"
+        self._stage(plate_norm, values)
+        return status, values["id"]
+
+
+class DailyPlanItemImport(_BulkUpsert):
+    """Merge CSV rows into the items of one daily plan."""
+
+    table = AnprDailyPlanItem.__table__
+    conflict_columns = ("plan_id", "plate_norm")
+    update_columns = ("vehicle_id", "plate_raw", "expected_by_local", "status", "notes", "updated_at")
+
+    def __init__(self, db: Session, plan_id: str, godown_id: str, *, columns: set[str]) -> None:
+        super().__init__(db)
+        self.plan_id = plan_id
+        self.columns = columns
+        self._vehicles: dict[str, tuple[str, str]] = {
+            plate_norm: (vehicle_id, plate_raw)
+            for vehicle_id, plate_norm, plate_raw in (
+                db.query(AnprVehicle.id, AnprVehicle.plate_norm, AnprVehicle.plate_raw)
+                .filter(AnprVehicle.godown_id == godown_id)
+                .all()
+            )
+        }
+        rows = (
+            db.query(
+                AnprDailyPlanItem.id,
+                AnprDailyPlanItem.vehicle_id,
+                AnprDailyPlanItem.plate_raw,
+                AnprDailyPlanItem.plate_norm,
+                AnprDailyPlanItem.expected_by_local,
+                AnprDailyPlanItem.status,
+                AnprDailyPlanItem.notes,
+            )
+            .filter(AnprDailyPlanItem.plan_id == plan_id)
+            .all()
+        )
+        for row in rows:
+            self._known[row.plate_norm] = {
+                "id": row.id,
+                "plan_id": plan_id,
+                "vehicle_id": row.vehicle_id,
+                "plate_raw": row.plate_raw,
+                "plate_norm": row.plate_norm,
+                "expected_by_local": row.expected_by_local,
+                "status": row.status,
+                "notes": row.notes,
+            }
+
+    def stage(
+        self,
+        *,
+        plate_raw: str,
+        plate_norm: str,
+        expected_by_local: Optional[datetime.time],
+        status: Optional[str],
+        notes: Optional[str],
+    ) -> tuple[str, str]:
+        """Queue one row and return ``(status, item_id)``."""
+        vehicle = self._vehicles.get(plate_norm)
+        current = self._known.get(plate_norm)
+        if current is not None:
+            values = dict(current)
+            if "expected_by_local" in self.columns or "expected_by" in self.columns:
+                values["expected_by_local"] = expected_by_local
+            if status:
+                values["status"] = status
+            if "notes" in self.columns:
+                values["notes"] = notes or None
+            if vehicle and values["vehicle_id"] != vehicle[0]:
+                values["vehicle_id"], values["plate_raw"] = vehicle
+            result = "updated"
+        else:
+            values = {
+                "id": str(uuid.uuid4()),
+                "plan_id": self.plan_id,
+                "vehicle_id": vehicle[0] if vehicle else None,
+                "plate_raw": vehicle[1] if vehicle else plate_raw,
+                "plate_norm": plate_norm,
+                "expected_by_local": expected_by_local,
+                "status": status,
+                "notes": notes or None,
+            }
+            result = "created"
+        self._stage(plate_norm, values)
+        return result, values["id"]
@@ -0,0 +1,231 @@
+"""
+Cluster-wide configuration version vector for edge polling.
+
+Each config write bumps ``config_versions`` for its (godown, kind) in the
+same transaction as the write itself: a session ``after_flush`` listener
+inspects flushed cameras, rules, zones, watchlist rows and authorized users
+and issues one atomic UPSERT per touched counter. Watchlist persons are also
+stamped with the new watchlist version (and hard deletes leave a tombstone)
+so edges can ask for a delta ``since`` a version they already hold. Because the counters live
+in the database, every API worker reports the same version and restarts do
+not force edges to re-download their configuration.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+from typing import Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models.authorized_user import AuthorizedUser
+from ..models.config_version import ConfigVersion
+from ..models.godown import Camera
+from ..models.rule import Rule
+from ..models.watchlist import WatchlistPerson, WatchlistPersonEmbedding, WatchlistPersonImage, WatchlistTombstone
+from ..models.zone import Zone
+
+
+CONFIG_KINDS = ("cameras", "rules", "zones", "watchlist", "authorized_users")
+GLOBAL_SCOPE = ""
+# Backend-only counter (not part of the edge version vector): bumped by the
+# notifications API so every process drops its cached notification targets.
+NOTIFICATION_TARGETS = "notification_targets"
+
+# Model -> kind; models without a godown_id are versioned in the global scope.
+_TRACKED_MODELS: dict[type, str] = {
+    Camera: "cameras",
+    Rule: "rules",
+    Zone: "zones",
+    WatchlistPerson: "watchlist",
+    WatchlistPersonImage: "watchlist",
+    WatchlistPersonEmbedding: "watchlist",
+    AuthorizedUser: "authorized_users",
+}
+_VERSIONS = ConfigVersion.__table__
+_PERSONS = WatchlistPerson.__table__
+_TOMBSTONES = WatchlistTombstone.__table__
+
+
+def _scope_for(obj) -> Optional[tuple[str, str]]:
+    kind = _TRACKED_MODELS.get(type(obj))
+    if kind is None:
+        return None
+    return str(getattr(obj, "godown_id", None) or GLOBAL_SCOPE), kind
+
+
+def _collect_bumps(session: Session) -> set[tuple[str, str]]:
+    bumps: set[tuple[str, str]] = set()
+    for obj in session.new:
+        scope = _scope_for(obj)
+        if scope:
+            bumps.add(scope)
+    for obj in session.deleted:
+        scope = _scope_for(obj)
+        if scope:
+            bumps.add(scope)
+    for obj in session.dirty:
+        scope = _scope_for(obj)
+        if scope and session.is_modified(obj, include_collections=False):
+            bumps.add(scope)
+    return bumps
+
+
+def _watchlist_changes(session: Session) -> tuple[set[str], set[str]]:
+    """Return ``(touched_person_ids, deleted_person_ids)`` for this flush."""
+    touched: set[str] = set()
+    deleted: set[str] = set()
+
+    def _person_id(obj) -> Optional[str]:
+        if isinstance(obj, WatchlistPerson):
+            return obj.id
+        if isinstance(obj, (WatchlistPersonImage, WatchlistPersonEmbedding)):
+            return obj.person_id
+        return None
+
+    for obj in session.new:
+        person_id = _person_id(obj)
+        if person_id:
+            touched.add(person_id)
+    for obj in session.dirty:
+        person_id = _person_id(obj)
+        if person_id and session.is_modified(obj, include_collections=False):
+            touched.add(person_id)
+    for obj in session.deleted:
+        person_id = _person_id(obj)
+        if not person_id:
+            continue
+        if isinstance(obj, WatchlistPerson):
+            deleted.add(person_id)
+        else:
+            touched.add(person_id)
+    return touched - deleted, deleted
+
+
+def _stamp_watchlist(conn: Connection, touched: set[str], deleted: set[str]) -> None:
+    version = conn.execute(
+        select(_VERSIONS.c.version).where(_VERSIONS.c.godown_id == GLOBAL_SCOPE, _VERSIONS.c.kind == "watchlist")
+    ).scalar()
+    if version is None:
+        return
+    if touched:
+        conn.execute(
+            _PERSONS.update()
+            .where(_PERSONS.c.id.in_(sorted(touched)))
+            .values(sync_version=version, updated_at=_PERSONS.c.updated_at)
+        )
+    if deleted:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        conn.execute(_TOMBSTONES.delete().where(_TOMBSTONES.c.person_id.in_(sorted(deleted))))
+        conn.execute(
+            _TOMBSTONES.insert(),
+            [{"person_id": person_id, "sync_version": version, "deleted_at": now} for person_id in sorted(deleted)],
+        )
+
+
+def _insert_for(conn: Connection):
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def bump_config_versions(conn: Connection, scopes: set[tuple[str, str]]) -> None:
+    """Increment the ``(godown_id, kind)`` counters, creating rows as needed."""
+    if not scopes:
+        return
+    now = datetime.datetime.now(datetime.timezone.utc)
+    rows = [
+        {"godown_id": godown_id, "kind": kind, "version": 1, "updated_at": now}
+        for godown_id, kind in sorted(scopes)
+    ]
+    insert = _insert_for(conn)
+    if insert is None:
+        for row in rows:
+            updated = conn.execute(
+                _VERSIONS.update()
+                .where(_VERSIONS.c.godown_id == row["godown_id"], _VERSIONS.c.kind == row["kind"])
+                .values(version=_VERSIONS.c.version + 1, updated_at=now)
+            )
+            if not updated.rowcount:
+                conn.execute(_VERSIONS.insert().values(**row))
+        return
+    stmt = insert(_VERSIONS).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[_VERSIONS.c.godown_id, _VERSIONS.c.kind],
+        set_={"version": _VERSIONS.c.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    conn.execute(stmt)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    bumps = _collect_bumps(session)
+    if not bumps:
+        return
+    conn = session.connection()
+    bump_config_versions(conn, bumps)
+    if (GLOBAL_SCOPE, "watchlist") in bumps:
+        touched, deleted = _watchlist_changes(session)
+        _stamp_watchlist(conn, touched, deleted)
+
+
+def register_config_version_listener(factory: sessionmaker) -> None:
+    """Bump config versions for every config write made through ``factory``."""
+    if not event.contains(factory, "after_flush", _after_flush):
+        event.listen(factory, "after_flush", _after_flush)
+
+
+def get_config_versions(db: Session, godown_id: str | None = None) -> tuple[dict[str, int], Optional[datetime.datetime]]:
+    """
+    Return ``({kind: version}, last_updated_at)``.
+
+    For a godown, each entry is its own counter plus the global one, so a
+    watchlist change is visible to every godown. Without a godown the
+    counters are summed across all scopes; both stay monotonic.
+    """
+    query = select(ConfigVersion.kind, func.sum(ConfigVersion.version), func.max(ConfigVersion.updated_at)).where(
+        ConfigVersion.kind.in_(CONFIG_KINDS)
+    )
+    if godown_id:
+        query = query.where(ConfigVersion.godown_id.in_([godown_id, GLOBAL_SCOPE]))
+    versions = {kind: 0 for kind in CONFIG_KINDS}
+    last_updated: Optional[datetime.datetime] = None
+    for kind, version, updated_at in db.execute(query.group_by(ConfigVersion.kind)):
+        versions[kind] = int(version or 0)
+        if updated_at is not None and (last_updated is None or updated_at > last_updated):
+            last_updated = updated_at
+    return versions, last_updated
+
+
+def config_etag(versions: dict[str, int], godown_id: str | None = None) -> str:
+    """Strong ETag for a version vector (stable across processes)."""
+    raw = ";".join(f"{kind}={versions.get(kind, 0)}" for kind in CONFIG_KINDS)
+    digest = hashlib.sha1(f"{godown_id or '*'}|{raw}".encode("utf-8")).hexdigest()[:16]
+    return f'"{digest}"'
+
+
+def get_config_version(db: Session, kind: str, godown_id: str | None = None) -> int:
+    """Current counter for one ``(godown, kind)`` scope (0 before the first write)."""
+    version = db.execute(
+        select(ConfigVersion.version).where(
+            ConfigVersion.godown_id == (godown_id or GLOBAL_SCOPE), ConfigVersion.kind == kind
+        )
+    ).scalar()
+    return int(version or 0)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    if "*" in candidates:
+        return True
+    # Weak comparison: W/"x" matches "x" (proxies may weaken our tag).
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
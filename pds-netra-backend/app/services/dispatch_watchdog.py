@@ -37,14 +37,9 @@ def _find_first_movement(db: Session, issue: DispatchIssue) -> Optional[Event]:
     )
     if issue.camera_id:
         query = query.filter(Event.camera_id == issue.camera_id)
-    query = query.order_by(Event.timestamp_utc.asc())
-    if not issue.zone_id:
-        return query.first()
-    for event in query.yield_per(200):
-        meta = event.meta or {}
-        if meta.get("zone_id") == issue.zone_id:
-            return event
-    return None
+    if issue.zone_id:
+        query = query.filter(Event.zone_id == issue.zone_id)
+    return query.order_by(Event.timestamp_utc.asc()).first()
 
 
 def run_dispatch_watchdog(stop_event: threading.Event) -> None:
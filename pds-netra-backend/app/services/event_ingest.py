@@ -9,83 +9,24 @@ engine to create or update alerts.
 
 from __future__ import annotations
 
-import json
 import logging
 import uuid
-from typing import List, Tuple
 
 from sqlalchemy.orm import Session
 
+from ..core.db import unit_of_work
 from ..models.anpr_event import AnprEvent
 from ..models.godown import Godown, Camera
 from ..models.event import Event
 from ..schemas.event import EventIn
 from .rule_engine import apply_rules
 from .vehicle_gate import handle_anpr_hit_event
+from .zone_geometry import camera_geometry
 
 
 logger = logging.getLogger("event_ingest")
 
 
-def _point_in_polygon(x: float, y: float, polygon: List[Tuple[float, float]]) -> bool:
-    num = len(polygon)
-    j = num - 1
-    inside = False
-    for i in range(num):
-        xi, yi = polygon[i]
-        xj, yj = polygon[j]
-        intersects = ((yi > y) != (yj > y)) and (x < (xj - xi) * (y - yi) / (yj - yi + 1e-9) + xi)
-        if intersects:
-            inside = not inside
-        j = i
-    return inside
-
-
-def _bbox_in_zone(bbox: List[int], polygon: List[Tuple[float, float]]) -> bool:
-    if len(bbox) != 4:
-        return False
-    x1, y1, x2, y2 = bbox
-    cx = (x1 + x2) / 2.0
-    cy = (y1 + y2) / 2.0
-    if _point_in_polygon(cx, cy, polygon):
-        return True
-    corners = [(x1, y1), (x1, y2), (x2, y1), (x2, y2)]
-    if any(_point_in_polygon(x, y, polygon) for x, y in corners):
-        return True
-    xs = [pt[0] for pt in polygon]
-    ys = [pt[1] for pt in polygon]
-    if not xs or not ys:
-        return False
-    min_x, max_x = min(xs), max(xs)
-    min_y, max_y = min(ys), max(ys)
-    return not (x2 < min_x or x1 > max_x or y2 < min_y or y1 > max_y)
-
-
-def _infer_zone_id(bbox: List[int], zones_json: str | None) -> str | None:
-    if not zones_json:
-        return None
-    try:
-        zones = json.loads(zones_json)
-    except Exception:
-        return None
-    if not isinstance(zones, list):
-        return None
-    for zone in zones:
-        zone_id = zone.get("id") if isinstance(zone, dict) else None
-        polygon = zone.get("polygon") if isinstance(zone, dict) else None
-        if not zone_id or not isinstance(polygon, list):
-            continue
-        try:
-            poly_pts = [tuple(map(float, pt)) for pt in polygon if isinstance(pt, list) and len(pt) == 2]
-        except Exception:
-            continue
-        if not poly_pts:
-            continue
-        if _bbox_in_zone(bbox, poly_pts):
-            return zone_id
-    return None
-
-
 ANPR_EDGE_EVENT_TYPES = {
     "ANPR_PLATE_VERIFIED",
     "ANPR_PLATE_ALERT",
@@ -160,6 +101,12 @@ def handle_incoming_event(event_in: EventIn, db: Session) -> Event:
     """
     Handle an incoming event from an edge node.
 
+    The whole pipeline (godown/camera auto-create, Event row, ANPR upsert,
+    gate session and rule evaluation) runs as one unit of work and commits
+    once. The optional ANPR, gate-session and rule steps each run in a
+    savepoint so their failure never discards the raw event. Alerts only
+    record a notification request here; the worker writes the outbox rows.
+
     Parameters
     ----------
     event_in: EventIn
@@ -172,13 +119,17 @@ def handle_incoming_event(event_in: EventIn, db: Session) -> Event:
     Event
         The persisted ORM Event instance.
     """
+    with unit_of_work(db):
+        return _ingest_event(event_in, db)
+
+
+def _ingest_event(event_in: EventIn, db: Session) -> Event:
     # Ensure godown exists
     godown = db.get(Godown, event_in.godown_id)
     if godown is None:
         godown = Godown(id=event_in.godown_id)
         db.add(godown)
-        db.commit()
-        db.refresh(godown)
+        db.flush()
     # Ensure camera exists
     camera = (
         db.query(Camera)
@@ -188,11 +139,10 @@ def handle_incoming_event(event_in: EventIn, db: Session) -> Event:
     if camera is None:
         camera = Camera(id=event_in.camera_id, godown_id=event_in.godown_id)
         db.add(camera)
-        db.commit()
-        db.refresh(camera)
+        db.flush()
     meta = event_in.meta.model_dump()
     if not meta.get("zone_id") and event_in.bbox:
-        inferred_zone = _infer_zone_id(event_in.bbox, camera.zones_json)
+        inferred_zone = camera_geometry(camera).infer_zone_id(event_in.bbox)
         if inferred_zone:
             meta["zone_id"] = inferred_zone
     # Keep snapshot URL redundantly in both Event.image_url and meta.extra.snapshot_url
@@ -233,12 +183,11 @@ def handle_incoming_event(event_in: EventIn, db: Session) -> Event:
         meta=meta,
     )
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    db.flush()
     if event.event_type in ANPR_EDGE_EVENT_TYPES:
         try:
-            _upsert_anpr_event(db, event_in=event_in, meta=meta)
-            db.commit()
+            with db.begin_nested():
+                _upsert_anpr_event(db, event_in=event_in, meta=meta)
         except Exception as exc:
             logger.exception(
                 "ANPR upsert failed event_id=%s godown=%s camera=%s err=%s",
@@ -247,23 +196,22 @@ def handle_incoming_event(event_in: EventIn, db: Session) -> Event:
                 event_in.camera_id,
                 exc,
             )
-            db.rollback()
 
     if event.event_type in ANPR_EDGE_EVENT_TYPES:
         role = (camera.role or "").strip().upper()
         allow_gate_session = role in {"", "GATE_ANPR"}
         if allow_gate_session:
             try:
-                handle_anpr_hit_event(
-                    db,
-                    godown_id=event.godown_id,
-                    camera_id=event.camera_id,
-                    event_id=event.event_id_edge,
-                    occurred_at=event.timestamp_utc,
-                    meta=event.meta or {},
-                    image_url=event.image_url,
-                )
-                db.commit()
+                with db.begin_nested():
+                    handle_anpr_hit_event(
+                        db,
+                        godown_id=event.godown_id,
+                        camera_id=event.camera_id,
+                        event_id=event.event_id_edge,
+                        occurred_at=event.timestamp_utc,
+                        meta=event.meta or {},
+                        image_url=event.image_url,
+                    )
             except Exception as exc:
                 logger.exception(
                     "ANPR gate session failed event_id=%s godown=%s camera=%s err=%s",
@@ -272,13 +220,21 @@ def handle_incoming_event(event_in: EventIn, db: Session) -> Event:
                     event_in.camera_id,
                     exc,
                 )
-                db.rollback()
         else:
             logging.getLogger("event_ingest").info(
                 "Ignoring ANPR gate session for non-gate camera: camera=%s role=%s",
                 event.camera_id,
                 role or "UNKNOWN",
             )
-    # Invoke rule engine
-    apply_rules(db, event)
+    # Invoke rule engine (nested unit of work -> savepoint)
+    try:
+        apply_rules(db, event)
+    except Exception as exc:
+        logger.exception(
+            "Rule evaluation failed event_id=%s godown=%s camera=%s err=%s",
+            event_in.event_id,
+            event_in.godown_id,
+            event_in.camera_id,
+            exc,
+        )
     return event
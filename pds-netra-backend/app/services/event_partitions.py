@@ -0,0 +1,212 @@
+"""
+Monthly range partitions for the event tables (PostgreSQL only).
+
+``events`` is partitioned by ``timestamp_utc`` into ``<table>_pYYYYMM``
+children plus a ``<table>_default`` catch-all (migration 20260401_01), so
+range filters on the timestamp only touch the months they cover.
+``anpr_events`` stays a plain table so its unique ``event_id`` is still
+enforced on its own; partitioning would widen it to
+``(event_id, timestamp_utc)``. The worker calls
+``maintain_event_partitions`` periodically: it keeps
+``EVENT_PARTITION_MONTHS_AHEAD`` future months created and, when
+``EVENT_RETENTION_MONTHS`` is set, detaches months older than the retention
+window, archives them as gzip-compressed CSV under ``EVENT_ARCHIVE_DIR`` and
+drops them. Other dialects keep plain tables and every call is a no-op.
+"""
+
+from __future__ import annotations
+
+import datetime
+import gzip
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection, Engine
+
+from .test_runs import data_dir
+
+
+logger = logging.getLogger("event_partitions")
+
+PARTITIONED_TABLES = ("events",)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, str(default))))
+    except Exception:
+        return default
+
+
+def months_ahead() -> int:
+    return _env_int("EVENT_PARTITION_MONTHS_AHEAD", 3)
+
+
+def retention_months() -> int:
+    """Months of events kept online; 0 keeps everything."""
+    return _env_int("EVENT_RETENTION_MONTHS", 0)
+
+
+def archive_dir() -> Path:
+    raw = os.getenv("EVENT_ARCHIVE_DIR", "").strip()
+    return Path(raw) if raw else data_dir() / "archive"
+
+
+def month_floor(value: datetime.datetime) -> datetime.datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    value = value.astimezone(datetime.timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime.datetime, count: int) -> datetime.datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime.datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _partition_month(table: str, name: str) -> Optional[datetime.datetime]:
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    if not match:
+        return None
+    return datetime.datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=datetime.timezone.utc)
+
+
+def _quote(conn: Connection, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    row = conn.execute(
+        sa.text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": table},
+    ).first()
+    return row is not None
+
+
+def list_partitions(conn: Connection, table: str) -> list[str]:
+    rows = conn.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+        ),
+        {"table": table},
+    ).all()
+    return [row[0] for row in rows]
+
+
+def create_month_partition(conn: Connection, table: str, month: datetime.datetime) -> bool:
+    """Create the partition for ``month`` unless it exists; return True if created."""
+    name = partition_name(table, month)
+    if conn.execute(sa.text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+    lower = month.isoformat()
+    upper = add_months(month, 1).isoformat()
+    conn.execute(
+        sa.text(
+            f"CREATE TABLE {_quote(conn, name)} PARTITION OF {_quote(conn, table)} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+    )
+    return True
+
+
+def ensure_partitions(
+    conn: Connection,
+    table: str,
+    *,
+    now: Optional[datetime.datetime] = None,
+    ahead: Optional[int] = None,
+) -> list[str]:
+    """Create partitions from the current month through ``ahead`` months out."""
+    current = month_floor(now or datetime.datetime.now(datetime.timezone.utc))
+    ahead = months_ahead() if ahead is None else ahead
+    created: list[str] = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        try:
+            with conn.begin_nested():
+                if create_month_partition(conn, table, month):
+                    created.append(partition_name(table, month))
+        except Exception:
+            # Usually rows for that month already landed in the default partition.
+            logger.warning("Could not create partition %s", partition_name(table, month), exc_info=True)
+    return created
+
+
+def _copy_out(conn: Connection, relation: str, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        with gzip.open(tmp, "wt", encoding="utf-8", newline="") as fh:
+            cursor.copy_expert(f"COPY {_quote(conn, relation)} TO STDOUT WITH (FORMAT csv, HEADER true)", fh)
+    finally:
+        cursor.close()
+    os.replace(tmp, path)
+
+
+def expired_partitions(
+    conn: Connection,
+    table: str,
+    *,
+    now: Optional[datetime.datetime] = None,
+    keep_months: Optional[int] = None,
+) -> list[str]:
+    keep_months = retention_months() if keep_months is None else keep_months
+    if keep_months <= 0:
+        return []
+    cutoff = add_months(month_floor(now or datetime.datetime.now(datetime.timezone.utc)), -keep_months)
+    expired = []
+    for name in list_partitions(conn, table):
+        month = _partition_month(table, name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            expired.append(name)
+    return expired
+
+
+def archive_partition(conn: Connection, table: str, name: str, *, target_dir: Optional[Path] = None) -> Path:
+    """Detach ``name`` from ``table``, dump it to ``<dir>/<table>/<name>.csv.gz`` and drop it."""
+    path = (target_dir or archive_dir()) / table / f"{name}.csv.gz"
+    conn.execute(sa.text(f"ALTER TABLE {_quote(conn, table)} DETACH PARTITION {_quote(conn, name)}"))
+    _copy_out(conn, name, path)
+    if table == "events":
+        # The link table lost its FK (and ON DELETE CASCADE) when events was partitioned.
+        conn.execute(
+            sa.text(f"DELETE FROM alert_event_links WHERE event_id IN (SELECT id FROM {_quote(conn, name)})")
+        )
+    conn.execute(sa.text(f"DROP TABLE {_quote(conn, name)}"))
+    return path
+
+
+def maintain_event_partitions(engine: Engine, *, now: Optional[datetime.datetime] = None) -> dict:
+    """Create upcoming partitions and archive expired ones for every event table."""
+    if engine.dialect.name != "postgresql":
+        return {}
+    summary: dict[str, dict[str, list[str]]] = {}
+    for table in PARTITIONED_TABLES:
+        with engine.begin() as conn:
+            if not is_partitioned(conn, table):
+                continue
+            created = ensure_partitions(conn, table, now=now)
+            expired = expired_partitions(conn, table, now=now)
+        archived: list[str] = []
+        for name in expired:
+            try:
+                with engine.begin() as conn:
+                    path = archive_partition(conn, table, name)
+                archived.append(str(path))
+                logger.info("Archived partition %s to %s", name, path)
+            except Exception:
+                logger.exception("Failed to archive partition %s", name)
+        summary[table] = {"created": created, "archived": archived}
+    return summary
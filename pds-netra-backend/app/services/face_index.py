@@ -0,0 +1,492 @@
+"""
+In-process face embedding index for server-side verification and search.
+
+Watchlist and authorized-user embeddings are kept as L2-normalised float32
+matrices (one bank per embedding dimension), so a top-k cosine search is a
+single matrix-vector product plus ``argpartition``. The index follows the
+database incrementally using the persisted config versions: watchlist
+persons stamped with a newer ``sync_version`` (and tombstones) are
+re-indexed, and the authorized users of every godown whose counter moved
+are rebuilt. Writes in any process therefore show up on the next search in
+every process.
+
+The index is saved as ``.npy`` matrices plus a JSON manifest in a snapshot
+directory under ``FACE_INDEX_DIR`` (named by the ``CURRENT`` pointer) and
+re-opened memory-mapped on startup, so only the delta since the last save
+has to be read from the database.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import LargeBinary, or_, select, type_coerce
+from sqlalchemy.orm import Session
+
+from ..models.authorized_user import AuthorizedUser
+from ..models.config_version import ConfigVersion
+from ..models.types import unpack_embedding
+from ..models.watchlist import WatchlistPerson, WatchlistPersonEmbedding, WatchlistTombstone
+from .config_version import GLOBAL_SCOPE, get_config_version
+
+
+logger = logging.getLogger("face_index")
+
+WATCHLIST = "watchlist"
+AUTHORIZED_USERS = "authorized_users"
+_KeyT = tuple[str, str, str]  # (kind, person_id, embedding_id)
+_MANIFEST = "manifest.json"
+_CURRENT = "CURRENT"
+_SNAPSHOT_PREFIX = "snapshot-"
+
+
+def _default_dir() -> Optional[Path]:
+    if os.getenv("FACE_INDEX_PERSIST", "true").lower() not in {"1", "true", "yes"}:
+        return None
+    configured = os.getenv("FACE_INDEX_DIR")
+    if configured:
+        return Path(configured).expanduser()
+    return Path(os.getenv("PDS_DATA_DIR", "/opt/app/data")) / "face_index"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, str(default))))
+    except Exception:
+        return default
+
+
+def _normalise(vector: np.ndarray) -> Optional[np.ndarray]:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    if vector.size == 0 or not np.isfinite(norm) or norm == 0.0:
+        return None
+    return vector / norm
+
+
+class _Bank:
+    """Normalised vectors of one dimension with slot reuse on removal."""
+
+    def __init__(self, dim: int, vectors: Optional[np.ndarray] = None) -> None:
+        self.dim = dim
+        self.vectors = vectors if vectors is not None else np.zeros((0, dim), dtype=np.float32)
+        size = len(self.vectors)
+        self.active = np.ones(size, dtype=bool)
+        self.keys: list[Optional[_KeyT]] = [None] * size
+        # Object arrays so kind/godown filters stay vectorised.
+        self.kinds = np.full(size, None, dtype=object)
+        self.godowns = np.full(size, None, dtype=object)
+        self.free: list[int] = []
+
+    def _ensure_capacity(self, needed: int) -> None:
+        # Memory-mapped matrices are read-only; copy on first write or growth.
+        size = len(self.vectors)
+        if needed <= size and self.vectors.flags.writeable:
+            return
+        capacity = max(needed, size * 2, 16) if needed > size else size
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:size] = self.vectors
+        self.vectors = grown
+        for name in ("active", "kinds", "godowns"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=bool) if name == "active" else np.full(capacity, None, dtype=object)
+            new[:size] = old
+            setattr(self, name, new)
+        self.keys.extend([None] * (capacity - size))
+        self.free.extend(range(capacity - 1, size - 1, -1))
+
+    def put(self, key: _KeyT, vector: np.ndarray, godown_id: Optional[str]) -> int:
+        self._ensure_capacity(len(self.vectors) + 1 if not self.free else 0)
+        slot = self.free.pop()
+        self.vectors[slot] = vector
+        self.active[slot] = True
+        self.keys[slot] = key
+        self.kinds[slot] = key[0]
+        self.godowns[slot] = godown_id
+        return slot
+
+    def drop(self, slot: int) -> None:
+        self._ensure_capacity(0)
+        self.vectors[slot] = 0.0
+        self.active[slot] = False
+        self.keys[slot] = None
+        self.kinds[slot] = None
+        self.godowns[slot] = None
+        self.free.append(slot)
+
+    def count(self) -> int:
+        return int(self.active.sum())
+
+
+class FaceIndex:
+    """Thread-safe top-k cosine index over watchlist and authorized-user embeddings."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        self._banks: dict[int, _Bank] = {}
+        self._slots: dict[_KeyT, tuple[int, int]] = {}
+        self._by_person: dict[tuple[str, str], set[_KeyT]] = {}
+        self.watchlist_version: Optional[int] = None
+        # Authorized-user counter per godown scope ("" for global users).
+        self.authorized_versions: Optional[dict[str, int]] = None
+        self.loaded_from_disk = False
+        self.save_interval_sec = _env_float("FACE_INDEX_SAVE_INTERVAL_SEC", 60.0)
+        self._last_saved: Optional[float] = None
+        self.searches = 0
+        self.refreshes = 0
+
+    # -- mutation -----------------------------------------------------------
+
+    def upsert(self, kind: str, person_id: str, embedding_id: str, vector, godown_id: Optional[str] = None) -> bool:
+        normalised = _normalise(vector)
+        key = (kind, str(person_id), str(embedding_id))
+        with self._lock:
+            self._remove_key(key)
+            if normalised is None:
+                return False
+            bank = self._banks.get(normalised.size)
+            if bank is None:
+                bank = self._banks[normalised.size] = _Bank(normalised.size)
+            slot = bank.put(key, normalised, godown_id)
+            self._slots[key] = (normalised.size, slot)
+            self._by_person.setdefault((kind, str(person_id)), set()).add(key)
+            return True
+
+    def _remove_key(self, key: _KeyT) -> None:
+        located = self._slots.pop(key, None)
+        if located is None:
+            return
+        dim, slot = located
+        self._banks[dim].drop(slot)
+        keys = self._by_person.get((key[0], key[1]))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_person[(key[0], key[1])]
+
+    def remove_person(self, kind: str, person_id: str) -> int:
+        with self._lock:
+            keys = list(self._by_person.get((kind, str(person_id)), ()))
+            for key in keys:
+                self._remove_key(key)
+            return len(keys)
+
+    def _clear_kind(self, kind: str) -> None:
+        for person_kind, person_id in [k for k in self._by_person if k[0] == kind]:
+            self.remove_person(person_kind, person_id)
+
+    # -- search -------------------------------------------------------------
+
+    def search(
+        self,
+        vector,
+        *,
+        top_k: int = 5,
+        kinds: Optional[Iterable[str]] = None,
+        godown_id: Optional[str] = None,
+        authorized_godowns: Optional[Iterable[str]] = None,
+        min_score: float = -1.0,
+    ) -> list[dict]:
+        """
+        Top-k cosine matches. With ``godown_id``, entries scoped to another
+        godown are skipped (global entries always match). With
+        ``authorized_godowns``, authorized-user entries outside those godowns
+        are skipped as well.
+        """
+        query = _normalise(vector)
+        if query is None:
+            return []
+        kinds = set(kinds) if kinds else None
+        with self._lock:
+            self.searches += 1
+            bank = self._banks.get(query.size)
+            if bank is None or not bank.count():
+                return []
+            scores = bank.vectors @ query
+            mask = bank.active.copy()
+            if kinds is not None:
+                mask &= np.isin(bank.kinds, list(kinds))
+            if godown_id is not None:
+                mask &= (bank.godowns == None) | (bank.godowns == godown_id)  # noqa: E711
+            if authorized_godowns is not None:
+                allowed = set(authorized_godowns)
+                in_allowed = np.fromiter((g in allowed for g in bank.godowns), dtype=bool, count=len(bank.godowns))
+                mask &= (bank.kinds != AUTHORIZED_USERS) | in_allowed
+            scores = np.where(mask & (scores >= min_score), scores, -np.inf)
+            k = min(top_k, int(np.isfinite(scores).sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {
+                    "kind": bank.keys[slot][0],
+                    "person_id": bank.keys[slot][1],
+                    "embedding_id": bank.keys[slot][2],
+                    "godown_id": bank.godowns[slot],
+                    "score": round(float(scores[slot]), 6),
+                }
+                for slot in top
+            ]
+
+    # -- database sync ------------------------------------------------------
+
+    def _index_watchlist_persons(self, db: Session, person_ids: Optional[list[str]]) -> None:
+        query = (
+            select(
+                WatchlistPersonEmbedding.person_id,
+                WatchlistPersonEmbedding.id,
+                type_coerce(WatchlistPersonEmbedding.embedding, LargeBinary()),
+            )
+            .join(WatchlistPerson, WatchlistPerson.id == WatchlistPersonEmbedding.person_id)
+            .where(WatchlistPerson.status == "ACTIVE")
+        )
+        if person_ids is not None:
+            if not person_ids:
+                return
+            query = query.where(WatchlistPersonEmbedding.person_id.in_(person_ids))
+        for person_id, embedding_id, blob in db.execute(query):
+            if blob:
+                self.upsert(WATCHLIST, person_id, embedding_id, unpack_embedding(blob))
+
+    def _refresh_watchlist(self, db: Session, current: int) -> None:
+        previous = self.watchlist_version
+        if previous is None or current < previous:
+            self._clear_kind(WATCHLIST)
+            self._index_watchlist_persons(db, None)
+        elif current > previous:
+            changed = [
+                row[0]
+                for row in db.execute(select(WatchlistPerson.id).where(WatchlistPerson.sync_version > previous))
+            ]
+            deleted = [
+                row[0]
+                for row in db.execute(
+                    select(WatchlistTombstone.person_id).where(WatchlistTombstone.sync_version > previous)
+                )
+            ]
+            for person_id in [*changed, *deleted]:
+                self.remove_person(WATCHLIST, person_id)
+            self._index_watchlist_persons(db, changed)
+        self.watchlist_version = current
+
+    def _refresh_authorized(self, db: Session, current: dict[str, int]) -> None:
+        # Each godown's counter is bumped in the same transaction as its
+        # authorized-user writes, so a godown whose counter moved is rebuilt
+        # from its committed rows; clock stamps would miss late commits.
+        previous = self.authorized_versions
+        if previous is None:
+            changed = None
+            self._clear_kind(AUTHORIZED_USERS)
+        else:
+            changed = {scope for scope in set(current) | set(previous) if current.get(scope) != previous.get(scope)}
+            if not changed:
+                self.authorized_versions = current
+                return
+            for kind, person_id in [k for k in self._by_person if k[0] == AUTHORIZED_USERS]:
+                if (self._godown_of(kind, person_id) or GLOBAL_SCOPE) in changed:
+                    self.remove_person(kind, person_id)
+        query = select(
+            AuthorizedUser.person_id,
+            AuthorizedUser.godown_id,
+            AuthorizedUser.is_active,
+            type_coerce(AuthorizedUser.embedding, LargeBinary()),
+        )
+        if changed is not None:
+            scoped = AuthorizedUser.godown_id.in_(sorted(changed - {GLOBAL_SCOPE}))
+            if GLOBAL_SCOPE in changed:
+                scoped = or_(scoped, AuthorizedUser.godown_id.is_(None), AuthorizedUser.godown_id == GLOBAL_SCOPE)
+            query = query.where(scoped)
+        for person_id, godown_id, is_active, blob in db.execute(query):
+            self.remove_person(AUTHORIZED_USERS, person_id)
+            if is_active and blob:
+                self.upsert(AUTHORIZED_USERS, person_id, person_id, unpack_embedding(blob), godown_id)
+        self.authorized_versions = current
+
+    def _godown_of(self, kind: str, person_id: str) -> Optional[str]:
+        for key in self._by_person.get((kind, person_id), ()):
+            dim, slot = self._slots[key]
+            return self._banks[dim].godowns[slot]
+        return None
+
+    def refresh(self, db: Session) -> bool:
+        """Apply database changes since the last refresh; returns True if any."""
+        watchlist_version = get_config_version(db, WATCHLIST)
+        authorized_versions = {
+            str(godown_id): int(version)
+            for godown_id, version in db.execute(
+                select(ConfigVersion.godown_id, ConfigVersion.version).where(ConfigVersion.kind == AUTHORIZED_USERS)
+            )
+        }
+        with self._lock:
+            if (
+                watchlist_version == self.watchlist_version
+                and authorized_versions == self.authorized_versions
+            ):
+                return False
+            started = time.perf_counter()
+            if watchlist_version != self.watchlist_version:
+                self._refresh_watchlist(db, watchlist_version)
+            if authorized_versions != self.authorized_versions:
+                self._refresh_authorized(db, authorized_versions)
+            self.refreshes += 1
+            logger.info(
+                "Face index refreshed entries=%s took_ms=%.1f",
+                len(self._slots),
+                (time.perf_counter() - started) * 1000.0,
+            )
+        # The manifest records the versions it was saved at, so a throttled
+        # save only means a slightly larger delta on the next startup.
+        if self._last_saved is None or time.monotonic() - self._last_saved >= self.save_interval_sec:
+            self.save()
+        return True
+
+    # -- persistence --------------------------------------------------------
+
+    def save(self) -> None:
+        """
+        Write a snapshot and switch ``CURRENT`` to it.
+
+        Every process saves into its own directory (vectors and the manifest
+        with the versions they were built at), then repoints ``CURRENT`` with
+        one atomic rename, so a reader never pairs one process's vectors with
+        another process's keys.
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            try:
+                self.path.mkdir(parents=True, exist_ok=True)
+                snapshot = f"{_SNAPSHOT_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:12]}"
+                target = self.path / snapshot
+                target.mkdir()
+                banks = []
+                for dim, bank in sorted(self._banks.items()):
+                    rows = np.flatnonzero(bank.active)
+                    file_name = f"vectors_{dim}.npy"
+                    with open(target / file_name, "wb") as handle:
+                        np.save(handle, np.ascontiguousarray(bank.vectors[rows]))
+                    banks.append(
+                        {
+                            "dim": dim,
+                            "file": file_name,
+                            "keys": [list(bank.keys[slot]) for slot in rows],
+                            "godowns": [bank.godowns[slot] for slot in rows],
+                        }
+                    )
+                manifest = {
+                    "watchlist_version": self.watchlist_version,
+                    "authorized_versions": self.authorized_versions,
+                    "banks": banks,
+                }
+                (target / _MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+                previous = self._current_snapshot()
+                pointer = self.path / f".{_CURRENT}.{snapshot}.tmp"
+                pointer.write_text(snapshot, encoding="utf-8")
+                os.replace(pointer, self.path / _CURRENT)
+                self._last_saved = time.monotonic()
+            except Exception as exc:
+                logger.warning("Face index save failed path=%s err=%s", self.path, exc)
+                return
+            # Keep the snapshot just replaced for readers that resolved it a
+            # moment ago; a reader that loses a race falls back to a rebuild.
+            for stale in self.path.glob(f"{_SNAPSHOT_PREFIX}*"):
+                if stale.name not in {snapshot, previous}:
+                    shutil.rmtree(stale, ignore_errors=True)
+
+    def _current_snapshot(self) -> Optional[str]:
+        try:
+            name = (self.path / _CURRENT).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return name if name.startswith(_SNAPSHOT_PREFIX) and "/" not in name else None
+
+    def load(self) -> bool:
+        """Open the current snapshot memory-mapped; returns False if none is usable."""
+        if self.path is None:
+            return False
+        try:
+            snapshot = self._current_snapshot()
+            if snapshot is None:
+                return False
+            source = self.path / snapshot
+            manifest = json.loads((source / _MANIFEST).read_text(encoding="utf-8"))
+            banks: dict[int, _Bank] = {}
+            slots: dict[_KeyT, tuple[int, int]] = {}
+            by_person: dict[tuple[str, str], set[_KeyT]] = {}
+            for entry in manifest.get("banks", []):
+                dim = int(entry["dim"])
+                vectors = np.load(source / entry["file"], mmap_mode="r")
+                if vectors.shape != (len(entry["keys"]), dim):
+                    raise ValueError(f"bank {dim} does not match its manifest")
+                bank = _Bank(dim, vectors)
+                for slot, (raw_key, godown_id) in enumerate(zip(entry["keys"], entry["godowns"])):
+                    key = (raw_key[0], raw_key[1], raw_key[2])
+                    bank.keys[slot] = key
+                    bank.kinds[slot] = key[0]
+                    bank.godowns[slot] = godown_id
+                    slots[key] = (dim, slot)
+                    by_person.setdefault((key[0], key[1]), set()).add(key)
+                banks[dim] = bank
+            authorized_versions = manifest.get("authorized_versions")
+        except Exception as exc:
+            logger.warning("Face index load failed path=%s err=%s", self.path, exc)
+            return False
+        with self._lock:
+            self._banks, self._slots, self._by_person = banks, slots, by_person
+            self.watchlist_version = manifest.get("watchlist_version")
+            self.authorized_versions = (
+                {str(k): int(v) for k, v in authorized_versions.items()} if authorized_versions is not None else None
+            )
+            self.loaded_from_disk = True
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._slots),
+                "dims": {str(dim): bank.count() for dim, bank in sorted(self._banks.items())},
+                "watchlist_version": self.watchlist_version,
+                "authorized_version": sum((self.authorized_versions or {}).values()),
+                "loaded_from_disk": self.loaded_from_disk,
+                "searches": self.searches,
+                "refreshes": self.refreshes,
+            }
+
+
+_index: Optional[FaceIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_face_index() -> FaceIndex:
+    """Process-wide index, re-opened from disk on first use when available."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FaceIndex(_default_dir())
+            _index.load()
+        return _index
+
+
+def search_faces(db: Session, vector, **kwargs) -> list[dict]:
+    index = get_face_index()
+    index.refresh(db)
+    return index.search(vector, **kwargs)
+
+
+def face_index_stats() -> dict:
+    with _index_lock:
+        index = _index
+    if index is None:
+        return {"entries": 0, "loaded": False}
+    return index.stats()
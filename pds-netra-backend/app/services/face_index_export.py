@@ -0,0 +1,128 @@
+"""
+Binary bulk export of face embeddings for edge sync.
+
+JSON face indexes make every edge re-parse 512-d float arrays as text. The
+export below sends one JSON manifest followed by contiguous, C-ordered
+float matrices that the edge maps straight into NumPy::
+
+    b"PNFI" | format version (uint32 LE) | manifest length (uint32 LE) | manifest (UTF-8 JSON)
+    | zero padding to a 64-byte boundary | section data ...
+
+``manifest["sections"]`` lists ``{"dim", "count", "offset", "nbytes"}`` with
+``offset`` relative to the start of the section data, and every record in
+``manifest["records"]`` carries ``section``/``row`` pointing at its vector, so
+an edge can do::
+
+    data_start = align64(12 + manifest_len)
+    matrix = np.frombuffer(body, dtype=manifest["dtype"], count=count * dim,
+                           offset=data_start + section["offset"]).reshape(count, dim)
+
+Vectors are grouped by dimension so mixed model versions still export.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from ..models.types import unpack_embedding
+
+
+FACE_INDEX_MEDIA_TYPE = "application/x-pds-face-index"
+FACE_INDEX_MAGIC = b"PNFI"
+FACE_INDEX_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<4sII")
+_ALIGN = 64
+_EXPORT_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+
+
+def _align(value: int) -> int:
+    return (value + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def export_dtype(value: Optional[str]) -> str:
+    value = (value or "float32").strip().lower()
+    if value not in _EXPORT_DTYPES:
+        raise ValueError(f"Unsupported export dtype {value!r}")
+    return value
+
+
+def encode_face_index(
+    records: Iterable[tuple[dict, Optional[bytes]]],
+    *,
+    dtype: str = "float32",
+    extra: Optional[dict[str, Any]] = None,
+) -> bytes:
+    """
+    Encode ``(record, packed_embedding)`` pairs into the binary export.
+
+    ``packed_embedding`` is the raw column value (see ``models.types``), so
+    stored vectors are decoded with ``np.frombuffer`` rather than parsed.
+    Records without an embedding are kept in the manifest with
+    ``section = None``.
+    """
+    out_dtype = _EXPORT_DTYPES[export_dtype(dtype)]
+    manifest_records: list[dict] = []
+    groups: dict[int, list[np.ndarray]] = {}
+    for record, blob in records:
+        record = dict(record)
+        vector = unpack_embedding(blob) if blob else None
+        if vector is None or vector.size == 0:
+            record["section"] = None
+            record["row"] = None
+        else:
+            rows = groups.setdefault(int(vector.size), [])
+            record["section"] = int(vector.size)
+            record["row"] = len(rows)
+            rows.append(vector)
+        manifest_records.append(record)
+
+    sections: list[dict] = []
+    chunks: list[bytes] = []
+    section_index: dict[int, int] = {}
+    offset = 0
+    for dim in sorted(groups):
+        matrix = np.ascontiguousarray(np.vstack(groups[dim]).astype(out_dtype, copy=False))
+        data = matrix.tobytes()
+        section_index[dim] = len(sections)
+        sections.append({"dim": dim, "count": int(matrix.shape[0]), "offset": offset, "nbytes": len(data)})
+        padded = _align(len(data))
+        chunks.append(data + b"\0" * (padded - len(data)))
+        offset += padded
+    for record in manifest_records:
+        if record["section"] is not None:
+            record["section"] = section_index[record["section"]]
+
+    manifest = {
+        "format": "pds-face-index",
+        "format_version": FACE_INDEX_FORMAT_VERSION,
+        "dtype": export_dtype(dtype),
+        "byte_order": "little",
+        **(extra or {}),
+        "sections": sections,
+        "records": manifest_records,
+    }
+    manifest_bytes = json.dumps(manifest, separators=(",", ":"), default=str).encode("utf-8")
+    head = _PREAMBLE.pack(FACE_INDEX_MAGIC, FACE_INDEX_FORMAT_VERSION, len(manifest_bytes)) + manifest_bytes
+    head += b"\0" * (_align(len(head)) - len(head))
+    return head + b"".join(chunks)
+
+
+def decode_face_index(body: bytes) -> tuple[dict, list[np.ndarray]]:
+    """Parse an export back into ``(manifest, [matrix per section])``."""
+    magic, version, manifest_len = _PREAMBLE.unpack_from(body)
+    if magic != FACE_INDEX_MAGIC or version != FACE_INDEX_FORMAT_VERSION:
+        raise ValueError("Unsupported face index export")
+    manifest = json.loads(body[_PREAMBLE.size : _PREAMBLE.size + manifest_len].decode("utf-8"))
+    data_start = _align(_PREAMBLE.size + manifest_len)
+    dtype = _EXPORT_DTYPES[manifest["dtype"]]
+    matrices = [
+        np.frombuffer(
+            body, dtype=dtype, count=section["count"] * section["dim"], offset=data_start + section["offset"]
+        ).reshape(section["count"], section["dim"])
+        for section in manifest["sections"]
+    ]
+    return manifest, matrices
@@ -0,0 +1,235 @@
+"""
+Bounded, sharded worker pool for MQTT ingest.
+
+Messages are routed to a shard by key (the godown segment of the topic) so
+events from one godown are processed in order by a single worker, while
+different godowns are ingested in parallel. Each worker drains its queue in
+micro-batches bounded by count and deadline and hands the whole batch to a
+single callback, which typically processes it in one DB session.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+def _env_int(name: str, default: int, *, minimum: int = 0) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except Exception:
+        value = default
+    return max(value, minimum)
+
+
+def _env_float(name: str, default: float, *, minimum: float = 0.0) -> float:
+    try:
+        value = float(os.getenv(name, str(default)))
+    except Exception:
+        value = default
+    return max(value, minimum)
+
+
+@dataclass
+class IngestMessage:
+    topic: str
+    payload: bytes
+    received_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _ShardStats:
+    enqueued: int = 0
+    processed: int = 0
+    failed: int = 0
+    dropped: int = 0
+    batches: int = 0
+    max_depth: int = 0
+    batch_latency_total: float = 0.0
+    queue_wait_total: float = 0.0
+
+
+class IngestWorkerPool:
+    """Sharded queues drained by worker threads in micro-batches."""
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[IngestMessage]], int],
+        *,
+        workers: int | None = None,
+        queue_size: int | None = None,
+        batch_size: int | None = None,
+        batch_wait_ms: float | None = None,
+        enqueue_timeout_sec: float | None = None,
+        name: str = "mqtt-ingest",
+    ) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._process_batch = process_batch
+        self.workers = workers if workers is not None else _env_int("MQTT_INGEST_WORKERS", 4, minimum=1)
+        self.workers = max(1, self.workers)
+        total_queue = queue_size if queue_size is not None else _env_int("MQTT_INGEST_QUEUE_SIZE", 2000, minimum=1)
+        self.shard_queue_size = max(1, total_queue // self.workers)
+        self.batch_size = batch_size if batch_size is not None else _env_int("MQTT_INGEST_BATCH_SIZE", 50, minimum=1)
+        wait_ms = batch_wait_ms if batch_wait_ms is not None else _env_float("MQTT_INGEST_BATCH_WAIT_MS", 50.0)
+        self.batch_wait_sec = wait_ms / 1000.0
+        self.enqueue_timeout_sec = (
+            enqueue_timeout_sec
+            if enqueue_timeout_sec is not None
+            else _env_float("MQTT_INGEST_ENQUEUE_TIMEOUT_SEC", 5.0)
+        )
+        self.name = name
+        self._queues: list[queue.Queue[IngestMessage]] = [
+            queue.Queue(maxsize=self.shard_queue_size) for _ in range(self.workers)
+        ]
+        self._stats = [_ShardStats() for _ in range(self.workers)]
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for idx in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                args=(idx,),
+                daemon=True,
+                name=f"{self.name}-{idx}",
+            )
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info(
+            "Ingest pool started workers=%s shard_queue=%s batch_size=%s batch_wait_ms=%.0f",
+            self.workers,
+            self.shard_queue_size,
+            self.batch_size,
+            self.batch_wait_sec * 1000.0,
+        )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def shard_for(self, key: str) -> int:
+        return zlib.crc32(key.encode("utf-8")) % self.workers
+
+    def submit(self, message: IngestMessage, *, key: Optional[str] = None) -> bool:
+        """
+        Enqueue a message, blocking up to the enqueue timeout when the shard is full.
+
+        Blocking the caller (paho's network thread) is the backpressure signal;
+        the message is dropped only when the shard stays full past the timeout.
+        """
+        shard = self.shard_for(key if key is not None else message.topic)
+        q = self._queues[shard]
+        try:
+            q.put(message, timeout=self.enqueue_timeout_sec)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats[shard].dropped += 1
+            self.logger.warning(
+                "Ingest shard full; dropping message shard=%s topic=%s depth=%s",
+                shard,
+                message.topic,
+                q.qsize(),
+            )
+            return False
+        depth = q.qsize()
+        with self._stats_lock:
+            stats = self._stats[shard]
+            stats.enqueued += 1
+            if depth > stats.max_depth:
+                stats.max_depth = depth
+        return True
+
+    def _drain_batch(self, q: queue.Queue[IngestMessage]) -> list[IngestMessage]:
+        try:
+            first = q.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait_sec
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(q.get_nowait())
+                else:
+                    batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, shard: int) -> None:
+        q = self._queues[shard]
+        while not (self._stop.is_set() and q.empty()):
+            batch = self._drain_batch(q)
+            if not batch:
+                continue
+            started = time.monotonic()
+            failed = 0
+            try:
+                failed = self._process_batch(batch) or 0
+            except Exception:
+                failed = len(batch)
+                self.logger.exception("Ingest batch failed shard=%s size=%s", shard, len(batch))
+            finished = time.monotonic()
+            with self._stats_lock:
+                stats = self._stats[shard]
+                stats.batches += 1
+                stats.processed += len(batch) - failed
+                stats.failed += failed
+                stats.batch_latency_total += finished - started
+                stats.queue_wait_total += sum(started - msg.received_at for msg in batch)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            shards = []
+            totals = _ShardStats()
+            for idx, stats in enumerate(self._stats):
+                depth = self._queues[idx].qsize()
+                shards.append(
+                    {
+                        "shard": idx,
+                        "depth": depth,
+                        "max_depth": stats.max_depth,
+                        "processed": stats.processed,
+                        "dropped": stats.dropped,
+                    }
+                )
+                totals.enqueued += stats.enqueued
+                totals.processed += stats.processed
+                totals.failed += stats.failed
+                totals.dropped += stats.dropped
+                totals.batches += stats.batches
+                totals.max_depth = max(totals.max_depth, stats.max_depth)
+                totals.batch_latency_total += stats.batch_latency_total
+                totals.queue_wait_total += stats.queue_wait_total
+        handled = totals.processed + totals.failed
+        return {
+            "workers": self.workers,
+            "shard_capacity": self.shard_queue_size,
+            "batch_size": self.batch_size,
+            "batch_wait_ms": round(self.batch_wait_sec * 1000.0, 1),
+            "queue_depth": sum(s["depth"] for s in shards),
+            "max_shard_depth": totals.max_depth,
+            "enqueued": totals.enqueued,
+            "processed": totals.processed,
+            "failed": totals.failed,
+            "dropped": totals.dropped,
+            "batches": totals.batches,
+            "avg_batch_size": round(handled / totals.batches, 2) if totals.batches else 0.0,
+            "avg_batch_ms": round(totals.batch_latency_total * 1000.0 / totals.batches, 2) if totals.batches else 0.0,
+            "avg_queue_wait_ms": round(totals.queue_wait_total * 1000.0 / handled, 2) if handled else 0.0,
+            "shards": shards,
+        }
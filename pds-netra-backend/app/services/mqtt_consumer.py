@@ -11,9 +11,10 @@ import os
 from typing import Optional
 
 import paho.mqtt.client as mqtt
+from sqlalchemy.orm import Session
 
 from ..core.config import settings
-from ..core.db import SessionLocal
+from ..core.db import SessionLocal, unit_of_work
 from ..core.errors import log_exception
 from ..schemas.event import EventIn
 from ..schemas.watchlist import FaceMatchEventIn
@@ -21,6 +22,13 @@ from ..schemas.presence import PresenceEventIn
 from .event_ingest import handle_incoming_event
 from .watchlist import ingest_face_match_event
 from .presence import ingest_presence_event
+from .ingest_pool import IngestMessage, IngestWorkerPool
+
+
+def _topic_godown(topic: str) -> str:
+    # Topics are pds/<godown_id>/<kind>; shard on the godown so its events stay ordered.
+    parts = topic.split("/")
+    return parts[1] if len(parts) >= 3 else topic
 
 
 class MQTTConsumer:
@@ -45,6 +53,14 @@ class MQTTConsumer:
         self.client.on_disconnect = self.on_disconnect  # type: ignore
         self.client.reconnect_delay_set(min_delay=1, max_delay=10)
         self._connected = threading.Event()
+        # MQTT_INGEST_WORKERS=0 keeps the legacy inline path on paho's network thread.
+        self.pool: Optional[IngestWorkerPool] = None
+        try:
+            workers = int(os.getenv("MQTT_INGEST_WORKERS", "4"))
+        except Exception:
+            workers = 4
+        if workers > 0:
+            self.pool = IngestWorkerPool(self._process_batch, workers=workers)
 
     def on_connect(self, client: mqtt.Client, userdata, flags, rc) -> None:  # type: ignore
         if rc == 0:
@@ -71,67 +87,108 @@ class MQTTConsumer:
         self.logger.warning("MQTT disconnected with return code %s", rc)
 
     def on_message(self, client: mqtt.Client, userdata, msg) -> None:  # type: ignore
+        topic = getattr(msg, "topic", None) or ""
+        payload = msg.payload if getattr(msg, "payload", None) is not None else b""
+        if self.pool is None:
+            with SessionLocal() as db:
+                self._ingest_message(db, topic, payload)
+            return
+        self.pool.submit(IngestMessage(topic=topic, payload=payload), key=_topic_godown(topic))
+
+    def _process_batch(self, batch: list[IngestMessage]) -> int:
+        # One transaction per batch; each message's ingest nests as a savepoint,
+        # so a failing message is discarded without aborting the others.
         try:
-            payload = json.loads(msg.payload.decode("utf-8"))
+            return self._ingest_batch(batch)
+        except Exception as exc:
+            if len(batch) == 1:
+                raise
+            self.logger.warning("Ingest batch commit failed size=%s err=%s; retrying one by one", len(batch), exc)
+        # paho has already acknowledged these messages, so retry each in its own
+        # transaction rather than lose the whole batch to one bad row.
+        failed = 0
+        for item in batch:
+            try:
+                failed += self._ingest_batch([item])
+            except Exception as exc:
+                log_exception(self.logger, "Failed to ingest message", exc=exc, extra={"topic": item.topic})
+                failed += 1
+        return failed
+
+    def _ingest_batch(self, batch: list[IngestMessage]) -> int:
+        failed = 0
+        with SessionLocal() as db:
+            with unit_of_work(db):
+                for item in batch:
+                    if not self._ingest_message(db, item.topic, item.payload):
+                        failed += 1
+        return failed
+
+    def _ingest_message(self, db: Session, topic: str, raw: bytes) -> bool:
+        try:
+            payload = json.loads(raw.decode("utf-8"))
         except Exception as exc:
             self.logger.warning(
                 "Invalid event payload topic=%s payload_len=%s err=%s",
-                getattr(msg, "topic", None),
-                len(msg.payload) if getattr(msg, "payload", None) is not None else None,
+                topic,
+                len(raw),
                 exc,
             )
-            return
+            return False
         if isinstance(payload, dict) and payload.get("event_type") == "FACE_MATCH":
             try:
                 face_event = FaceMatchEventIn.model_validate(payload)
             except Exception as exc:
                 self.logger.warning(
                     "Invalid face match payload topic=%s payload_len=%s err=%s",
-                    getattr(msg, "topic", None),
-                    len(msg.payload) if getattr(msg, "payload", None) is not None else None,
+                    topic,
+                    len(raw),
                     exc,
                 )
-                return
-            with SessionLocal() as db:
-                try:
-                    ingest_face_match_event(db, face_event)
-                except Exception as exc:
-                    self.logger.exception("Failed to ingest face match event: %s", exc)
-            return
+                return False
+            try:
+                ingest_face_match_event(db, face_event)
+            except Exception as exc:
+                self.logger.exception("Failed to ingest face match event: %s", exc)
+                return False
+            return True
         if isinstance(payload, dict) and payload.get("event_type") in {"PERSON_DETECTED", "VEHICLE_DETECTED", "ANPR_HIT"}:
             try:
                 presence_event = PresenceEventIn.model_validate(payload)
             except Exception as exc:
                 self.logger.warning(
                     "Invalid presence payload topic=%s payload_len=%s err=%s",
-                    getattr(msg, "topic", None),
-                    len(msg.payload) if getattr(msg, "payload", None) is not None else None,
+                    topic,
+                    len(raw),
                     exc,
                 )
-                return
-            with SessionLocal() as db:
-                try:
-                    ingest_presence_event(db, presence_event)
-                except Exception as exc:
-                    self.logger.exception("Failed to ingest presence event: %s", exc)
-            return
+                return False
+            try:
+                ingest_presence_event(db, presence_event)
+            except Exception as exc:
+                self.logger.exception("Failed to ingest presence event: %s", exc)
+                return False
+            return True
         try:
             event_in = EventIn.parse_obj(payload)
         except Exception as exc:
             self.logger.warning(
                 "Invalid event payload topic=%s payload_len=%s err=%s",
-                getattr(msg, "topic", None),
-                len(msg.payload) if getattr(msg, "payload", None) is not None else None,
+                topic,
+                len(raw),
                 exc,
             )
-            return
-        with SessionLocal() as db:
-            try:
-                handle_incoming_event(event_in, db)
-            except Exception as exc:
-                self.logger.exception("Failed to ingest event: %s", exc)
+            return False
+        try:
+            handle_incoming_event(event_in, db)
+        except Exception as exc:
+            self.logger.exception("Failed to ingest event: %s", exc)
+            return False
+        return True
 
     def start(self) -> None:
+        if self.pool is not None:
+            self.pool.start()
         try:
             self.client.connect_async(
                 settings.mqtt_broker_host,
@@ -153,6 +210,14 @@ class MQTTConsumer:
             self.client.disconnect()
         except Exception as exc:
             log_exception(self.logger, "MQTT shutdown failed", exc=exc)
+        if self.pool is not None:
+            # Drain whatever is already queued before the process exits.
+            self.pool.stop()
 
     def is_connected(self) -> bool:
         return self._connected.is_set()
+
+    def ingest_stats(self) -> dict:
+        if self.pool is None:
+            return {"mode": "inline"}
+        return {"mode": "pool", **self.pool.stats()}
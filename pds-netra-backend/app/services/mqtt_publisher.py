@@ -1,5 +1,12 @@
 """
 MQTT publisher utilities for backend-triggered notifications.
+
+Notifications go through one long-lived ``MQTTPublisher`` per process: a
+single auto-reconnecting client plus a bounded outbound queue drained by a
+sender thread, instead of a fresh TCP connect per message. Messages that
+share a coalescing key (topic plus godown/camera) and arrive within
+``MQTT_PUBLISH_DEBOUNCE_MS`` collapse into one publish carrying the latest
+payload, so bulk edits emit a single config-change or sync notification.
 """
 
 from __future__ import annotations
@@ -7,8 +14,14 @@ from __future__ import annotations
 import json
 import logging
 import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 
 import paho.mqtt.client as mqtt
 
@@ -17,19 +30,304 @@ from ..core.config import settings
 
 _logger = logging.getLogger("mqtt_publisher")
 
-# Track the last config change time for the /api/v1/config/version endpoint
-_last_config_change: datetime = datetime.utcnow()
+def _env_int(name: str, default: int, *, minimum: int = 0) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except Exception:
+        value = default
+    return max(value, minimum)
+
+
+def _env_float(name: str, default: float, *, minimum: float = 0.0) -> float:
+    try:
+        value = float(os.getenv(name, str(default)))
+    except Exception:
+        value = default
+    return max(value, minimum)
+
+
+def _publisher_client_id() -> str:
+    # Containers all run uvicorn as PID 1, so the pid alone collides across
+    # replicas and the broker would keep dropping the older session.
+    return f"pds-netra-publisher-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def _build_client(client_id: str) -> mqtt.Client:
+    protocol = os.getenv("MQTT_PROTOCOL", "v311").lower()
+    if protocol == "v31":
+        mqtt_protocol = mqtt.MQTTv31
+    elif protocol == "v5":
+        mqtt_protocol = mqtt.MQTTv5
+    else:
+        mqtt_protocol = mqtt.MQTTv311
+    client = mqtt.Client(client_id=client_id, clean_session=True, protocol=mqtt_protocol)
+    if settings.mqtt_username:
+        client.username_pw_set(settings.mqtt_username, settings.mqtt_password)
+    client.reconnect_delay_set(min_delay=1, max_delay=10)
+    return client
+
+
+@dataclass
+class _Pending:
+    topic: str
+    payload: dict
+    enqueued_at: float
+    due_at: float
+
+
+class MQTTPublisher:
+    """Persistent MQTT client with a bounded, coalescing outbound queue."""
+
+    def __init__(
+        self,
+        *,
+        client_factory: Optional[Callable[[], mqtt.Client]] = None,
+        queue_size: int | None = None,
+        debounce_ms: float | None = None,
+        retry_delay_sec: float = 1.0,
+    ) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.client_id = _publisher_client_id()
+        self._client_factory = client_factory or (lambda: _build_client(self.client_id))
+        self.queue_size = queue_size if queue_size is not None else _env_int("MQTT_PUBLISH_QUEUE_SIZE", 1000, minimum=1)
+        wait_ms = debounce_ms if debounce_ms is not None else _env_float("MQTT_PUBLISH_DEBOUNCE_MS", 250.0)
+        self.debounce_sec = wait_ms / 1000.0
+        self.retry_delay_sec = retry_delay_sec
+        self.client: Optional[mqtt.Client] = None
+        self._cond = threading.Condition()
+        self._pending: OrderedDict[str, _Pending] = OrderedDict()
+        # Messages taken by the sender but not yet published still count
+        # against queue_size, so the bound holds while the broker is down.
+        self._inflight = 0
+        self._connected = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.published = 0
+        self.failed = 0
+        self.max_depth = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def on_connect(self, client, userdata, flags, rc, *args) -> None:  # type: ignore
+        if rc == 0:
+            self._connected.set()
+            with self._cond:
+                self._cond.notify_all()
+        else:
+            self.logger.error("MQTT publisher failed to connect with code %s", rc)
+
+    def on_disconnect(self, client, userdata, rc, *args) -> None:  # type: ignore
+        self._connected.clear()
+        self.logger.warning("MQTT publisher disconnected with return code %s", rc)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self.client = self._client_factory()
+        self.client.on_connect = self.on_connect  # type: ignore
+        self.client.on_disconnect = self.on_disconnect  # type: ignore
+        try:
+            self.client.connect_async(settings.mqtt_broker_host, settings.mqtt_broker_port, keepalive=60)
+            self.client.loop_start()
+        except Exception as exc:
+            self.logger.error(
+                "MQTT publisher connection failed for %s:%s (%s)",
+                settings.mqtt_broker_host,
+                settings.mqtt_broker_port,
+                exc,
+            )
+        self._thread = threading.Thread(target=self._run, daemon=True, name="mqtt-publisher")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush what is due (while connected) and close the client."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self.client is not None:
+            try:
+                self.client.loop_stop()
+                self.client.disconnect()
+            except Exception as exc:
+                self.logger.warning("MQTT publisher shutdown failed: %s", exc)
+            self.client = None
+        self._connected.clear()
+
+    def publish(self, topic: str, payload: dict, *, key: str | None = None) -> bool:
+        """
+        Queue ``payload`` for ``topic``; returns False when it was dropped.
 
+        A message whose ``key`` is already pending replaces that payload but
+        keeps its original deadline, so coalescing never delays delivery past
+        one debounce window.
+        """
+        key = key or f"{topic}|{id(payload)}"
+        now = time.monotonic()
+        with self._cond:
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.payload = payload
+                self.coalesced += 1
+                return True
+            if len(self._pending) + self._inflight >= self.queue_size:
+                self.dropped += 1
+                self.logger.warning("MQTT publish queue full; dropping message topic=%s", topic)
+                return False
+            self._pending[key] = _Pending(topic=topic, payload=payload, enqueued_at=now, due_at=now + self.debounce_sec)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._pending) + self._inflight)
+            self._cond.notify_all()
+        return True
 
-def _publish_mqtt(topic: str, payload: dict) -> None:
-    """Helper to publish MQTT message with common error handling."""
+    def _take_due(self) -> list[tuple[str, _Pending]]:
+        # Entries are kept in deadline order (retries are re-appended with a
+        # later deadline), so only the head needs checking.
+        with self._cond:
+            while True:
+                if self._pending:
+                    wait = next(iter(self._pending.values())).due_at - time.monotonic()
+                    if wait <= 0 or self._stopping:
+                        break
+                elif self._stopping:
+                    return []
+                else:
+                    wait = None
+                self._cond.wait(wait)
+            now = time.monotonic()
+            due: list[tuple[str, _Pending]] = []
+            for key, item in list(self._pending.items()):
+                if item.due_at > now and not self._stopping:
+                    break
+                due.append((key, self._pending.pop(key)))
+            self._inflight = len(due)
+            return due
+
+    def _requeue(self, items: list[tuple[str, _Pending]]) -> None:
+        due_at = time.monotonic() + self.retry_delay_sec
+        with self._cond:
+            self._inflight = 0
+            for key, item in items:
+                if key in self._pending:
+                    # A newer payload for the same key is already waiting.
+                    continue
+                if len(self._pending) >= self.queue_size:
+                    self.dropped += 1
+                    continue
+                item.due_at = due_at
+                self._pending[key] = item
+
+    def _send(self, item: _Pending) -> bool:
+        client = self.client
+        if client is None:
+            return False
+        try:
+            info = client.publish(item.topic, json.dumps(item.payload), qos=1)
+        except Exception as exc:
+            self.logger.warning("Failed to publish MQTT on topic %s: %s", item.topic, exc)
+            return False
+        if getattr(info, "rc", mqtt.MQTT_ERR_SUCCESS) != mqtt.MQTT_ERR_SUCCESS:
+            self.logger.warning("Failed to publish MQTT on topic %s: rc=%s", item.topic, info.rc)
+            return False
+        latency = time.monotonic() - item.enqueued_at
+        with self._cond:
+            self._inflight -= 1
+            self.published += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            due = self._take_due()
+            if not due:
+                if self._stopping:
+                    return
+                continue
+            if not self._connected.wait(timeout=self.retry_delay_sec):
+                if self._stopping:
+                    with self._cond:
+                        self._inflight = 0
+                        self.dropped += len(due)
+                    self.logger.warning("MQTT publisher stopping while disconnected; dropped=%s", len(due))
+                    return
+                self._requeue(due)
+                continue
+            retry: list[tuple[str, _Pending]] = []
+            for key, item in due:
+                if not self._send(item):
+                    retry.append((key, item))
+            if retry:
+                with self._cond:
+                    self.failed += len(retry)
+                if self._stopping:
+                    with self._cond:
+                        self._inflight = 0
+                    return
+                self._requeue(retry)
+
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "running": self._thread is not None,
+                "connected": self._connected.is_set(),
+                "queue_depth": len(self._pending) + self._inflight,
+                "max_depth": self.max_depth,
+                "queue_size": self.queue_size,
+                "debounce_ms": round(self.debounce_sec * 1000.0, 1),
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "published": self.published,
+                "failed": self.failed,
+                "avg_latency_ms": round(self._latency_total / self.published * 1000.0, 2) if self.published else 0.0,
+                "max_latency_ms": round(self._latency_max * 1000.0, 2),
+            }
+
+
+_publisher: Optional[MQTTPublisher] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> MQTTPublisher:
+    """Return the process-wide publisher, starting it on first use."""
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = MQTTPublisher()
+            _publisher.start()
+        return _publisher
+
+
+def shutdown_publisher() -> None:
+    global _publisher
+    with _publisher_lock:
+        publisher, _publisher = _publisher, None
+    if publisher is not None:
+        publisher.stop()
+
+
+def publisher_stats() -> dict:
+    with _publisher_lock:
+        publisher = _publisher
+    if publisher is None:
+        return {"running": False, "connected": False, "queue_depth": 0}
+    return publisher.stats()
+
+
+def _publish_mqtt(topic: str, payload: dict, key: str | None = None) -> None:
+    """Hand a message to the shared publisher; never blocks the request."""
     try:
-        client = mqtt.Client(client_id=f"pds-netra-{topic.replace('/', '-')}-{id(payload)}")
-        if settings.mqtt_username:
-            client.username_pw_set(settings.mqtt_username, settings.mqtt_password)
-        client.connect(settings.mqtt_broker_host, settings.mqtt_broker_port, keepalive=30)
-        client.publish(topic, json.dumps(payload), qos=1)
-        client.disconnect()
+        get_publisher().publish(topic, payload, key=key)
     except Exception as exc:
         _logger.warning("Failed to publish MQTT on topic %s: %s", topic, exc)
 
@@ -44,14 +342,11 @@ def publish_watchlist_sync(godown_id: Optional[str] = None) -> None:
         "godown_id": godown_id,
         "timestamp_utc": datetime.utcnow().isoformat() + "Z",
     }
-    _publish_mqtt(topic, payload)
+    _publish_mqtt(topic, payload, key=f"{topic}|{godown_id or '*'}")
 
 
 def publish_camera_config_changed(godown_id: str, camera_id: str, action: str) -> None:
     """Publish config change event when a camera is created/updated/deleted."""
-    global _last_config_change
-    _last_config_change = datetime.utcnow()
-
     if os.getenv("ENABLE_CONFIG_MQTT_PUSH", "true").lower() not in {"1", "true", "yes"}:
         return
 
@@ -64,14 +359,11 @@ def publish_camera_config_changed(godown_id: str, camera_id: str, action: str) -
         "camera_id": camera_id,
         "timestamp_utc": datetime.utcnow().isoformat() + "Z",
     }
-    _publish_mqtt(topic, payload)
+    _publish_mqtt(topic, payload, key=f"{topic}|{godown_id}|{camera_id}")
 
 
 def publish_rules_config_changed(godown_id: str, camera_id: str) -> None:
     """Publish config change event when any rule is created/updated/deleted."""
-    global _last_config_change
-    _last_config_change = datetime.utcnow()
-
     if os.getenv("ENABLE_CONFIG_MQTT_PUSH", "true").lower() not in {"1", "true", "yes"}:
         return
 
@@ -83,14 +375,11 @@ def publish_rules_config_changed(godown_id: str, camera_id: str) -> None:
         "camera_id": camera_id,
         "timestamp_utc": datetime.utcnow().isoformat() + "Z",
     }
-    _publish_mqtt(topic, payload)
+    _publish_mqtt(topic, payload, key=f"{topic}|{godown_id}|{camera_id}")
 
 
 def publish_zones_config_changed(godown_id: str, camera_id: str) -> None:
     """Publish config change event when any zone is created/updated/deleted."""
-    global _last_config_change
-    _last_config_change = datetime.utcnow()
-
     if os.getenv("ENABLE_CONFIG_MQTT_PUSH", "true").lower() not in {"1", "true", "yes"}:
         return
 
@@ -102,9 +391,5 @@ def publish_zones_config_changed(godown_id: str, camera_id: str) -> None:
         "camera_id": camera_id,
         "timestamp_utc": datetime.utcnow().isoformat() + "Z",
     }
-    _publish_mqtt(topic, payload)
-
+    _publish_mqtt(topic, payload, key=f"{topic}|{godown_id}|{camera_id}")
 
-def get_last_config_change() -> datetime:
-    """Get the timestamp of the last config change (for config version endpoint)."""
-    return _last_config_change
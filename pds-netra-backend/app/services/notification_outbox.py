@@ -1,26 +1,45 @@
 """
 Notification outbox helpers and alert message templating.
+
+Resolved notification targets are cached per ``(godown_id, scope)``,
+separately for each database engine. The cache is keyed on the
+``notification_targets`` counter in ``config_versions``, which the
+notifications API bumps in its write transaction; fan-out checks the counter
+once per batch, so a change made in any process is seen by the worker on
+its next batch. ``NOTIFY_TARGET_CACHE_TTL_SEC`` only bounds staleness for
+writes that bypass the API. The env var mappings are parsed once for each
+distinct value.
+
+Ingest only records an ``AlertNotificationRequest`` in its own transaction;
+the worker fans requests out into outbox rows in batches of
+``NOTIFY_FANOUT_BATCH_SIZE``, rendering each alert's message once.
 """
 
 from __future__ import annotations
 
 import datetime
+import functools
 import logging
 import os
+import threading
+import time
+import weakref
 from dataclasses import dataclass
 import html
 import json
 from typing import Any, Iterable, Optional
 
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from zoneinfo import ZoneInfo
 
 from .ack_tokens import issue_ack_token
+from .config_version import GLOBAL_SCOPE, NOTIFICATION_TARGETS, bump_config_versions, get_config_version
 
 from ..models.event import Alert, Event, AlertEventLink
 from ..models.godown import Godown, Camera
 from ..models.notification_endpoint import NotificationEndpoint
-from ..models.notification_outbox import NotificationOutbox
+from ..models.notification_outbox import AlertNotificationRequest, NotificationOutbox
 from ..models.notification_recipient import NotificationRecipient
 
 
@@ -264,47 +283,150 @@ def _parse_scoped_targets(raw: str, *, godown_id: Optional[str], channel: str) -
     return targets
 
 
+_HQ_ENV = (
+    ("WATCHLIST_NOTIFY_HQ_EMAILS", "EMAIL"),
+    ("WATCHLIST_NOTIFY_HQ_WHATSAPP", "WHATSAPP"),
+    ("WATCHLIST_NOTIFY_HQ_CALLS", "CALL"),
+)
+_GODOWN_ENV = (
+    ("WATCHLIST_NOTIFY_GODOWN_EMAILS", "EMAIL"),
+    ("WATCHLIST_NOTIFY_GODOWN_WHATSAPP", "WHATSAPP"),
+    ("WATCHLIST_NOTIFY_GODOWN_CALLS", "CALL"),
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_env_targets(
+    hq_raw: tuple[str, ...], godown_raw: tuple[str, ...]
+) -> tuple[tuple[tuple[str, str], ...], dict[str, tuple[tuple[str, str], ...]]]:
+    """Parse the env mappings into ``(hq_targets, {godown_id: targets})``."""
+    hq: list[tuple[str, str]] = []
+    for raw, (_, channel) in zip(hq_raw, _HQ_ENV):
+        for value in raw.split(","):
+            norm = _normalize_target(channel, value)
+            if norm:
+                hq.append(norm)
+    per_godown: dict[str, list[tuple[str, str]]] = {}
+    for raw, (_, channel) in zip(godown_raw, _GODOWN_ENV):
+        for item in raw.split(";"):
+            if ":" not in item:
+                continue
+            gid = item.split(":", 1)[0].strip()
+            per_godown.setdefault(gid, []).extend(_parse_scoped_targets(item, godown_id=gid, channel=channel))
+    return tuple(hq), {gid: tuple(targets) for gid, targets in per_godown.items()}
+
+
 def _targets_from_env(*, godown_id: Optional[str], scopes: Iterable[str]) -> list[tuple[str, str]]:
     scope_set = {str(s).upper() for s in scopes}
+    hq, per_godown = _parse_env_targets(
+        tuple(os.getenv(name, "") or "" for name, _ in _HQ_ENV),
+        tuple(os.getenv(name, "") or "" for name, _ in _GODOWN_ENV),
+    )
     targets: list[tuple[str, str]] = []
-
     if "HQ" in scope_set:
-        for value in (os.getenv("WATCHLIST_NOTIFY_HQ_EMAILS", "") or "").split(","):
-            norm = _normalize_target("EMAIL", value)
-            if norm:
-                targets.append(norm)
-        for value in (os.getenv("WATCHLIST_NOTIFY_HQ_WHATSAPP", "") or "").split(","):
-            norm = _normalize_target("WHATSAPP", value)
-            if norm:
-                targets.append(norm)
-        for value in (os.getenv("WATCHLIST_NOTIFY_HQ_CALLS", "") or "").split(","):
-            norm = _normalize_target("CALL", value)
-            if norm:
-                targets.append(norm)
-
+        targets.extend(hq)
     if "GODOWN_MANAGER" in scope_set and godown_id:
-        targets.extend(
-            _parse_scoped_targets(
-                os.getenv("WATCHLIST_NOTIFY_GODOWN_EMAILS", "") or "",
-                godown_id=godown_id,
-                channel="EMAIL",
-            )
-        )
-        targets.extend(
-            _parse_scoped_targets(
-                os.getenv("WATCHLIST_NOTIFY_GODOWN_WHATSAPP", "") or "",
-                godown_id=godown_id,
-                channel="WHATSAPP",
-            )
+        targets.extend(per_godown.get(godown_id, ()))
+    return targets
+
+
+def _target_cache_ttl_sec() -> float:
+    try:
+        return max(0.0, float(os.getenv("NOTIFY_TARGET_CACHE_TTL_SEC", "60")))
+    except Exception:
+        return 60.0
+
+
+_RECIPIENTS_KEY = ("", "__recipients__")
+
+
+class NotificationTargetCache:
+    """Resolved endpoint targets keyed by ``(godown_id, scope)``, plus the recipient list, per engine."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: weakref.WeakKeyDictionary[Any, dict[tuple[str, str], tuple[list, float]]] = (
+            weakref.WeakKeyDictionary()
         )
-        targets.extend(
-            _parse_scoped_targets(
-                os.getenv("WATCHLIST_NOTIFY_GODOWN_CALLS", "") or "",
-                godown_id=godown_id,
-                channel="CALL",
+        self._versions: weakref.WeakKeyDictionary[Any, int] = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, bind: Any, key: tuple[str, str]) -> Optional[list[tuple[str, str]]]:
+        ttl = _target_cache_ttl_sec()
+        with self._lock:
+            entry = self._entries.get(bind, {}).get(key)
+            if entry is None or (time.monotonic() - entry[1] > ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, bind: Any, key: tuple[str, str], targets: list[tuple[str, str]]) -> None:
+        with self._lock:
+            self._entries.setdefault(bind, {})[key] = (targets, time.monotonic())
+
+    def sync(self, db: Session) -> None:
+        """Drop this engine's entries if the persisted targets version moved."""
+        bind = db.get_bind()
+        version = get_config_version(db, NOTIFICATION_TARGETS)
+        with self._lock:
+            if self._versions.get(bind) != version:
+                self._entries.pop(bind, None)
+                self._versions[bind] = version
+
+    def endpoint_targets(self, db: Session, godown_id: Optional[str], scope: str) -> list[tuple[str, str]]:
+        bind = db.get_bind()
+        key = (godown_id or "", scope)
+        targets = self._get(bind, key)
+        if targets is None:
+            query = db.query(NotificationEndpoint).filter(
+                NotificationEndpoint.scope == scope,
+                NotificationEndpoint.is_enabled.is_(True),
             )
-        )
-    return targets
+            if godown_id:
+                query = query.filter(
+                    or_(NotificationEndpoint.godown_id.is_(None), NotificationEndpoint.godown_id == godown_id)
+                )
+            endpoints = query.order_by(NotificationEndpoint.created_at.asc(), NotificationEndpoint.id.asc()).all()
+            targets = _targets_from_endpoints(endpoints, godown_id=godown_id, scope=scope)
+            self._put(bind, key, targets)
+        return targets
+
+    def recipient_targets(self, db: Session) -> list[tuple[str, str]]:
+        bind = db.get_bind()
+        targets = self._get(bind, _RECIPIENTS_KEY)
+        if targets is None:
+            targets = _targets_from_recipients(db.query(NotificationRecipient).all())
+            self._put(bind, _RECIPIENTS_KEY, targets)
+        return targets
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = sum(len(per_bind) for per_bind in self._entries.values())
+            return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+_target_cache = NotificationTargetCache()
+
+
+def sync_notification_targets(db: Session) -> None:
+    """Re-read the persisted targets version; call once per fan-out batch."""
+    _target_cache.sync(db)
+
+
+def bump_notification_targets(db: Session) -> None:
+    """Mark cached targets stale in every process, in the caller's transaction."""
+    bump_config_versions(db.connection(), {(GLOBAL_SCOPE, NOTIFICATION_TARGETS)})
+
+
+def notification_target_cache_stats() -> dict:
+    return _target_cache.stats()
 
 
 def resolve_notification_targets(
@@ -314,14 +436,12 @@ def resolve_notification_targets(
     scopes: Iterable[str],
 ) -> list[tuple[str, str]]:
     scopes = tuple(scopes)
-    endpoints = db.query(NotificationEndpoint).all()
-    recipients = db.query(NotificationRecipient).all()
     targets: list[tuple[str, str]] = []
     for scope in scopes:
-        targets.extend(_targets_from_endpoints(endpoints, godown_id=godown_id, scope=scope))
+        targets.extend(_target_cache.endpoint_targets(db, godown_id, scope))
     targets = _merge_targets(
         targets,
-        _targets_from_recipients(recipients),
+        _target_cache.recipient_targets(db),
         _targets_from_env(godown_id=godown_id, scopes=scopes),
     )
     return targets
@@ -345,7 +465,13 @@ def _cooldown_ok(alert: Alert, channel: str, now: datetime.datetime) -> bool:
     return (now - last).total_seconds() >= cooldown_s
 
 
-def enqueue_alert_notifications(db: Session, alert: Alert, *, event: Optional[Event] = None) -> int:
+def enqueue_alert_notifications(
+    db: Session,
+    alert: Alert,
+    *,
+    event: Optional[Event] = None,
+    commit: bool = True,
+) -> int:
     if not alert.public_id:
         db.flush()
 
@@ -358,6 +484,29 @@ def enqueue_alert_notifications(db: Session, alert: Alert, *, event: Optional[Ev
         logger.info("No notification targets configured for godown=%s", alert.godown_id)
         return 0
 
+    now = datetime.datetime.now(datetime.timezone.utc)
+    queued = set(
+        db.query(NotificationOutbox.channel, NotificationOutbox.target)
+        .filter(
+            NotificationOutbox.alert_id == alert.public_id,
+            NotificationOutbox.kind == "ALERT",
+        )
+        .all()
+    )
+    pending: list[tuple[str, str]] = []
+    for channel, target in targets:
+        channel_norm = channel.upper()
+        if channel_norm not in {"WHATSAPP", "EMAIL", "CALL"}:
+            continue
+        if not _cooldown_ok(alert, channel_norm, now):
+            continue
+        if (channel_norm, target) in queued:
+            continue
+        queued.add((channel_norm, target))
+        pending.append((channel_norm, target))
+    if not pending:
+        return 0
+
     # --- Option A: Human ACK via link from WhatsApp/Email ---
     # We always issue a fresh one-time token when queuing notifications so the outgoing
     # message contains a valid raw token (we only store its hash on the Alert).
@@ -395,25 +544,7 @@ def enqueue_alert_notifications(db: Session, alert: Alert, *, event: Optional[Ev
             )
 
     created = 0
-    now = datetime.datetime.now(datetime.timezone.utc)
-    for channel, target in targets:
-        channel_norm = channel.upper()
-        if channel_norm not in {"WHATSAPP", "EMAIL", "CALL"}:
-            continue
-        if not _cooldown_ok(alert, channel_norm, now):
-            continue
-        exists = (
-            db.query(NotificationOutbox)
-            .filter(
-                NotificationOutbox.alert_id == alert.public_id,
-                NotificationOutbox.kind == "ALERT",
-                NotificationOutbox.channel == channel_norm,
-                NotificationOutbox.target == target,
-            )
-            .first()
-        )
-        if exists:
-            continue
+    for channel_norm, target in pending:
         if channel_norm == "EMAIL":
             subject = content.email_subject
             message = content.email_body
@@ -443,10 +574,89 @@ def enqueue_alert_notifications(db: Session, alert: Alert, *, event: Optional[Ev
 
     if created:
         db.add(alert)  # persist token fields (and any updated_at)
-        db.commit()
+        if commit:
+            db.commit()
     return created
 
 
+def request_alert_notifications(db: Session, alert: Alert, *, event: Optional[Event] = None) -> None:
+    """
+    Record that ``alert`` needs notifying, in the caller's transaction.
+
+    This is all the ingest path does; ``fan_out_alert_notifications`` (run
+    by the worker) later resolves targets, renders content and writes the
+    outbox rows.
+    """
+    if not alert.public_id:
+        db.flush()
+    db.add(
+        AlertNotificationRequest(
+            alert_id=alert.public_id,
+            event_id=event.id if event is not None else None,
+            status="PENDING",
+            attempts=0,
+        )
+    )
+
+
+def _fanout_batch_size() -> int:
+    try:
+        return max(1, int(os.getenv("NOTIFY_FANOUT_BATCH_SIZE", "100")))
+    except Exception:
+        return 100
+
+
+def fan_out_alert_notifications(db: Session, *, batch_size: Optional[int] = None, max_attempts: int = 5) -> int:
+    """
+    Expand pending alert notification requests into per-target outbox rows.
+
+    Each request runs in its own savepoint so one bad alert does not hold
+    back the batch; failures are retried up to ``max_attempts`` times.
+    Returns the number of requests handled.
+    """
+    query = (
+        db.query(AlertNotificationRequest)
+        .filter(AlertNotificationRequest.status == "PENDING")
+        .order_by(AlertNotificationRequest.created_at.asc(), AlertNotificationRequest.id.asc())
+        .limit(batch_size or _fanout_batch_size())
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    requests = query.all()
+    if not requests:
+        db.rollback()
+        return 0
+    sync_notification_targets(db)
+
+    alert_ids = {request.alert_id for request in requests}
+    alerts = {alert.public_id: alert for alert in db.query(Alert).filter(Alert.public_id.in_(alert_ids)).all()}
+    event_ids = {request.event_id for request in requests if request.event_id is not None}
+    events = {ev.id: ev for ev in db.query(Event).filter(Event.id.in_(event_ids)).all()} if event_ids else {}
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    handled: set[str] = set()
+    for request in requests:
+        request.attempts = int(request.attempts or 0) + 1
+        alert = alerts.get(request.alert_id)
+        if alert is not None and request.alert_id not in handled:
+            try:
+                with db.begin_nested():
+                    enqueue_alert_notifications(db, alert, event=events.get(request.event_id), commit=False)
+            except Exception as exc:
+                logger.warning("Alert notification fan-out failed alert_id=%s err=%s", request.alert_id, exc)
+                request.last_error = str(exc)
+                if request.attempts >= max_attempts:
+                    request.status = "FAILED"
+                    request.processed_at = now
+                continue
+            handled.add(request.alert_id)
+        request.status = "DONE"
+        request.last_error = None
+        request.processed_at = now
+    db.commit()
+    return len(requests)
+
+
 def enqueue_report_notifications(
     db: Session,
     report_id: str,
@@ -458,6 +668,7 @@ def enqueue_report_notifications(
     scopes: Iterable[str] = ("HQ",),
     godown_id: Optional[str] = None,
 ) -> int:
+    sync_notification_targets(db)
     targets = resolve_notification_targets(db, godown_id=godown_id, scopes=scopes)
     payload = email_html or message or message_text or ""
     created = 0
@@ -0,0 +1,325 @@
+"""
+Pooled, keep-alive transports for outbound notifications.
+
+Provider sends used to open a fresh connection per message: a new TLS
+handshake to the WhatsApp Cloud API for every ``requests.post``, and a new
+SMTP connection, STARTTLS and login for every email. This module keeps one
+process-wide ``requests.Session`` whose adapter pools connections per host
+(``NOTIFY_HTTP_POOL_SIZE``), and a small pool of authenticated SMTP
+connections per server (``SMTP_MAX_CONNECTIONS``). An SMTP connection that
+sat idle longer than ``SMTP_NOOP_AFTER_SEC`` is checked with NOOP before
+reuse, connections idle past ``SMTP_IDLE_TIMEOUT_SEC`` are closed, and a send
+that hits a dropped connection reconnects once. Webhook fan-out posts to all
+URLs in parallel. ``transport_stats()`` reports how often connections were
+reused.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger("notification_transport")
+
+
+def _env_int(name: str, default: int, *, minimum: int = 0) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except Exception:
+        value = default
+    return max(value, minimum)
+
+
+def _env_float(name: str, default: float, *, minimum: float = 0.0) -> float:
+    try:
+        value = float(os.getenv(name, str(default)))
+    except Exception:
+        value = default
+    return max(value, minimum)
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+_http_lock = threading.Lock()
+_http_session: Optional[requests.Session] = None
+
+
+def http_session() -> requests.Session:
+    """Shared keep-alive session for provider APIs and webhooks."""
+    global _http_session
+    if _http_session is None:
+        with _http_lock:
+            if _http_session is None:
+                size = _env_int("NOTIFY_HTTP_POOL_SIZE", 16, minimum=1)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=size, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def _http_stats() -> dict:
+    session = _http_session
+    requests_sent = 0
+    connections = 0
+    hosts = 0
+    if session is not None:
+        seen: set[int] = set()
+        for adapter in session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                hosts += 1
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+    return {
+        "hosts": hosts,
+        "requests": requests_sent,
+        "connections_opened": connections,
+        "reused": max(0, requests_sent - connections),
+    }
+
+
+# ---------------------------------------------------------------------------
+# SMTP
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class _SmtpStats:
+    sends: int = 0
+    connects: int = 0
+    reused: int = 0
+    noop_checks: int = 0
+    reconnects: int = 0
+    closed_idle: int = 0
+
+
+@dataclass(frozen=True)
+class SmtpConfig:
+    host: str
+    port: int
+    user: Optional[str] = None
+    password: Optional[str] = None
+    starttls: bool = True
+    timeout: float = 8.0
+
+
+@dataclass
+class _IdleConnection:
+    server: smtplib.SMTP
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SmtpConnectionPool:
+    """Reusable authenticated SMTP connections to one server."""
+
+    def __init__(self, config: SmtpConfig, *, max_idle: Optional[int] = None) -> None:
+        self.config = config
+        self.max_idle = max_idle if max_idle is not None else _env_int("SMTP_MAX_CONNECTIONS", 2, minimum=1)
+        self._lock = threading.Lock()
+        self._idle: list[_IdleConnection] = []
+        self.stats = _SmtpStats()
+
+    def _connect(self) -> smtplib.SMTP:
+        cfg = self.config
+        server = smtplib.SMTP(cfg.host, cfg.port, timeout=cfg.timeout)
+        try:
+            server.ehlo()
+            if cfg.starttls:
+                server.starttls()
+                server.ehlo()
+            if cfg.user and cfg.password:
+                server.login(cfg.user, cfg.password)
+        except Exception:
+            _close_quietly(server)
+            raise
+        with self._lock:
+            self.stats.connects += 1
+        return server
+
+    def _checkout(self) -> tuple[smtplib.SMTP, bool]:
+        """Return ``(server, reused)``, health-checking connections that sat idle."""
+        idle_timeout = _env_float("SMTP_IDLE_TIMEOUT_SEC", 60.0)
+        noop_after = _env_float("SMTP_NOOP_AFTER_SEC", 10.0)
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                return self._connect(), False
+            idle_for = time.monotonic() - entry.last_used
+            if idle_for > idle_timeout:
+                with self._lock:
+                    self.stats.closed_idle += 1
+                _close_quietly(entry.server)
+                continue
+            if idle_for > noop_after:
+                with self._lock:
+                    self.stats.noop_checks += 1
+                try:
+                    code, _ = entry.server.noop()
+                except Exception:
+                    code = None
+                if code != 250:
+                    with self._lock:
+                        self.stats.reconnects += 1
+                    _close_quietly(entry.server)
+                    continue
+            with self._lock:
+                self.stats.reused += 1
+            return entry.server, True
+
+    def _checkin(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(_IdleConnection(server))
+                return
+        _close_quietly(server)
+
+    def send(self, msg: EmailMessage) -> None:
+        server, reused = self._checkout()
+        try:
+            server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, ConnectionError) as exc:
+            _close_quietly(server)
+            dropped = not isinstance(exc, smtplib.SMTPResponseException) or exc.smtp_code == 421
+            if not (reused and dropped):
+                raise
+            # The server dropped a pooled connection since its last use; retry once on a fresh one.
+            with self._lock:
+                self.stats.reconnects += 1
+            server = self._connect()
+            try:
+                server.send_message(msg)
+            except Exception:
+                _close_quietly(server)
+                raise
+        except Exception:
+            _close_quietly(server)
+            raise
+        with self._lock:
+            self.stats.sends += 1
+        self._checkin(server)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            _close_quietly(entry.server)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "sends": self.stats.sends,
+                "connects": self.stats.connects,
+                "reused": self.stats.reused,
+                "noop_checks": self.stats.noop_checks,
+                "reconnects": self.stats.reconnects,
+                "closed_idle": self.stats.closed_idle,
+            }
+
+
+def _close_quietly(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+
+_smtp_lock = threading.Lock()
+_smtp_pools: dict[SmtpConfig, SmtpConnectionPool] = {}
+
+
+def smtp_pool(config: SmtpConfig) -> SmtpConnectionPool:
+    with _smtp_lock:
+        pool = _smtp_pools.get(config)
+        if pool is None:
+            pool = SmtpConnectionPool(config)
+            _smtp_pools[config] = pool
+        return pool
+
+
+def close_smtp_pools() -> None:
+    with _smtp_lock:
+        pools = list(_smtp_pools.values())
+        _smtp_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# ---------------------------------------------------------------------------
+# Webhooks
+# ---------------------------------------------------------------------------
+
+_webhook_lock = threading.Lock()
+_webhook_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _webhook_pool() -> ThreadPoolExecutor:
+    global _webhook_executor
+    if _webhook_executor is None:
+        with _webhook_lock:
+            if _webhook_executor is None:
+                workers = _env_int("NOTIFY_WEBHOOK_CONCURRENCY", 4, minimum=1)
+                _webhook_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notify-webhook")
+    return _webhook_executor
+
+
+def post_json(url: str, payload: dict, *, timeout: float) -> requests.Response:
+    response = http_session().post(url, json=payload, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def post_json_all(urls: list[str], payload: dict, *, timeout: float) -> dict[str, Optional[str]]:
+    """POST ``payload`` to every URL in parallel; return ``url -> error`` (None on success)."""
+    if not urls:
+        return {}
+    if len(urls) == 1:
+        futures = None
+    else:
+        executor = _webhook_pool()
+        futures = {url: executor.submit(post_json, url, payload, timeout=timeout) for url in urls}
+    outcome: dict[str, Optional[str]] = {}
+    for url in urls:
+        try:
+            if futures is None:
+                post_json(url, payload, timeout=timeout)
+            else:
+                futures[url].result()
+            outcome[url] = None
+        except Exception as exc:
+            outcome[url] = str(exc)
+    return outcome
+
+
+def transport_stats() -> dict:
+    with _smtp_lock:
+        pools = dict(_smtp_pools)
+    return {
+        "http": _http_stats(),
+        "smtp": {f"{cfg.host}:{cfg.port}": pool.snapshot() for cfg, pool in pools.items()},
+    }
@@ -10,18 +10,21 @@ import json
 import logging
 import os
 import re
-import smtplib
+import socket
+import threading
+import uuid
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
 from dataclasses import dataclass
 from email.message import EmailMessage
 from email.utils import make_msgid
 from typing import Optional
 from urllib.parse import urlparse
-import urllib.request
-import urllib.error
 from ..core.config import settings
 from ..integrations.twilio_client import get_twilio_voice_client
-from sqlalchemy import or_
+from .notification_transport import SmtpConfig, http_session, smtp_pool
+from sqlalchemy import bindparam, func, or_, select, update
 from sqlalchemy.orm import Session
 
 from ..models.notification_outbox import NotificationOutbox
@@ -31,6 +34,14 @@ from ..models.event import Alert
 logger = logging.getLogger("notification_worker")
 
 
+def _env_int(name: str, default: int, *, minimum: int = 0) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except Exception:
+        value = default
+    return max(value, minimum)
+
+
 class MetaWhatsAppError(RuntimeError):
     def __init__(
         self,
@@ -53,6 +64,9 @@ class MetaWhatsAppError(RuntimeError):
 
 
 class NotificationProvider:
+    # Upper bound on simultaneous sends through this provider (None = only the channel limit applies).
+    max_concurrency: Optional[int] = None
+
     def send_whatsapp(
         self,
         to: str,
@@ -114,7 +128,7 @@ def _post_meta_whatsapp_message(
         "Content-Type": "application/json",
     }
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=(5, 20))
+        response = http_session().post(url, headers=headers, json=payload, timeout=(5, 20))
     except requests.RequestException as exc:
         raise RuntimeError(f"Meta WhatsApp request failed: {exc}") from exc
 
@@ -171,6 +185,7 @@ class WhatsAppMetaProvider(NotificationProvider):
             self.template_body_param_count = 0
         configured_names = (os.getenv("META_WA_TEMPLATE_BODY_PARAM_NAMES") or "").strip()
         self.template_body_param_names = [part.strip() for part in configured_names.split(",") if part.strip()]
+        self.max_concurrency = _env_int("META_WA_MAX_CONCURRENCY", 8, minimum=1)
         missing = []
         if not self.access_token:
             missing.append("META_WA_ACCESS_TOKEN")
@@ -674,6 +689,7 @@ class TwilioCallProvider(NotificationProvider):
             self.timeout = int(os.getenv("TWILIO_CALL_TIMEOUT", "15"))
         except ValueError:
             self.timeout = 15
+        self.max_concurrency = _env_int("TWILIO_MAX_CONCURRENT_CALLS", 4, minimum=1)
 
         self.client = get_twilio_voice_client()
 
@@ -731,6 +747,7 @@ class EmailSMTPProvider(NotificationProvider):
         self.user = os.getenv("SMTP_USER")
         self.password = os.getenv("SMTP_PASS") or os.getenv("SMTP_PASSWORD")
         self.sender = os.getenv("SMTP_FROM", self.user or "pds-netra@localhost")
+        self.max_concurrency = _env_int("SMTP_MAX_CONNECTIONS", 2, minimum=1)
 
         # Respect explicit flags first.
         raw_tls = os.getenv("SMTP_USE_TLS", os.getenv("SMTP_STARTTLS", "")).lower().strip()
@@ -778,9 +795,10 @@ class EmailSMTPProvider(NotificationProvider):
             if match:
                 src_url = match.group(1)
                 if src_url.startswith("http://") or src_url.startswith("https://"):
-                    with urllib.request.urlopen(src_url, timeout=6) as resp:
-                        data = resp.read()
-                        content_type = resp.headers.get_content_type()
+                    resp = http_session().get(src_url, timeout=6)
+                    resp.raise_for_status()
+                    data = resp.content
+                    content_type = (resp.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
                     # Guard against huge downloads (5 MB cap)
                     if data and len(data) <= 5 * 1024 * 1024 and content_type.startswith("image/"):
                         related_bytes = data
@@ -797,14 +815,16 @@ class EmailSMTPProvider(NotificationProvider):
             html_part.add_related(related_bytes, maintype=related_type, subtype=related_subtype, cid=related_cid)
 
         try:
-            with smtplib.SMTP(self.host, self.port, timeout=8) as server:
-                server.ehlo()
-                if self.starttls:
-                    server.starttls()
-                    server.ehlo()
-                if self.user and self.password:
-                    server.login(self.user, self.password)
-                server.send_message(msg)
+            smtp_pool(
+                SmtpConfig(
+                    host=self.host,
+                    port=self.port,
+                    user=self.user,
+                    password=self.password,
+                    starttls=self.starttls,
+                    timeout=8,
+                )
+            ).send(msg)
             return None
         except Exception as exc:
             raise RuntimeError(f"SMTP send failed: {exc}") from exc
@@ -819,7 +839,10 @@ class ProviderSet:
     email: NotificationProvider
     call: NotificationProvider
 
-    def send(self, outbox: NotificationOutbox) -> Optional[str]:
+    def provider_for(self, channel: str) -> Optional[NotificationProvider]:
+        return {"WHATSAPP": self.whatsapp, "EMAIL": self.email, "CALL": self.call}.get(channel)
+
+    def send(self, outbox: NotificationOutbox | OutboxJob) -> Optional[str]:
         if outbox.channel == "WHATSAPP":
             media_url = _normalize_media_url(outbox.media_url)
             last_error = (outbox.last_error or "").lower()
@@ -960,101 +983,350 @@ def _backoff_seconds(attempt: int) -> int:
     return schedule[idx]
 
 
-def process_outbox_batch(
-    db: Session,
-    *,
-    providers: Optional[ProviderSet] = None,
-    max_attempts: int = 5,
-    batch_size: int = 50,
-) -> int:
-    # Build providers once per worker lifetime (pass providers from app/worker.py),
-    # but keep this fallback for safety.
-    providers = providers or _build_providers()
-    now = datetime.datetime.now(datetime.timezone.utc)
-
-    query = (
-        db.query(NotificationOutbox)
-        .filter(
-            NotificationOutbox.status.in_(["PENDING", "RETRYING"]),
-            or_(NotificationOutbox.next_retry_at.is_(None), NotificationOutbox.next_retry_at <= now),
-        )
-        .order_by(NotificationOutbox.created_at.asc())
-        .limit(batch_size)
-    )
-    if db.bind and db.bind.dialect.name == "postgresql":
-        query = query.with_for_update(skip_locked=True)
+@dataclass
+class OutboxJob:
+    """Detached copy of a claimed outbox row (the claim's RETURNING columns), safe to hand to a sender thread."""
 
-    rows = query.all()
-    processed = 0
+    id: str
+    alert_id: Optional[str]
+    channel: str
+    target: str
+    subject: Optional[str]
+    message: str
+    media_url: Optional[str]
+    last_error: Optional[str]
+    attempts: int
 
-    for row in rows:
-        # Mark retrying
+
+@dataclass
+class SendResult:
+    job: OutboxJob
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    finished_at: Optional[datetime.datetime] = None
+
+
+_ALERT_SENT_COLUMNS = {
+    "WHATSAPP": "last_whatsapp_at",
+    "CALL": "last_call_at",
+    "EMAIL": "last_email_at",
+}
+
+
+def _default_worker_id() -> str:
+    prefix = (os.getenv("NOTIFY_WORKER_ID") or socket.gethostname()).strip()
+    return f"{prefix}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class OutboxDispatcher:
+    """
+    Claims due outbox rows and sends them concurrently.
+
+    Every channel has its own thread pool (``NOTIFY_<CHANNEL>_CONCURRENCY``
+    workers) and its own in-flight budget of ``batch_size`` rows, claimed
+    separately per channel, so a slow SMTP server never holds up WhatsApp or
+    call notifications, and every provider is additionally capped by its
+    ``max_concurrency``. Results are collected on the caller's thread and
+    written back in one bulk update per poll.
+
+    Rows are claimed with a lease (``claimed_by`` / ``lease_expires_at``,
+    ``NOTIFY_LEASE_SEC``) that is renewed while sends are outstanding, so
+    several worker replicas can drain the outbox without sending a row twice,
+    and rows held by a crashed worker are picked up once its lease lapses.
+    """
+
+    _DEFAULT_CHANNEL_LIMITS = {"WHATSAPP": 8, "EMAIL": 4, "CALL": 4}
+
+    def __init__(
+        self,
+        providers: Optional[ProviderSet] = None,
+        *,
+        max_attempts: int = 5,
+        batch_size: Optional[int] = None,
+        channel_limits: Optional[dict[str, int]] = None,
+        worker_id: Optional[str] = None,
+        lease_sec: Optional[int] = None,
+    ) -> None:
+        self.providers = providers or _build_providers()
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size if batch_size is not None else _env_int("NOTIFY_BATCH_SIZE", 50, minimum=1)
+        limits = dict(channel_limits or {})
+        for channel, default in self._DEFAULT_CHANNEL_LIMITS.items():
+            limits.setdefault(channel, _env_int(f"NOTIFY_{channel}_CONCURRENCY", default, minimum=1))
+        self._executors = {
+            channel: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"notify-{channel.lower()}")
+            for channel, limit in limits.items()
+        }
+        self._fallback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notify-other")
+        self._provider_slots: dict[int, threading.BoundedSemaphore] = {}
+        for channel in limits:
+            provider = self.providers.provider_for(channel)
+            limit = getattr(provider, "max_concurrency", None)
+            if provider is not None and limit and id(provider) not in self._provider_slots:
+                self._provider_slots[id(provider)] = threading.BoundedSemaphore(limit)
+        self._inflight: dict[str, Future] = {}
+        self._inflight_group: dict[str, Optional[str]] = {}
+        self.worker_id = worker_id or _default_worker_id()
+        self.lease_sec = lease_sec if lease_sec is not None else _env_int("NOTIFY_LEASE_SEC", 120, minimum=10)
+        self._renewed_at: Optional[datetime.datetime] = None
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def _send(self, job: OutboxJob) -> SendResult:
+        slot = self._provider_slots.get(id(self.providers.provider_for(job.channel)))
+        try:
+            if slot is None:
+                message_id = self.providers.send(job)
+            else:
+                with slot:
+                    message_id = self.providers.send(job)
+            return SendResult(job, message_id=message_id, finished_at=datetime.datetime.now(datetime.timezone.utc))
+        except Exception as exc:
+            logger.warning(
+                "Notification send failed id=%s channel=%s target=%s alert_id=%s attempts=%s err=%s",
+                job.id,
+                job.channel,
+                job.target,
+                job.alert_id,
+                job.attempts,
+                exc,
+            )
+            return SendResult(job, error=str(exc), finished_at=datetime.datetime.now(datetime.timezone.utc))
+
+    def _group(self, channel: str) -> Optional[str]:
+        """Claim group of a channel: the channel itself, or None for channels without a pool."""
+        return channel if channel in self._executors else None
+
+    def _room(self, group: Optional[str]) -> int:
+        inflight = sum(1 for g in self._inflight_group.values() if g == group)
+        return self.batch_size - inflight
+
+    def _claim(self, db: Session, limit: int, group: Optional[str] = None) -> list[OutboxJob]:
+        """
+        Lease up to ``limit`` due rows of one channel group in one ``UPDATE ... RETURNING``.
+
+        ``group`` is a channel name, or None for rows on channels without
+        their own pool. Rows whose lease has lapsed (a worker died mid-send)
+        are claimable again; on Postgres ``SKIP LOCKED`` keeps concurrent
+        claims disjoint.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        lease_until = now + datetime.timedelta(seconds=self.lease_sec)
+        candidates = (
+            select(NotificationOutbox.id)
+            .where(
+                NotificationOutbox.status.in_(["PENDING", "RETRYING"]),
+                or_(NotificationOutbox.next_retry_at.is_(None), NotificationOutbox.next_retry_at <= now),
+                or_(NotificationOutbox.lease_expires_at.is_(None), NotificationOutbox.lease_expires_at <= now),
+                (
+                    NotificationOutbox.channel == group
+                    if group is not None
+                    else NotificationOutbox.channel.notin_(list(self._executors))
+                ),
+            )
+            .order_by(NotificationOutbox.created_at.asc())
+            .limit(limit)
+        )
+        if self._inflight:
+            candidates = candidates.where(~NotificationOutbox.id.in_(list(self._inflight)))
+        dialect = db.get_bind().dialect
+        if dialect.name == "postgresql":
+            candidates = candidates.with_for_update(skip_locked=True)
+        stmt = (
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(candidates))
+            .values(
+                attempts=func.coalesce(NotificationOutbox.attempts, 0) + 1,
+                status="RETRYING",
+                claimed_by=self.worker_id,
+                lease_expires_at=lease_until,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        columns = [getattr(NotificationOutbox, name) for name in OutboxJob.__dataclass_fields__]
         try:
-            row.attempts = int(row.attempts or 0) + 1
-            row.status = "RETRYING"
-            row.next_retry_at = now + datetime.timedelta(seconds=30)
-            row.updated_at = now
-            db.add(row)
+            if dialect.update_returning:
+                rows = db.execute(stmt.returning(*columns)).all()
+            else:
+                db.execute(stmt)
+                rows = db.execute(
+                    select(*columns).where(
+                        NotificationOutbox.claimed_by == self.worker_id,
+                        NotificationOutbox.lease_expires_at == lease_until,
+                        ~NotificationOutbox.id.in_(list(self._inflight)),
+                    )
+                ).all()
             db.commit()
         except Exception as exc:
             db.rollback()
-            logger.warning("Failed to mark outbox retrying id=%s err=%s", row.id, exc)
-            continue
-
-        # Send
-        message_id: Optional[str] = None
+            logger.warning("Failed to claim outbox batch worker=%s err=%s", self.worker_id, exc)
+            return []
+        if rows and self._renewed_at is None:
+            self._renewed_at = now
+        return [OutboxJob(**row._mapping) for row in rows]
+
+    def _renew_leases(self, db: Session) -> None:
+        """Extend the leases of rows still being sent, every third of the lease period."""
+        if not self._inflight:
+            self._renewed_at = None
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if self._renewed_at is not None and (now - self._renewed_at).total_seconds() < self.lease_sec / 3:
+            return
         try:
-            message_id = providers.send(row)
-
-            row.status = "SENT"
-            row.provider_message_id = message_id
-            now_sent = datetime.datetime.now(datetime.timezone.utc)
-            row.sent_at = now_sent
-            row.provider_message_id = message_id
-            row.last_error = None
-            row.next_retry_at = None
-            if row.alert_id:
-                alert = (
-                    db.query(Alert)
-                    .filter(Alert.public_id == row.alert_id)
-                    .first()
+            db.execute(
+                update(NotificationOutbox)
+                .where(
+                    NotificationOutbox.id.in_(list(self._inflight)),
+                    NotificationOutbox.claimed_by == self.worker_id,
                 )
-                if alert:
-                    if row.channel == "WHATSAPP":
-                        alert.last_whatsapp_at = now_sent
-                    elif row.channel == "CALL":
-                        alert.last_call_at = now_sent
-                    elif row.channel == "EMAIL":
-                        alert.last_email_at = now_sent
-                    db.add(alert)
-        except Exception as exc:
-            row.last_error = str(exc)
-            logger.warning(
-                "Notification send failed id=%s channel=%s target=%s alert_id=%s attempts=%s message_id=%s err=%s",
-                row.id,
-                row.channel,
-                row.target,
-                row.alert_id,
-                row.attempts,
-                message_id or row.provider_message_id,
-                exc,
+                .values(lease_expires_at=now + datetime.timedelta(seconds=self.lease_sec))
+                .execution_options(synchronize_session=False)
             )
-            if row.attempts >= max_attempts:
-                row.status = "FAILED"
-                row.next_retry_at = None
+            db.commit()
+            self._renewed_at = now
+        except Exception as exc:
+            db.rollback()
+            logger.warning("Failed to renew outbox leases worker=%s err=%s", self.worker_id, exc)
+
+    def _collect(self, *, wait: bool) -> list[SendResult]:
+        results: list[SendResult] = []
+        for job_id, future in list(self._inflight.items()):
+            if wait or future.done():
+                results.append(future.result())
+                del self._inflight[job_id]
+                self._inflight_group.pop(job_id, None)
+        return results
+
+    def _drain(self, db: Session) -> list[SendResult]:
+        """Wait for every in-flight send, renewing leases while slow sends are outstanding."""
+        while self._inflight:
+            _, pending = futures_wait(list(self._inflight.values()), timeout=self.lease_sec / 3)
+            if not pending:
+                break
+            self._renew_leases(db)
+        return self._collect(wait=True)
+
+    def _write_results(self, db: Session, results: list[SendResult]) -> int:
+        if not results:
+            return 0
+        now = datetime.datetime.now(datetime.timezone.utc)
+        mappings = []
+        sent_alerts: dict[str, dict[str, datetime.datetime]] = {}
+        for result in results:
+            job = result.job
+            values: dict = {
+                "b_id": job.id,
+                "updated_at": now,
+                "claimed_by": None,
+                "lease_expires_at": None,
+                "provider_message_id": None,
+                "sent_at": None,
+            }
+            if result.error is None:
+                values.update(
+                    status="SENT",
+                    provider_message_id=result.message_id,
+                    sent_at=result.finished_at,
+                    last_error=None,
+                    next_retry_at=None,
+                )
+                column = _ALERT_SENT_COLUMNS.get(job.channel)
+                if job.alert_id and column:
+                    latest = sent_alerts.setdefault(column, {})
+                    previous = latest.get(job.alert_id)
+                    latest[job.alert_id] = max(previous, result.finished_at) if previous else result.finished_at
+            elif job.attempts >= self.max_attempts:
+                values.update(status="FAILED", last_error=result.error, next_retry_at=None)
             else:
-                row.status = "RETRYING"
-                row.next_retry_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
-                    seconds=_backoff_seconds(row.attempts)
+                values.update(
+                    status="RETRYING",
+                    last_error=result.error,
+                    next_retry_at=result.finished_at + datetime.timedelta(seconds=_backoff_seconds(job.attempts)),
                 )
-
-        # Persist result
+            mappings.append(values)
+        table = NotificationOutbox.__table__
         try:
-            db.add(row)
+            # Only rows still leased to this worker; a lapsed lease may already be in another worker's hands.
+            written = db.execute(
+                update(table).where(table.c.id == bindparam("b_id"), table.c.claimed_by == self.worker_id),
+                mappings,
+            ).rowcount
+            alerts = Alert.__table__
+            for column, per_alert in sent_alerts.items():
+                sent_col = alerts.c[column]
+                # Each alert gets its own latest send time, and never moves backwards.
+                db.execute(
+                    update(alerts)
+                    .where(
+                        alerts.c.public_id == bindparam("b_alert_id"),
+                        or_(sent_col.is_(None), sent_col < bindparam("b_sent_at")),
+                    )
+                    .values({column: bindparam("b_sent_at")}),
+                    [{"b_alert_id": alert_id, "b_sent_at": sent_at} for alert_id, sent_at in per_alert.items()],
+                )
             db.commit()
-            processed += 1
         except Exception as exc:
             db.rollback()
-            logger.warning("Failed to update outbox id=%s err=%s", row.id, exc)
+            logger.warning("Failed to update outbox results count=%s err=%s", len(mappings), exc)
+            return 0
+        if 0 <= written < len(mappings):
+            logger.warning(
+                "Outbox leases lost before write-back worker=%s lost=%s", self.worker_id, len(mappings) - written
+            )
+        return len(mappings)
+
+    def poll(self, db: Session, *, wait: bool = False) -> tuple[int, int]:
+        """
+        Write back finished sends, then claim and submit rows for every
+        channel until it has ``batch_size`` rows in flight.
+
+        With ``wait`` the call blocks until every in-flight send has finished.
+        Returns ``(claimed, processed)``.
+        """
+        processed = self._write_results(db, self._collect(wait=False))
+        self._renew_leases(db)
+        jobs: list[OutboxJob] = []
+        for group in [*self._executors, None]:
+            room = self._room(group)
+            if room <= 0:
+                continue
+            claimed = self._claim(db, room, group)
+            for job in claimed:
+                executor = self._executors.get(job.channel, self._fallback_executor)
+                self._inflight[job.id] = executor.submit(self._send, job)
+                self._inflight_group[job.id] = group
+            jobs.extend(claimed)
+        if wait:
+            processed += self._write_results(db, self._drain(db))
+        return len(jobs), processed
+
+    def shutdown(self, db: Optional[Session] = None) -> None:
+        """Stop the pools; with ``db`` the outstanding results are written back first."""
+        if db is not None:
+            self._write_results(db, self._drain(db))
+        else:
+            self._collect(wait=True)
+        for executor in [*self._executors.values(), self._fallback_executor]:
+            executor.shutdown(wait=True)
 
+
+def process_outbox_batch(
+    db: Session,
+    *,
+    providers: Optional[ProviderSet] = None,
+    max_attempts: int = 5,
+    batch_size: int = 50,
+) -> int:
+    """Send one batch of due notifications and wait for it (one-shot use and tests)."""
+    # Build providers once per worker lifetime (pass providers from app/worker.py),
+    # but keep this fallback for safety.
+    dispatcher = OutboxDispatcher(providers, max_attempts=max_attempts, batch_size=batch_size)
+    try:
+        _, processed = dispatcher.poll(db, wait=True)
+    finally:
+        dispatcher.shutdown()
     return processed
@@ -7,8 +7,6 @@ from __future__ import annotations
 import json
 import logging
 import os
-import smtplib
-import urllib.request
 from dataclasses import dataclass
 from email.message import EmailMessage
 from typing import Iterable, Optional
@@ -17,9 +15,10 @@ from sqlalchemy.orm import Session
 
 from ..models.event import Alert, Event
 from ..models.notification_recipient import NotificationRecipient
-from .notification_outbox import enqueue_alert_notifications
+from .notification_outbox import request_alert_notifications
 from ..core.config import settings
 from ..integrations.twilio_client import get_twilio_voice_client
+from .notification_transport import SmtpConfig, post_json, post_json_all, smtp_pool
 
 
 def _webhook_urls() -> list[str]:
@@ -33,14 +32,9 @@ def _send_webhook(payload: dict) -> None:
     urls = _webhook_urls()
     if not urls:
         return
-    body = json.dumps(payload).encode("utf-8")
-    for url in urls:
-        try:
-            req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
-            with urllib.request.urlopen(req, timeout=3):
-                pass
-        except Exception as exc:
-            logging.getLogger("notifications").warning("Webhook notify failed (%s): %s", url, exc)
+    for url, error in post_json_all(urls, payload, timeout=3).items():
+        if error:
+            logging.getLogger("notifications").warning("Webhook notify failed (%s): %s", url, error)
 
 
 def _send_email(payload: dict) -> None:
@@ -60,22 +54,16 @@ def _send_email(payload: dict) -> None:
     msg["From"] = sender
     msg["To"] = ", ".join(recipients)
     msg.set_content(json.dumps(payload, indent=2))
+    starttls = os.getenv("SMTP_STARTTLS", "true").lower() in {"1", "true", "yes"}
     try:
-        with smtplib.SMTP(host, port, timeout=5) as server:
-            server.ehlo()
-            if os.getenv("SMTP_STARTTLS", "true").lower() in {"1", "true", "yes"}:
-                server.starttls()
-                server.ehlo()
-            if user and password:
-                server.login(user, password)
-            server.send_message(msg)
+        smtp_pool(SmtpConfig(host=host, port=port, user=user, password=password, starttls=starttls, timeout=5)).send(msg)
     except Exception as exc:
         logging.getLogger("notifications").warning("Email notify failed: %s", exc)
 
 
 def notify_alert(db: Session, alert: Alert, event: Optional[Event] = None) -> None:
     try:
-        enqueue_alert_notifications(db, alert, event=event)
+        request_alert_notifications(db, alert, event=event)
     except Exception as exc:
         logging.getLogger("notifications").warning("Failed to enqueue notifications: %s", exc)
 
@@ -115,11 +103,8 @@ class WebhookWhatsAppProvider(NotificationProvider):
         if not self.url:
             return
         payload = {"to": to, "message": message, "media_url": media_url}
-        body = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
         try:
-            with urllib.request.urlopen(req, timeout=5):
-                pass
+            post_json(self.url, payload, timeout=5)
         except Exception as exc:
             logging.getLogger("notifications").warning("WhatsApp webhook failed: %s", exc)
 
@@ -149,15 +134,16 @@ class SmtpEmailProvider(NotificationProvider):
         # Provide both plain-text and HTML bodies so clients render images.
         msg.set_content("This is an HTML email. Please view in an HTML-capable email client.")
         msg.add_alternative(html, subtype="html")
+        config = SmtpConfig(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            starttls=self.starttls,
+            timeout=5,
+        )
         try:
-            with smtplib.SMTP(self.host, self.port, timeout=5) as server:
-                server.ehlo()
-                if self.starttls:
-                    server.starttls()
-                    server.ehlo()
-                if self.user and self.password:
-                    server.login(self.user, self.password)
-                server.send_message(msg)
+            smtp_pool(config).send(msg)
         except Exception as exc:
             logging.getLogger("notifications").warning("SMTP notify failed: %s", exc)
 
@@ -297,7 +283,7 @@ def notify_blacklist_alert(
     snapshot_url: Optional[str],
 ) -> None:
     try:
-        enqueue_alert_notifications(db, alert)
+        request_alert_notifications(db, alert)
     except Exception as exc:
         logging.getLogger("notifications").warning("Failed to enqueue blacklist alert: %s", exc)
 
@@ -311,7 +297,7 @@ def notify_after_hours_alert(
     snapshot_url: Optional[str],
 ) -> None:
     try:
-        enqueue_alert_notifications(db, alert)
+        request_alert_notifications(db, alert)
     except Exception as exc:
         logging.getLogger("notifications").warning("Failed to enqueue after-hours alert: %s", exc)
 
@@ -326,7 +312,7 @@ def notify_animal_intrusion(
     is_night: Optional[bool],
 ) -> None:
     try:
-        enqueue_alert_notifications(db, alert)
+        request_alert_notifications(db, alert)
     except Exception as exc:
         logging.getLogger("notifications").warning("Failed to enqueue animal alert: %s", exc)
 
@@ -341,7 +327,7 @@ def notify_dispatch_movement_delay(
     snapshot_url: Optional[str],
 ) -> None:
     try:
-        enqueue_alert_notifications(db, alert)
+        request_alert_notifications(db, alert)
     except Exception as exc:
         logging.getLogger("notifications").warning("Failed to enqueue dispatch delay alert: %s", exc)
 
@@ -355,6 +341,6 @@ def notify_fire_detected(
     snapshot_url: Optional[str],
 ) -> None:
     try:
-        enqueue_alert_notifications(db, alert)
+        request_alert_notifications(db, alert)
     except Exception as exc:
         logging.getLogger("notifications").warning("Failed to enqueue fire alert: %s", exc)
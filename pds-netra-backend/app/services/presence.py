@@ -4,17 +4,27 @@ Presence event ingestion for after-hours detection.
 
 from __future__ import annotations
 
+import logging
 from typing import Tuple
 
 from sqlalchemy.orm import Session
 
+from ..core.db import unit_of_work
 from ..models.event import Event
 from ..schemas.presence import PresenceEventIn
 from .after_hours import get_after_hours_policy, is_after_hours
 from .rule_engine import apply_rules
 
 
+logger = logging.getLogger("presence")
+
+
 def ingest_presence_event(db: Session, event_in: PresenceEventIn) -> Tuple[Event, bool]:
+    with unit_of_work(db):
+        return _ingest_presence_event(db, event_in)
+
+
+def _ingest_presence_event(db: Session, event_in: PresenceEventIn) -> Tuple[Event, bool]:
     if event_in.event_type not in {"PERSON_DETECTED", "VEHICLE_DETECTED", "ANPR_HIT"}:
         raise ValueError("Unsupported presence event type")
     existing = db.query(Event).filter(Event.event_id_edge == event_in.event_id).first()
@@ -52,7 +62,10 @@ def ingest_presence_event(db: Session, event_in: PresenceEventIn) -> Tuple[Event
         meta=meta,
     )
     db.add(event)
-    db.commit()
-    db.refresh(event)
-    apply_rules(db, event)
+    db.flush()
+    # Rule evaluation runs in a savepoint; keep the raw event if it fails.
+    try:
+        apply_rules(db, event)
+    except Exception:
+        logger.exception("Rule evaluation failed for presence event_id=%s", event_in.event_id)
     return event, True
@@ -12,21 +12,21 @@ history.
 from __future__ import annotations
 
 import datetime
-import json
 import os
 from datetime import timedelta
-from typing import Optional, List
+from typing import Optional, List, Sequence
 
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from zoneinfo import ZoneInfo
 IST = ZoneInfo("Asia/Kolkata")
 
+from ..core.db import unit_of_work
 from ..models.event import Event, Alert, AlertEventLink
-from ..models.godown import Camera
 from ..models.rule import Rule
 from .after_hours import get_after_hours_policy, is_after_hours
 from .incident_lifecycle import touch_detection_timestamp
+from .zone_geometry import get_camera_geometry, parse_bbox
 from .notifications import (
     notify_alert,
     notify_after_hours_alert,
@@ -35,83 +35,11 @@ from .notifications import (
 )
 
 
-def _parse_bbox(bbox_raw: str | None) -> Optional[list[int]]:
-    if not bbox_raw:
-        return None
-    try:
-        if bbox_raw.startswith("[") and bbox_raw.endswith("]"):
-            parts = bbox_raw.strip("[]").split(",")
-            return [int(float(p.strip())) for p in parts if p.strip()]
-    except Exception:
-        return None
-    return None
-
-
-def _point_in_polygon(x: float, y: float, polygon: list[tuple[float, float]]) -> bool:
-    num = len(polygon)
-    j = num - 1
-    inside = False
-    for i in range(num):
-        xi, yi = polygon[i]
-        xj, yj = polygon[j]
-        intersects = ((yi > y) != (yj > y)) and (x < (xj - xi) * (y - yi) / (yj - yi + 1e-9) + xi)
-        if intersects:
-            inside = not inside
-        j = i
-    return inside
-
-
-def _bbox_in_zone(bbox: list[int], polygon: list[tuple[float, float]]) -> bool:
-    if len(bbox) != 4:
-        return False
-    x1, y1, x2, y2 = bbox
-    cx = (x1 + x2) / 2.0
-    cy = (y1 + y2) / 2.0
-    if _point_in_polygon(cx, cy, polygon):
-        return True
-    corners = [(x1, y1), (x1, y2), (x2, y1), (x2, y2)]
-    if any(_point_in_polygon(x, y, polygon) for x, y in corners):
-        return True
-    xs = [pt[0] for pt in polygon]
-    ys = [pt[1] for pt in polygon]
-    if not xs or not ys:
-        return False
-    min_x, max_x = min(xs), max(xs)
-    min_y, max_y = min(ys), max(ys)
-    return not (x2 < min_x or x1 > max_x or y2 < min_y or y1 > max_y)
-
-
 def _infer_zone_id(db: Session, event: Event) -> Optional[str]:
-    bbox = _parse_bbox(event.bbox)
+    bbox = parse_bbox(event.bbox)
     if not bbox:
         return None
-    camera = (
-        db.query(Camera)
-        .filter(Camera.id == event.camera_id, Camera.godown_id == event.godown_id)
-        .first()
-    )
-    if not camera or not camera.zones_json:
-        return None
-    try:
-        zones = json.loads(camera.zones_json)
-    except Exception:
-        return None
-    if not isinstance(zones, list):
-        return None
-    for zone in zones:
-        zone_id = zone.get("id") if isinstance(zone, dict) else None
-        polygon = zone.get("polygon") if isinstance(zone, dict) else None
-        if not zone_id or not isinstance(polygon, list):
-            continue
-        try:
-            poly_pts = [tuple(map(float, pt)) for pt in polygon if isinstance(pt, list) and len(pt) == 2]
-        except Exception:
-            continue
-        if not poly_pts:
-            continue
-        if _bbox_in_zone(bbox, poly_pts):
-            return zone_id
-    return None
+    return get_camera_geometry(db, event.godown_id, event.camera_id).infer_zone_id(bbox)
 
 
 def _animal_extra_from_event(event: Event) -> dict:
@@ -175,7 +103,54 @@ def apply_rules(db: Session, event: Event) -> None:
     Depending on the event type, this function either creates a new
     alert or associates the event with an existing open alert. Alerts
     group multiple related events and manage their lifecycle.
+
+    All writes go through one unit of work: a single commit when called
+    on its own, or a savepoint inside the caller's transaction during
+    ingest. Alerts that need notifying are recorded in the same
+    transaction and fanned out to the outbox by the worker.
     """
+    with unit_of_work(db):
+        _apply_rules(db, event)
+
+
+def _open_alert_stmt(godown_id: str, alert_type: str, cutoff: datetime.datetime, zone_id: Optional[str] = None):
+    """Open alert of ``alert_type`` started since ``cutoff`` (optionally in ``zone_id``)."""
+    stmt = select(Alert).where(
+        Alert.godown_id == godown_id,
+        Alert.alert_type == alert_type,
+        Alert.status == "OPEN",
+        Alert.start_time >= cutoff,
+    )
+    if zone_id:
+        stmt = stmt.where(Alert.zone_id == zone_id)
+    return stmt
+
+
+def _camera_alert_stmt(
+    godown_id: str,
+    camera_id: str,
+    alert_type: str,
+    *,
+    statuses: Optional[Sequence[str]] = None,
+    exclude_status: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+):
+    """Alerts of ``alert_type`` on one camera, newest first (camera-scoped dedup and cooldown)."""
+    stmt = select(Alert).where(
+        Alert.godown_id == godown_id,
+        Alert.camera_id == camera_id,
+        Alert.alert_type == alert_type,
+    )
+    if statuses is not None:
+        stmt = stmt.where(Alert.status.in_(list(statuses)))
+    if exclude_status is not None:
+        stmt = stmt.where(Alert.status != exclude_status)
+    if since is not None:
+        stmt = stmt.where(Alert.start_time >= since)
+    return stmt.order_by(Alert.start_time.desc())
+
+
+def _apply_rules(db: Session, event: Event) -> None:
     # Ensure zone_id is populated when possible (helps zone-aware alerts).
     meta = event.meta or {}
     zone_id = meta.get("zone_id")
@@ -191,28 +166,16 @@ def apply_rules(db: Session, event: Event) -> None:
 
     # Specialized handlers
     if _handle_fire_detected(db, event):
-        if updated_meta:
-            db.add(event)
-            db.commit()
         return
     if _handle_animal_intrusion(db, event):
-        if updated_meta:
-            db.add(event)
-            db.commit()
         return
 
     alert_type = _map_event_to_alert_type(event.event_type, meta)
 
     if _handle_after_hours_presence(db, event):
-        if updated_meta:
-            db.add(event)
-            db.commit()
         return
 
     if alert_type is None:
-        if updated_meta:
-            db.add(event)
-            db.commit()
         return
 
     # Determine zone_id from meta if available
@@ -227,15 +190,7 @@ def apply_rules(db: Session, event: Event) -> None:
     now = event.timestamp_utc
     cutoff = now - timedelta(minutes=10)
 
-    stmt = select(Alert).where(
-        Alert.godown_id == event.godown_id,
-        Alert.alert_type == alert_type,
-        Alert.status == "OPEN",
-        Alert.start_time >= cutoff,
-    )
-    if zone_id:
-        stmt = stmt.where(Alert.zone_id == zone_id)
-
+    stmt = _open_alert_stmt(event.godown_id, alert_type, cutoff, zone_id)
     existing_alert: Optional[Alert] = db.execute(stmt).scalars().first()
     if existing_alert:
         link = AlertEventLink(alert_id=existing_alert.id, event_id=event.id)
@@ -276,7 +231,7 @@ def apply_rules(db: Session, event: Event) -> None:
         if updated_meta:
             db.add(event)
 
-        db.commit()
+        db.flush()
     else:
         extra = None
         if alert_type == "ANIMAL_INTRUSION":
@@ -345,13 +300,11 @@ def apply_rules(db: Session, event: Event) -> None:
         if updated_meta:
             db.add(event)
 
-        db.commit()
+        db.flush()
 
-        # Best-effort notifications (don't break ingestion if it fails)
-        try:
-            notify_alert(db, alert, event)
-        except Exception:
-            pass
+        # Queue a notification request in the ingest transaction; the worker
+        # fans it out. The row commits with the event, so a failure here fails it too.
+        notify_alert(db, alert, event)
 
 
 def _handle_after_hours_presence(db: Session, event: Event) -> bool:
@@ -372,7 +325,6 @@ def _handle_after_hours_presence(db: Session, event: Event) -> bool:
         meta["is_after_hours"] = is_ah
         event.meta = meta
         db.add(event)
-        db.commit()
 
     count_raw = meta.get("count")
     try:
@@ -398,17 +350,9 @@ def _handle_after_hours_presence(db: Session, event: Event) -> bool:
     plate = meta.get("vehicle_plate") or meta.get("plate_text")
     now = event.timestamp_utc
 
-    existing = (
-        db.query(Alert)
-        .filter(
-            Alert.godown_id == event.godown_id,
-            Alert.camera_id == event.camera_id,
-            Alert.alert_type == alert_type,
-            Alert.status.in_(["OPEN", "ACK"]),
-        )
-        .order_by(Alert.start_time.desc())
-        .first()
-    )
+    existing = db.execute(
+        _camera_alert_stmt(event.godown_id, event.camera_id, alert_type, statuses=("OPEN", "ACK")).limit(1)
+    ).scalars().first()
     if existing:
         link = AlertEventLink(alert_id=existing.id, event_id=event.id)
         db.add(link)
@@ -422,21 +366,13 @@ def _handle_after_hours_presence(db: Session, event: Event) -> bool:
         if plate:
             extra["vehicle_plate"] = plate
         existing.extra = extra
-        db.commit()
+        db.flush()
         return True
 
     cutoff = now - timedelta(seconds=max(1, policy.cooldown_seconds))
-    recent = (
-        db.query(Alert)
-        .filter(
-            Alert.godown_id == event.godown_id,
-            Alert.camera_id == event.camera_id,
-            Alert.alert_type == alert_type,
-            Alert.start_time >= cutoff,
-        )
-        .order_by(Alert.start_time.desc())
-        .first()
-    )
+    recent = db.execute(
+        _camera_alert_stmt(event.godown_id, event.camera_id, alert_type, since=cutoff).limit(1)
+    ).scalars().first()
     if recent:
         return True
 
@@ -471,11 +407,8 @@ def _handle_after_hours_presence(db: Session, event: Event) -> bool:
     db.flush()
     link = AlertEventLink(alert_id=alert.id, event_id=event.id)
     db.add(link)
-    db.commit()
-    try:
-        notify_after_hours_alert(db, alert, count=count, plate=plate, snapshot_url=snapshot_url)
-    except Exception:
-        pass
+    db.flush()
+    notify_after_hours_alert(db, alert, count=count, plate=plate, snapshot_url=snapshot_url)
     return True
 
 
@@ -696,19 +629,10 @@ def _handle_fire_detected(db: Session, event: Event) -> bool:
 
     event.severity_raw = "critical"
     db.add(event)
-    db.commit()
-
-    existing = (
-        db.query(Alert)
-        .filter(
-            Alert.godown_id == event.godown_id,
-            Alert.camera_id == event.camera_id,
-            Alert.alert_type == "FIRE_DETECTED",
-            Alert.status == "OPEN",
-        )
-        .order_by(Alert.start_time.desc())
-        .first()
-    )
+
+    existing = db.execute(
+        _camera_alert_stmt(event.godown_id, event.camera_id, "FIRE_DETECTED", statuses=("OPEN",)).limit(1)
+    ).scalars().first()
     if existing:
         link = AlertEventLink(alert_id=existing.id, event_id=event.id)
         db.add(link)
@@ -724,22 +648,15 @@ def _handle_fire_detected(db: Session, event: Event) -> bool:
         if event.image_url:
             extra["snapshot_url"] = event.image_url
         existing.extra = extra
-        db.commit()
+        db.flush()
         return True
 
     cutoff = event.timestamp_utc - timedelta(seconds=max(1, cooldown_sec))
-    recent = (
-        db.query(Alert)
-        .filter(
-            Alert.godown_id == event.godown_id,
-            Alert.camera_id == event.camera_id,
-            Alert.alert_type == "FIRE_DETECTED",
-            Alert.status != "ACK",
-            Alert.start_time >= cutoff,
-        )
-        .order_by(Alert.start_time.desc())
-        .first()
-    )
+    recent = db.execute(
+        _camera_alert_stmt(
+            event.godown_id, event.camera_id, "FIRE_DETECTED", exclude_status="ACK", since=cutoff
+        ).limit(1)
+    ).scalars().first()
     if recent:
         return True
 
@@ -770,17 +687,14 @@ def _handle_fire_detected(db: Session, event: Event) -> bool:
     db.flush()
     link = AlertEventLink(alert_id=alert.id, event_id=event.id)
     db.add(link)
-    db.commit()
-    try:
-        notify_fire_detected(
-            db,
-            alert,
-            classes=classes,
-            confidence=confidence,
-            snapshot_url=event.image_url,
-        )
-    except Exception:
-        pass
+    db.flush()
+    notify_fire_detected(
+        db,
+        alert,
+        classes=classes,
+        confidence=confidence,
+        snapshot_url=event.image_url,
+    )
     return True
 
 
@@ -824,7 +738,6 @@ def _handle_animal_intrusion(db: Session, event: Event) -> bool:
         meta["animal_label"] = species_label      # "Dog"
         event.meta = meta
         db.add(event)
-        db.commit()
 
     count_raw = meta.get("animal_count") or meta.get("count")
     try:
@@ -840,7 +753,6 @@ def _handle_animal_intrusion(db: Session, event: Event) -> bool:
         meta["animal_is_night"] = is_night
         event.meta = meta
         db.add(event)
-        db.commit()
 
     cooldown_sec = int(os.getenv("ANIMAL_ALERT_COOLDOWN_SEC", "300"))
     severity_day = os.getenv("ANIMAL_DAY_SEVERITY", "warning").lower()
@@ -848,7 +760,6 @@ def _handle_animal_intrusion(db: Session, event: Event) -> bool:
 
     event.severity_raw = severity
     db.add(event)
-    db.commit()
 
     def _alert_species(alert: Alert) -> str:
         extra = alert.extra or {}
@@ -856,17 +767,9 @@ def _handle_animal_intrusion(db: Session, event: Event) -> bool:
             return str(extra.get("animal_species") or "unknown")
         return "unknown"
 
-    existing = (
-        db.query(Alert)
-        .filter(
-            Alert.godown_id == event.godown_id,
-            Alert.camera_id == event.camera_id,
-            Alert.alert_type == "ANIMAL_INTRUSION",
-            Alert.status == "OPEN",
-        )
-        .order_by(Alert.start_time.desc())
-        .first()
-    )
+    existing = db.execute(
+        _camera_alert_stmt(event.godown_id, event.camera_id, "ANIMAL_INTRUSION", statuses=("OPEN",)).limit(1)
+    ).scalars().first()
 
     if existing and _alert_species(existing) != species_key:
         existing = None
@@ -890,22 +793,13 @@ def _handle_animal_intrusion(db: Session, event: Event) -> bool:
 
         existing.summary = _build_alert_summary("ANIMAL_INTRUSION", event)
 
-        db.commit()
+        db.flush()
         return True
 
     cutoff = event.timestamp_utc - timedelta(seconds=max(1, cooldown_sec))
-    recent = (
-        db.query(Alert)
-        .filter(
-            Alert.godown_id == event.godown_id,
-            Alert.camera_id == event.camera_id,
-            Alert.alert_type == "ANIMAL_INTRUSION",
-            Alert.status != "ACK",
-            Alert.start_time >= cutoff,
-        )
-        .order_by(Alert.start_time.desc())
-        .all()
-    )
+    recent = db.execute(
+        _camera_alert_stmt(event.godown_id, event.camera_id, "ANIMAL_INTRUSION", exclude_status="ACK", since=cutoff)
+    ).scalars().all()
     if any(_alert_species(a) == species_key for a in recent):
         return True
 
@@ -936,18 +830,15 @@ def _handle_animal_intrusion(db: Session, event: Event) -> bool:
     db.flush()
     link = AlertEventLink(alert_id=alert.id, event_id=event.id)
     db.add(link)
-    db.commit()
+    db.flush()
 
-    try:
-        notify_animal_intrusion(
-            db,
-            alert,
-            species=species_key,
-            count=count,
-            snapshot_url=event.image_url,
-            is_night=is_night,
-        )
-    except Exception:
-        pass
+    notify_animal_intrusion(
+        db,
+        alert,
+        species=species_key,
+        count=count,
+        snapshot_url=event.image_url,
+        is_night=is_night,
+    )
 
     return True
@@ -0,0 +1,115 @@
+"""
+Cached snapshot existence checks for event serialization.
+
+Listing events resolves each event's snapshot to a file under the snapshots
+root, which used to mean several ``Path.exists()`` calls per item on a
+bind-mounted volume. This index remembers the outcome per absolute path in a
+bounded LRU: hits are kept for ``SNAPSHOT_INDEX_TTL_SEC`` and misses for the
+shorter ``SNAPSHOT_INDEX_NEGATIVE_TTL_SEC`` (snapshots may be uploaded after
+the event arrives). The upload endpoint records new files directly and
+godown deletion invalidates its subtree, so the cache rarely needs disk I/O.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, str(default))))
+    except Exception:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, str(default))))
+    except Exception:
+        return default
+
+
+class SnapshotIndex:
+    """Thread-safe LRU of ``path -> exists`` with separate hit/miss TTLs."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def _store(self, key: str, exists: bool) -> None:
+        ttl = _env_float("SNAPSHOT_INDEX_TTL_SEC", 600.0) if exists else _env_float(
+            "SNAPSHOT_INDEX_NEGATIVE_TTL_SEC", 30.0
+        )
+        with self._lock:
+            self._entries[key] = (exists, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            limit = _env_int("SNAPSHOT_INDEX_MAX_ENTRIES", 20000)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def exists(self, path: Path) -> bool:
+        key = str(path)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        exists = path.exists()
+        self._store(key, exists)
+        return exists
+
+    def record(self, path: Path, exists: bool = True) -> None:
+        """Record a file written (or removed) by this process."""
+        with self._lock:
+            self.recorded += 1
+        self._store(str(path), exists)
+
+    def invalidate(self, godown_id: str | None = None) -> None:
+        """Drop every entry, or only those under ``snapshots/<godown_id>/``."""
+        with self._lock:
+            if godown_id is None:
+                self._entries.clear()
+                return
+            segment = f"{os.sep}snapshots{os.sep}{godown_id}{os.sep}"
+            for key in [k for k in self._entries if segment in k]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "recorded": self.recorded,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_index = SnapshotIndex()
+
+
+def snapshot_exists(path: Path) -> bool:
+    return _index.exists(path)
+
+
+def record_snapshot(path: Path, exists: bool = True) -> None:
+    _index.record(path, exists)
+
+
+def invalidate_snapshots(godown_id: str | None = None) -> None:
+    _index.invalidate(godown_id)
+
+
+def snapshot_index_stats() -> dict:
+    return _index.stats()
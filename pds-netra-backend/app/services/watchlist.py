@@ -9,15 +9,19 @@ import json
 import logging
 import os
 import sys
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Callable, Iterable, Optional, Tuple
 from zoneinfo import ZoneInfo
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import LargeBinary, func, tuple_, type_coerce
 
-from ..models.watchlist import WatchlistPerson, WatchlistPersonImage, WatchlistPersonEmbedding
+from ..core.db import unit_of_work
+from ..core.pagination import decode_cursor, encode_cursor
+from ..models.watchlist import WatchlistPerson, WatchlistPersonImage, WatchlistPersonEmbedding, WatchlistTombstone
 from ..models.face_match_event import FaceMatchEvent
 from ..models.event import Alert, Event, AlertEventLink
 from ..models.rule import Rule
@@ -25,6 +29,9 @@ from ..schemas.watchlist import FaceMatchEventIn, WatchlistEmbeddingIn
 from .storage import get_storage_provider
 from .notifications import notify_blacklist_alert
 from .mqtt_publisher import publish_watchlist_sync
+from .config_version import get_config_version
+from .face_index_export import encode_face_index
+from .face_index import WATCHLIST, search_faces
 from .incident_lifecycle import touch_detection_timestamp
 
 _logger = logging.getLogger("watchlist")
@@ -54,7 +61,7 @@ def create_person(
     db.add(person)
     db.commit()
     db.refresh(person)
-    publish_watchlist_sync()
+    _watchlist_changed()
     return person
 
 
@@ -65,7 +72,7 @@ def update_person(db: Session, person: WatchlistPerson, updates: dict) -> Watchl
     db.add(person)
     db.commit()
     db.refresh(person)
-    publish_watchlist_sync()
+    _watchlist_changed()
     return person
 
 
@@ -74,7 +81,7 @@ def deactivate_person(db: Session, person: WatchlistPerson) -> WatchlistPerson:
     db.add(person)
     db.commit()
     db.refresh(person)
-    publish_watchlist_sync()
+    _watchlist_changed()
     return person
 
 
@@ -88,7 +95,7 @@ def delete_person(db: Session, person: WatchlistPerson) -> None:
     )
     db.delete(person)
     db.commit()
-    publish_watchlist_sync()
+    _watchlist_changed()
 
 
 def add_person_images(
@@ -114,7 +121,7 @@ def add_person_images(
     db.commit()
     for img in saved:
         db.refresh(img)
-    publish_watchlist_sync()
+    _watchlist_changed()
     _auto_embed_from_images(db, person=person, images=saved)
     return saved
 
@@ -138,7 +145,7 @@ def add_embeddings(
     db.commit()
     for item in saved:
         db.refresh(item)
-    publish_watchlist_sync()
+    _watchlist_changed()
     return saved
 
 
@@ -276,16 +283,15 @@ def _auto_embed_from_images(db: Session, person: WatchlistPerson, images: list[W
     _logger.info("Auto-generated watchlist embedding for person %s", person.id)
     add_embeddings(db, person=person, embeddings=payloads)
 
-def build_sync_payload(db: Session) -> dict:
-    persons = (
-        db.query(WatchlistPerson)
-        .filter(WatchlistPerson.status == "ACTIVE")
-        .order_by(WatchlistPerson.updated_at.desc())
-        .all()
-    )
-    items: list[dict] = []
-    for person in persons:
-        images = [
+def _person_sync_item(person: WatchlistPerson) -> dict:
+    return {
+        "id": person.id,
+        "name": person.name,
+        "alias": person.alias,
+        "reason": person.reason,
+        "status": person.status,
+        "updated_at": person.updated_at,
+        "images": [
             {
                 "id": img.id,
                 "image_url": img.image_url,
@@ -293,37 +299,271 @@ def build_sync_payload(db: Session) -> dict:
                 "created_at": img.created_at,
             }
             for img in person.images
-        ]
-        embeddings = [
+        ],
+        "embeddings": [
             {
                 "embedding": emb.embedding,
                 "embedding_version": emb.embedding_version,
                 "embedding_hash": emb.embedding_hash,
             }
             for emb in person.embeddings
-        ]
-        items.append(
-            {
-                "id": person.id,
-                "name": person.name,
-                "alias": person.alias,
-                "reason": person.reason,
-                "status": person.status,
-                "updated_at": person.updated_at,
-                "images": images,
-                "embeddings": embeddings,
-            }
-        )
-    checksum = _checksum_payload(items)
-    return {
+        ],
+    }
+
+
+def _sync_persons_query(db: Session):
+    return db.query(WatchlistPerson).options(
+        selectinload(WatchlistPerson.images),
+        selectinload(WatchlistPerson.embeddings),
+    )
+
+
+class _SyncPayloadCache:
+    """
+    Small LRU of built sync pages keyed by ``(watchlist_version, page, page_size)``.
+
+    The version comes from ``config_versions``, so a write in any process
+    changes the key; local writes also clear the cache outright.
+    """
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[dict]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: tuple, payload: dict) -> None:
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_sync_cache = _SyncPayloadCache()
+
+
+def invalidate_sync_cache() -> None:
+    _sync_cache.clear()
+
+
+def sync_cache_stats() -> dict:
+    return _sync_cache.stats()
+
+
+def _watchlist_changed() -> None:
+    invalidate_sync_cache()
+    publish_watchlist_sync()
+
+
+def build_sync_payload(db: Session, *, page: int = 1, page_size: Optional[int] = None) -> dict:
+    """
+    Full snapshot of ACTIVE persons, one page at a time.
+
+    Paging runs in SQL with images and embeddings eager-loaded, and each
+    built page is cached for the current watchlist version. ``checksum`` is a
+    content hash of the returned items and doubles as the ETag. Pass the
+    returned ``version`` as ``since`` later to fetch only what changed.
+    """
+    version = get_config_version(db, "watchlist")
+    key = ("full", version, page, page_size)
+    cached = _sync_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    q = db.query(WatchlistPerson).filter(WatchlistPerson.status == "ACTIVE")
+    total = q.count()
+    persons_q = _sync_persons_query(db).filter(WatchlistPerson.status == "ACTIVE").order_by(
+        WatchlistPerson.updated_at.desc(), WatchlistPerson.id.asc()
+    )
+    if page_size is not None:
+        persons_q = persons_q.offset((page - 1) * page_size).limit(page_size)
+    items = [_person_sync_item(person) for person in persons_q.all()]
+    payload = {
         "schema_version": "1.0",
-        "checksum": checksum,
+        "mode": "full",
+        "version": version,
+        "checksum": _checksum_payload(items),
         "generated_at": _utc_now(),
         "items": items,
+        "total": total,
+    }
+    if page_size is not None:
+        payload["page"] = page
+        payload["page_size"] = page_size
+    _sync_cache.put(key, payload)
+    return dict(payload)
+
+
+def build_sync_delta(
+    db: Session,
+    *,
+    since: int,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Optional[dict]:
+    """
+    Persons changed after watchlist version ``since``.
+
+    ``upserts`` holds ACTIVE persons that were created or changed (including
+    their images/embeddings); ``deleted`` lists ids that were hard-deleted or
+    are no longer ACTIVE and should be dropped by the edge. Returns None when
+    ``since`` is ahead of the server (e.g. after a database restore), in which
+    case the caller should serve a full snapshot.
+
+    With ``page_size``, changed persons are paged by keyset on
+    ``(sync_version, id)``: while ``next_cursor`` is set, repeat the call with
+    the same ``since`` and that cursor. Tombstones come with the last page, and
+    only the last page's ``version`` should be stored as the next ``since``.
+    """
+    version = get_config_version(db, "watchlist")
+    if since > version:
+        return None
+    key = ("delta", version, since, page_size, cursor)
+    cached = _sync_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    upserts: list[dict] = []
+    deleted: list[str] = []
+    next_cursor: Optional[str] = None
+    if since < version:
+        changed_q = (
+            _sync_persons_query(db)
+            .filter(WatchlistPerson.sync_version > since)
+            .order_by(WatchlistPerson.sync_version.asc(), WatchlistPerson.id.asc())
+        )
+        if cursor:
+            after_version, after_id = decode_cursor(cursor, 2)
+            changed_q = changed_q.filter(
+                tuple_(WatchlistPerson.sync_version, WatchlistPerson.id) > tuple_(after_version, after_id)
+            )
+        if page_size is not None:
+            changed_q = changed_q.limit(page_size + 1)
+        changed = changed_q.all()
+        if page_size is not None and len(changed) > page_size:
+            changed = changed[:page_size]
+            next_cursor = encode_cursor([changed[-1].sync_version, changed[-1].id])
+        for person in changed:
+            if person.status == "ACTIVE":
+                upserts.append(_person_sync_item(person))
+            else:
+                deleted.append(person.id)
+        if next_cursor is None:
+            deleted.extend(
+                row[0]
+                for row in db.query(WatchlistTombstone.person_id)
+                .filter(WatchlistTombstone.sync_version > since)
+                .order_by(WatchlistTombstone.person_id.asc())
+                .all()
+            )
+    payload = {
+        "schema_version": "1.0",
+        "mode": "delta",
+        "since": since,
+        "version": version,
+        "checksum": _checksum_payload([*upserts, *deleted]),
+        "generated_at": _utc_now(),
+        "upserts": upserts,
+        "deleted": deleted,
+        "next_cursor": next_cursor,
     }
+    _sync_cache.put(key, payload)
+    return dict(payload)
+
+
+def build_sync_export(db: Session, payload: dict, *, dtype: str = "float32") -> bytes:
+    """
+    Binary face-index export for a sync payload (full page or delta).
+
+    Person metadata goes into the manifest without embeddings; vectors are
+    read as raw packed blobs and laid out as NumPy-mappable matrices.
+    """
+    persons = payload.get("items") if payload.get("mode") == "full" else payload.get("upserts")
+    persons = persons or []
+    person_ids = [person["id"] for person in persons]
+    rows = []
+    if person_ids:
+        rows = (
+            db.query(
+                WatchlistPersonEmbedding.person_id,
+                WatchlistPersonEmbedding.id,
+                WatchlistPersonEmbedding.embedding_version,
+                WatchlistPersonEmbedding.embedding_hash,
+                type_coerce(WatchlistPersonEmbedding.embedding, LargeBinary()),
+            )
+            .filter(WatchlistPersonEmbedding.person_id.in_(person_ids))
+            .order_by(WatchlistPersonEmbedding.person_id.asc(), WatchlistPersonEmbedding.created_at.asc())
+            .all()
+        )
+    meta = {key: value for key, value in payload.items() if key not in {"items", "upserts"}}
+    meta["persons"] = [{k: v for k, v in person.items() if k != "embeddings"} for person in persons]
+    return encode_face_index(
+        (
+            (
+                {
+                    "person_id": person_id,
+                    "embedding_id": embedding_id,
+                    "embedding_version": embedding_version,
+                    "embedding_hash": embedding_hash,
+                },
+                blob,
+            )
+            for person_id, embedding_id, embedding_version, embedding_hash, blob in rows
+        ),
+        dtype=dtype,
+        extra={"kind": "watchlist", **meta},
+    )
 
 
 def ingest_face_match_event(db: Session, event_in: FaceMatchEventIn) -> Tuple[FaceMatchEvent, bool]:
+    with unit_of_work(db):
+        return _ingest_face_match_event(db, event_in)
+
+
+def _verify_face_match(db: Session, event_in: FaceMatchEventIn) -> Optional[dict]:
+    """
+    Re-score the edge's probe embedding against the backend face index.
+
+    Recorded on the event for audit only; the edge's verdict still decides
+    whether an alert is raised.
+    """
+    candidate = event_in.payload.person_candidate
+    if not candidate.embedding:
+        return None
+    if os.getenv("FACE_MATCH_VERIFY", "true").lower() not in {"1", "true", "yes"}:
+        return None
+    try:
+        matches = search_faces(db, candidate.embedding, top_k=1, kinds=[WATCHLIST])
+    except Exception as exc:
+        _logger.warning("Face match verification failed event_id=%s err=%s", event_in.event_id, exc)
+        return None
+    best = matches[0] if matches else None
+    return {
+        "person_id": best["person_id"] if best else None,
+        "score": best["score"] if best else None,
+        "agrees": bool(best) and best["person_id"] == candidate.blacklist_person_id,
+    }
+
+
+def _ingest_face_match_event(db: Session, event_in: FaceMatchEventIn) -> Tuple[FaceMatchEvent, bool]:
     existing = db.get(FaceMatchEvent, event_in.event_id)
     if existing:
         return existing, False
@@ -344,11 +584,10 @@ def ingest_face_match_event(db: Session, event_in: FaceMatchEventIn) -> Tuple[Fa
         snapshot_url=evidence.snapshot_url,
         storage_path=evidence.local_snapshot_path,
         correlation_id=event_in.correlation_id,
-        raw_payload=event_in.model_dump(mode="json"),
+        raw_payload=event_in.model_dump(mode="json", exclude={"payload": {"person_candidate": {"embedding"}}}),
     )
     db.add(face_event)
-    db.commit()
-    db.refresh(face_event)
+    db.flush()
 
     event_meta = {
         "person_id": person_candidate.blacklist_person_id,
@@ -357,6 +596,9 @@ def ingest_face_match_event(db: Session, event_in: FaceMatchEventIn) -> Tuple[Fa
         "correlation_id": event_in.correlation_id,
         "bbox": evidence.bbox,
     }
+    server_match = _verify_face_match(db, event_in)
+    if server_match is not None:
+        event_meta["server_match"] = server_match
     person_name = None
     if person_candidate.blacklist_person_id:
         person = db.get(WatchlistPerson, person_candidate.blacklist_person_id)
@@ -377,8 +619,7 @@ def ingest_face_match_event(db: Session, event_in: FaceMatchEventIn) -> Tuple[Fa
         meta=event_meta,
     )
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    db.flush()
 
     alert_created = False
     if person_candidate.is_blacklisted:
@@ -392,7 +633,13 @@ def ingest_face_match_event(db: Session, event_in: FaceMatchEventIn) -> Tuple[Fa
             correlation_id=event_in.correlation_id,
         )
         if alert_created:
-            notify_blacklist_alert(db, alert, person_name=person_name, match_score=person_candidate.match_score, snapshot_url=evidence.snapshot_url)
+            notify_blacklist_alert(
+                db,
+                alert,
+                person_name=person_name,
+                match_score=person_candidate.match_score,
+                snapshot_url=evidence.snapshot_url,
+            )
     return face_event, alert_created
 
 
@@ -414,27 +661,8 @@ def _ensure_blacklist_alert(
         Alert.status.in_(["OPEN", "ACK"]),
     )
     if person_id:
-        candidates = None
-        if db.bind and db.bind.dialect.name == "sqlite":
-            candidates = q.all()
-        else:
-            try:
-                existing = q.filter(Alert.extra["person_id"].astext == person_id).first()
-                if existing:
-                    candidates = None
-                else:
-                    candidates = []
-            except Exception:
-                candidates = q.all()
-        if candidates is not None:
-            existing = None
-            for alert in candidates:
-                extra = alert.extra or {}
-                if extra.get("person_id") == person_id:
-                    existing = alert
-                    break
-    else:
-        existing = q.first()
+        q = q.filter(Alert.person_id == person_id)
+    existing = q.first()
 
     if existing:
         link = AlertEventLink(alert_id=existing.id, event_id=event.id)
@@ -455,7 +683,7 @@ def _ensure_blacklist_alert(
             "correlation_id": correlation_id,
         }
         touch_detection_timestamp(existing, event.timestamp_utc)
-        db.commit()
+        db.flush()
         return existing, False
 
     # Ensure zone_id is set for blacklist alerts
@@ -525,6 +753,5 @@ def _ensure_blacklist_alert(
     db.flush()
     link = AlertEventLink(alert_id=alert.id, event_id=event.id)
     db.add(link)
-    db.commit()
-    db.refresh(alert)
+    db.flush()
     return alert, True
@@ -0,0 +1,310 @@
+"""
+Zone geometry helpers and per-process camera zone cache.
+
+Camera zones are stored as JSON on ``Camera.zones_json``. Parsing them and
+rebuilding float polygons for every event is wasteful, so this module keeps
+pre-parsed polygons (with bounding boxes) keyed by ``(godown_id, camera_id)``.
+The camera and zone write APIs invalidate entries; a TTL bounds staleness
+when another worker process performed the write.
+
+``classify_bboxes`` classifies many detections against a camera's zones in
+one NumPy pass for list enrichment, backfills and batched ingest.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..models.event import Event
+from ..models.godown import Camera
+
+
+@dataclass(frozen=True)
+class ZonePolygon:
+    zone_id: str
+    points: tuple[tuple[float, float], ...]
+    min_x: float
+    min_y: float
+    max_x: float
+    max_y: float
+
+
+@dataclass(frozen=True)
+class CameraGeometry:
+    zones: tuple[ZonePolygon, ...]
+
+    def infer_zone_id(self, bbox: Optional[Sequence[float]]) -> Optional[str]:
+        return infer_zone_id(bbox, self.zones)
+
+    def classify(self, bboxes: Sequence[Optional[Sequence[float]]]) -> list[Optional[str]]:
+        return classify_bboxes(bboxes, self.zones)
+
+
+EMPTY_GEOMETRY = CameraGeometry(zones=())
+
+
+def parse_bbox(bbox_raw: str | None) -> Optional[list[int]]:
+    """Parse the ``"[x1, y1, x2, y2]"`` string stored on ``Event.bbox``."""
+    if not bbox_raw:
+        return None
+    try:
+        if bbox_raw.startswith("[") and bbox_raw.endswith("]"):
+            parts = bbox_raw.strip("[]").split(",")
+            return [int(float(p.strip())) for p in parts if p.strip()]
+    except Exception:
+        return None
+    return None
+
+
+def bbox_in_zone(bbox: Sequence[float], zone: ZonePolygon) -> bool:
+    """
+    Return True when the bbox overlaps the zone.
+
+    The historical check (center, then corners, then bounding-box overlap)
+    accepts any bbox that overlaps the polygon's bounding box: a center or
+    corner inside the polygon always implies that overlap. Testing the
+    overlap directly gives identical results without ray casting.
+    """
+    if len(bbox) != 4:
+        return False
+    x1, y1, x2, y2 = bbox
+    return not (x2 < zone.min_x or x1 > zone.max_x or y2 < zone.min_y or y1 > zone.max_y)
+
+
+def infer_zone_id(bbox: Optional[Sequence[float]], zones: Sequence[ZonePolygon]) -> Optional[str]:
+    """Return the id of the first zone the bbox overlaps, in configuration order."""
+    if not bbox or len(bbox) != 4:
+        return None
+    for zone in zones:
+        if bbox_in_zone(bbox, zone):
+            return zone.zone_id
+    return None
+
+
+def _bbox_array(bboxes: Sequence[Optional[Sequence[float]]]) -> tuple[np.ndarray, np.ndarray]:
+    """Pack bboxes into an (N, 4) float array plus a validity mask."""
+    boxes = np.zeros((len(bboxes), 4), dtype=np.float64)
+    valid = np.zeros(len(bboxes), dtype=bool)
+    for idx, bbox in enumerate(bboxes):
+        if not bbox or len(bbox) != 4:
+            continue
+        try:
+            boxes[idx] = [float(v) for v in bbox]
+        except (TypeError, ValueError):
+            continue
+        valid[idx] = True
+    return boxes, valid
+
+
+def classify_bboxes(
+    bboxes: Sequence[Optional[Sequence[float]]],
+    zones: Sequence[ZonePolygon],
+) -> list[Optional[str]]:
+    """
+    Classify N bboxes against M zones at once.
+
+    Returns one zone id (or None) per bbox with the same first-match semantics
+    as ``infer_zone_id``: the (N, M) overlap matrix is reduced with ``argmax``,
+    which picks the earliest zone in configuration order.
+    """
+    if not bboxes:
+        return []
+    if not zones:
+        return [None] * len(bboxes)
+    boxes, valid = _bbox_array(bboxes)
+    extents = np.array([(z.min_x, z.min_y, z.max_x, z.max_y) for z in zones], dtype=np.float64)
+    x1, y1, x2, y2 = (boxes[:, i : i + 1] for i in range(4))
+    overlap = ~(
+        (x2 < extents[:, 0])
+        | (x1 > extents[:, 2])
+        | (y2 < extents[:, 1])
+        | (y1 > extents[:, 3])
+    )
+    overlap &= valid[:, None]
+    first = overlap.argmax(axis=1)
+    matched = overlap[np.arange(len(bboxes)), first]
+    return [zones[int(z)].zone_id if hit else None for z, hit in zip(first, matched)]
+
+
+def parse_zones_json(zones_json: str | None) -> CameraGeometry:
+    """Parse ``Camera.zones_json`` into polygons, skipping malformed zones."""
+    if not zones_json:
+        return EMPTY_GEOMETRY
+    try:
+        zones = json.loads(zones_json)
+    except Exception:
+        return EMPTY_GEOMETRY
+    if not isinstance(zones, list):
+        return EMPTY_GEOMETRY
+    parsed: list[ZonePolygon] = []
+    for zone in zones:
+        zone_id = zone.get("id") if isinstance(zone, dict) else None
+        polygon = zone.get("polygon") if isinstance(zone, dict) else None
+        if not zone_id or not isinstance(polygon, list):
+            continue
+        try:
+            points = tuple(
+                (float(pt[0]), float(pt[1])) for pt in polygon if isinstance(pt, list) and len(pt) == 2
+            )
+        except Exception:
+            continue
+        if not points:
+            continue
+        xs = [pt[0] for pt in points]
+        ys = [pt[1] for pt in points]
+        parsed.append(
+            ZonePolygon(
+                zone_id=str(zone_id),
+                points=points,
+                min_x=min(xs),
+                min_y=min(ys),
+                max_x=max(xs),
+                max_y=max(ys),
+            )
+        )
+    return CameraGeometry(zones=tuple(parsed))
+
+
+def _cache_ttl_sec() -> float:
+    try:
+        return max(0.0, float(os.getenv("ZONE_GEOMETRY_CACHE_TTL_SEC", "300")))
+    except Exception:
+        return 300.0
+
+
+def _cache_max_entries() -> int:
+    try:
+        return max(1, int(os.getenv("ZONE_GEOMETRY_CACHE_MAX_ENTRIES", "4096")))
+    except Exception:
+        return 4096
+
+
+class ZoneGeometryCache:
+    """Thread-safe LRU of parsed camera geometry keyed by (godown_id, camera_id)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], tuple[CameraGeometry, str | None, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: tuple[str, str], zones_json: str | None, *, check_source: bool) -> Optional[CameraGeometry]:
+        ttl = _cache_ttl_sec()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            geometry, source, loaded_at = entry
+            if ttl and now - loaded_at > ttl:
+                del self._entries[key]
+                return None
+            if check_source and source != zones_json:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return geometry
+
+    def _store(self, key: tuple[str, str], geometry: CameraGeometry, zones_json: str | None) -> None:
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (geometry, zones_json, time.monotonic())
+            self._entries.move_to_end(key)
+            limit = _cache_max_entries()
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def for_camera(self, camera: Camera) -> CameraGeometry:
+        """Geometry for an already-loaded camera row (no DB round trip)."""
+        key = (str(camera.godown_id), str(camera.id))
+        geometry = self._lookup(key, camera.zones_json, check_source=True)
+        if geometry is None:
+            geometry = parse_zones_json(camera.zones_json)
+            self._store(key, geometry, camera.zones_json)
+        return geometry
+
+    def get(self, db: Session, godown_id: str, camera_id: str) -> CameraGeometry:
+        """Geometry for a camera, loading ``zones_json`` from the DB on a miss."""
+        key = (str(godown_id), str(camera_id))
+        geometry = self._lookup(key, None, check_source=False)
+        if geometry is not None:
+            return geometry
+        row = (
+            db.query(Camera.zones_json)
+            .filter(Camera.id == camera_id, Camera.godown_id == godown_id)
+            .first()
+        )
+        zones_json = row[0] if row else None
+        geometry = parse_zones_json(zones_json)
+        self._store(key, geometry, zones_json)
+        return geometry
+
+    def invalidate(self, godown_id: Optional[str] = None, camera_id: Optional[str] = None) -> None:
+        with self._lock:
+            if godown_id is None and camera_id is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if godown_id is not None and key[0] != godown_id:
+                    continue
+                if camera_id is not None and key[1] != camera_id:
+                    continue
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache = ZoneGeometryCache()
+
+
+def get_camera_geometry(db: Session, godown_id: str, camera_id: str) -> CameraGeometry:
+    return _cache.get(db, godown_id, camera_id)
+
+
+def camera_geometry(camera: Camera) -> CameraGeometry:
+    return _cache.for_camera(camera)
+
+
+def infer_event_zones(db: Session, events: Iterable[Event]) -> dict[int, str]:
+    """
+    Infer zones for events lacking ``meta.zone_id``, one classify call per camera.
+
+    Returns ``{event.id: zone_id}`` for the events that matched a zone.
+    """
+    grouped: dict[tuple[str, str], list[tuple[Event, list[int]]]] = {}
+    for event in events:
+        if (event.meta or {}).get("zone_id"):
+            continue
+        bbox = parse_bbox(event.bbox)
+        if not bbox:
+            continue
+        grouped.setdefault((event.godown_id, event.camera_id), []).append((event, bbox))
+    inferred: dict[int, str] = {}
+    for (godown_id, camera_id), items in grouped.items():
+        geometry = get_camera_geometry(db, godown_id, camera_id)
+        if not geometry.zones:
+            continue
+        zone_ids = geometry.classify([bbox for _, bbox in items])
+        for (event, _), zone_id in zip(items, zone_ids):
+            if zone_id:
+                inferred[event.id] = zone_id
+    return inferred
+
+
+def invalidate_camera_geometry(godown_id: Optional[str] = None, camera_id: Optional[str] = None) -> None:
+    _cache.invalidate(godown_id, camera_id)
+
+
+def zone_geometry_cache_stats() -> dict:
+    return _cache.stats()
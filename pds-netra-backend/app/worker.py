@@ -26,11 +26,15 @@ FIRE_ALERT_TYPES = {"FIRE_DETECTED"}
 
 
 from .core.config import settings  # noqa: E402
-from .core.db import SessionLocal  # noqa: E402
+from .core.db import SessionLocal, engine  # noqa: E402
 from .models.event import Alert  # noqa: E402
 from .services.incident_lifecycle import mark_alert_closed  # noqa: E402
-from .services.notification_worker import _build_providers, process_outbox_batch  # noqa: E402
+from .services.notification_transport import close_smtp_pools, transport_stats  # noqa: E402
+from .services.notification_outbox import fan_out_alert_notifications  # noqa: E402
+from .services.notification_worker import OutboxDispatcher, _build_providers  # noqa: E402
 from .services.alert_reports import generate_hq_report, IST  # noqa: E402
+from .services.alert_stats import rebuild_alert_stats, register_alert_stats_listener  # noqa: E402
+from .services.event_partitions import maintain_event_partitions  # noqa: E402
 
 logging.basicConfig(
     level=logging.INFO,
@@ -39,14 +43,13 @@ logging.basicConfig(
 logger = logging.getLogger("worker")
 
 
-def close_stale_incidents(db: Session, *, now: datetime.datetime | None = None) -> int:
-    now = now or datetime.datetime.now(datetime.timezone.utc)
-    closed = 0
-
-    candidates: dict[str, Alert] = {}
-
-    def _due_filter(cutoff: datetime.datetime):
-        return or_(
+def _stale_alerts_query(db: Session, cutoff: datetime.datetime, *, fire: bool):
+    """Live alerts whose last detection (or start) is at or before ``cutoff``."""
+    types = tuple(FIRE_ALERT_TYPES)
+    return db.query(Alert).filter(
+        Alert.status.in_(["OPEN", "ACK"]),
+        Alert.alert_type.in_(types) if fire else ~Alert.alert_type.in_(types),
+        or_(
             and_(
                 Alert.last_detection_at.isnot(None),
                 Alert.last_detection_at <= cutoff,
@@ -55,34 +58,24 @@ def close_stale_incidents(db: Session, *, now: datetime.datetime | None = None)
                 Alert.last_detection_at.is_(None),
                 Alert.start_time <= cutoff,
             ),
-        )
+        ),
+    )
+
+
+def close_stale_incidents(db: Session, *, now: datetime.datetime | None = None) -> int:
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    closed = 0
+
+    candidates: dict[str, Alert] = {}
 
     if ALERT_AUTO_CLOSE_DEFAULT_SEC > 0:
         default_cutoff = now - datetime.timedelta(seconds=ALERT_AUTO_CLOSE_DEFAULT_SEC)
-        default_rows = (
-            db.query(Alert)
-            .filter(
-                Alert.status.in_(["OPEN", "ACK"]),
-                ~Alert.alert_type.in_(tuple(FIRE_ALERT_TYPES)),
-                _due_filter(default_cutoff),
-            )
-            .all()
-        )
-        for alert in default_rows:
+        for alert in _stale_alerts_query(db, default_cutoff, fire=False).all():
             candidates[str(alert.id)] = alert
 
     if ALERT_AUTO_CLOSE_FIRE_SEC > 0:
         fire_cutoff = now - datetime.timedelta(seconds=ALERT_AUTO_CLOSE_FIRE_SEC)
-        fire_rows = (
-            db.query(Alert)
-            .filter(
-                Alert.status.in_(["OPEN", "ACK"]),
-                Alert.alert_type.in_(tuple(FIRE_ALERT_TYPES)),
-                _due_filter(fire_cutoff),
-            )
-            .all()
-        )
-        for alert in fire_rows:
+        for alert in _stale_alerts_query(db, fire_cutoff, fire=True).all():
             candidates[str(alert.id)] = alert
 
     for alert in candidates.values():
@@ -109,28 +102,80 @@ def close_stale_incidents(db: Session, *, now: datetime.datetime | None = None)
 def main() -> int:
     logger.info("✅ Worker booted (pid=%s)", os.getpid())
     interval = int(os.getenv("WORKER_INTERVAL_SEC", "10"))
+    # While notifications are in flight or backlogged, poll the outbox this often instead of sleeping `interval`.
+    busy_poll_sec = max(0.0, float(os.getenv("NOTIFY_BUSY_POLL_MS", "200")) / 1000.0)
+    fanout_batch_size = max(1, int(os.getenv("NOTIFY_FANOUT_BATCH_SIZE", "100")))
+    last_housekeeping_at: datetime.datetime | None = None
     report_interval = int(os.getenv("HQ_REPORT_INTERVAL_SEC", "3600"))
     last_report_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=report_interval)
-
-    providers = _build_providers()
+    stats_interval = int(os.getenv("ALERT_STATS_RECONCILE_INTERVAL_SEC", "3600"))
+    # Only recent buckets are reconciled; a full rebuild is app.scripts.rebuild_alert_stats.
+    stats_window = datetime.timedelta(days=max(1, int(os.getenv("ALERT_STATS_RECONCILE_DAYS", "2"))))
+    last_stats_at: datetime.datetime | None = None
+    partition_interval = int(os.getenv("EVENT_PARTITION_MAINTENANCE_INTERVAL_SEC", "3600"))
+    last_partition_at: datetime.datetime | None = None
+    transport_log_interval = int(os.getenv("NOTIFY_TRANSPORT_STATS_LOG_SEC", "3600"))
+    last_transport_log_at = datetime.datetime.now(datetime.timezone.utc)
+
+    register_alert_stats_listener(SessionLocal)
+
+    dispatcher = OutboxDispatcher(_build_providers())
     logger.info("Worker started interval=%ss", interval)
 
     while True:
         try:
             with SessionLocal() as db:
-                process_outbox_batch(db, providers=providers)
-                close_stale_incidents(db)
+                try:
+                    fanned_out = fan_out_alert_notifications(db, batch_size=fanout_batch_size)
+                except Exception:
+                    db.rollback()
+                    fanned_out = 0
+                    logger.exception("Failed to fan out alert notifications")
+                claimed, _ = dispatcher.poll(db)
 
                 now = datetime.datetime.now(datetime.timezone.utc)
-                if (now - last_report_at).total_seconds() >= report_interval:
-                    try:
-                        generate_hq_report(db, now_utc=now)
-                        last_report_at = now
-                    except Exception:
-                        logger.exception("Failed to generate HQ report")
-
-            time.sleep(interval)
+                if last_housekeeping_at is None or (now - last_housekeeping_at).total_seconds() >= interval:
+                    last_housekeeping_at = now
+                    close_stale_incidents(db)
+
+                    if (now - last_report_at).total_seconds() >= report_interval:
+                        try:
+                            generate_hq_report(db, now_utc=now)
+                            last_report_at = now
+                        except Exception:
+                            logger.exception("Failed to generate HQ report")
+
+                    if stats_interval > 0 and (
+                        last_stats_at is None or (now - last_stats_at).total_seconds() >= stats_interval
+                    ):
+                        try:
+                            rebuild_alert_stats(db, since=now - stats_window)
+                            last_stats_at = now
+                        except Exception:
+                            db.rollback()
+                            logger.exception("Failed to reconcile alert stats")
+
+                    if partition_interval > 0 and (
+                        last_partition_at is None or (now - last_partition_at).total_seconds() >= partition_interval
+                    ):
+                        try:
+                            maintain_event_partitions(engine, now=now)
+                            last_partition_at = now
+                        except Exception:
+                            logger.exception("Failed to maintain event partitions")
+
+                    if transport_log_interval > 0 and (
+                        (now - last_transport_log_at).total_seconds() >= transport_log_interval
+                    ):
+                        logger.info("Notification transport stats: %s", transport_stats())
+                        last_transport_log_at = now
+
+            if claimed < dispatcher.batch_size and fanned_out < fanout_batch_size:
+                time.sleep(busy_poll_sec if dispatcher.inflight else interval)
         except KeyboardInterrupt:
+            with SessionLocal() as db:
+                dispatcher.shutdown(db)
+            close_smtp_pools()
             return 0
         except Exception:
             logger.exception("Worker loop error")
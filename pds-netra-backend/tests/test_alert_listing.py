@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.events import list_alerts
+from app.models import Base
+from app.models.event import Alert, AlertEventLink, Event
+from app.models.godown import Godown
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return SessionLocal()
+
+
+def _seed(db, alerts: int, events_per_alert: int) -> None:
+    now = datetime.utcnow()
+    db.add(Godown(id="GDN_1", name="Godown 1", district="D1"))
+    for idx in range(alerts):
+        alert = Alert(
+            godown_id="GDN_1",
+            camera_id="CAM_1",
+            alert_type="SECURITY_UNAUTH_ACCESS",
+            severity_final="warning",
+            start_time=now - timedelta(minutes=idx),
+            status="OPEN",
+        )
+        db.add(alert)
+        db.flush()
+        for n in range(events_per_alert):
+            ev = Event(
+                godown_id="GDN_1",
+                camera_id="CAM_1",
+                event_id_edge=f"e-{idx}-{n}",
+                event_type="UNAUTH_PERSON",
+                severity_raw="warning",
+                timestamp_utc=now,
+                image_url=f"http://edge/snap-{idx}-{n}.jpg",
+                meta={"zone_id": f"zone-{idx}-{n}"},
+            )
+            db.add(ev)
+            db.flush()
+            db.add(AlertEventLink(alert_id=alert.id, event_id=ev.id))
+    db.commit()
+
+
+def _list(db, **kwargs):
+    params = dict(
+        godown_id=None,
+        district=None,
+        alert_type=None,
+        severity=None,
+        status=None,
+        date_from=None,
+        date_to=None,
+        page=1,
+        page_size=50,
+        cursor=None,
+        count_mode=None,
+        db=db,
+        user=None,
+    )
+    params.update(kwargs)
+    return list_alerts(**params)
+
+
+def test_list_alerts_batches_linked_event_lookups():
+    db = _make_session()
+    _seed(db, alerts=20, events_per_alert=3)
+    db.expunge_all()
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    result = _list(db)
+
+    assert len(statements) == 4
+    assert result["total"] == 20
+    first = result["items"][0]
+    assert first["count_events"] == 3
+    assert first["key_meta"]["zone_id"] == "zone-0-0"
+    assert first["key_meta"]["snapshot_url"] == "http://edge/snap-0-0.jpg"
+
+
+def test_list_alerts_count_modes():
+    db = _make_session()
+    _seed(db, alerts=3, events_per_alert=0)
+    assert _list(db, count_mode="none")["total"] is None
+    # Estimates fall back to an exact count where the dialect has none.
+    assert _list(db, count_mode="estimated", district="D1")["total"] == 3
+
+
+def test_list_alerts_cursor_pages_cover_all_rows_once():
+    db = _make_session()
+    _seed(db, alerts=7, events_per_alert=0)
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        result = _list(db, page_size=3, cursor=cursor)
+        assert result["total"] is None
+        seen.extend(item["id"] for item in result["items"])
+        cursor = result["next_cursor"]
+    paged = _list(db, page_size=50)
+    assert seen == [item["id"] for item in paged["items"]]
+    assert len(set(seen)) == 7
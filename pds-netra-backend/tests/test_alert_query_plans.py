@@ -0,0 +1,137 @@
+"""
+EXPLAIN regression checks for the alert hot paths.
+
+Seeds a synthetic alert table, refreshes planner statistics and asserts that
+each hot query is answered through an index rather than a full table scan.
+The defaults keep the run short on in-memory SQLite; set
+``PLAN_TEST_DATABASE_URL`` to a scratch Postgres database and raise
+``PLAN_TEST_ALERT_ROWS`` (e.g. to 2000000) for a production-sized run.
+"""
+
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select, text, tuple_
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.event import Alert
+from app.services.rule_engine import _camera_alert_stmt, _open_alert_stmt
+from app.worker import _stale_alerts_query
+
+ALERT_TYPES = [
+    "UNAUTH_PERSON",
+    "ANIMAL_INTRUSION",
+    "FIRE_DETECTED",
+    "BAG_MOVEMENT_ANOMALY",
+    "BLACKLIST_PERSON_MATCH",
+    "DISPATCH_MOVEMENT_DELAY",
+    "CAMERA_OFFLINE",
+    "AFTER_HOURS_PERSON_PRESENCE",
+]
+NOW = datetime(2026, 3, 30, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    url = os.getenv("PLAN_TEST_DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    rows = int(os.getenv("PLAN_TEST_ALERT_ROWS", "20000"))
+    engine = create_engine(url, future=True)
+    Base.metadata.drop_all(engine, tables=[Alert.__table__])
+    Base.metadata.create_all(engine, tables=[Alert.__table__])
+    rng = random.Random(7)
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            start = NOW - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+            live = rng.random() < 0.02
+            batch.append(
+                {
+                    "public_id": f"a-{i}",
+                    "godown_id": f"G{rng.randint(1, 200):03d}",
+                    "camera_id": f"CAM{rng.randint(1, 16)}",
+                    "alert_type": rng.choice(ALERT_TYPES),
+                    "severity_final": "warning",
+                    "start_time": start,
+                    "last_detection_at": start + timedelta(minutes=rng.randint(0, 30)),
+                    "status": rng.choice(["OPEN", "ACK"]) if live else "CLOSED",
+                    "zone_id": f"Z{rng.randint(1, 6)}",
+                    "created_at": start,
+                    "updated_at": start,
+                }
+            )
+            if len(batch) >= 10000:
+                conn.execute(Alert.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Alert.__table__.insert(), batch)
+        conn.execute(text("ANALYZE"))
+    yield engine
+    if engine.dialect.name != "sqlite":
+        Base.metadata.drop_all(engine, tables=[Alert.__table__])
+    engine.dispose()
+
+
+def _plan(engine, stmt) -> str:
+    compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+            return "\n".join(str(row[-1]) for row in rows)
+        rows = conn.execute(text(f"EXPLAIN {compiled}")).all()
+        return "\n".join(str(row[0]) for row in rows)
+
+
+def _assert_indexed(engine, stmt, index_name: str) -> None:
+    plan = _plan(engine, stmt)
+    if engine.dialect.name == "sqlite":
+        # "SCAN alerts USING INDEX" walks an index (e.g. a partial one); a bare SCAN reads the table.
+        assert not any(line.startswith("SCAN alerts") and "INDEX" not in line for line in plan.splitlines()), plan
+    else:
+        assert "Seq Scan on alerts" not in plan, plan
+    assert index_name in plan, plan
+
+
+def _query(engine):
+    return sessionmaker(bind=engine, future=True)()
+
+
+def test_rule_engine_dedup_uses_composite_index(seeded):
+    stmt = _open_alert_stmt("G042", "UNAUTH_PERSON", NOW - timedelta(minutes=10))
+    _assert_indexed(seeded, stmt, "ix_alerts_godown_type_status_start")
+    zoned = _open_alert_stmt("G042", "UNAUTH_PERSON", NOW - timedelta(minutes=10), "Z3")
+    _assert_indexed(seeded, zoned, "ix_alerts_godown_type_status_start")
+
+
+def test_camera_scoped_dedup_uses_composite_index(seeded):
+    # The fire, animal and after-hours handlers look up open alerts and cooldowns per camera.
+    lookups = [
+        _camera_alert_stmt("G042", "CAM3", "FIRE_DETECTED", statuses=("OPEN",)).limit(1),
+        _camera_alert_stmt("G042", "CAM3", "AFTER_HOURS_PERSON_PRESENCE", statuses=("OPEN", "ACK")).limit(1),
+        _camera_alert_stmt("G042", "CAM3", "FIRE_DETECTED", exclude_status="ACK", since=NOW - timedelta(minutes=5)),
+        _camera_alert_stmt("G042", "CAM3", "ANIMAL_INTRUSION", since=NOW - timedelta(minutes=5)).limit(1),
+    ]
+    for stmt in lookups:
+        _assert_indexed(seeded, stmt, "ix_alerts_godown_camera_type_start")
+
+
+@pytest.mark.parametrize("fire", [False, True])
+def test_auto_close_sweep_uses_partial_index(seeded, fire):
+    with _query(seeded) as db:
+        query = _stale_alerts_query(db, NOW - timedelta(minutes=2), fire=fire)
+        _assert_indexed(seeded, query.statement, "ix_alerts_active_type_last_detection")
+
+
+def test_alert_listing_keyset_uses_recency_index(seeded):
+    recency = func.coalesce(Alert.end_time, Alert.start_time)
+    first = select(Alert).order_by(recency.desc(), Alert.id.desc()).limit(51)
+    _assert_indexed(seeded, first, "ix_alerts_recency_id")
+    after = (
+        select(Alert)
+        .where(tuple_(recency, Alert.id) < tuple_(NOW - timedelta(days=30), 5000))
+        .order_by(recency.desc(), Alert.id.desc())
+        .limit(51)
+    )
+    _assert_indexed(seeded, after, "ix_alerts_recency_id")
@@ -0,0 +1,75 @@
+import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.event import Alert, Event
+from app.services.alert_reports import _period_range, generate_hq_report
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return SessionLocal()
+
+
+def test_hq_report_aggregates_in_sql():
+    db = _make_session()
+    now = datetime.datetime(2026, 3, 2, 6, 0, tzinfo=datetime.timezone.utc)
+    start, end = _period_range("24h", now)
+    inside = start + datetime.timedelta(hours=2)
+    outside = start - datetime.timedelta(hours=2)
+
+    for gid, threshold in (("GDN_1", 4), ("GDN_1", 4), ("GDN_2", 24)):
+        db.add(
+            Alert(
+                godown_id=gid,
+                alert_type="DISPATCH_MOVEMENT_DELAY",
+                severity_final="warning",
+                start_time=inside,
+                status="OPEN",
+                extra={"threshold_hours": threshold},
+            )
+        )
+    db.add(Alert(godown_id="GDN_1", alert_type="FIRE_DETECTED", severity_final="critical", start_time=inside))
+    db.add(Alert(godown_id="GDN_1", alert_type="FIRE_DETECTED", severity_final="critical", start_time=outside))
+    for idx, (reason, ts) in enumerate(
+        (("sudden_blackout", inside), ("BLACK_FRAME", inside), ("LOW_LIGHT", inside), ("BLACK_FRAME", outside))
+    ):
+        db.add(
+            Event(
+                godown_id="GDN_1",
+                camera_id="CAM_1",
+                event_id_edge=f"e{idx}",
+                event_type="CAMERA_TAMPERED",
+                severity_raw="warning",
+                timestamp_utc=ts,
+                meta={"reason": reason},
+            )
+        )
+    db.add(
+        Event(
+            godown_id="GDN_1",
+            camera_id="CAM_1",
+            event_id_edge="no-meta",
+            event_type="PERSON_DETECTED",
+            severity_raw="info",
+            timestamp_utc=inside,
+            meta={},
+        )
+    )
+    db.commit()
+
+    summary = generate_hq_report(db, now_utc=now, force=True).summary_json
+    assert summary["total_alerts"] == 4
+    assert summary["alerts_by_type"] == {"DISPATCH_MOVEMENT_DELAY": 3, "FIRE_DETECTED": 1}
+    assert summary["top_godowns"][0] == {"godown_id": "GDN_1", "count": 3}
+    assert summary["camera_health"]["blackout_events"] == 2
+    assert summary["dispatch_delay_counts"] == {"4": 2, "24": 1}
+
+    scoped = generate_hq_report(db, now_utc=now, force=True, godown_id="GDN_2").summary_json
+    assert scoped["total_alerts"] == 1
+    assert scoped["dispatch_delay_counts"] == {"24": 1}
+    assert scoped["camera_health"]["blackout_events"] == 0
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.alert_stats import AlertStatsHourly
+from app.models.event import Alert
+from app.services.alert_stats import clear_godown_alert_stats, rebuild_alert_stats, register_alert_stats_listener
+from app.services.incident_lifecycle import mark_alert_closed
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    register_alert_stats_listener(SessionLocal)
+    return SessionLocal()
+
+
+def _rollup(db):
+    rows = db.execute(
+        select(
+            AlertStatsHourly.godown_id,
+            AlertStatsHourly.alert_type,
+            AlertStatsHourly.severity,
+            AlertStatsHourly.bucket_start,
+            AlertStatsHourly.alerts_total,
+            AlertStatsHourly.alerts_open,
+        )
+    ).all()
+    return {
+        (g, t, s, b.replace(tzinfo=None)): (total, open_)
+        for g, t, s, b, total, open_ in rows
+        if total or open_
+    }
+
+
+def test_rollup_tracks_inserts_transitions_and_matches_rebuild():
+    db = _make_session()
+    start = datetime(2026, 3, 1, 10, 15, tzinfo=timezone.utc)
+    fire = Alert(godown_id="GDN_1", alert_type="FIRE_DETECTED", severity_final="critical", start_time=start)
+    intrusion = Alert(
+        godown_id="GDN_1",
+        alert_type="ANIMAL_INTRUSION",
+        severity_final="warning",
+        start_time=start + timedelta(hours=1),
+        status="OPEN",
+    )
+    db.add_all([fire, intrusion])
+    db.commit()
+
+    hour = datetime(2026, 3, 1, 10)
+    assert _rollup(db) == {
+        ("GDN_1", "FIRE_DETECTED", "critical", hour): (1, 1),
+        ("GDN_1", "ANIMAL_INTRUSION", "warning", hour + timedelta(hours=1)): (1, 1),
+    }
+
+    # Status transitions on expired rows, severity escalation and deletes.
+    intrusion.status = "ACK"
+    mark_alert_closed(fire)
+    db.commit()
+    intrusion.severity_final = "critical"
+    intrusion.status = "OPEN"
+    db.flush()
+    db.commit()
+    extra = Alert(godown_id="GDN_2", alert_type="FIRE_DETECTED", severity_final="critical", start_time=start)
+    db.add(extra)
+    db.commit()
+    db.delete(extra)
+    db.commit()
+
+    expected = {
+        ("GDN_1", "FIRE_DETECTED", "critical", hour): (1, 0),
+        ("GDN_1", "ANIMAL_INTRUSION", "critical", hour + timedelta(hours=1)): (1, 1),
+    }
+    assert _rollup(db) == expected
+
+    rebuild_alert_stats(db)
+    assert _rollup(db) == expected
+
+
+def test_rollup_rolls_back_with_savepoint():
+    db = _make_session()
+    start = datetime(2026, 3, 1, 10, 15, tzinfo=timezone.utc)
+    try:
+        with db.begin_nested():
+            db.add(Alert(godown_id="GDN_1", alert_type="FIRE_DETECTED", severity_final="critical", start_time=start))
+            db.flush()
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    db.commit()
+    assert _rollup(db) == {}
+
+
+def test_rebuilt_rows_keep_taking_incremental_deltas():
+    db = _make_session()
+    start = datetime(2026, 3, 1, 10, 15, tzinfo=timezone.utc)
+    db.add(Alert(godown_id="GDN_1", alert_type="FIRE_DETECTED", severity_final="critical", start_time=start))
+    db.commit()
+    assert rebuild_alert_stats(db) == 1
+
+    db.add(Alert(godown_id="GDN_1", alert_type="FIRE_DETECTED", severity_final="critical", start_time=start))
+    db.commit()
+    assert db.query(AlertStatsHourly).count() == 1
+    assert _rollup(db) == {("GDN_1", "FIRE_DETECTED", "critical", datetime(2026, 3, 1, 10)): (2, 2)}
+
+
+def test_bulk_godown_delete_clears_its_rollup():
+    db = _make_session()
+    start = datetime(2026, 3, 1, 10, 15, tzinfo=timezone.utc)
+    for godown_id in ("GDN_1", "GDN_2"):
+        db.add(Alert(godown_id=godown_id, alert_type="FIRE_DETECTED", severity_final="critical", start_time=start))
+    db.commit()
+
+    db.query(Alert).filter(Alert.godown_id == "GDN_1").delete(synchronize_session=False)
+    clear_godown_alert_stats(db, "GDN_1")
+    db.commit()
+    incremental = _rollup(db)
+    assert incremental == {("GDN_2", "FIRE_DETECTED", "critical", datetime(2026, 3, 1, 10)): (1, 1)}
+    rebuild_alert_stats(db)
+    assert _rollup(db) == incremental
+
+
+def test_windowed_rebuild_only_touches_recent_buckets():
+    db = _make_session()
+    old = datetime(2026, 1, 1, 8, 5, tzinfo=timezone.utc)
+    recent = datetime(2026, 3, 1, 10, 15, tzinfo=timezone.utc)
+    for start in (old, recent):
+        db.add(Alert(godown_id="GDN_1", alert_type="FIRE_DETECTED", severity_final="critical", start_time=start))
+    db.commit()
+    db.execute(AlertStatsHourly.__table__.update().values(alerts_total=99))
+    db.commit()
+
+    assert rebuild_alert_stats(db, since=recent - timedelta(minutes=45)) == 1
+    assert _rollup(db) == {
+        ("GDN_1", "FIRE_DETECTED", "critical", datetime(2026, 1, 1, 8)): (99, 1),
+        ("GDN_1", "FIRE_DETECTED", "critical", datetime(2026, 3, 1, 10)): (1, 1),
+    }
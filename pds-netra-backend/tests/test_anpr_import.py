@@ -0,0 +1,147 @@
+import datetime
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.anpr_management import import_anpr_vehicles_csv, import_daily_plan_items_csv
+from app.models import Base
+from app.models.anpr_daily_plan_item import AnprDailyPlanItem
+from app.models.anpr_vehicle import AnprVehicle
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return SessionLocal(), engine
+
+
+def _upload(text: str) -> UploadFile:
+    return UploadFile(file=io.BytesIO(text.encode("utf-8")), filename="import.csv")
+
+
+def _count_statements(engine):
+    statements: list[str] = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    return statements
+
+
+def test_vehicle_import_upserts_in_bulk(monkeypatch):
+    monkeypatch.setenv("ANPR_IMPORT_BATCH_SIZE", "2")
+    db, engine = _make_session()
+    db.add(AnprVehicle(godown_id="G1", plate_raw="MH 12 AB 1234", plate_norm="MH12AB1234", transporter="Old"))
+    db.add(AnprVehicle(godown_id="G2", plate_raw="MH12AB1234", plate_norm="MH12AB1234"))
+    db.commit()
+
+    csv_text = (
+        "﻿plate_text,list_type,transporter,is_active\n"
+        "mh12ab1234,BLACKLIST,,no\n"
+        "KA01XY0001,,Acme,\n"
+        ",WHITELIST,,\n"
+        "KA01XY0002,GREYLIST,,\n"
+        "KA 01 XY 0001,,Beta,\n"
+        "DL3C0003,,,\n"
+    )
+    statements = _count_statements(engine)
+    summary = import_anpr_vehicles_csv(godown_id="G1", file=_upload(csv_text), db=db, user=None, request=None)
+
+    assert (summary.total, summary.created, summary.updated, summary.failed) == (6, 2, 2, 2)
+    assert [r.status for r in summary.rows] == ["updated", "created", "failed", "failed", "updated", "created"]
+    assert [r.row_number for r in summary.rows] == [2, 3, 4, 5, 6, 7]
+    assert summary.rows[2].message == "plate_text is required"
+    assert summary.rows[3].message == "Invalid list_type: GREYLIST"
+    assert summary.rows[1].entity_id == summary.rows[4].entity_id
+    # No per-row lookups: one prefetch plus a handful of batched writes.
+    assert sum(1 for s in statements if s.lstrip().upper().startswith("SELECT")) == 1
+
+    vehicles = {v.plate_norm: v for v in db.query(AnprVehicle).filter(AnprVehicle.godown_id == "G1")}
+    assert set(vehicles) == {"MH12AB1234", "KA01XY0001", "DL3C0003"}
+    existing = vehicles["MH12AB1234"]
+    assert existing.id == summary.rows[0].entity_id
+    assert (existing.plate_raw, existing.list_type, existing.transporter, existing.is_active) == (
+        "mh12ab1234",
+        "BLACKLIST",
+        None,
+        False,
+    )
+    assert (vehicles["KA01XY0001"].plate_raw, vehicles["KA01XY0001"].transporter) == ("KA 01 XY 0001", "Beta")
+    assert (vehicles["DL3C0003"].list_type, vehicles["DL3C0003"].is_active) == ("WHITELIST", True)
+    other = db.query(AnprVehicle).filter(AnprVehicle.godown_id == "G2").one()
+    assert other.list_type == "WHITELIST"
+
+
+def test_vehicle_import_keeps_columns_missing_from_header():
+    db, _ = _make_session()
+    db.add(AnprVehicle(godown_id="G1", plate_raw="KA01XY0001", plate_norm="KA01XY0001", transporter="Acme", notes="n"))
+    db.commit()
+
+    summary = import_anpr_vehicles_csv(
+        godown_id="G1", file=_upload("plate\nKA01XY0001\n"), db=db, user=None, request=None
+    )
+    assert summary.updated == 1
+    vehicle = db.query(AnprVehicle).one()
+    assert (vehicle.transporter, vehicle.notes) == ("Acme", "n")
+
+
+def test_plan_item_import_links_vehicles_and_updates_existing():
+    db, _ = _make_session()
+    vehicle = AnprVehicle(godown_id="G1", plate_raw="KA 01 XY 0001", plate_norm="KA01XY0001")
+    db.add(vehicle)
+    db.commit()
+    plan_date = datetime.date(2026, 3, 28)
+
+    first = import_daily_plan_items_csv(
+        godown_id="G1",
+        plan_date=plan_date,
+        timezone_name="Asia/Kolkata",
+        file=_upload("plate_number,expected_by,status,notes\nMH12AB1234,09:30,,first\n"),
+        db=db,
+        user=None,
+        request=None,
+    )
+    assert (first.created, first.updated) == (1, 0)
+
+    second = import_daily_plan_items_csv(
+        godown_id="G1",
+        plan_date=plan_date,
+        timezone_name="Asia/Kolkata",
+        file=_upload(
+            "plate_number,expected_by,status\n"
+            "MH12AB1234,10:15,arrived\n"
+            "ka01xy0001,,\n"
+            "ka01xy0002,25:00,\n"
+            "ka01xy0003,,LOST\n"
+        ),
+        db=db,
+        user=None,
+        request=None,
+    )
+    assert (second.total, second.created, second.updated, second.failed) == (4, 1, 1, 2)
+    assert second.rows[2].message == "Invalid time: 25:00"
+    assert second.rows[3].message == "Invalid status: LOST"
+
+    items = {it.plate_norm: it for it in db.query(AnprDailyPlanItem)}
+    assert set(items) == {"MH12AB1234", "KA01XY0001"}
+    updated = items["MH12AB1234"]
+    assert updated.id == first.rows[0].entity_id
+    assert (updated.expected_by_local, updated.status, updated.notes) == (datetime.time(10, 15), "ARRIVED", "first")
+    linked = items["KA01XY0001"]
+    assert (linked.vehicle_id, linked.plate_raw) == (vehicle.id, "KA 01 XY 0001")
+
+
+def test_vehicle_import_enforces_upload_limit(monkeypatch):
+    monkeypatch.setenv("MAX_UPLOAD_BYTES", "1024")
+    db, _ = _make_session()
+    csv_text = "plate\n" + "".join(f"KA01XY{i:04d}\n" for i in range(200))
+    with pytest.raises(HTTPException) as exc:
+        import_anpr_vehicles_csv(godown_id="G1", file=_upload(csv_text), db=db, user=None, request=None)
+    assert exc.value.status_code == 413
+    db.rollback()
+    assert db.query(AnprVehicle).count() == 0
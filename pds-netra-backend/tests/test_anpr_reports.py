@@ -0,0 +1,73 @@
+import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.anpr_management import anpr_daily_report
+from app.models import Base
+from app.models.anpr_daily_plan import AnprDailyPlan
+from app.models.anpr_daily_plan_item import AnprDailyPlanItem
+from app.models.anpr_event import AnprEvent
+from app.models.anpr_vehicle import AnprVehicle
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return SessionLocal(), engine
+
+
+def _event(event_id: int, plate: str, ts: datetime.datetime, status: str = "VERIFIED") -> AnprEvent:
+    return AnprEvent(
+        id=event_id,
+        godown_id="G1",
+        camera_id="CAM1",
+        timestamp_utc=ts,
+        plate_raw=plate,
+        plate_norm=plate,
+        match_status=status,
+        event_type="ANPR_PLATE_DETECTED",
+        meta={},
+    )
+
+
+def test_daily_report_buckets_events_by_local_day_in_one_scan():
+    db, engine = _make_session()
+    day1 = datetime.date(2026, 3, 1)
+    day2 = datetime.date(2026, 3, 2)
+    for d, plates in ((day1, ["KA01", "KA02", "KA03"]), (day2, ["KA01", "KA04"])):
+        plan = AnprDailyPlan(godown_id="G1", plan_date=d, timezone_name="Asia/Kolkata", expected_count=len(plates))
+        db.add(plan)
+        db.flush()
+        for plate in plates:
+            db.add(AnprDailyPlanItem(plan_id=plan.id, plate_raw=plate, plate_norm=plate))
+        if d == day1:
+            db.add(AnprDailyPlanItem(plan_id=plan.id, plate_raw="KA05", plate_norm="KA05", status="CANCELLED"))
+    db.add(AnprVehicle(godown_id="G1", plate_raw="KA04", plate_norm="KA04"))
+    # 20:00 UTC on Mar 1 is already Mar 2 in Asia/Kolkata.
+    db.add(_event(1, "KA01", datetime.datetime(2026, 2, 28, 19, 0)))
+    db.add(_event(2, "KA02", datetime.datetime(2026, 3, 1, 5, 0)))
+    db.add(_event(3, "KA03", datetime.datetime(2026, 3, 1, 6, 0), status="UNKNOWN"))
+    db.add(_event(4, "KA01", datetime.datetime(2026, 3, 1, 20, 0)))
+    db.add(_event(5, "KA04", datetime.datetime(2026, 3, 1, 21, 0), status="UNKNOWN"))
+    db.commit()
+    db.expunge_all()
+
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    report = anpr_daily_report(
+        godown_id="G1",
+        timezone_name="Asia/Kolkata",
+        date_from=day1,
+        date_to=datetime.date(2026, 3, 3),
+        db=db,
+        user=None,
+    )
+
+    rows = {row.date_local: row for row in report.rows}
+    assert (rows[day1].planned_items, rows[day1].arrived, rows[day1].no_show, rows[day1].cancelled) == (4, 2, 1, 1)
+    assert (rows[day2].planned_items, rows[day2].arrived, rows[day2].no_show) == (2, 2, 0)
+    assert rows[datetime.date(2026, 3, 3)].planned_items == 0
+    # plans + items + one event scan + one registry lookup
+    assert len(statements) == 4
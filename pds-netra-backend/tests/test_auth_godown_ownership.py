@@ -25,6 +25,7 @@ from app.main import create_app
 from app.core.db import SessionLocal
 from app.core.security import hash_password
 from app.models.app_user import AppUser
+from app.services import test_runs as test_runs_module
 from app.services.test_runs import create_test_run
 
 
@@ -137,7 +138,8 @@ def test_user_cannot_access_update_delete_other_users_godown() -> None:
         assert delete.status_code == 403
 
 
-def test_user_only_sees_own_test_runs() -> None:
+def test_user_only_sees_own_test_runs(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(test_runs_module, "_base_dir", lambda: tmp_path)
     with _client() as client:
         _create_user(username="admin3", password="admin-pass", role="STATE_ADMIN")
         _create_user(username="run_owner", password="owner-pass", role="USER")
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from fastapi import Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.config import get_config_version
+from app.models import Base
+from app.models.godown import Camera, Godown
+from app.models.rule import Rule
+from app.models.watchlist import WatchlistPerson
+from app.services.config_version import get_config_versions, register_config_version_listener
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    register_config_version_listener(SessionLocal)
+    return SessionLocal()
+
+
+def test_config_writes_bump_persisted_version_vector():
+    db = _make_session()
+    db.add(Godown(id="GDN_1", name="Godown 1"))
+    db.add(Godown(id="GDN_2", name="Godown 2"))
+    db.add(Camera(id="CAM_1", godown_id="GDN_1"))
+    db.add(Rule(godown_id="GDN_1", camera_id="CAM_1", zone_id="all", type="FIRE_DETECTED", params={}))
+    db.commit()
+
+    versions, _ = get_config_versions(db, "GDN_1")
+    assert versions["cameras"] == 1
+    assert versions["rules"] == 1
+    assert versions["watchlist"] == 0
+    assert get_config_versions(db, "GDN_2")[0]["cameras"] == 0
+
+    # A flush that changes nothing does not bump.
+    camera = db.get(Camera, ("CAM_1", "GDN_1"))
+    camera.label = camera.label
+    db.commit()
+    assert get_config_versions(db, "GDN_1")[0]["cameras"] == 1
+
+    camera.label = "Gate"
+    db.add(WatchlistPerson(name="Suspect"))
+    db.commit()
+    versions, _ = get_config_versions(db, "GDN_1")
+    assert versions["cameras"] == 2
+    # Global watchlist changes are visible from every godown.
+    assert versions["watchlist"] == 1
+    assert get_config_versions(db, "GDN_2")[0]["watchlist"] == 1
+
+    # Rolled-back writes leave the counters untouched.
+    camera.label = "Dock"
+    db.flush()
+    db.rollback()
+    assert get_config_versions(db, "GDN_1")[0]["cameras"] == 2
+
+
+def test_config_version_endpoint_returns_etag_and_304():
+    db = _make_session()
+    db.add(Godown(id="GDN_1", name="Godown 1"))
+    db.add(Camera(id="CAM_1", godown_id="GDN_1"))
+    db.commit()
+
+    response = Response()
+    body = get_config_version(response, godown_id="GDN_1", if_none_match=None, db=db)
+    etag = response.headers["etag"]
+    assert body["versions"]["cameras"] == 1
+    assert body["etag"] == etag.strip('"')
+    assert datetime.fromisoformat(body["version"].replace("Z", "+00:00"))
+    assert body["epoch_ms"] > 0
+
+
+def test_config_version_endpoint_has_timestamp_before_first_write():
+    db = _make_session()
+    body = get_config_version(Response(), godown_id="GDN_9", if_none_match=None, db=db)
+    assert body["version"].endswith("Z")
+    assert body["epoch_ms"] > 0
+
+    cached = get_config_version(Response(), godown_id="GDN_1", if_none_match=f"W/{etag}", db=db)
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    db.add(Rule(godown_id="GDN_1", camera_id="CAM_1", zone_id="all", type="FIRE_DETECTED", params={}))
+    db.commit()
+    response = Response()
+    body = get_config_version(response, godown_id="GDN_1", if_none_match=etag, db=db)
+    assert isinstance(body, dict)
+    assert response.headers["etag"] != etag
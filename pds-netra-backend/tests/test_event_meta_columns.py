@@ -0,0 +1,116 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.events import list_events
+from app.api.v1.reports import movement_summary
+from app.models import Base
+from app.models.event import Alert, Event
+from app.schemas.event import EventIn, MetaIn
+from app.services.event_ingest import handle_incoming_event
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return SessionLocal()
+
+
+def _ingest(db, ts: datetime, **meta) -> Event:
+    extra = meta.pop("extra", {})
+    event_in = EventIn(
+        godown_id="G1",
+        camera_id="CAM1",
+        event_id=str(uuid.uuid4()),
+        event_type=meta.pop("event_type", "BAG_MOVEMENT"),
+        severity="info",
+        timestamp_utc=ts,
+        meta=MetaIn(zone_id=meta.pop("zone_id", None), rule_id=None, confidence=0.9, extra=extra, **meta),
+    )
+    return handle_incoming_event(event_in, db)
+
+
+def test_ingest_promotes_meta_keys_to_columns():
+    db = _make_session()
+    event = _ingest(
+        db,
+        datetime.now(timezone.utc),
+        zone_id="Z1",
+        movement_type="LOADING",
+        plate_text="ka 01-ab 1234",
+        person_id="P-7",
+        extra={"run_id": "run-1"},
+    )
+    stored = db.get(Event, event.id)
+    assert (stored.zone_id, stored.movement_type, stored.plate_norm, stored.person_id, stored.run_id) == (
+        "Z1",
+        "LOADING",
+        "KA01AB1234",
+        "P-7",
+        "run-1",
+    )
+
+    stored.meta = {**stored.meta, "zone_id": "Z2"}
+    assert stored.zone_id == "Z2"
+
+
+def test_meta_filters_use_promoted_columns():
+    db = _make_session()
+    now = datetime.now(timezone.utc)
+    _ingest(db, now - timedelta(hours=1), zone_id="Z1", movement_type="LOADING", plate_text="KA01AB1234")
+    _ingest(db, now - timedelta(hours=2), zone_id="Z2", movement_type="UNLOADING", person_id="P-7")
+    _ingest(db, now - timedelta(hours=3), zone_id="Z1", movement_type="UNLOADING")
+
+    def _list(**filters):
+        params = dict(
+            godown_id=None,
+            camera_id=None,
+            event_type=None,
+            severity=None,
+            plate_text=None,
+            person_id=None,
+            date_from=None,
+            date_to=None,
+            page=1,
+            page_size=50,
+            start_time=None,
+            end_time=None,
+            cursor=None,
+            count_mode=None,
+        )
+        params.update(filters)
+        return list_events(db=db, **params)
+
+    assert _list(plate_text="KA 01 AB 1234")["total"] == 1
+    assert _list(person_id="P-7")["total"] == 1
+
+    summary = movement_summary(
+        godown_id="G1",
+        camera_id=None,
+        zone_id="Z1",
+        date_from=now - timedelta(days=1),
+        date_to=now,
+        db=db,
+    )
+    assert summary["total_events"] == 2
+    assert summary["counts_by_type"] == {"LOADING": 1, "UNLOADING": 1}
+
+
+def test_alert_person_id_follows_extra():
+    db = _make_session()
+    alert = Alert(
+        godown_id="G1",
+        alert_type="BLACKLIST_PERSON_MATCH",
+        severity_final="critical",
+        start_time=datetime.now(timezone.utc),
+        extra={"person_id": "P-7"},
+    )
+    db.add(alert)
+    db.commit()
+    assert db.query(Alert).filter(Alert.person_id == "P-7").count() == 1
+
+    alert.extra = {**(alert.extra or {}), "match_score": 0.9}
+    assert alert.person_id == "P-7"
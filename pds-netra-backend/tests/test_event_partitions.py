@@ -0,0 +1,139 @@
+import datetime
+import gzip
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.event import Alert, AlertEventLink, Event
+from app.services import event_partitions as partitions
+
+UTC = datetime.timezone.utc
+
+
+def test_month_arithmetic_and_naming():
+    month = partitions.month_floor(datetime.datetime(2026, 12, 17, 23, 30))
+    assert month == datetime.datetime(2026, 12, 1, tzinfo=UTC)
+    assert partitions.add_months(month, 1) == datetime.datetime(2027, 1, 1, tzinfo=UTC)
+    assert partitions.add_months(month, -12) == datetime.datetime(2025, 12, 1, tzinfo=UTC)
+    assert partitions.partition_name("events", month) == "events_p202612"
+    assert partitions._partition_month("events", "events_p202612") == month
+    assert partitions._partition_month("events", "anpr_events_p202612") is None
+    assert partitions._partition_month("events", "events_default") is None
+
+
+def test_maintenance_is_a_noop_off_postgres():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    assert partitions.maintain_event_partitions(engine) == {}
+
+
+def test_alert_links_reference_events_without_a_foreign_key():
+    assert not AlertEventLink.__table__.c.event_id.foreign_keys
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, future=True)()
+    now = datetime.datetime(2026, 4, 1, tzinfo=UTC)
+    event = Event(
+        godown_id="GDN_1",
+        camera_id="CAM_1",
+        event_id_edge="evt-1",
+        event_type="UNAUTH_PERSON",
+        severity_raw="warning",
+        timestamp_utc=now,
+        meta={},
+    )
+    alert = Alert(
+        godown_id="GDN_1",
+        alert_type="UNAUTH_PERSON",
+        severity_final="warning",
+        start_time=now,
+        status="OPEN",
+    )
+    db.add_all([event, alert])
+    db.flush()
+    db.add(AlertEventLink(alert_id=alert.id, event_id=event.id))
+    db.commit()
+    assert db.scalars(select(AlertEventLink)).one().event is event
+    # The ORM cascade is what removes links when an event is deleted.
+    db.delete(event)
+    db.commit()
+    assert db.scalars(select(AlertEventLink)).all() == []
+
+
+PG_URL = os.getenv("PLAN_TEST_DATABASE_URL", "")
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "20260401_01_partition_event_tables.py"
+
+
+def _migration():
+    spec = importlib.util.spec_from_file_location("partition_event_tables", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.skipif(not PG_URL.startswith("postgresql"), reason="needs PLAN_TEST_DATABASE_URL pointing at Postgres")
+def test_partitioned_events_prune_and_archive(tmp_path, monkeypatch):
+    monkeypatch.setenv("EVENT_ARCHIVE_DIR", str(tmp_path))
+    migration = _migration()
+    engine = create_engine(PG_URL, future=True)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alert_event_links, events CASCADE"))
+        conn.execute(text("CREATE TABLE alert_event_links (alert_id integer, event_id integer)"))
+    Base.metadata.create_all(engine, tables=[Event.__table__])
+    now = datetime.datetime(2026, 4, 15, tzinfo=UTC)
+    with engine.begin() as conn:
+        for month in range(1, 5):
+            conn.execute(
+                Event.__table__.insert(),
+                [
+                    {
+                        "godown_id": "G1",
+                        "camera_id": "CAM1",
+                        "event_id_edge": f"e-{month}-{i}",
+                        "event_type": "CAMERA_OFFLINE",
+                        "severity_raw": "warning",
+                        "timestamp_utc": datetime.datetime(2026, month, 10, tzinfo=UTC) + datetime.timedelta(minutes=i),
+                        "meta": {},
+                        "created_at": now,
+                    }
+                    for i in range(50)
+                ],
+            )
+        migration._rebuild_table(conn, "events", partitioned=True, now=now)
+        assert partitions.is_partitioned(conn, "events")
+        conn.execute(text("ANALYZE events"))
+
+        stmt = (
+            select(Event)
+            .where(
+                Event.godown_id == "G1",
+                Event.timestamp_utc >= datetime.datetime(2026, 3, 1, tzinfo=UTC),
+                Event.timestamp_utc < datetime.datetime(2026, 3, 20, tzinfo=UTC),
+            )
+            .order_by(Event.timestamp_utc.desc())
+        )
+        compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+        plan = "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {compiled}")))
+        assert "events_p202603" in plan, plan
+        assert "events_p202602" not in plan and "events_p202604" not in plan, plan
+        assert conn.execute(select(Event.id).where(Event.event_id_edge == "e-3-0")).scalar() is not None
+
+    summary = partitions.maintain_event_partitions(engine, now=now)
+    assert summary["events"]["archived"] == []
+
+    monkeypatch.setenv("EVENT_RETENTION_MONTHS", "2")
+    summary = partitions.maintain_event_partitions(engine, now=now)
+    archived = tmp_path / "events" / "events_p202601.csv.gz"
+    assert str(archived) in summary["events"]["archived"]
+    with gzip.open(archived, "rt") as fh:
+        assert len(fh.read().strip().splitlines()) == 51
+    with engine.begin() as conn:
+        assert "events_p202601" not in partitions.list_partitions(conn, "events")
+        assert "events_p202607" in partitions.list_partitions(conn, "events")
+        migration._rebuild_table(conn, "events", partitioned=False)
+        assert not partitions.is_partitioned(conn, "events")
+        assert conn.execute(text("SELECT COUNT(*) FROM events")).scalar() == 150
@@ -0,0 +1,153 @@
+import os
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.authorized_user import AuthorizedUser
+from app.models.event import Event
+from app.models.godown import Godown
+from app.schemas.watchlist import (
+    FaceMatchCandidate,
+    FaceMatchEventIn,
+    FaceMatchEvidence,
+    FaceMatchPayload,
+    WatchlistEmbeddingIn,
+)
+from app.services import face_index as face_index_module
+from app.services import watchlist as watchlist_service
+from app.services.config_version import register_config_version_listener
+from app.services.face_index import AUTHORIZED_USERS, WATCHLIST, FaceIndex
+
+
+def _make_session():
+    os.environ["ENABLE_WATCHLIST_MQTT_SYNC"] = "false"
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    register_config_version_listener(SessionLocal)
+    return SessionLocal()
+
+
+def _person(db, name, vector):
+    person = watchlist_service.create_person(db, name=name, alias=None, reason=None, notes=None)
+    watchlist_service.add_embeddings(db, person=person, embeddings=[WatchlistEmbeddingIn(embedding=vector)])
+    return person
+
+
+def test_index_tracks_database_incrementally_and_reloads_from_disk(tmp_path):
+    db = _make_session()
+    db.add_all([Godown(id="GDN_1", name="One"), Godown(id="GDN_2", name="Two")])
+    db.add(AuthorizedUser(person_id="STAFF_1", name="Staff", godown_id="GDN_1", embedding=[0.0, 1.0, 0.0]))
+    db.add(AuthorizedUser(person_id="STAFF_2", name="Staff", godown_id="GDN_2", embedding=[0.0, 0.9, 0.1]))
+    db.commit()
+    alice = _person(db, "Alice", [1.0, 0.0, 0.0])
+    bob = _person(db, "Bob", [0.7, 0.7, 0.0])
+
+    index = FaceIndex(tmp_path)
+    assert index.refresh(db) is True
+    assert index.refresh(db) is False
+    matches = index.search([0.9, 0.1, 0.0], top_k=2)
+    assert [m["person_id"] for m in matches] == [alice.id, bob.id]
+    assert matches[0]["score"] > 0.99
+
+    scoped = index.search([0.0, 1.0, 0.0], top_k=5, kinds=[AUTHORIZED_USERS], godown_id="GDN_2")
+    assert [m["person_id"] for m in scoped] == ["STAFF_2"]
+
+    watchlist_service.delete_person(db, alice)
+    watchlist_service.deactivate_person(db, bob)
+    carol = _person(db, "Carol", [1.0, 0.1, 0.0])
+    staff = db.get(AuthorizedUser, "STAFF_2")
+    db.delete(staff)
+    db.commit()
+
+    assert index.refresh(db) is True
+    assert [m["person_id"] for m in index.search([1.0, 0.0, 0.0], top_k=5, kinds=[WATCHLIST])] == [carol.id]
+    assert [m["person_id"] for m in index.search([0.0, 1.0, 0.0], kinds=[AUTHORIZED_USERS])] == ["STAFF_1"]
+
+    index.save()
+    reopened = FaceIndex(tmp_path)
+    assert reopened.load() is True
+    assert reopened.refresh(db) is False
+    assert [m["person_id"] for m in reopened.search([1.0, 0.0, 0.0], kinds=[WATCHLIST])] == [carol.id]
+    # Writes after reload copy the memory-mapped bank before mutating it.
+    dave = _person(db, "Dave", [0.0, 0.0, 1.0])
+    assert reopened.refresh(db) is True
+    assert reopened.search([0.0, 0.0, 1.0], top_k=1)[0]["person_id"] == dave.id
+
+
+def test_face_match_ingest_records_server_side_verification(monkeypatch):
+    db = _make_session()
+    monkeypatch.setattr(face_index_module, "_index", FaceIndex(None))
+    suspect = _person(db, "Suspect", [0.6, 0.8, 0.0])
+    _person(db, "Other", [0.0, 0.0, 1.0])
+
+    event_in = FaceMatchEventIn(
+        event_id="evt-verify",
+        occurred_at=datetime.utcnow(),
+        godown_id="GDN_1",
+        camera_id="CAM_1",
+        payload=FaceMatchPayload(
+            person_candidate=FaceMatchCandidate(
+                match_score=0.9,
+                is_blacklisted=True,
+                blacklist_person_id=suspect.id,
+                embedding=[0.6, 0.79, 0.01],
+            ),
+            evidence=FaceMatchEvidence(),
+        ),
+    )
+    face_event, created = watchlist_service.ingest_face_match_event(db, event_in)
+    assert created is True
+    assert "embedding" not in face_event.raw_payload["payload"]["person_candidate"]
+    event = db.query(Event).filter(Event.event_id_edge == "evt-verify").one()
+    assert event.meta["server_match"]["person_id"] == suspect.id
+    assert event.meta["server_match"]["agrees"] is True
+    assert event.meta["server_match"]["score"] > 0.99
+
+
+def test_search_limits_authorized_users_to_allowed_godowns():
+    index = FaceIndex(None)
+    index.upsert(AUTHORIZED_USERS, "STAFF_1", "STAFF_1", [0.0, 1.0, 0.0], "GDN_1")
+    index.upsert(AUTHORIZED_USERS, "STAFF_2", "STAFF_2", [0.0, 1.0, 0.1], "GDN_2")
+    index.upsert(WATCHLIST, "P_1", "E_1", [0.1, 1.0, 0.0])
+
+    matches = index.search([0.0, 1.0, 0.0], top_k=5, authorized_godowns={"GDN_1"})
+    assert sorted(m["person_id"] for m in matches) == ["P_1", "STAFF_1"]
+    assert index.search([0.0, 1.0, 0.0], kinds=[AUTHORIZED_USERS], authorized_godowns=set()) == []
+
+
+def test_authorized_users_follow_godown_versions_not_clock_stamps(tmp_path):
+    db = _make_session()
+    db.add_all([Godown(id="GDN_1", name="One"), Godown(id="GDN_2", name="Two")])
+    db.add(AuthorizedUser(person_id="STAFF_1", name="Staff", godown_id="GDN_1", embedding=[0.0, 1.0, 0.0]))
+    db.commit()
+    index = FaceIndex(tmp_path)
+    index.refresh(db)
+
+    # A row stamped before the last refresh (a late commit) is still indexed.
+    db.add(
+        AuthorizedUser(
+            person_id="STAFF_2",
+            name="Late",
+            godown_id="GDN_2",
+            embedding=[0.0, 0.9, 0.1],
+            updated_at=datetime(2000, 1, 1),
+        )
+    )
+    db.get(AuthorizedUser, "STAFF_1").is_active = False
+    db.commit()
+    assert index.refresh(db) is True
+    assert [m["person_id"] for m in index.search([0.0, 1.0, 0.0], kinds=[AUTHORIZED_USERS])] == ["STAFF_2"]
+
+    # Saves from separate processes each land in their own snapshot.
+    other = FaceIndex(tmp_path)
+    other.refresh(db)
+    other.save()
+    index.save()
+    assert len(list(tmp_path.glob("snapshot-*"))) == 2
+    reopened = FaceIndex(tmp_path)
+    assert reopened.load() is True
+    assert reopened.refresh(db) is False
+    assert [m["person_id"] for m in reopened.search([0.0, 1.0, 0.0], kinds=[AUTHORIZED_USERS])] == ["STAFF_2"]
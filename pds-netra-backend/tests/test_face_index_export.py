@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+from sqlalchemy import LargeBinary, create_engine, select, type_coerce
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.authorized_users import get_authorized_user_face_index
+from app.core.auth import UserContext
+from app.models import Base
+from app.models.authorized_user import AuthorizedUser
+from app.models.godown import Godown
+from app.models.types import pack_embedding, unpack_embedding
+from app.schemas.watchlist import WatchlistEmbeddingIn
+from app.services import watchlist as watchlist_service
+from app.services.face_index_export import FACE_INDEX_MEDIA_TYPE, decode_face_index
+
+
+def _make_session():
+    os.environ["ENABLE_WATCHLIST_MQTT_SYNC"] = "false"
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return SessionLocal()
+
+
+def test_packed_embedding_round_trip_and_storage():
+    vector = [0.5, -0.25, 1.0, 0.125]
+    assert unpack_embedding(pack_embedding(vector)).tolist() == vector
+    half = pack_embedding(vector, "float16")
+    assert len(half) == 8 + 2 * len(vector)
+    assert unpack_embedding(half).dtype == np.float16
+
+    db = _make_session()
+    db.add(AuthorizedUser(person_id="P1", name="One", embedding=vector))
+    db.commit()
+    db.expire_all()
+    assert db.get(AuthorizedUser, "P1").embedding == vector
+    raw = db.execute(select(type_coerce(AuthorizedUser.embedding, LargeBinary()))).scalar_one()
+    assert len(raw) == 8 + 4 * len(vector)
+
+
+def test_face_index_binary_export_maps_into_numpy():
+    db = _make_session()
+    db.add(Godown(id="GDN_1", name="Godown 1"))
+    db.add(AuthorizedUser(person_id="P1", name="One", godown_id="GDN_1", embedding=[1.0, 2.0, 3.0]))
+    db.add(AuthorizedUser(person_id="P2", name="Two", godown_id=None, embedding=[4.0, 5.0, 6.0]))
+    db.add(AuthorizedUser(person_id="P3", name="Three", godown_id="GDN_1", embedding=[0.5, 0.5]))
+    db.commit()
+
+    response = get_authorized_user_face_index(
+        godown_id="GDN_1",
+        export_format="binary",
+        dtype="float32",
+        db=db,
+        user=UserContext(role="STATE_ADMIN"),
+    )
+    assert response.media_type == FACE_INDEX_MEDIA_TYPE
+    manifest, matrices = decode_face_index(response.body)
+    assert [r["person_id"] for r in manifest["records"]] == ["P1", "P2", "P3"]
+    by_id = {r["person_id"]: r for r in manifest["records"]}
+    assert matrices[by_id["P2"]["section"]][by_id["P2"]["row"]].tolist() == [4.0, 5.0, 6.0]
+    assert matrices[by_id["P3"]["section"]].shape == (1, 2)
+
+    person = watchlist_service.create_person(db, name="Suspect", alias=None, reason=None, notes=None)
+    watchlist_service.add_embeddings(
+        db,
+        person=person,
+        embeddings=[WatchlistEmbeddingIn(embedding=[0.25] * 4, embedding_version="v1")],
+    )
+    payload = watchlist_service.build_sync_payload(db, page=1, page_size=50)
+    manifest, matrices = decode_face_index(watchlist_service.build_sync_export(db, payload, dtype="float16"))
+    assert manifest["persons"][0]["id"] == person.id
+    assert "embeddings" not in manifest["persons"][0]
+    assert matrices[0].dtype == np.float16
+    assert matrices[0].tolist() == [[0.25] * 4]
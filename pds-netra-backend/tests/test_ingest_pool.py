@@ -0,0 +1,83 @@
+import threading
+import time
+
+from app.services.ingest_pool import IngestMessage, IngestWorkerPool
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_pool_batches_and_preserves_per_key_order():
+    seen: dict[str, list[int]] = {}
+    batch_sizes: list[int] = []
+    lock = threading.Lock()
+
+    def _process(batch):
+        with lock:
+            batch_sizes.append(len(batch))
+            for msg in batch:
+                key, seq = msg.payload.decode().split(":")
+                seen.setdefault(key, []).append(int(seq))
+        return 0
+
+    pool = IngestWorkerPool(_process, workers=3, queue_size=300, batch_size=10, batch_wait_ms=20)
+    for seq in range(40):
+        for key in ("GDN_A", "GDN_B"):
+            pool.submit(IngestMessage(topic=f"pds/{key}/events", payload=f"{key}:{seq}".encode()), key=key)
+    pool.start()
+    assert _wait_for(lambda: pool.stats()["processed"] == 80)
+    pool.stop()
+
+    assert seen["GDN_A"] == list(range(40))
+    assert seen["GDN_B"] == list(range(40))
+    assert max(batch_sizes) <= 10
+    assert max(batch_sizes) > 1
+
+
+def test_pool_drops_when_shard_full_and_counts_failures():
+    pool = IngestWorkerPool(lambda batch: len(batch), workers=1, queue_size=2, enqueue_timeout_sec=0.01)
+    assert pool.submit(IngestMessage(topic="pds/G/events", payload=b"1"))
+    assert pool.submit(IngestMessage(topic="pds/G/events", payload=b"2"))
+    assert pool.submit(IngestMessage(topic="pds/G/events", payload=b"3")) is False
+    stats = pool.stats()
+    assert stats["dropped"] == 1
+    assert stats["queue_depth"] == 2
+
+    pool.start()
+    assert _wait_for(lambda: pool.stats()["failed"] == 2)
+    pool.stop()
+    assert pool.stats()["processed"] == 0
+
+
+def test_failed_batch_commit_is_retried_one_message_at_a_time(monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Base
+    from app.models.godown import Godown
+    from app.services import mqtt_consumer
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, future=True)
+    monkeypatch.setattr(mqtt_consumer, "SessionLocal", SessionLocal)
+
+    consumer = object.__new__(mqtt_consumer.MQTTConsumer)
+    consumer.logger = mqtt_consumer.logging.getLogger("test_ingest_pool")
+
+    def _ingest(db, topic, raw):
+        # A duplicate godown id only fails when the whole batch commits.
+        db.add(Godown(id=raw.decode(), name=raw.decode()))
+        return True
+
+    consumer._ingest_message = _ingest
+    batch = [IngestMessage(topic="pds/G/events", payload=p) for p in (b"G1", b"G2", b"G1")]
+    assert consumer._process_batch(batch) == 1
+    with SessionLocal() as db:
+        assert sorted(g.id for g in db.query(Godown).all()) == ["G1", "G2"]
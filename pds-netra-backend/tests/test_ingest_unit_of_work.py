@@ -0,0 +1,99 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, event as sa_event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import unit_of_work
+from app.models import Base
+from app.models.event import Alert, Event
+from app.models.notification_endpoint import NotificationEndpoint
+from app.models.notification_outbox import AlertNotificationRequest, NotificationOutbox
+from app.schemas.event import EventIn, MetaIn
+from app.services import event_ingest
+from app.services.event_ingest import handle_incoming_event
+from app.services.notification_outbox import fan_out_alert_notifications
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return SessionLocal()
+
+
+def _build_event(event_type: str = "FIRE_DETECTED", **meta) -> EventIn:
+    return EventIn(
+        godown_id="GDN_UOW",
+        camera_id="CAM_UOW",
+        event_id=str(uuid.uuid4()),
+        event_type=event_type,
+        severity="critical",
+        timestamp_utc=datetime.now(timezone.utc),
+        bbox=[10, 10, 80, 80],
+        image_url="http://localhost/snap.jpg",
+        meta=MetaIn(zone_id=None, rule_id=None, confidence=0.9, **meta),
+    )
+
+
+def _count_commits(db) -> list[int]:
+    commits = [0]
+
+    # Count real COMMITs on the connection; savepoint releases do not count.
+    @sa_event.listens_for(db.get_bind(), "commit")
+    def _on_commit(conn):
+        commits[0] += 1
+
+    return commits
+
+
+def test_fire_event_commits_once_and_defers_notification_fan_out():
+    db = _make_session()
+    db.add(NotificationEndpoint(scope="HQ", godown_id=None, channel="EMAIL", target="hq@example.com", is_enabled=True))
+    db.commit()
+    commits = _count_commits(db)
+
+    handle_incoming_event(_build_event(), db)
+
+    # Ingest commits once and only records the notification request.
+    assert commits[0] == 1
+    assert db.query(Alert).filter(Alert.alert_type == "FIRE_DETECTED").count() == 1
+    assert db.query(AlertNotificationRequest).filter(AlertNotificationRequest.status == "PENDING").count() == 1
+    assert db.query(NotificationOutbox).count() == 0
+
+    assert fan_out_alert_notifications(db) == 1
+    assert db.query(NotificationOutbox).count() == 1
+
+
+def test_failing_anpr_step_keeps_event(monkeypatch):
+    db = _make_session()
+
+    def _boom(*args, **kwargs):
+        raise RuntimeError("anpr down")
+
+    monkeypatch.setattr(event_ingest, "_upsert_anpr_event", _boom)
+    monkeypatch.setattr(event_ingest, "handle_anpr_hit_event", _boom)
+    handle_incoming_event(_build_event("ANPR_PLATE_DETECTED", plate_text="MH12AB1234"), db)
+    assert db.query(Event).filter(Event.event_type == "ANPR_PLATE_DETECTED").count() == 1
+
+
+def test_nested_failure_discards_only_its_savepoint():
+    db = _make_session()
+    with unit_of_work(db):
+        handle_incoming_event(_build_event(), db)
+        with pytest.raises(RuntimeError):
+            with unit_of_work(db):
+                db.add(Event(
+                    godown_id="GDN_UOW",
+                    camera_id="CAM_UOW",
+                    event_id_edge="doomed",
+                    event_type="LOW_LIGHT",
+                    severity_raw="info",
+                    timestamp_utc=datetime.now(timezone.utc),
+                    meta={},
+                ))
+                db.flush()
+                raise RuntimeError("boom")
+    assert db.query(Event).filter(Event.event_id_edge == "doomed").count() == 0
+    assert db.query(Event).filter(Event.event_type == "FIRE_DETECTED").count() == 1
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+from app.services.mqtt_publisher import MQTTPublisher
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class _Info:
+    def __init__(self, rc: int) -> None:
+        self.rc = rc
+
+
+class _FakeClient:
+    """Stands in for the broker connection; records what would be sent."""
+
+    def __init__(self, connect: bool = True) -> None:
+        self.sent: list[tuple[str, dict]] = []
+        self.connects = 0
+        self._connect = connect
+        self._lock = threading.Lock()
+        self.on_connect = None
+        self.on_disconnect = None
+
+    def connect_async(self, host, port, keepalive=60) -> None:
+        self.connects += 1
+
+    def loop_start(self) -> None:
+        if self._connect:
+            self.on_connect(self, None, {}, 0)
+
+    def loop_stop(self) -> None:
+        pass
+
+    def disconnect(self) -> None:
+        pass
+
+    def publish(self, topic, payload, qos=0):
+        with self._lock:
+            self.sent.append((topic, json.loads(payload)))
+        return _Info(mqtt.MQTT_ERR_SUCCESS)
+
+
+def test_publisher_reuses_one_client_and_coalesces_duplicates():
+    client = _FakeClient()
+    publisher = MQTTPublisher(client_factory=lambda: client, queue_size=10, debounce_ms=50)
+    publisher.start()
+    for seq in range(5):
+        publisher.publish("pds/config/zones", {"camera_id": "CAM_1", "seq": seq}, key="zones|GDN_1|CAM_1")
+    publisher.publish("pds/config/zones", {"camera_id": "CAM_2", "seq": 0}, key="zones|GDN_1|CAM_2")
+    assert _wait_for(lambda: publisher.stats()["published"] == 2)
+    publisher.stop()
+
+    assert client.connects == 1
+    assert sorted((p["camera_id"], p["seq"]) for _, p in client.sent) == [("CAM_1", 4), ("CAM_2", 0)]
+    stats = publisher.stats()
+    assert stats["coalesced"] == 4
+    assert stats["queue_depth"] == 0
+    assert stats["max_latency_ms"] >= 0.0
+
+
+def test_publisher_bounds_queue_while_disconnected_then_flushes():
+    client = _FakeClient(connect=False)
+    publisher = MQTTPublisher(client_factory=lambda: client, queue_size=3, debounce_ms=0, retry_delay_sec=0.05)
+    publisher.start()
+    accepted = [publisher.publish("pds/watchlist/sync", {"n": n}, key=f"sync|{n}") for n in range(5)]
+    assert accepted == [True, True, True, False, False]
+    time.sleep(0.1)
+    assert client.sent == []
+    assert publisher.stats()["queue_depth"] == 3
+
+    client.on_connect(client, None, {}, 0)
+    assert _wait_for(lambda: publisher.stats()["published"] == 3)
+    publisher.stop()
+    assert sorted(p["n"] for _, p in client.sent) == [0, 1, 2]
+    assert publisher.stats()["dropped"] == 2
+
+
+def test_publisher_client_ids_are_unique_per_instance():
+    first, second = MQTTPublisher(), MQTTPublisher()
+    assert first.client_id != second.client_id
+    assert first.client_id.startswith("pds-netra-publisher-")
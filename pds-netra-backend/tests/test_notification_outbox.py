@@ -1,18 +1,31 @@
 import datetime
 import os
+import threading
+import time
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.models import Base
 from app.models.event import Alert
 from app.models.notification_endpoint import NotificationEndpoint
-from app.models.notification_outbox import NotificationOutbox
-from app.services.notification_outbox import enqueue_alert_notifications, enqueue_report_notifications
+from app.models.notification_outbox import AlertNotificationRequest, NotificationOutbox
+from app.services import notification_outbox as notification_outbox_service
+from app.services.notification_outbox import (
+    bump_notification_targets,
+    enqueue_alert_notifications,
+    enqueue_report_notifications,
+    fan_out_alert_notifications,
+    notification_target_cache_stats,
+    request_alert_notifications,
+    resolve_notification_targets,
+    sync_notification_targets,
+)
 from app.services.alert_reports import generate_hq_report
 from app.services.notification_worker import (
     MetaWhatsAppError,
     NotificationProvider,
+    OutboxDispatcher,
     ProviderSet,
     WhatsAppMetaProvider,
     process_outbox_batch,
@@ -106,6 +119,105 @@ def test_enqueue_alert_notifications_combines_env_call_with_endpoints():
             os.environ["WATCHLIST_NOTIFY_GODOWN_CALLS"] = prev_value
 
 
+def test_target_resolution_is_cached_until_endpoints_change():
+    db = _make_session()
+    db.add(NotificationEndpoint(scope="HQ", channel="EMAIL", target="hq@example.com", is_enabled=True))
+    db.add(
+        NotificationEndpoint(
+            scope="GODOWN_MANAGER", godown_id="GDN_SAMPLE", channel="WHATSAPP", target="+910000000000", is_enabled=True
+        )
+    )
+    db.add(
+        NotificationEndpoint(
+            scope="GODOWN_MANAGER", godown_id="GDN_OTHER", channel="WHATSAPP", target="+919999999999", is_enabled=True
+        )
+    )
+    db.commit()
+    statements: list[str] = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cur, stmt, *args: statements.append(stmt))
+
+    sync_notification_targets(db)
+    alerts = [_create_alert(db) for _ in range(5)]
+    statements.clear()
+    hits_before = notification_target_cache_stats()["hits"]
+    assert sum(enqueue_alert_notifications(db, alert) for alert in alerts) == 10
+    endpoint_reads = [stmt for stmt in statements if "FROM notification_endpoints" in stmt]
+    outbox_reads = [stmt for stmt in statements if stmt.lstrip().startswith("SELECT") and "FROM notification_outbox" in stmt]
+    assert len(endpoint_reads) == 2  # one per scope, then served from the cache
+    assert len(outbox_reads) == 5  # one bulk duplicate lookup per alert
+    assert notification_target_cache_stats()["hits"] > hits_before
+
+    # A write that bumps the persisted version (as the notifications API does)
+    # is picked up on the next sync, whichever process made it.
+    db.add(NotificationEndpoint(scope="HQ", channel="CALL", target="+918888888888", is_enabled=True))
+    db.commit()
+    sync_notification_targets(db)
+    targets = resolve_notification_targets(db, godown_id="GDN_SAMPLE", scopes=("GODOWN_MANAGER", "HQ"))
+    assert ("CALL", "+918888888888") not in targets
+    bump_notification_targets(db)
+    db.commit()
+    sync_notification_targets(db)
+    targets = resolve_notification_targets(db, godown_id="GDN_SAMPLE", scopes=("GODOWN_MANAGER", "HQ"))
+    assert targets == [("WHATSAPP", "+910000000000"), ("EMAIL", "hq@example.com"), ("CALL", "+918888888888")]
+
+
+def test_fan_out_renders_once_and_is_idempotent(monkeypatch):
+    db = _make_session()
+    db.add(NotificationEndpoint(scope="HQ", channel="EMAIL", target="hq@example.com", is_enabled=True))
+    db.add(NotificationEndpoint(scope="HQ", channel="WHATSAPP", target="+910000000000", is_enabled=True))
+    db.commit()
+    alert = _create_alert(db)
+    renders: list[str] = []
+    build = notification_outbox_service.build_alert_notification
+
+    def _counting_build(session, alert, event=None):
+        renders.append(alert.public_id)
+        return build(session, alert, event)
+
+    monkeypatch.setattr(notification_outbox_service, "build_alert_notification", _counting_build)
+
+    request_alert_notifications(db, alert)
+    request_alert_notifications(db, alert)
+    db.commit()
+    assert db.query(NotificationOutbox).count() == 0
+
+    assert fan_out_alert_notifications(db) == 2
+    assert renders == [alert.public_id]
+    rows = db.query(NotificationOutbox).all()
+    assert sorted(row.channel for row in rows) == ["EMAIL", "WHATSAPP"]
+    assert all("Acknowledge" in row.message for row in rows)
+    assert db.query(AlertNotificationRequest).filter(AlertNotificationRequest.status == "DONE").count() == 2
+
+    request_alert_notifications(db, alert)
+    db.commit()
+    assert fan_out_alert_notifications(db) == 1
+    assert fan_out_alert_notifications(db) == 0
+    assert db.query(NotificationOutbox).count() == 2
+
+
+def test_fan_out_retries_failures_then_gives_up(monkeypatch):
+    db = _make_session()
+    db.add(NotificationEndpoint(scope="HQ", channel="EMAIL", target="hq@example.com", is_enabled=True))
+    db.commit()
+    alert = _create_alert(db)
+    request_alert_notifications(db, alert)
+    db.commit()
+
+    def _boom(*args, **kwargs):
+        raise RuntimeError("template broke")
+
+    monkeypatch.setattr(notification_outbox_service, "build_alert_notification", _boom)
+    assert fan_out_alert_notifications(db, max_attempts=2) == 1
+    request = db.query(AlertNotificationRequest).one()
+    assert (request.status, request.attempts, request.last_error) == ("PENDING", 1, "template broke")
+    assert alert.ack_token_hash is None  # savepoint rolled back the token
+    assert fan_out_alert_notifications(db, max_attempts=2) == 1
+    db.refresh(request)
+    assert (request.status, request.attempts) == ("FAILED", 2)
+    assert fan_out_alert_notifications(db, max_attempts=2) == 0
+    assert db.query(NotificationOutbox).count() == 0
+
+
 def test_worker_marks_sent_with_log_provider():
     db = _make_session()
     alert = _create_alert(db)
@@ -274,6 +386,263 @@ def test_worker_forces_template_after_131047_marker():
     assert row.provider_message_id == "wamid-template-retry"
 
 
+def _queue(db, alert, channel: str, target: str) -> None:
+    db.add(
+        NotificationOutbox(
+            kind="ALERT",
+            alert_id=alert.public_id,
+            channel=channel,
+            target=target,
+            subject="Test" if channel == "EMAIL" else None,
+            message="Fire detected",
+            status="PENDING",
+            attempts=0,
+        )
+    )
+    db.commit()
+
+
+def test_dispatcher_slow_email_does_not_block_whatsapp():
+    db = _make_session()
+    alert = _create_alert(db)
+    _queue(db, alert, "EMAIL", "slow@example.com")
+    _queue(db, alert, "WHATSAPP", "+910000000009")
+    release = threading.Event()
+
+    class SlowEmail(NotificationProvider):
+        def send_email(self, to: str, subject: str, html: str):
+            release.wait(5)
+            return None
+
+    class FastWhatsApp(NotificationProvider):
+        def send_whatsapp(self, to: str, message: str, media_url=None, force_template: bool = False):
+            return "wamid-fast"
+
+    dispatcher = OutboxDispatcher(
+        ProviderSet(whatsapp=FastWhatsApp(), email=SlowEmail(), call=NotificationProvider()),
+        batch_size=10,
+    )
+    try:
+        claimed, _ = dispatcher.poll(db)
+        assert claimed == 2
+        deadline = time.monotonic() + 5
+        processed = 0
+        while not processed and time.monotonic() < deadline:
+            time.sleep(0.01)
+            _, processed = dispatcher.poll(db)
+        assert processed == 1
+        assert dispatcher.inflight == 1
+        statuses = {row.channel: row.status for row in db.query(NotificationOutbox).all()}
+        assert statuses == {"WHATSAPP": "SENT", "EMAIL": "RETRYING"}
+        db.expire_all()
+        assert db.get(Alert, alert.id).last_whatsapp_at is not None
+    finally:
+        release.set()
+        dispatcher.shutdown(db)
+    db.expire_all()
+    assert {row.status for row in db.query(NotificationOutbox).all()} == {"SENT"}
+
+
+def test_dispatcher_email_backlog_beyond_batch_does_not_block_whatsapp():
+    db = _make_session()
+    alert = _create_alert(db)
+    for i in range(15):
+        _queue(db, alert, "EMAIL", f"slow{i}@example.com")
+    _queue(db, alert, "WHATSAPP", "+910000000019")
+    release = threading.Event()
+
+    class SlowEmail(NotificationProvider):
+        def send_email(self, to: str, subject: str, html: str):
+            release.wait(5)
+            return None
+
+    class FastWhatsApp(NotificationProvider):
+        def send_whatsapp(self, to: str, message: str, media_url=None, force_template: bool = False):
+            return "wamid-fast"
+
+    dispatcher = OutboxDispatcher(
+        ProviderSet(whatsapp=FastWhatsApp(), email=SlowEmail(), call=NotificationProvider()),
+        batch_size=10,
+    )
+    try:
+        claimed, _ = dispatcher.poll(db)
+        assert claimed == 11  # a full email batch plus the WhatsApp row
+        deadline = time.monotonic() + 5
+        processed = 0
+        while not processed and time.monotonic() < deadline:
+            time.sleep(0.01)
+            _, processed = dispatcher.poll(db)
+        assert processed == 1
+        db.expire_all()
+        rows = db.query(NotificationOutbox).all()
+        assert [row.status for row in rows if row.channel == "WHATSAPP"] == ["SENT"]
+        assert sorted(row.status for row in rows if row.channel == "EMAIL") == ["PENDING"] * 5 + ["RETRYING"] * 10
+    finally:
+        release.set()
+        dispatcher.shutdown(db)
+
+
+def test_dispatcher_records_each_alerts_own_send_time():
+    db = _make_session()
+    first, second, third = _create_alert(db), _create_alert(db), _create_alert(db)
+    _queue(db, first, "WHATSAPP", "+910000000031")
+    _queue(db, second, "WHATSAPP", "+910000000032")
+    _queue(db, third, "WHATSAPP", "+910000000033")
+    newer = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+    third.last_whatsapp_at = newer
+    db.commit()
+
+    class StaggeredWhatsApp(NotificationProvider):
+        def send_whatsapp(self, to: str, message: str, media_url=None, force_template: bool = False):
+            if to.endswith("32"):
+                time.sleep(0.2)
+            return f"wamid-{to}"
+
+    provider = StaggeredWhatsApp()
+    assert process_outbox_batch(db, providers=ProviderSet(whatsapp=provider, email=provider, call=provider)) == 3
+    db.expire_all()
+    sent_at = {row.alert_id: row.sent_at.replace(tzinfo=None) for row in db.query(NotificationOutbox).all()}
+    last = {alert.public_id: alert.last_whatsapp_at.replace(tzinfo=None) for alert in db.query(Alert).all()}
+    assert sent_at[second.public_id] > sent_at[first.public_id]
+    assert last[first.public_id] == sent_at[first.public_id]
+    assert last[second.public_id] == sent_at[second.public_id]
+    assert last[third.public_id] == newer.replace(tzinfo=None)  # never moved backwards
+
+def test_dispatcher_respects_provider_concurrency():
+    db = _make_session()
+    alert = _create_alert(db)
+    for i in range(6):
+        _queue(db, alert, "WHATSAPP", f"+91000000010{i}")
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    class LimitedWhatsApp(NotificationProvider):
+        max_concurrency = 2
+
+        def send_whatsapp(self, to: str, message: str, media_url=None, force_template: bool = False):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            return f"wamid-{to}"
+
+    provider = LimitedWhatsApp()
+    dispatcher = OutboxDispatcher(
+        ProviderSet(whatsapp=provider, email=provider, call=provider),
+        batch_size=10,
+        channel_limits={"WHATSAPP": 6},
+    )
+    try:
+        claimed, processed = dispatcher.poll(db, wait=True)
+    finally:
+        dispatcher.shutdown()
+    assert (claimed, processed) == (6, 6)
+    assert active["peak"] == 2
+    assert {row.status for row in db.query(NotificationOutbox).all()} == {"SENT"}
+
+
+class _BlockingWhatsApp(NotificationProvider):
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.sent: list[str] = []
+
+    def send_whatsapp(self, to: str, message: str, media_url=None, force_template: bool = False):
+        self.release.wait(5)
+        self.sent.append(to)
+        return f"wamid-{to}"
+
+
+def _dispatcher(provider, worker_id: str, batch_size: int = 10, **kwargs) -> OutboxDispatcher:
+    return OutboxDispatcher(
+        ProviderSet(whatsapp=provider, email=provider, call=provider),
+        batch_size=batch_size,
+        worker_id=worker_id,
+        **kwargs,
+    )
+
+
+def test_workers_claim_disjoint_leases():
+    db = _make_session()
+    alert = _create_alert(db)
+    for i in range(6):
+        _queue(db, alert, "WHATSAPP", f"+91000000020{i}")
+    first, second = _BlockingWhatsApp(), _BlockingWhatsApp()
+    worker_a = _dispatcher(first, "worker-a", batch_size=4)
+    worker_b = _dispatcher(second, "worker-b")
+    try:
+        assert worker_a.poll(db) == (4, 0)
+        assert worker_b.poll(db) == (2, 0)
+        assert worker_a.poll(db)[0] == 0
+        db.expire_all()
+        owners = [row.claimed_by for row in db.query(NotificationOutbox).all()]
+        assert sorted(owners) == ["worker-a"] * 4 + ["worker-b"] * 2
+    finally:
+        first.release.set()
+        second.release.set()
+        worker_a.shutdown(db)
+        worker_b.shutdown(db)
+    assert len(first.sent) + len(second.sent) == 6
+    db.expire_all()
+    rows = db.query(NotificationOutbox).all()
+    assert {(row.status, row.claimed_by, row.attempts) for row in rows} == {("SENT", None, 1)}
+
+
+def test_expired_lease_is_reclaimed_and_live_lease_is_not():
+    db = _make_session()
+    alert = _create_alert(db)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    _queue(db, alert, "WHATSAPP", "+910000000301")
+    _queue(db, alert, "WHATSAPP", "+910000000302")
+    stale, live = db.query(NotificationOutbox).order_by(NotificationOutbox.target).all()
+    for row, lease in ((stale, now - datetime.timedelta(seconds=5)), (live, now + datetime.timedelta(minutes=5))):
+        row.status = "RETRYING"
+        row.attempts = 1
+        row.claimed_by = "crashed-worker"
+        row.lease_expires_at = lease
+    db.commit()
+
+    provider = _BlockingWhatsApp()
+    provider.release.set()
+    dispatcher = _dispatcher(provider, "worker-c")
+    try:
+        assert dispatcher.poll(db, wait=True) == (1, 1)
+    finally:
+        dispatcher.shutdown()
+    assert provider.sent == ["+910000000301"]
+    db.expire_all()
+    assert (db.get(NotificationOutbox, stale.id).status, db.get(NotificationOutbox, stale.id).attempts) == ("SENT", 2)
+    assert db.get(NotificationOutbox, live.id).claimed_by == "crashed-worker"
+
+
+def test_leases_renew_while_sending_and_lost_leases_are_not_overwritten():
+    db = _make_session()
+    alert = _create_alert(db)
+    _queue(db, alert, "WHATSAPP", "+910000000401")
+    provider = _BlockingWhatsApp()
+    dispatcher = _dispatcher(provider, "worker-d", lease_sec=30)
+    try:
+        dispatcher.poll(db)
+        row = db.query(NotificationOutbox).one()
+        first_lease = row.lease_expires_at
+        dispatcher._renewed_at -= datetime.timedelta(seconds=20)
+        time.sleep(0.01)
+        dispatcher.poll(db)
+        db.expire_all()
+        assert db.query(NotificationOutbox).one().lease_expires_at > first_lease
+
+        # Another worker took the row over after our lease lapsed.
+        db.query(NotificationOutbox).update({"claimed_by": "worker-e"})
+        db.commit()
+    finally:
+        provider.release.set()
+        dispatcher.shutdown(db)
+    db.expire_all()
+    row = db.query(NotificationOutbox).one()
+    assert (row.status, row.claimed_by, row.sent_at) == ("RETRYING", "worker-e", None)
+
+
 def test_hq_report_enqueues_to_hq_only():
     db = _make_session()
     endpoint_hq = NotificationEndpoint(
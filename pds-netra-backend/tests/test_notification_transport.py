@@ -0,0 +1,140 @@
+import json
+import smtplib
+import threading
+from email.message import EmailMessage
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services import notification_transport as transport
+
+
+class FakeSMTP:
+    instances: list["FakeSMTP"] = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent: list[str] = []
+        self.noop_code = 250
+        self.drop_next_send = False
+        self.logged_in = False
+        FakeSMTP.instances.append(self)
+
+    def ehlo(self):
+        return 250, b"ok"
+
+    def starttls(self):
+        return 220, b"ready"
+
+    def login(self, user, password):
+        self.logged_in = True
+
+    def noop(self):
+        return self.noop_code, b"ok"
+
+    def send_message(self, msg):
+        if self.drop_next_send:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append(msg["To"])
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _message(to: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["To"] = to
+    msg["From"] = "netra@example.com"
+    msg["Subject"] = "Alert"
+    msg.set_content("body")
+    return msg
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances = []
+    monkeypatch.setattr(transport.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(transport, "_smtp_pools", {})
+    return FakeSMTP
+
+
+def test_smtp_pool_reuses_one_connection(fake_smtp):
+    config = transport.SmtpConfig(host="smtp.example.com", port=587, user="u", password="p")
+    pool = transport.smtp_pool(config)
+    for i in range(3):
+        pool.send(_message(f"user{i}@example.com"))
+
+    assert len(fake_smtp.instances) == 1
+    assert fake_smtp.instances[0].logged_in
+    assert fake_smtp.instances[0].sent == ["user0@example.com", "user1@example.com", "user2@example.com"]
+    stats = transport.transport_stats()["smtp"]["smtp.example.com:587"]
+    assert (stats["connects"], stats["reused"], stats["sends"]) == (1, 2, 3)
+
+
+def test_smtp_pool_reconnects_after_failed_noop_or_drop(fake_smtp, monkeypatch):
+    monkeypatch.setenv("SMTP_NOOP_AFTER_SEC", "0")
+    pool = transport.smtp_pool(transport.SmtpConfig(host="smtp.example.com", port=25, starttls=False))
+    pool.send(_message("a@example.com"))
+
+    fake_smtp.instances[0].noop_code = 421
+    pool.send(_message("b@example.com"))
+    assert len(fake_smtp.instances) == 2
+    assert fake_smtp.instances[1].sent == ["b@example.com"]
+
+    fake_smtp.instances[1].drop_next_send = True
+    pool.send(_message("c@example.com"))
+    assert len(fake_smtp.instances) == 3
+    assert fake_smtp.instances[2].sent == ["c@example.com"]
+    stats = pool.snapshot()
+    assert stats["reconnects"] == 2
+    assert stats["sends"] == 3
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received: list[dict] = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        status = 404 if self.path == "/missing" else 200
+        if status == 200:
+            _Handler.received.append(json.loads(body))
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server(monkeypatch):
+    monkeypatch.setattr(transport, "_http_session", None)
+    _Handler.received = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_session_keeps_connections_alive(http_server):
+    for i in range(3):
+        transport.post_json(f"{http_server}/hook", {"n": i}, timeout=3)
+
+    stats = transport.transport_stats()["http"]
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["reused"] == 2
+
+
+def test_webhook_fan_out_reports_each_url(http_server):
+    urls = [f"{http_server}/a", f"{http_server}/missing", f"{http_server}/b"]
+    outcome = transport.post_json_all(urls, {"alert": "FIRE_DETECTED"}, timeout=3)
+
+    assert outcome[urls[0]] is None and outcome[urls[2]] is None
+    assert "404" in outcome[urls[1]]
+    assert _Handler.received == [{"alert": "FIRE_DETECTED"}] * 2
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.overview import overview
+from app.core.auth import UserContext
+from app.models import Base
+from app.models.event import Alert, Event
+from app.models.godown import Camera, Godown
+from app.services.alert_stats import register_alert_stats_listener
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    register_alert_stats_listener(SessionLocal)
+    return SessionLocal()
+
+
+def _alert(godown_id, alert_type, severity, start_time, status="OPEN"):
+    return Alert(
+        godown_id=godown_id,
+        alert_type=alert_type,
+        severity_final=severity,
+        start_time=start_time,
+        status=status,
+    )
+
+
+def test_overview_reads_rollup_in_constant_queries():
+    db = _make_session()
+    now = datetime.utcnow()
+    for idx in range(5):
+        gid = f"GDN_{idx}"
+        db.add(Godown(id=gid, name=gid))
+        db.add(Camera(id="CAM_1", godown_id=gid))
+        db.add(Camera(id="CAM_2", godown_id=gid))
+    db.add(_alert("GDN_0", "FIRE_DETECTED", "critical", now - timedelta(hours=1)))
+    db.add(_alert("GDN_0", "ANIMAL_INTRUSION", "warning", now - timedelta(days=2)))
+    db.add(_alert("GDN_1", "AFTER_HOURS_PERSON_PRESENCE", "warning", now - timedelta(hours=2), status="CLOSED"))
+    db.add(_alert("GDN_1", "AFTER_HOURS_PERSON_PRESENCE", "warning", now - timedelta(days=3), status="CLOSED"))
+    db.add(_alert("GDN_2", "FIRE_DETECTED", "critical", now - timedelta(days=30), status="CLOSED"))
+    db.add(
+        Event(
+            godown_id="GDN_0",
+            camera_id="CAM_1",
+            event_id_edge="e1",
+            event_type="FIRE_DETECTED",
+            severity_raw="critical",
+            timestamp_utc=now,
+            meta={},
+        )
+    )
+    db.commit()
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    result = overview(page=1, page_size=50, db=db, user=UserContext(role="STATE_ADMIN"))
+
+    assert len(statements) <= 8
+    stats = result["stats"]
+    assert stats["godowns_monitored"] == 5
+    assert stats["open_alerts_critical"] == 1
+    assert stats["open_alerts_warning"] == 1
+    assert stats["alerts_by_type"] == {"FIRE_DETECTED": 1, "ANIMAL_INTRUSION": 1}
+    assert stats["fire_alerts_24h"] == 1 and stats["fire_alerts_7d"] == 1
+    assert stats["animal_intrusions_24h"] == 0 and stats["animal_intrusions_7d"] == 1
+    assert stats["after_hours_person_24h"] == 1 and stats["after_hours_person_7d"] == 2
+    assert sum(point["count"] for point in stats["alerts_over_time"]) == 4
+
+    cards = {card["godown_id"]: card for card in result["godowns"]}
+    assert cards["GDN_0"]["cameras_total"] == 2
+    assert cards["GDN_0"]["open_alerts_critical"] == 1
+    assert cards["GDN_0"]["status"] == "CRITICAL"
+    assert cards["GDN_0"]["last_event_time_utc"] is not None
+    assert cards["GDN_3"]["status"] == "OK"
+    assert cards["GDN_3"]["last_event_time_utc"] is None
@@ -50,3 +50,20 @@ def test_negative_page_rejected():
         assert resp.status_code == 422
         resp = client.get("/api/v1/godowns?page_size=0")
         assert resp.status_code == 422
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    from datetime import datetime, timezone
+
+    from app.core.pagination import decode_cursor, encode_cursor
+
+    ts = datetime(2026, 3, 1, 10, 15, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor((ts, 42)), 2) == [ts, 42]
+    with _client() as client:
+        resp = client.get("/api/v1/events", params={"cursor": "not-a-cursor"})
+        assert resp.status_code == 400
+        resp = client.get("/api/v1/events", params={"cursor": ""})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["total"] is None
+        assert "next_cursor" in body
@@ -0,0 +1,32 @@
+from app.services.snapshot_index import SnapshotIndex
+
+
+def test_snapshot_index_caches_hits_and_records_uploads(tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_INDEX_NEGATIVE_TTL_SEC", "300")
+    index = SnapshotIndex()
+    snap = tmp_path / "snapshots" / "GDN_1" / "CAM_1" / "2026-03-01" / "e1.jpg"
+
+    assert index.exists(snap) is False
+    snap.parent.mkdir(parents=True)
+    snap.write_bytes(b"jpg")
+    # Negative result is still cached until the upload path records the file.
+    assert index.exists(snap) is False
+    index.record(snap)
+    assert index.exists(snap) is True
+
+    snap.unlink()
+    assert index.exists(snap) is True
+    index.invalidate("GDN_1")
+    assert index.exists(snap) is False
+
+    stats = index.stats()
+    assert stats["hits"] == 3 and stats["misses"] == 2
+    assert stats["recorded"] == 1
+
+
+def test_snapshot_index_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_INDEX_MAX_ENTRIES", "2")
+    index = SnapshotIndex()
+    for name in ("a", "b", "c"):
+        index.exists(tmp_path / name)
+    assert index.stats()["entries"] == 2
@@ -1,20 +1,25 @@
 from datetime import datetime
 import os
 
+from fastapi import Response
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.api.v1.watchlist import sync_watchlist
 from app.models import Base
 from app.models.event import Alert
 from app.schemas.watchlist import FaceMatchCandidate, FaceMatchEvidence, FaceMatchEventIn, FaceMatchPayload, WatchlistEmbeddingIn
 from app.services import watchlist as watchlist_service
+from app.services.config_version import register_config_version_listener
 
 
-def _make_session():
+def _make_session(versioned: bool = False):
     os.environ["ENABLE_WATCHLIST_MQTT_SYNC"] = "false"
     engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
     Base.metadata.create_all(engine)
     SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    if versioned:
+        register_config_version_listener(SessionLocal)
     return SessionLocal()
 
 
@@ -69,3 +74,52 @@ def test_face_match_idempotency_and_alert():
     alerts = db.query(Alert).filter(Alert.alert_type == "BLACKLIST_PERSON_MATCH").all()
     assert len(alerts) == 1
     assert alerts[0].status == "OPEN"
+
+
+def test_watchlist_sync_pages_deltas_and_etags():
+    db = _make_session(versioned=True)
+    keep = watchlist_service.create_person(db, name="Keep", alias=None, reason=None, notes=None)
+    gone = watchlist_service.create_person(db, name="Gone", alias=None, reason=None, notes=None)
+    quiet = watchlist_service.create_person(db, name="Quiet", alias=None, reason=None, notes=None)
+
+    full = watchlist_service.build_sync_payload(db, page=1, page_size=2)
+    assert full["total"] == 3
+    assert len(full["items"]) == 2
+    version = full["version"]
+    assert version == 3
+
+    watchlist_service.add_embeddings(
+        db,
+        person=keep,
+        embeddings=[WatchlistEmbeddingIn(embedding=[0.25] * 4, embedding_version="v1")],
+    )
+    watchlist_service.delete_person(db, gone)
+    watchlist_service.deactivate_person(db, quiet)
+
+    delta = watchlist_service.build_sync_delta(db, since=version)
+    assert delta["mode"] == "delta"
+    assert delta["version"] == 6
+    assert [item["id"] for item in delta["upserts"]] == [keep.id]
+    assert delta["upserts"][0]["embeddings"][0]["embedding"] == [0.25] * 4
+    assert sorted(delta["deleted"]) == sorted([gone.id, quiet.id])
+    assert watchlist_service.build_sync_delta(db, since=6)["upserts"] == []
+    assert watchlist_service.build_sync_delta(db, since=99) is None
+
+    first = watchlist_service.build_sync_delta(db, since=0, page_size=1)
+    assert [item["id"] for item in first["upserts"]] == [keep.id]
+    assert first["deleted"] == [] and first["next_cursor"]
+    last = watchlist_service.build_sync_delta(db, since=0, page_size=1, cursor=first["next_cursor"])
+    assert last["upserts"] == []
+    assert last["deleted"] == [quiet.id, gone.id]
+    assert last["next_cursor"] is None
+
+    response = Response()
+    body = sync_watchlist(
+        response, page=1, page_size=50, since=None, export_format="json", dtype="float32", if_none_match=None, db=db
+    )
+    etag = response.headers["etag"]
+    assert [item["id"] for item in body["items"]] == [keep.id]
+    cached = sync_watchlist(
+        Response(), page=1, page_size=50, since=None, export_format="json", dtype="float32", if_none_match=etag, db=db
+    )
+    assert cached.status_code == 304
@@ -0,0 +1,72 @@
+import json
+import random
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.godown import Camera, Godown
+from app.services.zone_geometry import ZoneGeometryCache, classify_bboxes, infer_zone_id, parse_zones_json
+
+
+ZONES = [
+    {"id": "gate", "polygon": [[0, 0], [100, 0], [100, 100], [0, 100]]},
+    {"id": "yard", "polygon": [[200, 200], [400, 200], [300, 400]]},
+    {"id": "broken", "polygon": "nope"},
+]
+
+
+def _make_session():
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return SessionLocal()
+
+
+def test_parse_zones_json_skips_malformed_and_infers_first_match():
+    geometry = parse_zones_json(json.dumps(ZONES))
+    assert [z.zone_id for z in geometry.zones] == ["gate", "yard"]
+    assert geometry.zones[1].min_x == 200 and geometry.zones[1].max_y == 400
+    assert geometry.infer_zone_id([10, 10, 20, 20]) == "gate"
+    assert geometry.infer_zone_id([350, 350, 360, 360]) == "yard"
+    assert geometry.infer_zone_id([150, 150, 160, 160]) is None
+    assert geometry.infer_zone_id([1, 2, 3]) is None
+    assert parse_zones_json("not json").zones == ()
+
+
+def test_cache_hits_without_db_and_invalidates():
+    db = _make_session()
+    db.add(Godown(id="GDN_1"))
+    db.add(Camera(id="CAM_1", godown_id="GDN_1", zones_json=json.dumps(ZONES)))
+    db.commit()
+
+    cache = ZoneGeometryCache()
+    assert cache.get(db, "GDN_1", "CAM_1").infer_zone_id([10, 10, 20, 20]) == "gate"
+
+    camera = db.get(Camera, ("CAM_1", "GDN_1"))
+    camera.zones_json = json.dumps([ZONES[1]])
+    db.commit()
+    # Still served from cache until invalidated.
+    assert cache.get(db, "GDN_1", "CAM_1").infer_zone_id([10, 10, 20, 20]) == "gate"
+    assert cache.stats()["hits"] == 1
+
+    cache.invalidate("GDN_1")
+    assert cache.get(db, "GDN_1", "CAM_1").infer_zone_id([10, 10, 20, 20]) is None
+
+    # A loaded row with different zones_json is re-parsed instead of served stale.
+    camera.zones_json = json.dumps(ZONES)
+    assert cache.for_camera(camera).infer_zone_id([10, 10, 20, 20]) == "gate"
+
+
+def test_classify_bboxes_matches_scalar_first_match():
+    geometry = parse_zones_json(json.dumps(ZONES + [{"id": "overlap", "polygon": [[50, 50], [250, 50], [250, 250]]}]))
+    rng = random.Random(7)
+    bboxes = []
+    for _ in range(500):
+        x1, y1 = rng.uniform(-50, 450), rng.uniform(-50, 450)
+        bboxes.append([x1, y1, x1 + rng.uniform(0, 80), y1 + rng.uniform(0, 80)])
+    bboxes += [None, [], [1, 2, 3], ["a", 0, 1, 1]]
+    expected = [infer_zone_id(b, geometry.zones) if b and len(b) == 4 and not isinstance(b[0], str) else None for b in bboxes]
+    assert geometry.classify(bboxes) == expected
+    assert classify_bboxes([], geometry.zones) == []
+    assert classify_bboxes([[0, 0, 1, 1]], ()) == [None]